@@ -15,6 +15,11 @@ if [[ "$CREATE_SUPERUSER" = "True" ]]; then
     python /app/manage.py createsuperuser --noinput || true
 fi
 
+if [[ "$REDIS_URL" && "$CACHE_WARMUP_ENABLED" != "False" ]]; then
+    echo "Warming up the cache in the background..."
+    python /app/manage.py warmcache &
+fi
+
 if [[ "$DEV_SERVER" = "True" ]]; then
     python /app/manage.py runserver 0.0.0.0:8000
 else
@@ -33,8 +33,8 @@ class ExcelFormView(View):
         )
         buildHierarchies(
             wb=wb,
-            rows=list(wb.worksheets[2].rows),
-        )
+            rows=wb.worksheets[2].rows,
+        ).apply()
         messages.success(request, "Successfully populated Class/location Excel data")
 
     def get(self, request, *args, **kwargs):
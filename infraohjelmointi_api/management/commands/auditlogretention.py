@@ -0,0 +1,88 @@
+import gzip
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from ...models import AuditLog
+from ...serializers import AuditLogSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes audit log entries older than the retention period in batches, oldest first. "
+        + "With --archive the deleted entries are first written to a gzipped NDJSON file."
+        + "\nUsage: python manage.py auditlogretention [--months 24] [--archive audit-log-archive.ndjson.gz] "
+        + "[--batch-size 5000] [--dry-run]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=24,
+            help="Entries created more than this many months (of 30 days) ago are removed. Usage: --months 24",
+        )
+        parser.add_argument(
+            "--archive",
+            type=str,
+            default=None,
+            help="Gzipped NDJSON file the removed entries are appended to. Usage: --archive archive.ndjson.gz",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Entries archived and deleted per transaction. Usage: --batch-size 5000",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the entries that would be removed. Usage: --dry-run",
+        )
+
+    def handle(self, *args, **options):
+        if options["months"] < 1:
+            raise CommandError("--months must be at least 1")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        cutoff = timezone.now() - timedelta(days=30 * options["months"])
+        expired = AuditLog.objects.filter(createdDate__lt=cutoff)
+        if options["dry_run"]:
+            self.stdout.write(
+                "{} audit log entries created before {} would be removed".format(
+                    expired.count(), cutoff.date().isoformat()
+                )
+            )
+            return
+
+        archive = gzip.open(options["archive"], "at", encoding="utf-8") if options["archive"] else None
+        removed = 0
+        try:
+            while True:
+                with transaction.atomic():
+                    # oldest first, the (createdDate, id) index serves the batches
+                    batch = list(
+                        expired.select_related("actor", "project", "project_group", "project_class")
+                        .order_by("createdDate", "id")[: options["batch_size"]]
+                    )
+                    if not batch:
+                        break
+                    if archive is not None:
+                        for data in AuditLogSerializer(batch, many=True).data:
+                            archive.write(json.dumps(data, default=str) + "\n")
+                        archive.flush()
+                    AuditLog.objects.filter(id__in=[entry.id for entry in batch]).delete()
+                removed += len(batch)
+        finally:
+            if archive is not None:
+                archive.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Removed {} audit log entries created before {}".format(removed, cutoff.date().isoformat())
+            )
+        )
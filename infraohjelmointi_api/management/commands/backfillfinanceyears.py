@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ...models import Project
+from ...services import ProjectFinancialService
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalculates the first and last years with a nonzero planning and frame finance value "
+        + "of every project, used by the programming year filter. The years are kept up to date "
+        + "when finances are saved, run this after finances have been written around the ORM."
+        + "\nUsage: python manage.py backfillfinanceyears [--batch-size 1000]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Projects updated per transaction. Usage: --batch-size 1000",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        project_ids = list(Project.objects.order_by("id").values_list("id", flat=True))
+        updated = 0
+        for start in range(0, len(project_ids), batch_size):
+            with transaction.atomic():
+                updated += ProjectFinancialService.update_finance_years(
+                    project_ids=project_ids[start : start + batch_size]
+                )
+
+        self.stdout.write(self.style.SUCCESS("Finance years updated for {} projects".format(updated)))
@@ -0,0 +1,98 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from infraohjelmointi_api.renderers import fast_json_dumps
+from infraohjelmointi_api.services.CompressionService import CompressionService
+
+from .benchmarkjsonrenderer import Command as JSONRendererBenchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the bytes sent and the CPU time per request of the response encodings on a synthetic "
+        + "project list payload, sent whole and streamed in chunks as the streamed lists are. "
+        + "\nUsage: python manage.py benchmarkcompression [--projects 5000] [--rounds 5] [--chunk-size 500]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--projects",
+            type=int,
+            default=5000,
+            help="Amount of synthetic projects in the payload. Usage: --projects 5000",
+        )
+        parser.add_argument(
+            "--rounds",
+            type=int,
+            default=5,
+            help="How many times each encoding compresses the payload. Usage: --rounds 5",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Projects per chunk of the streamed payload. Usage: --chunk-size 500",
+        )
+
+    def handle(self, *args, **options):
+        if options["projects"] < 1 or options["chunk_size"] < 1:
+            raise CommandError("--projects and --chunk-size must be at least 1")
+        if CompressionService.BROTLI not in CompressionService.available_encodings():
+            self.stdout.write(self.style.WARNING("brotli is not installed, only gzip is compared."))
+
+        payload = JSONRendererBenchmark.build_payload(options["projects"])
+        body = fast_json_dumps(payload)
+        chunks = self.build_chunks(payload["results"], options["chunk_size"])
+        self.rounds = max(options["rounds"], 1)
+
+        self.stdout.write(
+            "Payload: {} projects, {} bytes, {} streamed chunks, best of {} rounds".format(
+                options["projects"], len(body), len(chunks), self.rounds
+            )
+        )
+        for encoding in CompressionService.available_encodings():
+            size, cpu = self.measure(lambda: [CompressionService.compress(body, encoding)])
+            self.write_result(encoding, size, len(body), cpu)
+
+            size, cpu = self.measure(lambda: list(CompressionService.compress_stream(iter(chunks), encoding)))
+            self.write_result(
+                "{} streamed, {} KiB flushes".format(encoding, CompressionService.flush_size() // 1024),
+                size,
+                len(body),
+                cpu,
+            )
+
+            # a flush per chunk, as without the flush buffer
+            with override_settings(COMPRESSION_STREAM_FLUSH_SIZE=1):
+                size, cpu = self.measure(
+                    lambda: list(CompressionService.compress_stream(iter(chunks), encoding))
+                )
+            self.write_result("{} streamed, flush per chunk".format(encoding), size, len(body), cpu)
+
+    @staticmethod
+    def build_chunks(projects, chunk_size) -> list:
+        """Splits the payload into chunks like generate_streaming_response yields them"""
+        chunks = [b'{"count":%d,"next":null,"previous":null,"results":' % len(projects), b"["]
+        for start in range(0, len(projects), chunk_size):
+            chunk = b",".join(fast_json_dumps(project) for project in projects[start : start + chunk_size])
+            chunks.append((b"," if start else b"") + chunk)
+        chunks += [b"]", b"}"]
+        return chunks
+
+    def measure(self, compress) -> tuple:
+        """Returns the compressed size and the least CPU time of the rounds"""
+        timings = []
+        for _ in range(self.rounds):
+            start = time.process_time()
+            compressed = compress()
+            timings.append(time.process_time() - start)
+        return sum(len(part) for part in compressed), min(timings)
+
+    def write_result(self, name, size, original_size, cpu):
+        self.stdout.write(
+            "{:<36} {:>10} bytes ({:>5.1%}), {:>7.1f} ms CPU per request".format(
+                name, size, size / original_size, cpu * 1000
+            )
+        )
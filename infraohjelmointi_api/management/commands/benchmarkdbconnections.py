@@ -0,0 +1,100 @@
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulates concurrent requests against the database and reports how many connections "
+        + "they opened. Every simulated request runs a query and ends like a real one does, with "
+        + "close_old_connections, so the numbers follow CONN_MAX_AGE and the connection pool. "
+        + "PostgreSQL only."
+        + "\nUsage: python manage.py benchmarkdbconnections [--threads 8] [--requests 50]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="Requests handled at the same time. Usage: --threads 8",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=50,
+            help="Requests handled by each thread. Usage: --requests 50",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("benchmarkdbconnections needs PostgreSQL, not {}.".format(connection.vendor))
+        if options["threads"] < 1 or options["requests"] < 1:
+            raise CommandError("--threads and --requests must be at least 1")
+
+        pool = getattr(connection, "pool", None)
+        pool_before = pool.stats() if pool is not None else None
+        backend_pids = set()
+        durations = []
+        lock = threading.Lock()
+
+        def simulate_requests():
+            try:
+                for _ in range(options["requests"]):
+                    start = time.perf_counter()
+                    close_old_connections()
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT pg_backend_pid()")
+                        pid = cursor.fetchone()[0]
+                    close_old_connections()
+                    with lock:
+                        backend_pids.add(pid)
+                        durations.append(time.perf_counter() - start)
+            finally:
+                connections.close_all()
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=simulate_requests) for _ in range(options["threads"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        durations.sort()
+        self.stdout.write(
+            "{} requests on {} threads in {:.2f} s, {:.2f} ms per request (p95 {:.2f} ms)".format(
+                len(durations),
+                options["threads"],
+                elapsed,
+                statistics.mean(durations) * 1000,
+                durations[min(len(durations) - 1, int(len(durations) * 0.95))] * 1000,
+            )
+        )
+        self.stdout.write(
+            "{} database connections used, CONN_MAX_AGE {}".format(
+                len(backend_pids), connection.settings_dict["CONN_MAX_AGE"]
+            )
+        )
+        if pool is None:
+            self.stdout.write(self.style.WARNING("Connection pool not in use, see DB_POOL_ENABLED"))
+            return
+
+        pool_after = pool.stats()
+        opened = pool_after["opened"] - pool_before["opened"]
+        reused = pool_after["reused"] - pool_before["reused"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Pool of {}: {} connections opened, {} reused ({:.0%}), {:.2f} s waited, {} timeouts".format(
+                    pool.max_size,
+                    opened,
+                    reused,
+                    reused / max(1, opened + reused),
+                    pool_after["wait_seconds"] - pool_before["wait_seconds"],
+                    pool_after["timeouts"] - pool_before["timeouts"],
+                )
+            )
+        )
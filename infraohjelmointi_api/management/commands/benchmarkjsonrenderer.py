@@ -0,0 +1,127 @@
+import datetime
+import random
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from infraohjelmointi_api.renderers import FastJSONRenderer, orjson
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the encode time of DRF's JSONRenderer and FastJSONRenderer on a synthetic project list payload. "
+        + "\nUsage: python manage.py benchmarkjsonrenderer [--projects 5000] [--rounds 5]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--projects",
+            type=int,
+            default=5000,
+            help="Amount of synthetic projects in the payload. Usage: --projects 5000",
+        )
+        parser.add_argument(
+            "--rounds",
+            type=int,
+            default=5,
+            help="How many times each renderer encodes the payload. Usage: --rounds 5",
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(
+                self.style.WARNING(
+                    "orjson is not installed, FastJSONRenderer falls back to DRF's JSONRenderer."
+                )
+            )
+
+        payload = self.build_payload(options["projects"])
+        rounds = max(options["rounds"], 1)
+
+        results = {}
+        for name, renderer in [
+            ("JSONRenderer", JSONRenderer()),
+            ("FastJSONRenderer", FastJSONRenderer()),
+        ]:
+            timings = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                rendered = renderer.render(payload)
+                timings.append(time.perf_counter() - start)
+            results[name] = (min(timings), rendered)
+
+        drf_time, drf_bytes = results["JSONRenderer"]
+        fast_time, fast_bytes = results["FastJSONRenderer"]
+
+        self.stdout.write(
+            "Payload: {} projects, {} bytes, best of {} rounds".format(
+                options["projects"], len(drf_bytes), rounds
+            )
+        )
+        self.stdout.write("JSONRenderer:     {:.1f} ms".format(drf_time * 1000))
+        self.stdout.write("FastJSONRenderer: {:.1f} ms".format(fast_time * 1000))
+        self.stdout.write("Speedup:          {:.1f}x".format(drf_time / max(fast_time, 1e-9)))
+
+        if drf_bytes == fast_bytes:
+            self.stdout.write(self.style.SUCCESS("Output is byte-identical."))
+        else:
+            self.stdout.write(self.style.ERROR("Output differs from JSONRenderer!"))
+
+    @staticmethod
+    def build_payload(project_count):
+        """Builds a list resembling the /projects/ response, with nested finances and SAP values."""
+        rng = random.Random(2023)
+        names = ["Mannerheimintie", "Hämeentie", "Työpajankatu", "Läntinen Rantatie", "Öljysatama"]
+        updated = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+        def money():
+            return "{:.2f}".format(rng.randint(0, 5_000_000) / 100)
+
+        def person():
+            return {
+                "id": uuid.UUID(int=rng.getrandbits(128)),
+                "firstName": "Matti",
+                "lastName": "Meikäläinen",
+                "email": "matti.meikalainen@hel.fi",
+            }
+
+        projects = []
+        for index in range(project_count):
+            finances = {"year": 2024}
+            for plus in range(0, 3):
+                finances["budgetProposalCurrentYearPlus{}".format(plus)] = money()
+            for plus in range(3, 11):
+                finances["preliminaryCurrentYearPlus{}".format(plus)] = money()
+
+            projects.append(
+                {
+                    "id": uuid.UUID(int=rng.getrandbits(128)),
+                    "hkrId": index,
+                    "name": "{} {}".format(rng.choice(names), index),
+                    "description": "Katusuunnitelma – vaihe {}".format(index % 4),
+                    "projectClass": uuid.UUID(int=rng.getrandbits(128)),
+                    "projectLocation": uuid.UUID(int=rng.getrandbits(128)),
+                    "personPlanning": person(),
+                    "otherPersons": [person() for _ in range(rng.randint(0, 3))],
+                    "estPlanningStart": "01.01.2024",
+                    "estConstructionEnd": "31.12.2026",
+                    "programmed": bool(index % 2),
+                    "costForecast": Decimal(money()),
+                    "finances": finances,
+                    "spentBudget": 0,
+                    "currentYearsSapValues": [
+                        {
+                            "year": 2024,
+                            "project_task_costs": money(),
+                            "production_task_costs": money(),
+                        }
+                    ],
+                    "hashTags": [uuid.UUID(int=rng.getrandbits(128)) for _ in range(2)],
+                    "updatedDate": updated + datetime.timedelta(seconds=index, microseconds=index),
+                }
+            )
+
+        return {"count": project_count, "next": None, "previous": None, "results": projects}
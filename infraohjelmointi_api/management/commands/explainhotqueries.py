@@ -0,0 +1,132 @@
+import json
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from ...models import Project, ProjectFinancial, SapCurrentYear
+from ...services import ProjectFinancialService
+
+# Tables large enough that a sequential scan on them is a missing or unused index
+HOT_TABLES = [
+    ProjectFinancial._meta.db_table,
+    Project._meta.db_table,
+    SapCurrentYear._meta.db_table,
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs EXPLAIN (ANALYZE) on the canonical hot queries of the financial views and flags "
+        + "sequential scans on the large tables. Run generatesyntheticdata first, on an empty "
+        + "database every plan is a sequential scan. PostgreSQL only."
+        + "\nUsage: python manage.py explainhotqueries [--analyze-tables] [--fail-on-seq-scan] [--verbose-plans]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--analyze-tables",
+            action="store_true",
+            help="Refresh the planner statistics of the tables first. Usage: --analyze-tables",
+        )
+        parser.add_argument(
+            "--fail-on-seq-scan",
+            action="store_true",
+            help="Exit with an error if any query scans a large table sequentially. Usage: --fail-on-seq-scan",
+        )
+        parser.add_argument(
+            "--verbose-plans",
+            action="store_true",
+            help="Print the full JSON plans. Usage: --verbose-plans",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("explainhotqueries needs PostgreSQL, not {}.".format(connection.vendor))
+        if not Project.objects.exists():
+            raise CommandError("No projects found, run generatesyntheticdata first.")
+
+        if options["analyze_tables"]:
+            with connection.cursor() as cursor:
+                for table in HOT_TABLES:
+                    cursor.execute('ANALYZE "{}"'.format(table))
+
+        flagged = []
+        for name, queryset in self.get_hot_queries():
+            plan = self.explain(queryset)
+            nodes = list(self.walk_plan(plan["Plan"]))
+            seq_scans = [
+                node["Relation Name"]
+                for node in nodes
+                if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in HOT_TABLES
+            ]
+            indexes = sorted({node["Index Name"] for node in nodes if "Index Name" in node})
+            line = "{}: {:.2f} ms, indexes: {}".format(
+                name, plan["Execution Time"], ", ".join(indexes) or "-"
+            )
+            if seq_scans:
+                flagged.append(name)
+                self.stdout.write(
+                    self.style.WARNING("{}, sequential scan on: {}".format(line, ", ".join(seq_scans)))
+                )
+            else:
+                self.stdout.write(line)
+            if options["verbose_plans"]:
+                self.stdout.write(json.dumps(plan, indent=2))
+
+        if flagged and options["fail_on_seq_scan"]:
+            raise CommandError("Sequential scans in: {}".format(", ".join(flagged)))
+        if not flagged:
+            self.stdout.write(self.style.SUCCESS("No sequential scans on {}".format(", ".join(HOT_TABLES))))
+
+    def get_hot_queries(self):
+        """Yields (name, queryset) of the hot queries, with sample keys from the current data"""
+        year = date.today().year
+        years = range(year, year + 11)
+        # sample keys, every filter uses a value that exists in the data
+        sample = {
+            field: Project.objects.filter(**{f"{field}__isnull": False})
+            .values_list(field, flat=True)
+            .first()
+            for field in ["projectClass_id", "projectLocation_id", "projectGroup_id"]
+        }
+        project_ids = list(
+            Project.objects.filter(projectClass_id=sample["projectClass_id"]).values_list("id", flat=True)[:100]
+        )
+
+        yield "project-finances", ProjectFinancial.objects.filter(
+            project_id__in=project_ids, forFrameView=False, year__in=years
+        ).values_list("project_id", "year", "value")
+        yield "finance-window", ProjectFinancial.objects.filter(
+            forFrameView=False, year__in=years
+        ).values_list("project_id", "year", "value")
+        yield "programming-years", ProjectFinancialService.find_by_min_value_and_year_range(
+            min_value=0, year_range=range(year, year + 3)
+        ).values_list("project", flat=True).distinct()
+        yield "class-projects", Project.objects.filter(
+            projectClass_id=sample["projectClass_id"], programmed=True
+        ).values_list("id", flat=True)
+        yield "location-projects", Project.objects.filter(
+            projectLocation_id=sample["projectLocation_id"], programmed=True
+        ).values_list("id", flat=True)
+        yield "group-projects", Project.objects.filter(
+            projectGroup_id=sample["projectGroup_id"], programmed=True
+        ).values_list("id", flat=True)
+        yield "sap-current-year", SapCurrentYear.objects.filter(
+            project_id__in=project_ids, year=year
+        ).values_list("project_id", "project_task_costs", "production_task_costs")
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + sql, params)
+            result = cursor.fetchone()[0]
+        # psycopg2 decodes the json column, keep working if it is returned as text
+        if isinstance(result, str):
+            result = json.loads(result)
+        return result[0]
+
+    def walk_plan(self, node):
+        yield node
+        for child in node.get("Plans", []):
+            yield from self.walk_plan(child)
@@ -0,0 +1,493 @@
+import random
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from ...models import (
+    ClassFinancial,
+    LocationFinancial,
+    Note,
+    Person,
+    Project,
+    ProjectCategory,
+    ProjectClass,
+    ProjectFinancial,
+    ProjectGroup,
+    ProjectLocation,
+    ProjectPhase,
+    ProjectPriority,
+    ProjectType,
+    SapCost,
+    SapCurrentYear,
+)
+from ...services.CacheService import CacheService
+from ...services.ProjectFinancialService import ProjectFinancialService
+
+MASTER_CLASSES = [
+    "8 01 Kiinteä omaisuus",
+    "8 02 Kaupunkiuudistus",
+    "8 03 Kadut ja liikenneväylät",
+    "8 04 Puistot ja liikunta-alueet",
+    "8 05 Yhteishankkeet",
+    "8 06 Esirakentaminen",
+    "8 07 Satamat",
+    "8 08 Muut investoinnit",
+]
+# Subclasses of these main classes are divided into districts like in the planning Excel
+MASTER_CLASSES_WITH_DISTRICTS = ["8 03", "8 04"]
+DISTRICTS = [
+    "Eteläinen",
+    "Läntinen",
+    "Keskinen",
+    "Pohjoinen",
+    "Koillinen",
+    "Kaakkoinen",
+    "Itäinen",
+    "Östersundom",
+]
+CLASSES_PER_MASTER_CLASS = 4
+SUBCLASSES_PER_CLASS = 3
+DIVISIONS_PER_DISTRICT = 4
+SUBDIVISIONS_PER_DIVISION = 2
+FINANCE_YEARS = 11
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a deterministic synthetic city-scale dataset for benchmarking: class and location "
+        + "hierarchies for both views, projects, 11 years of planning and frame view financials, groups, "
+        + "SAP costs and notes. Intended for an empty local database."
+        + "\nUsage: python manage.py generatesyntheticdata [--projects 20000] [--seed 1] [--year <year>] [--clear] [--force]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--projects",
+            type=int,
+            default=20000,
+            help="Amount of projects to generate. Usage: --projects 20000",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=1,
+            help="Seed for the random generator, same seed produces the same dataset. Usage: --seed 1",
+        )
+        parser.add_argument(
+            "--year",
+            type=int,
+            default=date.today().year,
+            help="First year of the generated financials. Usage: --year 2025",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete ALL existing projects, groups, classes and locations before generating. Usage: --clear",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Allow running when DEBUG is off. Usage: --force",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["force"]:
+            raise CommandError(
+                "Synthetic data is meant for local databases only, use --force to run with DEBUG off."
+            )
+        if options["projects"] < 1:
+            raise CommandError("--projects must be a positive number.")
+
+        self.rng = random.Random(options["seed"])
+        self.year = options["year"]
+
+        with transaction.atomic():
+            if options["clear"]:
+                self.clear()
+            elif Project.objects.exists() or ProjectClass.objects.exists():
+                raise CommandError(
+                    "Database already contains projects or classes, use --clear to replace them."
+                )
+
+            counts = self.generate(options["projects"])
+
+        # Bulk inserts bypass the signals which normally invalidate the caches
+        CacheService.clear_all()
+        CacheService.bump_data_version()
+        for year in range(self.year, self.year + FINANCE_YEARS):
+            CacheService.bump_data_version(year)
+        CacheService.mark_planning_snapshot_dirty()
+
+        for name, count in counts.items():
+            self.stdout.write("{}: {}".format(name, count))
+        self.stdout.write(self.style.SUCCESS("Synthetic dataset generated"))
+
+    def clear(self):
+        self.stdout.write(self.style.WARNING("Deleting existing hierarchy and project data"))
+        # Deleting row by row would send a signal for every financial row, flush the tables instead.
+        # Tables referring to these (e.g. locks, notes, SAP costs) are flushed with them.
+        tables = [
+            model._meta.db_table
+            for model in [
+                Note,
+                SapCost,
+                SapCurrentYear,
+                ProjectFinancial,
+                ClassFinancial,
+                LocationFinancial,
+                Project,
+                ProjectGroup,
+                ProjectLocation,
+                ProjectClass,
+            ]
+        ]
+        # Pending deferred foreign key checks would prevent flushing inside the transaction
+        connection.check_constraints()
+        connection.ops.execute_sql_flush(
+            connection.ops.sql_flush(no_style(), tables, allow_cascade=True)
+        )
+
+    def new_id(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def generate(self, project_count: int) -> dict:
+        subclasses, coordinator_classes, coordinator_by_class = self.generate_classes()
+        locations_by_subclass, coordinator_locations = self.generate_locations(
+            subclasses, coordinator_by_class
+        )
+        groups = self.generate_groups(subclasses, locations_by_subclass, project_count)
+        persons = self.generate_persons()
+
+        counts = {
+            "Classes": ProjectClass.objects.count(),
+            "Locations": ProjectLocation.objects.count(),
+            "Groups": len(groups),
+            "Class financials": self.generate_hierarchy_finances(
+                ClassFinancial, "classRelation", coordinator_classes
+            ),
+            "Location financials": self.generate_hierarchy_finances(
+                LocationFinancial, "locationRelation", coordinator_locations
+            ),
+            "Projects": 0,
+            "Project financials": 0,
+            "SAP costs": 0,
+            "Notes": 0,
+        }
+
+        lookups = {
+            "phase": list(ProjectPhase.objects.order_by("id")),
+            "category": list(ProjectCategory.objects.order_by("id")),
+            "type": list(ProjectType.objects.order_by("id")),
+            "priority": list(ProjectPriority.objects.order_by("id")),
+        }
+        groups_by_subclass = {}
+        for group in groups:
+            groups_by_subclass.setdefault(group.classRelation_id, []).append(group)
+
+        for start in range(0, project_count, BATCH_SIZE):
+            projects = [
+                self.build_project(
+                    index, subclasses, locations_by_subclass, groups_by_subclass, persons, lookups
+                )
+                for index in range(start, min(start + BATCH_SIZE, project_count))
+            ]
+            Project.objects.bulk_create(projects, batch_size=BATCH_SIZE)
+            counts["Projects"] += len(projects)
+            counts["Project financials"] += self.generate_project_finances(projects)
+            counts["SAP costs"] += self.generate_sap_costs(projects)
+            counts["Notes"] += self.generate_notes(projects)
+            self.stdout.write("Generated {}/{} projects".format(counts["Projects"], project_count))
+
+        counts["SAP costs"] += self.generate_group_sap_costs(groups)
+        return counts
+
+    def generate_classes(self):
+        programmer_classes = []
+        coordinator_classes = []
+        coordinator_by_class = {}
+        subclasses = []
+
+        def add_class(name, parent, coordinator_parent):
+            path = name if parent is None else "/".join([parent.path, name])
+            project_class = ProjectClass(id=self.new_id(), name=name, path=path, parent=parent)
+            coordinator_class = ProjectClass(
+                id=self.new_id(),
+                name=name,
+                path=path,
+                parent=coordinator_parent,
+                forCoordinatorOnly=True,
+                relatedTo=project_class,
+            )
+            programmer_classes.append(project_class)
+            coordinator_classes.append(coordinator_class)
+            coordinator_by_class[project_class.id] = coordinator_class
+            return project_class, coordinator_class
+
+        for master_name in MASTER_CLASSES:
+            master_code = master_name[:4]
+            master, coordinator_master = add_class(master_name, None, None)
+            for class_number in range(1, CLASSES_PER_MASTER_CLASS + 1):
+                class_code = "{} {:02d}".format(master_code, class_number)
+                project_class, coordinator_class = add_class(
+                    "{} Luokka {}".format(class_code, class_number), master, coordinator_master
+                )
+                for subclass_number in range(1, SUBCLASSES_PER_CLASS + 1):
+                    subclass, _ = add_class(
+                        "{} {:02d} Alaluokka {}".format(class_code, subclass_number, subclass_number),
+                        project_class,
+                        coordinator_class,
+                    )
+                    subclasses.append(subclass)
+
+        ProjectClass.objects.bulk_create(programmer_classes + coordinator_classes)
+        return subclasses, coordinator_classes, coordinator_by_class
+
+    def generate_locations(self, subclasses, coordinator_by_class):
+        locations = []
+        coordinator_locations = []
+        locations_by_subclass = {}
+
+        for subclass in subclasses:
+            if subclass.name[:4] not in MASTER_CLASSES_WITH_DISTRICTS:
+                continue
+            subclass_locations = locations_by_subclass[subclass.id] = []
+            coordinator_class = coordinator_by_class[subclass.parent.id]
+            for district_number, district_path in enumerate(DISTRICTS, start=1):
+                district = ProjectLocation(
+                    id=self.new_id(),
+                    name="{} suurpiiri".format(district_path),
+                    path=district_path,
+                    parentClass=subclass,
+                )
+                coordinator_locations.append(
+                    ProjectLocation(
+                        id=self.new_id(),
+                        name=district.name,
+                        path=district_path,
+                        parentClass=coordinator_class,
+                        forCoordinatorOnly=True,
+                        relatedTo=district,
+                    )
+                )
+                locations.append(district)
+                subclass_locations.append(district)
+                for division_number in range(1, DIVISIONS_PER_DISTRICT + 1):
+                    division_name = "{}{:02d} Kaupunginosa {}".format(
+                        district_number, division_number, division_number
+                    )
+                    division = ProjectLocation(
+                        id=self.new_id(),
+                        name=division_name,
+                        path="/".join([district_path, division_name]),
+                        parent=district,
+                        parentClass=subclass,
+                    )
+                    locations.append(division)
+                    subclass_locations.append(division)
+                    for subdivision_number in range(1, SUBDIVISIONS_PER_DIVISION + 1):
+                        subdivision_name = "Osa-alue {}".format(subdivision_number)
+                        subdivision = ProjectLocation(
+                            id=self.new_id(),
+                            name=subdivision_name,
+                            path="/".join([division.path, subdivision_name]),
+                            parent=division,
+                            parentClass=subclass,
+                        )
+                        locations.append(subdivision)
+                        subclass_locations.append(subdivision)
+
+        ProjectLocation.objects.bulk_create(locations + coordinator_locations, batch_size=BATCH_SIZE)
+        return locations_by_subclass, coordinator_locations
+
+    def generate_groups(self, subclasses, locations_by_subclass, project_count):
+        groups = []
+        for index in range(max(project_count // 25, 1)):
+            subclass = self.rng.choice(subclasses)
+            districts = [
+                location
+                for location in locations_by_subclass.get(subclass.id, [])
+                if location.parent_id is None
+            ]
+            groups.append(
+                ProjectGroup(
+                    id=self.new_id(),
+                    name="Ryhmä {}".format(index + 1),
+                    classRelation=subclass,
+                    locationRelation=self.rng.choice(districts) if districts else None,
+                )
+            )
+        ProjectGroup.objects.bulk_create(groups, batch_size=BATCH_SIZE)
+        return groups
+
+    def generate_persons(self):
+        # Persons are kept on --clear, their ids don't use the seeded generator so that
+        # reruns produce the same dataset
+        persons = list(Person.objects.order_by("id")[:50])
+        if len(persons) < 50:
+            new_persons = [
+                Person(
+                    id=uuid.uuid4(),
+                    firstName="Etunimi{}".format(index),
+                    lastName="Sukunimi{}".format(index),
+                    email="henkilo{}@example.com".format(index),
+                    title="Suunnittelija",
+                    phone="040{:07d}".format(index),
+                )
+                for index in range(50 - len(persons))
+            ]
+            Person.objects.bulk_create(new_persons)
+            persons = sorted(persons + new_persons, key=lambda person: person.id)
+        return persons
+
+    def build_project(self, index, subclasses, locations_by_subclass, groups_by_subclass, persons, lookups):
+        subclass = self.rng.choice(subclasses)
+        locations = locations_by_subclass.get(subclass.id)
+        location = self.rng.choice(locations) if locations else None
+        group = None
+        if subclass.id in groups_by_subclass and self.rng.random() < 0.3:
+            group = self.rng.choice(groups_by_subclass[subclass.id])
+
+        planning_start_year = self.year + self.rng.randint(-3, 6)
+        construction_end_year = planning_start_year + self.rng.randint(1, 5)
+        project = Project(
+            id=self.new_id(),
+            name="Hanke {}".format(index + 1),
+            description="Synteettinen hanke {}".format(index + 1),
+            address="Katu {}".format(self.rng.randint(1, 500)),
+            projectClass=subclass,
+            projectLocation=location,
+            projectGroup=group,
+            programmed=self.rng.random() < 0.7,
+            hkrId=100000 + index if self.rng.random() < 0.8 else None,
+            sapProject="2814I{:05d}".format(index) if self.rng.random() < 0.6 else None,
+            planningStartYear=planning_start_year,
+            constructionEndYear=construction_end_year,
+            estPlanningStart=date(planning_start_year, 1, 1),
+            estPlanningEnd=date(planning_start_year + 1, 6, 30),
+            estConstructionStart=date(construction_end_year - 1, 3, 1),
+            estConstructionEnd=date(construction_end_year, 10, 31),
+            costForecast=self.rng.randint(100, 50_000) * 1000,
+            personPlanning=self.rng.choice(persons),
+            personConstruction=self.rng.choice(persons),
+        )
+        for field, values in lookups.items():
+            if values:
+                setattr(project, field, self.rng.choice(values))
+        return project
+
+    def generate_project_finances(self, projects) -> int:
+        finances = []
+        for project in projects:
+            for offset in range(FINANCE_YEARS):
+                year = self.year + offset
+                active = project.planningStartYear <= year <= project.constructionEndYear
+                for for_frame_view in (False, True):
+                    value = Decimal(self.rng.randint(1, 2000) * 1000) if active else Decimal(0)
+                    finances.append(
+                        ProjectFinancial(
+                            id=self.new_id(),
+                            project=project,
+                            year=year,
+                            value=value,
+                            forFrameView=for_frame_view,
+                        )
+                    )
+        ProjectFinancial.objects.bulk_create(finances, batch_size=BATCH_SIZE)
+        ProjectFinancialService.update_finance_years(project_ids=[project.id for project in projects])
+        return len(finances)
+
+    def generate_hierarchy_finances(self, model, relation_field, hierarchy) -> int:
+        finances = [
+            model(
+                id=self.new_id(),
+                year=self.year + offset,
+                forFrameView=for_frame_view,
+                frameBudget=self.rng.randint(1, 500) * 100_000,
+                budgetChange=self.rng.randint(-50, 50) * 10_000,
+                **{relation_field: instance},
+            )
+            for instance in hierarchy
+            for offset in range(FINANCE_YEARS)
+            for for_frame_view in (False, True)
+        ]
+        model.objects.bulk_create(finances, batch_size=BATCH_SIZE)
+        return len(finances)
+
+    def build_sap_cost(self, model, year, **kwargs):
+        return model(
+            id=self.new_id(),
+            year=year,
+            project_task_costs=Decimal(self.rng.randint(0, 10_000_000)) / 100,
+            project_task_commitments=Decimal(self.rng.randint(0, 1_000_000)) / 100,
+            production_task_costs=Decimal(self.rng.randint(0, 50_000_000)) / 100,
+            production_task_commitments=Decimal(self.rng.randint(0, 5_000_000)) / 100,
+            **kwargs,
+        )
+
+    def generate_sap_costs(self, projects) -> int:
+        sap_costs = []
+        current_year_costs = []
+        for project in projects:
+            if not project.sapProject:
+                continue
+            for year in (self.year - 1, self.year):
+                sap_costs.append(
+                    self.build_sap_cost(
+                        SapCost,
+                        year,
+                        project=project,
+                        project_group=project.projectGroup,
+                        sap_id=project.sapProject,
+                    )
+                )
+            current_year_costs.append(
+                self.build_sap_cost(
+                    SapCurrentYear,
+                    self.year,
+                    project=project,
+                    project_group=project.projectGroup,
+                    sap_id=project.sapProject,
+                )
+            )
+        SapCost.objects.bulk_create(sap_costs, batch_size=BATCH_SIZE)
+        SapCurrentYear.objects.bulk_create(current_year_costs, batch_size=BATCH_SIZE)
+        return len(sap_costs) + len(current_year_costs)
+
+    def generate_group_sap_costs(self, groups) -> int:
+        group_costs = [
+            self.build_sap_cost(
+                model,
+                self.year,
+                project_group=group,
+                sap_id="",
+                group_combined_costs=Decimal(self.rng.randint(0, 100_000_000)) / 100,
+                group_combined_commitments=Decimal(self.rng.randint(0, 10_000_000)) / 100,
+            )
+            for group in groups
+            if self.rng.random() < 0.5
+            for model in (SapCost, SapCurrentYear)
+        ]
+        for model in (SapCost, SapCurrentYear):
+            model.objects.bulk_create(
+                [cost for cost in group_costs if isinstance(cost, model)], batch_size=BATCH_SIZE
+            )
+        return len(group_costs)
+
+    def generate_notes(self, projects) -> int:
+        notes = [
+            Note(
+                id=self.new_id(),
+                project=project,
+                content="Muistiinpano {} hankkeelle {}".format(number + 1, project.name),
+            )
+            for project in projects
+            for number in range(self.rng.randint(0, 3))
+        ]
+        Note.objects.bulk_create(notes, batch_size=BATCH_SIZE)
+        return len(notes)
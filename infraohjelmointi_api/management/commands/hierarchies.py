@@ -13,6 +13,7 @@ class Command(BaseCommand):
         "Populates the DB with correct project class and location hierarchies. "
         + "\nUsage: python manage.py hierarchies --file <path/to/excel.xlsx>"
         + "\n--sync-locations-from-pw"
+        + "\n--dry-run"
     )
 
     def add_arguments(self, parser):
@@ -21,6 +22,7 @@ class Command(BaseCommand):
 
         --file /folder/folder/file.xlsx
         --sync-locations-from-pw
+        --dry-run
         """
 
         ## --file, used to tell the script to populate local db with
@@ -46,6 +48,17 @@ class Command(BaseCommand):
             ),
         )
 
+        ## --dry-run, used to tell the script to only report what populating
+        ## the local db with the --file argument would create and update
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help=(
+                "Argument to report the classes and locations the --file argument would create "
+                + "and update, without writing them to DB. Usage: --dry-run"
+            ),
+        )
+
     def handle(self, *args, **options):
         if not options["file"] and not options["sync_locations_from_pw"]:
             self.stdout.write(
@@ -69,12 +82,16 @@ class Command(BaseCommand):
             return
 
         try:
-            self.populateDBWithExcel(excelPath=options["file"])
+            self.populateDBWithExcel(
+                excelPath=options["file"],
+                dry_run=options["dry_run"],
+                verbose=options["verbosity"] > 1,
+            )
         except Exception as e:
             traceback.print_stack(e)
             self.stdout.write(self.style.ERROR(e))
 
-    def populateDBWithExcel(self, excelPath):
+    def populateDBWithExcel(self, excelPath, dry_run=False, verbose=False):
         self.stdout.write(
             self.style.NOTICE(
                 "----------------------------------------------------------------\n"
@@ -83,7 +100,14 @@ class Command(BaseCommand):
             )
         )
         wb = load_workbook(excelPath, data_only=True, read_only=True)
-        buildHierarchies(
+        tree = buildHierarchies(
             wb=wb,
-            rows=list(wb.worksheets[2].rows),
+            rows=wb.worksheets[2].rows,
+            verbose=verbose,
         )
+        for line in tree.report(details=dry_run or verbose):
+            self.stdout.write(line)
+        if dry_run:
+            self.stdout.write(self.style.NOTICE("Dry run, nothing was written to DB"))
+            return
+        tree.apply()
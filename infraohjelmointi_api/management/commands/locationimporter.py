@@ -20,6 +20,14 @@ class Command(BaseCommand):
             ),
             default="",
         )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help=(
+                "Argument to report the locations the --file argument would create and update, "
+                + "without writing them to DB. Usage: --dry-run"
+            ),
+        )
         parser.add_argument(
             "--eri-kaupunginosia",
             action="store_true",
@@ -55,12 +63,16 @@ class Command(BaseCommand):
             return
 
         try:
-            self.populateDBWithLocations(excelPath=options["file"])
+            self.populateDBWithLocations(
+                excelPath=options["file"],
+                dry_run=options["dry_run"],
+                verbose=options["verbosity"] > 1,
+            )
         except Exception as e:
             traceback.print_stack(e)
             self.stdout.write(self.style.ERROR(e))
 
-    def populateDBWithLocations(self, excelPath):
+    def populateDBWithLocations(self, excelPath, dry_run=False, verbose=False):
         self.stdout.write(
             self.style.NOTICE(
                 "\n"
@@ -72,7 +84,13 @@ class Command(BaseCommand):
             )
         )
         wb = load_workbook(excelPath, data_only=True, read_only=True)
-        add_locations(list(wb.worksheets[0].rows))
+        tree = add_locations(wb.worksheets[0].rows, verbose=verbose)
+        for line in tree.report(details=dry_run or verbose):
+            self.stdout.write(line)
+        if dry_run:
+            self.stdout.write(self.style.NOTICE("Dry run, nothing was written to DB"))
+            return
+        tree.apply()
 
     def add_eri_kaupunginosia_location_option(self):
         districts = ProjectDistrict.objects.filter(level='district')
@@ -14,6 +14,7 @@ try:
 except ImportError:
     raise CommandError("openpyxl is required to read Excel files. Please install it.")
 
+from infraohjelmointi_api.services import CacheService
 from infraohjelmointi_api.utils.project_class_utils import get_programmer_from_hierarchy
 from infraohjelmointi_api.models import (
     ProjectClass,
@@ -354,6 +355,8 @@ class Command(BaseCommand):
         if clear_existing:
             cleared_count = ProjectClass.objects.exclude(defaultProgrammer=None).count()
             ProjectClass.objects.update(defaultProgrammer=None)
+            # the update skips the signals invalidating the cached class paths of the programmers
+            transaction.on_commit(CacheService.invalidate_class_access)
             self.stdout.write(f"Cleared {cleared_count} existing programmer assignments")
 
         created_programmers = 0
@@ -429,6 +432,7 @@ class Command(BaseCommand):
                 # Assign programmer to all classes in this district that don't have one
                 # Use bulk update for better performance
                 fallback_assigned = classes.update(defaultProgrammer=programmer)
+                transaction.on_commit(CacheService.invalidate_class_access)
                 assigned_classes += fallback_assigned
 
                 self.stdout.write(f"   Assigned fallback programmer to {fallback_assigned} classes")
@@ -0,0 +1,469 @@
+import json
+import logging
+import statistics
+import subprocess
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from helusers.models import ADGroup
+from rest_framework.authtoken.models import Token
+
+from ...models import (
+    Note,
+    Project,
+    ProjectClass,
+    ProjectFinancial,
+    ProjectGroup,
+    ProjectLocation,
+    SapCost,
+    User,
+)
+from ...services import ProjectWiseService, SapApiService
+from ...services.utils.PWConfig import PWConfig
+from ...utils.standin_servers import PWStandInServer, SapStandInServer
+
+BENCHMARK_USERNAME = "benchmark-runner"
+BENCHMARK_AD_GROUP = "sg_kymp_sso_io_admin"
+
+# The endpoints are benchmarked cold, emptying the cache between them, and the sync benchmarks
+# invalidate cache entries. The configured Redis database holds the SSE streams and the data
+# versions too, the benchmarks use a cache of their own.
+BENCHMARK_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "runbenchmarks",
+    }
+}
+
+# name, url, authenticated with the API token instead of the session
+ENDPOINTS = [
+    ("projects", "/projects/?year={year}&masterClass={master_class}", False),
+    (
+        "projects-coordinator",
+        "/projects/coordinator/?year={year}&masterClass={coordinator_master_class}&forcedToFrame=false",
+        False,
+    ),
+    ("project-classes", "/project-classes/?year={year}", False),
+    ("project-classes-coordinator", "/project-classes/coordinator/?year={year}&forcedToFrame=false", False),
+    ("project-locations", "/project-locations/?year={year}", False),
+    ("project-locations-coordinator", "/project-locations/coordinator/?year={year}&forcedToFrame=false", False),
+    ("project-groups", "/project-groups/?year={year}", False),
+    ("project-groups-coordinator", "/project-groups/coordinator/?year={year}&forcedToFrame=false", False),
+    ("api-projects", "/api/projects/?year={year}", True),
+]
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries():
+    """Counts the SQL queries run on the default connection of this thread"""
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        yield counter
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures latency and SQL query counts of the heaviest endpoints and of the SAP and PW sync engines "
+        + "against local stand-in servers, and writes the results as a JSON report. "
+        + "Run generatesyntheticdata first. Sync benchmarks are rolled back and leave the data untouched. "
+        + "The endpoints are benchmarked on an in-process cache, the configured cache is not touched. "
+        + "Response sizes are the bytes sent, compressed as negotiated with --accept-encoding."
+        + "\nUsage: python manage.py runbenchmarks [--rounds 5] [--output benchmark-report.json] "
+        + "[--compare <previous report>] [--sync-projects 200] [--skip-sync] [--include-mass-update] "
+        + "[--accept-encoding 'gzip, deflate, br'] [--force]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rounds",
+            type=int,
+            default=5,
+            help="Warm requests per endpoint after the cold request. Usage: --rounds 5",
+        )
+        parser.add_argument(
+            "--output",
+            type=str,
+            default="benchmark-report.json",
+            help="Path of the JSON report. Usage: --output benchmark-report.json",
+        )
+        parser.add_argument(
+            "--compare",
+            type=str,
+            default=None,
+            help="Previous JSON report to compare the results with. Usage: --compare previous.json",
+        )
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            default=None,
+            help="Benchmark only the named endpoint, can be repeated. Usage: --endpoint project-classes",
+        )
+        parser.add_argument(
+            "--accept-encoding",
+            type=str,
+            default="gzip, deflate, br",
+            help="Accept-Encoding header of the requests, empty for uncompressed responses. "
+            + "Usage: --accept-encoding 'gzip, deflate, br'",
+        )
+        parser.add_argument(
+            "--sync-projects",
+            type=int,
+            default=200,
+            help="Amount of projects synchronized from SAP and PW. Usage: --sync-projects 200",
+        )
+        parser.add_argument(
+            "--standin-latency-ms",
+            type=float,
+            default=0,
+            help="Artificial latency of the SAP and PW stand-ins. Usage: --standin-latency-ms 20",
+        )
+        parser.add_argument(
+            "--skip-sync",
+            action="store_true",
+            help="Skip the SAP and PW sync benchmarks. Usage: --skip-sync",
+        )
+        parser.add_argument(
+            "--include-mass-update",
+            action="store_true",
+            help="Also run the PW mass update of all programmed projects. Usage: --include-mass-update",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Allow running when DEBUG is off. Usage: --force",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["force"]:
+            raise CommandError(
+                "Benchmarks are meant for local databases only, use --force to run with DEBUG off."
+            )
+        if not Project.objects.exists():
+            raise CommandError("No projects found, run generatesyntheticdata first.")
+
+        self.year = date.today().year
+        self.rounds = max(options["rounds"], 1)
+        self.accept_encoding = options["accept_encoding"]
+        report = {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "commit": self.get_commit(),
+            "database": connection.vendor,
+            "cache": BENCHMARK_CACHES["default"]["BACKEND"],
+            "dataset": self.get_dataset_size(),
+            "rounds": self.rounds,
+            "accept_encoding": self.accept_encoding,
+        }
+        with override_settings(CACHES=BENCHMARK_CACHES):
+            report["endpoints"] = self.run_endpoint_benchmarks(options["endpoint"])
+            if not options["skip_sync"]:
+                report["sync"] = self.run_sync_benchmarks(
+                    project_count=options["sync_projects"],
+                    latency=options["standin_latency_ms"] / 1000,
+                    include_mass_update=options["include_mass_update"],
+                )
+
+        with open(options["output"], "w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, indent=2)
+
+        self.print_report(report)
+        if options["compare"]:
+            self.print_comparison(report, options["compare"])
+        self.stdout.write(self.style.SUCCESS("Report written to {}".format(options["output"])))
+
+    @staticmethod
+    def get_commit():
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    @staticmethod
+    def get_dataset_size() -> dict:
+        return {
+            "projects": Project.objects.count(),
+            "project_financials": ProjectFinancial.objects.count(),
+            "classes": ProjectClass.objects.count(),
+            "locations": ProjectLocation.objects.count(),
+            "groups": ProjectGroup.objects.count(),
+            "sap_costs": SapCost.objects.count(),
+            "notes": Note.objects.count(),
+        }
+
+    @contextmanager
+    def benchmark_client(self):
+        """
+        Yields a client logged in as an admin user and the API token of the user.
+        The user, its token and the AD group, if created here, are deleted afterwards.
+        """
+        user, _ = User.objects.get_or_create(username=BENCHMARK_USERNAME)
+        group, group_created = ADGroup.objects.get_or_create(name=BENCHMARK_AD_GROUP)
+        try:
+            user.ad_groups.add(group)
+            token, _ = Token.objects.get_or_create(user=user)
+
+            client = Client()
+            client.force_login(user)
+            yield client, token.key
+            client.logout()
+        finally:
+            # the token and the group membership are deleted with the user
+            user.delete()
+            if group_created:
+                group.delete()
+
+    def get_url_params(self) -> dict:
+        master_class = ProjectClass.objects.filter(
+            parent=None, forCoordinatorOnly=False
+        ).first()
+        coordinator_master_class = ProjectClass.objects.filter(
+            parent=None, forCoordinatorOnly=True
+        ).first()
+        return {
+            "year": self.year,
+            "master_class": master_class.id if master_class else "",
+            "coordinator_master_class": coordinator_master_class.id if coordinator_master_class else "",
+        }
+
+    @staticmethod
+    def read_response(response) -> int:
+        if not response.streaming:
+            return len(response.content)
+        if getattr(response, "is_async", False):
+
+            async def consume():
+                return sum([len(chunk) async for chunk in response.streaming_content])
+
+            return async_to_sync(consume)()
+        return sum(len(chunk) for chunk in response.streaming_content)
+
+    def measure_request(self, client, url, headers):
+        """Returns the status, bytes sent, wall time, CPU time of the process, query count and encoding"""
+        with count_queries() as queries:
+            start = time.perf_counter()
+            cpu_start = time.process_time()
+            response = client.get(url, **headers)
+            size = self.read_response(response)
+            cpu = time.process_time() - cpu_start
+            duration = time.perf_counter() - start
+        return response.status_code, size, duration, cpu, queries.count, response.get("Content-Encoding")
+
+    def run_endpoint_benchmarks(self, only=None) -> dict:
+        params = self.get_url_params()
+        results = {}
+
+        # The test client talks to the server name "testserver"
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+        ), self.benchmark_client() as (client, token):
+            for name, url, uses_token in ENDPOINTS:
+                if only and name not in only:
+                    continue
+                url = url.format(**params)
+                headers = {"HTTP_AUTHORIZATION": "Bearer {}".format(token)} if uses_token else {}
+                if self.accept_encoding:
+                    headers["HTTP_ACCEPT_ENCODING"] = self.accept_encoding
+
+                cache.clear()
+                status_code, size, cold_duration, _, cold_queries, encoding = self.measure_request(
+                    client, url, headers
+                )
+                warm = [self.measure_request(client, url, headers) for _ in range(self.rounds)]
+                warm_durations = sorted(duration for _, _, duration, _, _, _ in warm)
+                warm_cpu = sorted(cpu for _, _, _, cpu, _, _ in warm)
+
+                results[name] = {
+                    "url": url,
+                    "status": status_code,
+                    "bytes": size,
+                    "encoding": encoding,
+                    "cold_ms": round(cold_duration * 1000, 2),
+                    "cold_queries": cold_queries,
+                    "warm_min_ms": round(warm_durations[0] * 1000, 2),
+                    "warm_p50_ms": round(statistics.median(warm_durations) * 1000, 2),
+                    "warm_p95_ms": round(self.percentile(warm_durations, 95) * 1000, 2),
+                    "warm_cpu_p50_ms": round(statistics.median(warm_cpu) * 1000, 2),
+                    "warm_queries": max(queries for _, _, _, _, queries, _ in warm),
+                }
+                self.stdout.write("Benchmarked {}".format(name))
+        return results
+
+    @staticmethod
+    def percentile(sorted_values, percent):
+        index = min(len(sorted_values) - 1, max(0, round(percent / 100 * len(sorted_values)) - 1))
+        return sorted_values[index]
+
+    @contextmanager
+    def rolled_back(self):
+        """Runs the block in a transaction which is always rolled back"""
+        with transaction.atomic():
+            yield
+            transaction.set_rollback(True)
+
+    @staticmethod
+    @contextmanager
+    def quiet_logging():
+        """The sync engines log every project on INFO level, which would dominate the timings"""
+        logger = logging.getLogger("infraohjelmointi_api")
+        level = logger.level
+        logger.setLevel(logging.WARNING)
+        try:
+            yield
+        finally:
+            logger.setLevel(level)
+
+    def measure_sync(self, server, run):
+        requests_before = server.request_count
+        with count_queries() as queries, self.rolled_back(), self.quiet_logging():
+            start = time.perf_counter()
+            run()
+            duration = time.perf_counter() - start
+        return {
+            "duration_s": round(duration, 3),
+            "queries": queries.count,
+            "http_requests": server.request_count - requests_before,
+        }
+
+    def run_sync_benchmarks(self, project_count, latency, include_mass_update) -> dict:
+        results = {}
+
+        sap_projects = list(
+            Project.objects.filter(sapProject__isnull=False)
+            .select_related("projectGroup")
+            .order_by("id")[:project_count]
+        )
+        with SapStandInServer(latency=latency) as sap:
+            service = SapApiService()
+            sap.configure(service)
+            results["sap_sync"] = {
+                "projects": len(sap_projects),
+                **self.measure_sync(
+                    sap,
+                    lambda: service.sync_all_projects_from_sap(
+                        for_financial_statement=False, sap_year=self.year, projects=sap_projects
+                    ),
+                ),
+            }
+            self.stdout.write("Benchmarked SAP sync")
+
+        pw_projects = list(Project.objects.filter(hkrId__isnull=False).order_by("id")[:project_count])
+        # The delay between hierarchical field updates and the request rate caps are only
+        # needed by the real PW
+        pw_config = {
+            "HIERARCHICAL_FIELD_DELAY": 0,
+            "MASS_UPDATE_REQUESTS_PER_SECOND": 0,
+            "INBOUND_SYNC_REQUESTS_PER_SECOND": 0,
+        }
+        original_pw_config = {name: getattr(PWConfig, name) for name in pw_config}
+        with PWStandInServer(latency=latency) as pw:
+            service = ProjectWiseService()
+            pw.configure(service)
+            try:
+                for name, value in pw_config.items():
+                    setattr(PWConfig, name, value)
+
+                results["pw_sync_from_pw"] = {
+                    "projects": len(pw_projects),
+                    **self.measure_sync(pw, lambda: service.sync_projects_from_pw(projects=pw_projects)),
+                }
+                self.stdout.write("Benchmarked PW sync from PW")
+
+                if include_mass_update:
+                    measurement = self.measure_sync(
+                        pw, lambda: service.sync_all_projects_to_pw(force=True)
+                    )
+                    # Second run finds every project unchanged since the first one
+                    unchanged_measurement = self.measure_sync(pw, service.sync_all_projects_to_pw)
+                    mass_update_projects = Project.objects.filter(
+                        programmed=True, hkrId__isnull=False
+                    ).count()
+                    results["pw_mass_update"] = {"projects": mass_update_projects, **measurement}
+                    results["pw_mass_update_unchanged"] = {
+                        "projects": mass_update_projects,
+                        **unchanged_measurement,
+                    }
+                    self.stdout.write("Benchmarked PW mass update")
+            finally:
+                for name, value in original_pw_config.items():
+                    setattr(PWConfig, name, value)
+
+        return results
+
+    def print_report(self, report):
+        self.stdout.write(
+            "{:<32}{:>8}{:>12}{:>6}{:>10}{:>10}{:>10}{:>10}{:>10}".format(
+                "endpoint", "status", "bytes", "enc", "cold ms", "p50 ms", "p95 ms", "cpu ms", "queries"
+            )
+        )
+        for name, result in report["endpoints"].items():
+            self.stdout.write(
+                "{:<32}{:>8}{:>12}{:>6}{:>10}{:>10}{:>10}{:>10}{:>10}".format(
+                    name,
+                    result["status"],
+                    result["bytes"],
+                    result.get("encoding") or "-",
+                    result["cold_ms"],
+                    result["warm_p50_ms"],
+                    result["warm_p95_ms"],
+                    result["warm_cpu_p50_ms"],
+                    "{}/{}".format(result["cold_queries"], result["warm_queries"]),
+                )
+            )
+        for name, result in report.get("sync", {}).items():
+            self.stdout.write(
+                "{}: {} projects in {} s, {} queries, {} HTTP requests".format(
+                    name,
+                    result["projects"],
+                    result["duration_s"],
+                    result["queries"],
+                    result["http_requests"],
+                )
+            )
+
+    def print_comparison(self, report, previous_path):
+        with open(previous_path, encoding="utf-8") as previous_file:
+            previous = json.load(previous_file)
+
+        self.stdout.write("Compared to {} ({})".format(previous_path, previous.get("commit")))
+        for name, result in report["endpoints"].items():
+            before = previous.get("endpoints", {}).get(name)
+            if not before:
+                continue
+            self.stdout.write(
+                "{:<32} p50 {:>9} -> {:>9} ms ({:+.0%}), queries {} -> {}, bytes {} -> {}".format(
+                    name,
+                    before["warm_p50_ms"],
+                    result["warm_p50_ms"],
+                    result["warm_p50_ms"] / before["warm_p50_ms"] - 1 if before["warm_p50_ms"] else 0,
+                    before["cold_queries"],
+                    result["cold_queries"],
+                    before["bytes"],
+                    result["bytes"],
+                )
+            )
+        for name, result in report.get("sync", {}).items():
+            before = previous.get("sync", {}).get(name)
+            if not before:
+                continue
+            self.stdout.write(
+                "{:<32} {} s -> {} s, queries {} -> {}".format(
+                    name, before["duration_s"], result["duration_s"], before["queries"], result["queries"]
+                )
+            )
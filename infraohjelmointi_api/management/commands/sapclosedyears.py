@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from django.db import transaction
+from ...services import (
+    ProjectService,
+    SapApiService,
+    SapAuthenticationError,
+    SapClosedYearCostService,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-open or re-fetch closed year SAP costs. "
+        "\nUsage: python manage.py sapclosedyears --year <year> (--reopen | --refetch) [--sap-id <sap id> ...]"
+        "\nA re-opened year is fetched from SAP on every sync until it is re-fetched, "
+        "re-fetching stores the costs of the year from SAP as closed again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, required=True, help="Closed year to handle")
+        action = parser.add_mutually_exclusive_group(required=True)
+        action.add_argument(
+            "--reopen",
+            action="store_true",
+            help="Mark the stored costs of the year open, nightly sync fetches the year from SAP again",
+        )
+        action.add_argument(
+            "--refetch",
+            action="store_true",
+            help="Fetch the costs of the year from SAP now and store them as closed",
+        )
+        parser.add_argument(
+            "--sap-id",
+            action="append",
+            dest="sap_ids",
+            help="Limit to given SAP id, can be given multiple times. By default all SAP ids of projects.",
+        )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        year = options["year"]
+        sap_ids = options["sap_ids"]
+
+        if options["reopen"]:
+            reopened = SapClosedYearCostService.get_by_year(year, sap_ids).update(closed=False)
+            self.stdout.write(self.style.SUCCESS(f"Re-opened {year} costs of {reopened} SAP ids"))
+            return
+
+        if not sap_ids:
+            sap_ids = sorted(
+                {
+                    sap_id
+                    for sap_id in ProjectService.list_with_non_null_sap_id().values_list("sapProject", flat=True)
+                    if sap_id
+                }
+            )
+        try:
+            stored = SapApiService().refetch_closed_year(year, sap_ids)
+        except SapAuthenticationError as e:
+            raise CommandError(
+                f"SAP authentication failed (401). Fix credentials and retry. {e}"
+            ) from e
+
+        self.stdout.write(self.style.SUCCESS(f"Re-fetched {year} costs of {stored}/{len(sap_ids)} SAP ids"))
@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.core.management import call_command
 from django.core.management.base import BaseCommand, CommandError
 
 from django.db import transaction
@@ -9,6 +11,7 @@ class Command(BaseCommand):
         "Synchronize SAP costs. "
         "\nUsage: python manage.py sapsynchronizer"
         "\nUse --counts-only to print project/group/sap_id counts and exit (no SAP/DB writes)."
+        "\nThe cache is warmed up after the synchronization, unless CACHE_WARMUP_ENABLED is False."
     )
 
     def add_arguments(self, parser):
@@ -29,6 +32,9 @@ class Command(BaseCommand):
             raise CommandError(
                 f"SAP authentication failed (401). Fix credentials and retry. {e}"
             ) from e
+        if getattr(settings, "CACHE_WARMUP_ENABLED", True):
+            # the updated costs invalidated the cached sums, warm them once they are committed
+            transaction.on_commit(lambda: call_command("warmcache", stdout=self.stdout))
 
     def _print_counts_only(self):
         """Load projects, group by SAP ID, print counts. No SAP calls, no DB writes."""
@@ -2,17 +2,13 @@ from openpyxl import load_workbook
 import datetime
 
 from .hierarchy import buildHierarchiesAndProjects, getColor, MAIN_CLASS_COLOR
-from ....models.ProjectFinancial import ProjectFinancial
 from ....services import (
-    PersonService,
-    ProjectService,
-    NoteService,
     ProjectCategoryService,
-    ProjectFinancialService,
     ProjectPhaseService,
 )
 
 from . import IExcelFileHandler
+from .ProjectImportPlan import ProjectImportPlan
 from django.contrib import messages
 from io import BytesIO
 
@@ -30,6 +26,11 @@ class BudgetFileHandler(IExcelFileHandler):
             str(pc.value).lower(): pc for pc in ProjectCategoryService.list_all()
         }
         self.current_budget_year = datetime.date.today().year
+        self.phases = {
+            value: ProjectPhaseService.get_by_value(value=value)
+            for value in ("programming", "proposal")
+        }
+        self.plan = ProjectImportPlan()
 
     def proceed_with_file(self, excel_path):
         logger.info(
@@ -49,28 +50,7 @@ class BudgetFileHandler(IExcelFileHandler):
             "ylitysoikeus yhteensä",
         ]
 
-        for sheetname in wb.sheetnames:
-            logger.debug("\n\nHandling sheet {}\n".format(sheetname))
-
-            sheet = wb[sheetname]
-            rows = list(sheet.rows)
-            year_heading = None
-            # there is a need to find the year for the budget file
-            for year in rows[8:11]:
-                if str(year[19].value).lower() == "tae":
-                    year_heading = "tae"
-                elif year_heading == "tae" and str(year[19].value).isnumeric():
-                    self.current_budget_year = year[19].value
-                    break
-
-            buildHierarchiesAndProjects(
-                wb=wb,
-                rows=rows,
-                skipables=skipables,
-                project_handler=self.proceed_with_project_row,
-            )
-
-        logger.info("\n\nTotal rows handled  {}\n".format(len(rows)))
+        self.__proceed_with_sheets(wb=wb, skipables=skipables)
         logger.info("Budget file import done\n\n")
 
     def proceed_with_uploaded_file(self, request, uploadedFile):
@@ -99,28 +79,35 @@ class BudgetFileHandler(IExcelFileHandler):
             "ylitysoikeus yhteensä",
         ]
 
+        self.__proceed_with_sheets(wb=wb, skipables=skipables)
+
+    def __proceed_with_sheets(self, wb, skipables):
+        """Plans the projects of every sheet and writes them to DB at once"""
+        self.plan = ProjectImportPlan()
+
         for sheetname in wb.sheetnames:
             logger.debug("\n\nHandling sheet {}\n".format(sheetname))
 
             sheet = wb[sheetname]
-            rows = list(sheet.rows)
             year_heading = None
             # there is a need to find the year for the budget file
-            for year in rows[8:11]:
+            for year in sheet.iter_rows(min_row=9, max_row=11):
                 if str(year[19].value).lower() == "tae":
                     year_heading = "tae"
                 elif year_heading == "tae" and str(year[19].value).isnumeric():
                     self.current_budget_year = year[19].value
                     break
 
+            # rows are read lazily, projects are only planned while reading
             buildHierarchiesAndProjects(
                 wb=wb,
-                rows=rows,
+                rows=sheet.rows,
                 skipables=skipables,
                 project_handler=self.proceed_with_project_row,
             )
 
-        logger.info("\n\nTotal rows handled  {}\n".format(len(rows)))
+        logger.info("\n\nTotal projects handled  {}\n".format(len(self.plan.projects)))
+        self.plan.apply()
 
     def proceed_with_project_row(
         self, row, name, project_class, project_location, project_group
@@ -171,123 +158,91 @@ class BudgetFileHandler(IExcelFileHandler):
         if not len(row) < 31:
             pwNumber = str(row[30].value).strip().lower()
 
-        try:
-            project = ProjectService.get(
-                name=name,
-                projectClass=project_class,
-                projectLocation=project_location,
-                projectGroup=project_group,
-            )
-        except:
-            project = ProjectService.create(
-                name=name,
-                projectClass=project_class,
-                description="Kuvaus puuttuu",
-                projectLocation=project_location,
-                projectGroup=project_group,
-            )
+        def find_non_zero_budget_index(budget_list):
+            """
+            Helper function to find first and last non zero budget
+            """
+            first_non_zero_index = None
+            last_non_zero_index = None
+            for i, num in enumerate(budget_list):
+                if num != 0:
+                    if first_non_zero_index is None:
+                        first_non_zero_index = i
+                    last_non_zero_index = i
+
+            return first_non_zero_index, last_non_zero_index
+
+        fields = {
+            "phase": self.phases["programming"]
+            if budget_sum > 0
+            else self.phases["proposal"]
+        }
 
-        try:
+        firstBudgetIndex, lastBudgetIndex = find_non_zero_budget_index(
+            budget_list=budget_list
+        )
 
-            def find_non_zero_budget_index(budget_list):
-                """
-                Helper function to find first and last non zero budget
-                """
-                first_non_zero_index = None
-                last_non_zero_index = None
-                for i, num in enumerate(budget_list):
-                    if num != 0:
-                        if first_non_zero_index is None:
-                            first_non_zero_index = i
-                        last_non_zero_index = i
-
-                return first_non_zero_index, last_non_zero_index
-
-            project.phase = (
-                ProjectPhaseService.get_by_value(value="programming")
-                if budget_sum > 0
-                else ProjectPhaseService.get_by_value(value="proposal")
+        if firstBudgetIndex != None and lastBudgetIndex != None:
+            hasOneBudgetField = firstBudgetIndex == lastBudgetIndex
+            planningStartYear = self.current_budget_year + firstBudgetIndex
+            # set first budget year as planning start
+            fields["planningStartYear"] = planningStartYear
+            # First date of the first month
+            fields["estPlanningStart"] = datetime.datetime(planningStartYear, 1, 1)
+            fields["frameEstPlanningStart"] = fields["estPlanningStart"]
+            # middle of year if only 1 budget in excel, else end of year
+            fields["estPlanningEnd"] = (
+                datetime.datetime(planningStartYear, 6, 30)
+                if hasOneBudgetField
+                else datetime.datetime(planningStartYear, 12, 31)
             )
-
-            firstBudgetIndex, lastBudgetIndex = find_non_zero_budget_index(
-                budget_list=budget_list
+            fields["frameEstPlanningEnd"] = fields["estPlanningEnd"]
+            # same year as planning if 1 budget in excel, else the same year as last budget in excel
+            fields["constructionEndYear"] = (
+                (planningStartYear)
+                if hasOneBudgetField
+                else (self.current_budget_year + lastBudgetIndex)
             )
 
-            if firstBudgetIndex != None and lastBudgetIndex != None:
-                hasOneBudgetField = firstBudgetIndex == lastBudgetIndex
-                planningStartYear = self.current_budget_year + firstBudgetIndex
-                # set first budget year as planning start
-                project.planningStartYear = planningStartYear
-                # First date of the first month
-                project.estPlanningStart = datetime.datetime(planningStartYear, 1, 1)
-                project.frameEstPlanningStart = project.estPlanningStart
-                # middle of year if only 1 budget in excel, else end of year
-                project.estPlanningEnd = (
-                    datetime.datetime(planningStartYear, 6, 30)
-                    if hasOneBudgetField
-                    else datetime.datetime(planningStartYear, 12, 31)
-                )
-                project.frameEstPlanningEnd = project.estPlanningEnd
-                # same year as planning if 1 budget in excel, else the same year as last budget in excel
-                project.constructionEndYear = (
-                    (planningStartYear)
-                    if hasOneBudgetField
-                    else (self.current_budget_year + lastBudgetIndex)
-                )
+            # 1 month after planning ends if 1 budget field, else 1 year after planning
+            fields["estConstructionStart"] = (
+                datetime.datetime(planningStartYear, 7, 1)
+                if hasOneBudgetField
+                else datetime.datetime(planningStartYear + 1, 1, 1)
+            )
+            fields["frameEstConstructionStart"] = fields["estConstructionStart"]
 
-                # 1 month after planning ends if 1 budget field, else 1 year after planning
-                project.estConstructionStart = (
-                    datetime.datetime(planningStartYear, 7, 1)
-                    if hasOneBudgetField
-                    else datetime.datetime(planningStartYear + 1, 1, 1)
-                )
-                project.frameEstConstructionStart = project.estConstructionStart
+            fields["estConstructionEnd"] = datetime.datetime(
+                fields["constructionEndYear"], 12, 31
+            )
+            fields["frameEstConstructionEnd"] = fields["estConstructionEnd"]
+
+        fields["programmed"] = budget_sum > 0
+        fields["category"] = category
+        fields["effectHousing"] = effectHousing
+        # if value already converted into float, convert it back to string to void validation error
+        fields["costForecast"] = str(costForecast) if costForecast != None else None
+        fields["hkrId"] = (
+            pwNumber
+            if pwNumber != "none" and pwNumber != "?" and pwNumber != "x"
+            else None
+        )
 
-                project.estConstructionEnd = datetime.datetime(
-                    project.constructionEndYear, 12, 31
-                )
-                project.frameEstConstructionEnd = project.estConstructionEnd
-
-            project.programmed = budget_sum > 0
-            project.category = category
-            project.effectHousing = effectHousing
-            # if value already converted into float, convert it back to string to void validation error
-            project.costForecast = str(costForecast) if costForecast != None else None
-            project_financials = []
-            for index, budgetValue in enumerate(budget_list):
-                project_financials.append(
-                    ProjectFinancial(
-                        year=self.current_budget_year + index,
-                        project_id=project.id,
-                        value=str(budgetValue) if budgetValue != None else None,
-                        forFrameView=False,
-                    )
-                )
-                project_financials.append(
-                    ProjectFinancial(
-                        year=self.current_budget_year + index,
-                        project_id=project.id,
-                        value=str(budgetValue) if budgetValue != None else None,
-                        forFrameView=True,
-                    )
+        key = self.plan.add_project(
+            name=name,
+            project_class=project_class,
+            project_location=project_location,
+            project_group=project_group,
+            **fields,
+        )
+        for index, budgetValue in enumerate(budget_list):
+            for forFrameView in (False, True):
+                self.plan.add_financial(
+                    key,
+                    year=self.current_budget_year + index,
+                    value=str(budgetValue) if budgetValue != None else None,
+                    for_frame_view=forFrameView,
                 )
 
-            ProjectFinancialService.update_or_create_bulk(
-                project_financials=project_financials
-            )
-            project.hkrId = (
-                pwNumber
-                if pwNumber != "none" and pwNumber != "?" and pwNumber != "x"
-                else None
-            )
-            project.save()
-        except Exception as e:
-            print(f"Project {name} handling ended in exception")
-            print(e)
-
         if notes != "None" and notes != "?":
-            NoteService.create(
-                content=notes,
-                project=project,
-                byPerson=None,
-            )
+            self.plan.add_note(key, notes)
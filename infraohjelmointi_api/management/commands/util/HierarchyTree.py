@@ -0,0 +1,131 @@
+from django.db import transaction
+from django.db.models import Model
+from django.utils import timezone
+
+from ....models import ProjectClass, ProjectDistrict, ProjectLocation
+from ....services import CacheService
+
+import logging
+
+logger = logging.getLogger("infraohjelmointi_api")
+
+# Fields identifying a node of the hierarchy, the rest of the fields are updated
+KEY_FIELDS = {
+    ProjectClass: ("forCoordinatorOnly", "path"),
+    # the same district is a location under many classes
+    ProjectLocation: ("forCoordinatorOnly", "parentClass", "path"),
+    ProjectDistrict: ("level", "path"),
+}
+
+
+def _value(value):
+    return value.pk if isinstance(value, Model) else value
+
+
+class HierarchyTree:
+    """
+    Project classes, locations and districts held in memory, keyed by path.
+
+    Nodes of a model are loaded from DB once, when the model is first used. get_or_create
+    diffs the node read from excel against the loaded node and plans the node to be created
+    or updated. apply writes the planned nodes in one transaction, so importing the same
+    excel again writes nothing. Nodes missing from the excel are left as they are.
+    """
+
+    def __init__(self) -> None:
+        self.nodes = {}
+        self.created = {}
+        self.updated = {}
+        self.updated_fields = {}
+
+    def get_or_create(self, model, **fields) -> tuple:
+        """Returns the node of the model with given fields and whether it was created"""
+        nodes = self.__get_nodes(model)
+        key = tuple(_value(fields[field]) for field in KEY_FIELDS[model])
+        node = nodes.get(key)
+        if node is None:
+            node = model(**fields)
+            nodes[key] = node
+            self.created.setdefault(model, []).append(node)
+            return node, True
+
+        changed = [
+            field
+            for field, value in fields.items()
+            if _value(getattr(node, model._meta.get_field(field).attname)) != _value(value)
+        ]
+        for field in changed:
+            setattr(node, field, fields[field])
+        if changed and not node._state.adding:
+            self.updated.setdefault(model, {})[node.pk] = node
+            self.updated_fields.setdefault(model, {}).setdefault(node.pk, set()).update(changed)
+        return node, False
+
+    def has_changes(self) -> bool:
+        return any(self.created.values()) or any(self.updated.values())
+
+    def report(self, details: bool = True) -> list[str]:
+        """Lines describing what apply would write, the amounts only when not details"""
+        lines = []
+        if details:
+            for model in KEY_FIELDS:
+                for node in self.created.get(model, []):
+                    lines.append(f"Create {model.__name__} '{node.path}'")
+                for pk, node in self.updated.get(model, {}).items():
+                    fields = ", ".join(sorted(self.updated_fields[model][pk]))
+                    lines.append(f"Update {model.__name__} '{node.path}': {fields}")
+        for model in KEY_FIELDS:
+            lines.append(
+                f"{model.__name__}: {len(self.created.get(model, []))} to create, "
+                f"{len(self.updated.get(model, {}))} to update"
+            )
+        return lines
+
+    @transaction.atomic
+    def apply(self) -> None:
+        """Writes the created and updated nodes to DB"""
+        now = timezone.now()
+        for model in KEY_FIELDS:
+            model.objects.bulk_create(self.created.get(model, []), batch_size=500)
+            updated = list(self.updated.get(model, {}).values())
+            if not updated:
+                continue
+            for node in updated:
+                node.updatedDate = now
+            fields = set().union(*self.updated_fields[model].values())
+            model.objects.bulk_update(
+                updated, fields=sorted(fields | {"updatedDate"}), batch_size=500
+            )
+
+        if self.has_changes():
+            # once for all nodes, what bump_hierarchy_data_version and mark_planning_snapshot_dirty
+            # would do for each node
+            transaction.on_commit(CacheService.bump_data_version)
+            transaction.on_commit(CacheService.mark_planning_snapshot_dirty)
+            if self.created.get(ProjectClass) or self.updated.get(ProjectClass):
+                # the class paths of the restricted programmers are cached
+                transaction.on_commit(CacheService.invalidate_class_access)
+
+        for model in KEY_FIELDS:
+            logger.info(
+                f"Hierarchy import: {len(self.created.get(model, []))} {model.__name__} created, "
+                f"{len(self.updated.get(model, {}))} updated"
+            )
+        self.created, self.updated, self.updated_fields = {}, {}, {}
+
+    def __get_nodes(self, model) -> dict:
+        if model not in self.nodes:
+            nodes = {}
+            for node in model.objects.order_by("createdDate"):
+                key = tuple(
+                    getattr(node, model._meta.get_field(field).attname)
+                    for field in KEY_FIELDS[model]
+                )
+                if key in nodes:
+                    logger.warning(
+                        f"Multiple {model.__name__} found with path '{node.path}', using the oldest"
+                    )
+                    continue
+                nodes[key] = node
+            self.nodes[model] = nodes
+        return self.nodes[model]
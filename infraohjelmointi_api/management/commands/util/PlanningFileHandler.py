@@ -2,8 +2,9 @@ import datetime
 from openpyxl import load_workbook
 import re
 from .hierarchy import buildHierarchiesAndProjects, getColor, MAIN_CLASS_COLOR
-from ....services import PersonService, ProjectService, NoteService, ProjectPhaseService
+from ....services import PersonService, ProjectPhaseService
 from . import IExcelFileHandler
+from .ProjectImportPlan import ProjectImportPlan
 from django.contrib import messages
 from io import BytesIO
 import logging
@@ -19,6 +20,12 @@ class PlanningFileHandler(IExcelFileHandler):
 
         self.planningYear1 = None
         self.phaseColumnIndex = None
+        self.phases = {
+            value: ProjectPhaseService.get_by_value(value=value)
+            for value in ("programming", "proposal")
+        }
+        self.persons = {}
+        self.plan = ProjectImportPlan()
 
     def proceed_with_file(self, excel_path):
         logger.error(
@@ -62,38 +69,42 @@ class PlanningFileHandler(IExcelFileHandler):
             and hex(int(getColor(wb, cel[0].fill.start_color), 16)) == MAIN_CLASS_COLOR
         ][0].value
 
+        self.plan = ProjectImportPlan()
+
         for sheetname in wb.sheetnames:
             logger.debug("\n\nHandling sheet {}\n".format(sheetname))
 
             sheet = wb[sheetname]
-            rows = list(sheet.rows)
+            headers = list(sheet.iter_rows(max_row=2))
 
-            for cellIndex, cell in enumerate(rows[1]):
+            for cellIndex, cell in enumerate(headers[1]):
                 # looking for 1st the month in the row
                 if str(cell.value) == "1":
                     # month is found, the field above should be year field
                     self.planningYear1 = (
-                        int(rows[0][cellIndex].value)
-                        if str(rows[0][cellIndex].value).isnumeric()
+                        int(headers[0][cellIndex].value)
+                        if str(headers[0][cellIndex].value).isnumeric()
                         else None
                     )
                     break
             # Finding correct phase column
-            for cellIndex, cell in enumerate(rows[1]):
+            for cellIndex, cell in enumerate(headers[1]):
                 # looking for 1st the month in the row
                 if "vaihe" in str(cell.value).lower():
                     self.phaseColumnIndex = cellIndex
                     break
 
+            # rows are read lazily, projects are only planned while reading
             buildHierarchiesAndProjects(
                 wb=wb,
-                rows=rows,
+                rows=sheet.rows,
                 skipables=skipables,
                 main_class=main_class,
                 project_handler=self.proceed_with_project_row,
             )
 
-        logger.info("\n\nTotal rows handled  {}\n".format(len(rows)))
+        logger.info("\n\nTotal projects handled  {}\n".format(len(self.plan.projects)))
+        self.plan.apply()
 
     def proceed_with_project_row(
         self, row, name, project_class, project_location, project_group
@@ -102,7 +113,7 @@ class PlanningFileHandler(IExcelFileHandler):
         sapNetwork = row[2].value
         projectManager = row[4].value.strip() if row[4].value else None
         responsiblePerson = (
-            PersonService.get_or_create_by_last_name(lastName=projectManager)[0]
+            self.__get_person(lastName=projectManager)
             if projectManager and projectManager != "?"
             else None
         )
@@ -111,29 +122,15 @@ class PlanningFileHandler(IExcelFileHandler):
         excelPhases = str(row[self.phaseColumnIndex].value).strip().lower().split(" ")
         logger.debug("Project '{}' has PW id '{}'".format(name, pwNumber))
 
-        try:
-            project = ProjectService.get(
-                name=name,
-                projectClass=project_class,
-                projectLocation=project_location,
-                projectGroup=project_group,
-            )
-        except:
-            project = ProjectService.create(
-                name=name,
-                projectClass=project_class,
-                description="Kuvaus puuttuu",
-                projectLocation=project_location,
-                projectGroup=project_group,
-            )
+        fields = {}
         # Check if excel file has any phases, set project phase to programming if true
         # Asked by Vesa
         if any(phase in excelPhases for phase in ["s", "m", "p", "k", "v", "t"]):
-            project.phase = ProjectPhaseService.get_by_value(value="programming")
-            project.programmed = True
+            fields["phase"] = self.phases["programming"]
+            fields["programmed"] = True
         else:
-            project.phase = ProjectPhaseService.get_by_value(value="proposal")
-            project.programmed = False
+            fields["phase"] = self.phases["proposal"]
+            fields["programmed"] = False
 
         # Setting timeline dates according to the monthly cells in planning excel
         # First year planning, next 3 years construction by default
@@ -142,48 +139,57 @@ class PlanningFileHandler(IExcelFileHandler):
             # Check if this project is programmed for any month
             if str(cell.value) == "1":
                 if self.planningYear1 != None:
-                    project.planningStartYear = self.planningYear1
+                    fields["planningStartYear"] = self.planningYear1
                     # First date of the first month given an year
-                    project.estPlanningStart = datetime.datetime(
+                    fields["estPlanningStart"] = datetime.datetime(
                         self.planningYear1, 1, 1
                     )
                     # Last date of last month given an year
-                    project.estPlanningEnd = datetime.datetime(
+                    fields["estPlanningEnd"] = datetime.datetime(
                         self.planningYear1, 12, 31
                     )
-                    project.constructionEndYear = self.planningYear1 + 3
+                    fields["constructionEndYear"] = self.planningYear1 + 3
                     # First date of First month given an year
-                    project.estConstructionStart = datetime.datetime(
+                    fields["estConstructionStart"] = datetime.datetime(
                         self.planningYear1 + 1, 1, 1
                     )
                     # Last date of last month given an year
-                    project.estConstructionEnd = datetime.datetime(
+                    fields["estConstructionEnd"] = datetime.datetime(
                         self.planningYear1 + 3, 12, 31
                     )
                 break
 
-        project.sapProject = (
+        fields["sapProject"] = (
             str(sapNumber).strip()  # should start with number
             if sapNumber != None and re.match("^\d+", str(sapNumber).strip())
             else None
         )
-        project.sapNetwork = (
+        fields["sapNetwork"] = (
             [str(sapNetwork).strip()]  # should start with number
             if sapNetwork != None and re.match("^\d+", str(sapNetwork).strip())
             else None
         )
-        project.hkrId = (
+        fields["hkrId"] = (
             pwNumber
             if pwNumber != "none" and pwNumber != "?" and pwNumber != "x"
             else None
         )
-        project.personPlanning = responsiblePerson
-        project.save()
+        fields["personPlanning"] = responsiblePerson
+        key = self.plan.add_project(
+            name=name,
+            project_class=project_class,
+            project_location=project_location,
+            project_group=project_group,
+            **fields,
+        )
 
         notes = str((row[28].value if len(row) > 28 else "")).strip()
         if notes != "None" and notes != "?":
-            NoteService.create(
-                content=notes,
-                project=project,
-                byPerson=None,
-            )
+            self.plan.add_note(key, notes)
+
+    def __get_person(self, lastName: str):
+        if lastName not in self.persons:
+            self.persons[lastName] = PersonService.get_or_create_by_last_name(
+                lastName=lastName
+            )[0]
+        return self.persons[lastName]
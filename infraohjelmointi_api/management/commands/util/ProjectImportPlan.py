@@ -0,0 +1,225 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from ....models import (
+    Note,
+    Project,
+    ProjectFinancial,
+    SapCost,
+    SapCurrentYear,
+    TalpaProjectOpening,
+)
+from ....services import CacheService, EventStreamService, ProjectFinancialService
+
+import logging
+
+logger = logging.getLogger("infraohjelmointi_api")
+
+# Project.clean strips these, saving the project writes them too
+CLEANED_FIELDS = [
+    "name",
+    "description",
+    "address",
+    "postalCode",
+    "city",
+    "entityName",
+    "neighborhood",
+    "comments",
+    "delays",
+]
+
+
+def _is_valid_sap_project(value) -> bool:
+    return value is not None and value.strip() not in ("", "0")
+
+
+class ProjectImportPlan:
+    """
+    Projects, finances and notes read from excel rows, written to DB with bulk statements.
+
+    Rows are planned by the natural key of the project: name, class, location and group.
+    A later row of the same project overrides the values of the earlier row, the same way as
+    saving the project again row by row would. apply writes the plan in one transaction and
+    does once for all projects what the Project post_save signals would do for each project.
+    """
+
+    def __init__(self) -> None:
+        self.projects = {}
+        self.financials = {}
+        self.notes = {}
+
+    @staticmethod
+    def key(name, project_class, project_location, project_group) -> tuple:
+        return (
+            name,
+            project_class.id if project_class else None,
+            project_location.id if project_location else None,
+            project_group.id if project_group else None,
+        )
+
+    def add_project(
+        self, name, project_class, project_location, project_group, **fields
+    ) -> tuple:
+        """Plans given field values for the project, returns the key of the project"""
+        key = self.key(name, project_class, project_location, project_group)
+        planned = self.projects.setdefault(
+            key,
+            {
+                "name": name,
+                "projectClass": project_class,
+                "projectLocation": project_location,
+                "projectGroup": project_group,
+                "fields": {},
+            },
+        )
+        planned["fields"].update(fields)
+        return key
+
+    def add_financial(self, key: tuple, year: int, value, for_frame_view: bool) -> None:
+        self.financials.setdefault(key, {})[(year, for_frame_view)] = value
+
+    def add_note(self, key: tuple, content: str) -> None:
+        self.notes.setdefault(key, []).append(content)
+
+    @transaction.atomic
+    def apply(self) -> dict:
+        """Writes the planned projects, finances and notes to DB.\n
+        Returns the amounts of created and updated projects and the keys of skipped projects.
+        """
+        existing = self.__get_existing_projects()
+        foreign_keys = [
+            field.name for field in Project._meta.fields if field.is_relation
+        ]
+
+        projects, created, updated, skipped = {}, [], [], []
+        # the class, location and group of the updated projects before the import
+        previous = []
+        update_fields = set(CLEANED_FIELDS)
+        stale_sap_project_ids = []
+        now = timezone.now()
+        # the default of priority is a query, made once instead of once per new project
+        default_priority = Project.get_default_projectPriority()
+        for key, planned in self.projects.items():
+            project = existing.get(key)
+            old_sap_project = project.sapProject if project else None
+            if project is not None:
+                previous.append(
+                    (project.projectClass_id, project.projectLocation_id, project.projectGroup_id)
+                )
+            if project is None:
+                project = Project(
+                    name=planned["name"],
+                    description="Kuvaus puuttuu",
+                    projectClass=planned["projectClass"],
+                    projectLocation=planned["projectLocation"],
+                    projectGroup=planned["projectGroup"],
+                    priority=default_priority,
+                )
+            for field, value in planned["fields"].items():
+                setattr(project, field, value)
+
+            try:
+                # Relations are model instances already, their existence needs no query per project
+                project.full_clean(
+                    exclude=foreign_keys, validate_unique=False, validate_constraints=False
+                )
+            except ValidationError as e:
+                logger.error(f"Project {planned['name']} handling ended in exception: {e}")
+                skipped.append(key)
+                continue
+
+            projects[key] = project
+            if key in existing:
+                project.updatedDate = now
+                update_fields.update(planned["fields"].keys())
+                updated.append(project)
+                # IO-777: SAP costs of the old SAP project are stale
+                if _is_valid_sap_project(old_sap_project) and (
+                    not _is_valid_sap_project(project.sapProject)
+                    or old_sap_project != project.sapProject
+                ):
+                    stale_sap_project_ids.append(project.id)
+            else:
+                created.append(project)
+
+        Project.objects.bulk_create(created, batch_size=500)
+        Project.objects.bulk_update(
+            updated, fields=sorted(update_fields | {"updatedDate"}), batch_size=500
+        )
+        if stale_sap_project_ids:
+            SapCost.objects.filter(project_id__in=stale_sap_project_ids).delete()
+            SapCurrentYear.objects.filter(project_id__in=stale_sap_project_ids).delete()
+
+        ProjectFinancialService.update_or_create_bulk(
+            project_financials=[
+                ProjectFinancial(
+                    year=year,
+                    project_id=projects[key].id,
+                    value=value,
+                    forFrameView=for_frame_view,
+                )
+                for key, financials in self.financials.items()
+                if key in projects
+                for (year, for_frame_view), value in financials.items()
+            ]
+        )
+        Note.objects.bulk_create(
+            [
+                Note(content=content, project=projects[key], updatedBy=None)
+                for key, contents in self.notes.items()
+                if key in projects
+                for content in contents
+            ],
+            batch_size=500,
+        )
+
+        # Locked Talpa openings get the project number, see update_talpa_status_on_sap_project
+        TalpaProjectOpening.objects.filter(
+            project_id__in=[project.id for project in projects.values() if project.sapProject],
+            status="sent_to_talpa",
+        ).update(status="project_number_opened")
+
+        # updated projects are invalidated whether programmed or not, the import may have
+        # taken them out of the programme
+        invalidated = created + updated
+        if invalidated:
+            transaction.on_commit(lambda: CacheService.invalidate_projects(invalidated, previous))
+            # one event for the batch instead of a project-update per project
+            transaction.on_commit(
+                lambda: EventStreamService.send_event(
+                    "project",
+                    "projects-update",
+                    {"projects": [str(project.id) for project in invalidated]},
+                )
+            )
+
+        logger.info(
+            f"Project import: {len(created)} projects created, {len(updated)} updated, "
+            f"{len(skipped)} skipped"
+        )
+        return {"created": len(created), "updated": len(updated), "skipped": skipped}
+
+    def __get_existing_projects(self) -> dict:
+        """Existing projects by key, a key matching many projects gets a new project"""
+        projects_by_key = {}
+        for project in Project.objects.filter(
+            name__in={planned["name"] for planned in self.projects.values()}
+        ):
+            key = (
+                project.name,
+                project.projectClass_id,
+                project.projectLocation_id,
+                project.projectGroup_id,
+            )
+            projects_by_key.setdefault(key, []).append(project)
+
+        existing = {}
+        for key, projects in projects_by_key.items():
+            if key not in self.projects:
+                continue
+            if len(projects) > 1:
+                logger.warning(f"Multiple projects found for '{key[0]}', creating a new project")
+                continue
+            existing[key] = projects[0]
+        return existing
@@ -6,6 +6,9 @@ from ....services import (
     ProjectGroupService,
 )
 import re
+from itertools import islice
+from weakref import WeakKeyDictionary
+from .HierarchyTree import HierarchyTree
 from .openpyxl_theme_and_tint_to_rgb import theme_and_tint_to_hex
 import string
 
@@ -39,15 +42,25 @@ SUURPIIRI = "suurpiiri"
 OSTERSUNDOM = "östersundom"
 OSTERSUNDOMIN_SUURPIIRI = "Östersundomin suurpiiri"
 
+# theme colors resolved once per workbook, resolving parses the theme of the workbook
+_theme_colors = WeakKeyDictionary()
+
+
 def getColor(wb, color_object) -> str:
-    try:
-        color_in_hex = theme_and_tint_to_hex(
-            wb=wb, theme=color_object.theme, tint=color_object.tint
-        )
-    except:
-        color_in_hex = color_object.rgb
+    if color_object.type != "theme":
+        return color_object.rgb
+
+    colors = _theme_colors.setdefault(wb, {})
+    key = (color_object.theme, color_object.tint)
+    if key not in colors:
+        try:
+            colors[key] = theme_and_tint_to_hex(
+                wb=wb, theme=color_object.theme, tint=color_object.tint
+            )
+        except:
+            colors[key] = color_object.rgb
 
-    return color_in_hex
+    return colors[key]
 
 
 def hex_to_rgb(hex_in_string):
@@ -63,13 +76,21 @@ def print_with_bg_color(value, hex_color):
 def buildHierarchies(
     wb,
     rows,
-):
+    tree: HierarchyTree = None,
+    verbose: bool = False,
+) -> HierarchyTree:
+    """Reads class and location hierarchies of the excel rows into the tree.\n
+    Nothing is written to DB until the returned tree is applied.
+    """
+    tree = tree or HierarchyTree()
     # stack for keeping track of class
     pv_class_stack: ProjectClass = []
     cv_class_stack: ProjectClass = []
     cv_color_stack: hex = []
+    related_to_district: ProjectLocation = None
 
-    for row in rows[2:]:
+    # rows can be a lazy iterator of a read only worksheet
+    for row in islice(rows, 2, None):
         if len(row) < 7:
             continue
 
@@ -98,6 +119,8 @@ def buildHierarchies(
             if pv_cell_color_hex == MAIN_CLASS_COLOR:
                 pv_class_stack.clear()
                 pv_main_class = proceedWithClass(
+                    tree=tree,
+                    verbose=verbose,
                     code=pv_code,
                     name=pv_name,
                     cell_color=pv_cell_color,
@@ -111,6 +134,8 @@ def buildHierarchies(
                 cv_class_stack.clear()
                 cv_class_stack.append(
                     proceedWithClass(
+                        tree=tree,
+                        verbose=verbose,
                         code=cv_code,
                         name=cv_name,
                         for_coordinator_only=True,
@@ -128,6 +153,8 @@ def buildHierarchies(
             if pv_cell_color_hex == CLASS_COLOR:
                 pv_class_stack = pv_class_stack[0:1]  # remove siblings
                 pv_class = proceedWithClass(
+                    tree=tree,
+                    verbose=verbose,
                     code=None,
                     name=pv_name,
                     parent=pv_class_stack[-1],
@@ -177,6 +204,8 @@ def buildHierarchies(
                 cv_class_stack = cv_class_stack[0:end_index]  # remove siblings
                 cv_class_stack.append(
                     proceedWithClass(
+                        tree=tree,
+                        verbose=verbose,
                         code=cv_code,
                         name=cv_name,
                         parent=cv_class_stack[-1],
@@ -198,6 +227,8 @@ def buildHierarchies(
                 elif pv_cell_color_hex == OTHER_CLASSIFICATION_COLOR:
                     pv_class_stack = pv_class_stack[0:3]  # remove siblings
                 pv_class = proceedWithClass(
+                    tree=tree,
+                    verbose=verbose,
                     code=None,
                     name=pv_name,
                     parent=pv_class_stack[-1],
@@ -208,6 +239,8 @@ def buildHierarchies(
                 # if subslcass is also a district
                 if SUURPIIRI in pv_name.lower() or OSTERSUNDOM in pv_name.lower():
                     related_to_district = proceedWithDistrict(
+                        tree=tree,
+                        verbose=verbose,
                         code=None,
                         name=pv_name,
                         parent_class=pv_class_stack[-1],
@@ -269,6 +302,8 @@ def buildHierarchies(
                 cv_color_stack.append(cv_cell_color_hex)
                 cv_class_stack = cv_class_stack[0:end_index]  # remove siblings
                 cv_class = proceedWithClass(
+                        tree=tree,
+                        verbose=verbose,
                         code=cv_code,
                         name=cv_name,
                         parent=cv_class_stack[-1],
@@ -283,6 +318,8 @@ def buildHierarchies(
 
             elif cv_cell_color_hex in [DISTRICT_COLOR]:
                 proceedWithDistrict(
+                    tree=tree,
+                    verbose=verbose,
                     code=cv_code,
                     name=pv_name,
                     parent_class=cv_class_stack[-1],
@@ -296,6 +333,8 @@ def buildHierarchies(
             related_to_district = None
             if pv_cell_color_hex in [DISTRICT_COLOR]:
                 related_to_district = proceedWithDistrict(
+                    tree=tree,
+                    verbose=verbose,
                     code=None,
                     name=pv_name,
                     parent_class=pv_class_stack[-1],
@@ -315,6 +354,8 @@ def buildHierarchies(
                 cv_color_stack.append(cv_cell_color_hex)
                 cv_class_stack = cv_class_stack[0:end_index]  # remove siblings
                 proceedWithDistrict(
+                    tree=tree,
+                    verbose=verbose,
                     code=cv_code,
                     name=cv_name,
                     parent_class=cv_class_stack[-1],
@@ -324,6 +365,8 @@ def buildHierarchies(
                     row_number=cv_cell.row,
                 )
 
+    return tree
+
 
 def getEndIndex(color_list: list, break_point: hex, check_point: list):
     for i in range(0, len(color_list)):
@@ -353,6 +396,7 @@ def sanitizeString(data: str = None):
 
 
 def proceedWithClass(
+    tree: HierarchyTree,
     code: str | None,
     name: str,
     cell_color: str,
@@ -361,6 +405,7 @@ def proceedWithClass(
     for_coordinator_only: bool = False,
     related_to: ProjectClass = None,
     relatedLocation: ProjectLocation = None,
+    verbose: bool = False,
 ) -> ProjectClass:
     name = sanitizeString(data=name)
 
@@ -385,29 +430,33 @@ def proceedWithClass(
         # Don't add code (A, B, C, ...) for OTHER_CLASSIFICATION_COLOR's path
         path = raw_name
 
-    print_with_bg_color(
-        "'{}' is a {} ({}) at line {}. Its class path is '{}'. It is related to '{}' and is for coordinator '{}'".format(
-            name,
-            color_map[cell_color],
+    if verbose:
+        print_with_bg_color(
+            "'{}' is a {} ({}) at line {}. Its class path is '{}'. It is related to '{}' and is for coordinator '{}'".format(
+                name,
+                color_map[cell_color],
+                cell_color,
+                row_number,
+                path if parent == None else "/".join([parent.path, path]),
+                related_to.id if related_to else None,
+                for_coordinator_only,
+            ),
             cell_color,
-            row_number,
-            path if parent == None else "/".join([parent.path, path]),
-            related_to.id if related_to else None,
-            for_coordinator_only,
-        ),
-        cell_color,
-    )
-    return ProjectClassService.get_or_create(
+        )
+    fields = {"relatedLocation": relatedLocation} if relatedLocation else {}
+    return tree.get_or_create(
+        ProjectClass,
         name=name,
         parent=parent,
         path=path if parent == None else "/".join([parent.path, path]),
         forCoordinatorOnly=for_coordinator_only,
         relatedTo=related_to,
-        relatedLocation=relatedLocation,
+        **fields,
     )[0]
 
 
 def proceedWithDistrict(
+    tree: HierarchyTree,
     code: str,
     name: str,
     parent_class: ProjectClass,
@@ -415,6 +464,7 @@ def proceedWithDistrict(
     row_number: int,
     for_coordinator_only: bool = False,
     related_to: ProjectLocation = None,
+    verbose: bool = False,
 ) -> ProjectLocation:
     district = name.split(" ")[0].strip()
     path = district
@@ -433,20 +483,22 @@ def proceedWithDistrict(
             name,
         ).strip()
 
-    print_with_bg_color(
-        "'{}' is a {} ({}) at line {}. Its class path is '{}'. It is related to '{}' and is for coordinator '{}'".format(
-            district,
-            color_map[cell_color],
+    if verbose:
+        print_with_bg_color(
+            "'{}' is a {} ({}) at line {}. Its class path is '{}'. It is related to '{}' and is for coordinator '{}'".format(
+                district,
+                color_map[cell_color],
+                cell_color,
+                row_number,
+                path,
+                related_to.id if related_to else None,
+                for_coordinator_only,
+            ),
             cell_color,
-            row_number,
-            path,
-            related_to.id if related_to else None,
-            for_coordinator_only,
-        ),
-        cell_color,
-    )
+        )
     # make this district as related to class for districts in coordinator view
-    return ProjectLocationService.get_or_create(
+    return tree.get_or_create(
+        ProjectLocation,
         name=district,
         parentClass=parent_class,
         parent=None,
@@ -476,7 +528,7 @@ def buildHierarchiesAndProjects(
     if main_class:
         # remove spaces between numbers
         main_class = str(main_class).lower()
-        main_class_array = main_class.split(" ")[0,1]
+        main_class_array = main_class.split(" ")[0:2]
 
         # code structure is "8 01" including space
         class_code = "{} {}".format(main_class_array[0], main_class_array[1]).strip()
@@ -500,7 +552,8 @@ def buildHierarchiesAndProjects(
     indention = 0
     type = "MAIN CLASS"
 
-    for row in rows[2:]:
+    # rows can be a lazy iterator of a read only worksheet
+    for row in islice(rows, 2, None):
         # If empty row, skip
         if len(row) < 1:
             continue
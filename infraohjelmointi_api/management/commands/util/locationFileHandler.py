@@ -1,8 +1,16 @@
-from infraohjelmointi_api.services import ProjectDistrictService
+from itertools import islice
 
+from infraohjelmointi_api.models import ProjectDistrict
+from .HierarchyTree import HierarchyTree
 
-def add_locations(rows):
-    for row in rows[1:]:
+
+def add_locations(rows, tree: HierarchyTree = None, verbose: bool = False) -> HierarchyTree:
+    """Reads districts, divisions and sub divisions of the excel rows into the tree.\n
+    Nothing is written to DB until the returned tree is applied.
+    """
+    tree = tree or HierarchyTree()
+    # rows can be a lazy iterator of a read only worksheet
+    for row in islice(rows, 1, None):
         district = row[1].value
         division = row[2].value
         subDivision = row[3].value
@@ -19,26 +27,34 @@ def add_locations(rows):
             subSubClassParentPath = path
 
 
-        district = ProjectDistrictService.get_or_create(
+        district = tree.get_or_create(
+            ProjectDistrict,
             name=district,
             parent=None,
             path=district,
             level="district",
             )[0]
-        print(district.name)
+        if verbose:
+            print(district.name)
         if subClassParentPath is not None:
-            division = ProjectDistrictService.get_or_create(
+            division = tree.get_or_create(
+                ProjectDistrict,
                 name=division,
                 parent=district,
                 path=subClassParentPath,
                 level="division",
                 )[0]
-            print(division.name)
+            if verbose:
+                print(division.name)
             if subSubClassParentPath is not None:
-                subsubDistrict = ProjectDistrictService.get_or_create(
+                subsubDistrict = tree.get_or_create(
+                    ProjectDistrict,
                     name=subDivision,
                     parent=division,
                     path=path,
                     level="subDivision",
                     )[0]
-                print(subsubDistrict.name)
+                if verbose:
+                    print(subsubDistrict.name)
+
+    return tree
@@ -0,0 +1,59 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...services import CacheService, CacheWarmupService
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the most read cache entries of a year in priority order: frame budgets, "
+        + "coordinator and planning class and location sums, the planning snapshot and the lookup "
+        + "lists. Entries already cached are kept and reported as warm. Run after deploys and "
+        + "other operations that empty the cache."
+        + "\nUsage: python manage.py warmcache [--year 2026] [--rate 20]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--year",
+            type=int,
+            default=date.today().year,
+            help="First year of the warmed views, defaults to the current year. Usage: --year 2026",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=getattr(settings, "CACHE_WARMUP_RATE", 20),
+            help="Cache entries rebuilt per second at most, 0 for no limit. "
+            + "Defaults to CACHE_WARMUP_RATE. Usage: --rate 20",
+        )
+
+    def handle(self, *args, **options):
+        if options["rate"] < 0:
+            raise CommandError("--rate can't be negative")
+        if not CacheService.is_available():
+            self.stdout.write(self.style.WARNING("Cache not in use, nothing to warm up"))
+            return
+
+        report = CacheWarmupService(year=options["year"], rate=options["rate"]).warm()
+        for entry in report:
+            self.stdout.write(
+                "{}: {} keys, {} warm, {} rebuilt in {:.2f} s".format(
+                    entry["step"],
+                    entry["keys"],
+                    entry["warm"],
+                    entry["keys"] - entry["warm"],
+                    entry["seconds"],
+                )
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Warm ratio before warm-up {:.0%} of {} keys, cache warmed for {}".format(
+                    CacheWarmupService.warm_ratio(report),
+                    sum(entry["keys"] for entry in report),
+                    options["year"],
+                )
+            )
+        )
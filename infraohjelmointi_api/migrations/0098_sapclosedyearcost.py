@@ -0,0 +1,30 @@
+# Generated by Django 4.2.26 on 2026-10-19 17:31
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('infraohjelmointi_api', '0097_auto_20260326_1011'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SapClosedYearCost',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('sap_id', models.CharField(max_length=30)),
+                ('year', models.IntegerField()),
+                ('project_task_costs', models.DecimalField(decimal_places=3, default=0.0, max_digits=20)),
+                ('production_task_costs', models.DecimalField(decimal_places=3, default=0.0, max_digits=20)),
+                ('closed', models.BooleanField(default=True)),
+                ('createdDate', models.DateTimeField(auto_now_add=True)),
+                ('updatedDate', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('sap_id', 'year')},
+            },
+        ),
+    ]
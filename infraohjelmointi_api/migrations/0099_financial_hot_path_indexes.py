@@ -0,0 +1,51 @@
+# Generated by Django 4.2.26 on 2026-10-19 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('infraohjelmointi_api', '0098_sapclosedyearcost'),
+    ]
+
+    operations = [
+        # Superseded by idx_pf_frame_year and idx_pf_positive_frame_year
+        migrations.RemoveIndex(
+            model_name='projectfinancial',
+            name='idx_projectfinancial_frameview',
+        ),
+        # Superseded by idx_project_class_programmed
+        migrations.RemoveIndex(
+            model_name='project',
+            name='idx_project_class',
+        ),
+        migrations.AddIndex(
+            model_name='projectfinancial',
+            index=models.Index(fields=['project', 'forFrameView', 'year'], include=('value',), name='idx_pf_project_frame_year'),
+        ),
+        migrations.AddIndex(
+            model_name='projectfinancial',
+            index=models.Index(fields=['forFrameView', 'year'], include=('project', 'value'), name='idx_pf_frame_year'),
+        ),
+        migrations.AddIndex(
+            model_name='projectfinancial',
+            index=models.Index(condition=models.Q(('value__gt', 0)), fields=['forFrameView', 'year', 'project'], name='idx_pf_positive_frame_year'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['projectClass', 'programmed'], name='idx_project_class_programmed'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['projectLocation', 'programmed'], name='idx_project_loc_programmed'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['projectGroup', 'programmed'], name='idx_project_group_programmed'),
+        ),
+        migrations.AddIndex(
+            model_name='sapcurrentyear',
+            index=models.Index(fields=['project', 'year'], name='idx_sapcurrentyear_proj_year'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.26 on 2026-10-19 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('infraohjelmointi_api', '0099_financial_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['createdDate', 'id'], name='idx_auditlog_created'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['project', 'createdDate'], name='idx_auditlog_project_created'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['actor', 'createdDate'], name='idx_auditlog_actor_created'),
+        ),
+    ]
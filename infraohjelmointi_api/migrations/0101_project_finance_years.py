@@ -0,0 +1,72 @@
+# Generated by Django 4.2.26 on 2026-10-19 20:10
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def populate_finance_years(apps, schema_editor):
+    Project = apps.get_model("infraohjelmointi_api", "Project")
+    ProjectFinancial = apps.get_model("infraohjelmointi_api", "ProjectFinancial")
+
+    def finance_year(for_frame_view, order_by):
+        return Subquery(
+            ProjectFinancial.objects.filter(
+                project=OuterRef("pk"), forFrameView=for_frame_view, value__gt=0
+            )
+            .order_by(order_by)
+            .values("year")[:1]
+        )
+
+    Project.objects.update(
+        financesFirstYear=finance_year(False, "year"),
+        financesLastYear=finance_year(False, "-year"),
+        frameFinancesFirstYear=finance_year(True, "year"),
+        frameFinancesLastYear=finance_year(True, "-year"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('infraohjelmointi_api', '0100_auditlog_time_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='financesFirstYear',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='financesLastYear',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='frameFinancesFirstYear',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='frameFinancesLastYear',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_finance_years, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['programmed', 'financesFirstYear'], name='idx_project_fin_first_year'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['programmed', 'financesLastYear'], name='idx_project_fin_last_year'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['programmed', 'frameFinancesFirstYear'], name='idx_project_frame_first_year'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['programmed', 'frameFinancesLastYear'], name='idx_project_frame_last_year'),
+        ),
+    ]
@@ -42,3 +42,11 @@ class AuditLog(models.Model):
     endpoint = models.CharField(max_length=200, blank=False, null=False, editable=False) #endpoint that was called to do the operation
     createdDate = models.DateTimeField(auto_now_add=True, blank=True, editable=False)
     updatedDate = models.DateTimeField(auto_now=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Time windowed and cursor paginated reads, newest first
+            models.Index(fields=['createdDate', 'id'], name='idx_auditlog_created'),
+            models.Index(fields=['project', 'createdDate'], name='idx_auditlog_project_created'),
+            models.Index(fields=['actor', 'createdDate'], name='idx_auditlog_actor_created'),
+        ]
@@ -31,6 +31,14 @@ from overrides import override
 
 
 class Project(models.Model):
+    # maintained for filtering, not part of the API
+    FINANCE_YEAR_FIELDS = [
+        "financesFirstYear",
+        "financesLastYear",
+        "frameFinancesFirstYear",
+        "frameFinancesLastYear",
+    ]
+
     def get_default_projectPriority():
         try:
             return ProjectPriority.objects.get(value__iexact="medium")
@@ -255,6 +263,12 @@ class Project(models.Model):
     )
     otherBudgetOverrunReason = models.TextField(max_length=200, null=True, blank=True)
     onSchedule = models.BooleanField(blank=True, null=True)
+    # First and last year with a nonzero value in the planning and frame finances, kept up to
+    # date by ProjectFinancialService.update_finance_years for the programming year filter
+    financesFirstYear = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    financesLastYear = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    frameFinancesFirstYear = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    frameFinancesLastYear = models.PositiveIntegerField(blank=True, null=True, editable=False)
     createdDate = models.DateTimeField(auto_now_add=True, blank=True)
     updatedDate = models.DateTimeField(auto_now=True, blank=True)
 
@@ -269,7 +283,19 @@ class Project(models.Model):
 
     @override
     def save(self, *args, **kwargs):
+        """
+        Saves an existing project without the FINANCE_YEAR_FIELDS, unless update_fields is given.
+        As with any save with update_fields, saving a project whose row has been deleted raises
+        DatabaseError instead of inserting the row again.
+        """
         self.full_clean()
+        if not self._state.adding and not args and not kwargs.get("force_insert") and kwargs.get("update_fields") is None:
+            # the finance years are updated along with the finances, not from an instance read before
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.FINANCE_YEAR_FIELDS
+            ]
         super(Project, self).save(*args, **kwargs)
 
     @override
@@ -315,6 +341,13 @@ class Project(models.Model):
         ]
         indexes = [
             models.Index(fields=['programmed'], name='idx_project_programmed'),
-            models.Index(fields=['projectClass'], name='idx_project_class'),
+            models.Index(fields=['projectClass', 'programmed'], name='idx_project_class_programmed'),
+            models.Index(fields=['projectLocation', 'programmed'], name='idx_project_loc_programmed'),
+            models.Index(fields=['projectGroup', 'programmed'], name='idx_project_group_programmed'),
+            # Programming year filter
+            models.Index(fields=['programmed', 'financesFirstYear'], name='idx_project_fin_first_year'),
+            models.Index(fields=['programmed', 'financesLastYear'], name='idx_project_fin_last_year'),
+            models.Index(fields=['programmed', 'frameFinancesFirstYear'], name='idx_project_frame_first_year'),
+            models.Index(fields=['programmed', 'frameFinancesLastYear'], name='idx_project_frame_last_year'),
         ]
         ordering = ["-id"]
@@ -39,5 +39,22 @@ class ProjectFinancial(models.Model):
         ]
         indexes = [
             models.Index(fields=['year'], name='idx_projectfinancial_year'),
-            models.Index(fields=['forFrameView'], name='idx_projectfinancial_frameview'),
+            # Finances of a set of projects, value is read from the index
+            models.Index(
+                fields=['project', 'forFrameView', 'year'],
+                include=['value'],
+                name='idx_pf_project_frame_year',
+            ),
+            # Finances of a year window for all projects
+            models.Index(
+                fields=['forFrameView', 'year'],
+                include=['project', 'value'],
+                name='idx_pf_frame_year',
+            ),
+            # Projects with planned finances in a year range (programming year filter)
+            models.Index(
+                fields=['forFrameView', 'year', 'project'],
+                condition=models.Q(value__gt=0),
+                name='idx_pf_positive_frame_year',
+            ),
         ]
@@ -0,0 +1,30 @@
+import uuid
+from django.db import models
+
+
+class SapClosedYearCost(models.Model):
+    """
+    Costs of one SAP id for one finished year.
+
+    Nightly SAP sync fetches costs of closed years only once and sums these totals with
+    the costs of the open years fetched from SAP. A re-opened year (closed=False) is
+    fetched from SAP again until it is re-fetched with the sapclosedyears command.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    sap_id = models.CharField(max_length=30)
+    year = models.IntegerField()
+    project_task_costs = models.DecimalField(
+        default=0.000, decimal_places=3, max_digits=20
+    )
+    production_task_costs = models.DecimalField(
+        default=0.000, decimal_places=3, max_digits=20
+    )
+    closed = models.BooleanField(default=True)
+    createdDate = models.DateTimeField(auto_now_add=True, blank=True)
+    updatedDate = models.DateTimeField(auto_now=True, blank=True)
+
+    class Meta:
+        unique_together = [["sap_id", "year"]]
+
+    def __str__(self):
+        return f"{self.sap_id} {self.year}"
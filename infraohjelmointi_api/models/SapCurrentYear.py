@@ -2,5 +2,7 @@ from django.db import models
 from .SapBaseModel import SapBaseModel
 
 class SapCurrentYear(SapBaseModel):
-    # If you have specific methods or Meta class attributes for SapCurrentYear, define them here
-    pass
\ No newline at end of file
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'year'], name='idx_sapcurrentyear_proj_year'),
+        ]
\ No newline at end of file
@@ -33,6 +33,7 @@ from .SapCost import SapCost
 from .CoordinatorNote import CoordinatorNote
 from .AppStateValueModel import AppStateValue
 from .SapCurrentYear import SapCurrentYear
+from .SapClosedYearCost import SapClosedYearCost
 from .SapBaseModel import SapBaseModel
 from .AuditLog import AuditLog
 from .BudgetOverrunReason import BudgetOverrunReason
@@ -1,6 +1,15 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = "page_size"
+
+
+class CreatedDateCursorPagination(CursorPagination):
+    """Newest first, the position is kept in the cursor instead of counting the skipped rows"""
+
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    ordering = ("-createdDate", "-id")
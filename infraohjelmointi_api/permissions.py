@@ -2,8 +2,10 @@ from infraohjelmointi_api.models.Project import Project
 from infraohjelmointi_api.models.ProjectClass import ProjectClass
 from infraohjelmointi_api.models.ProjectGroup import ProjectGroup
 from infraohjelmointi_api.models import ProjectProgrammer, ClassProgrammerAssignment
+from infraohjelmointi_api.services.CacheService import CacheService
 from rest_framework import permissions
 from django.conf import settings
+from django.db.models import Q
 
 
 def get_restricted_programmer_group_name():
@@ -67,6 +69,71 @@ def target_path_matches_assigned_paths(target_class_path, assigned_paths):
             return True
     return False
 
+
+class ClassPathAccess:
+    """
+    Class paths a restricted programmer may edit, compiled into a trie of path segments.
+
+    A path is allowed when it is an assigned path or a descendant of one, which is answered
+    by walking the segments of the path once.
+    """
+
+    # marks a node whose path is assigned
+    _ASSIGNED = object()
+
+    def __init__(self, assigned_paths):
+        self.paths = sorted(assigned_paths)
+        self._root = {}
+        for path in self.paths:
+            node = self._root
+            for segment in path.split("/"):
+                node = node.setdefault(segment, {})
+            node[self._ASSIGNED] = True
+
+    def __bool__(self):
+        return bool(self.paths)
+
+    def allows(self, target_class_path):
+        """True if target equals or is a descendant of an assigned path."""
+        if not target_class_path:
+            return False
+        node = self._root
+        for segment in target_class_path.split("/"):
+            node = node.get(segment)
+            if node is None:
+                return False
+            if self._ASSIGNED in node:
+                return True
+        return False
+
+    @property
+    def root_paths(self):
+        """Assigned paths that are not descendants of other assigned paths."""
+        return [path for path in self.paths if not self.allows(path.rpartition("/")[0])]
+
+    def as_q(self, path_field="projectClass__path"):
+        """Q object matching the rows whose class path is allowed, an empty match without paths."""
+        query = Q(pk__in=[])
+        for path in self.root_paths:
+            query |= Q(**{path_field: path}) | Q(**{f"{path_field}__startswith": path + "/"})
+        return query
+
+
+def get_restricted_user_class_access(user):
+    """
+    Compiled ClassPathAccess of the restricted programmer.
+
+    The assigned paths are cached per user, the cache is invalidated on changes to class
+    assignments, classes and programmers.
+    """
+    paths = CacheService.get_class_access_paths(user.pk)
+    if paths is None:
+        # read before the query, an invalidation in between must not be overwritten
+        version = CacheService.get_class_access_version()
+        paths = get_restricted_user_assigned_class_paths(user)
+        CacheService.set_class_access_paths(user.pk, paths, version)
+    return ClassPathAccess(paths)
+
 GET = "GET"
 POST = "POST"
 PATCH = "PATCH"
@@ -152,11 +219,14 @@ PROJECT_COORDINATOR_GET_ACTIONS = [
     "get_coordinator_projects",
     "list_for_coordinator",
     "get_projects_for_coordinator",
+    "export_projects_for_coordinator",
 ]
 PROJECT_PLANNING_GET_ACTIONS = [
     "get_projects_by_financial_year",
     "get_project_by_financial_year",
     "get_search_results",
+    "export_projects",
+    "get_planning_snapshot",
 ]
 PROJECT_ALL_GET_ACTIONS = [
     *PROJECT_COORDINATOR_GET_ACTIONS,
@@ -560,6 +630,10 @@ class IsClassProgrammer(permissions.BasePermission):
         """Get project class paths assigned to this user."""
         return get_restricted_user_assigned_class_paths(request.user)
 
+    def get_user_class_access(self, request):
+        """Get the compiled class path access of this user."""
+        return get_restricted_user_class_access(request.user)
+
     def has_permission(self, request, view):
         """Check if user has permission for the action"""
         # Only apply to authenticated users
@@ -629,10 +703,4 @@ class IsClassProgrammer(permissions.BasePermission):
         if not target_class_path:
             return False
 
-        assigned_paths = self.get_user_assigned_classes_paths(request)
-        if not assigned_paths:
-            return False
-
-        return self._target_path_matches_assigned_paths(
-            target_class_path, assigned_paths
-        )
+        return self.get_user_class_access(request).allows(target_class_path)
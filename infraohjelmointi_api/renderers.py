@@ -0,0 +1,71 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional, DRF's renderer is used without it
+    orjson = None
+
+
+# Dates and times are passed through to DRF's encoder so that their formatting
+# (millisecond precision, "Z" suffix) stays the same as with the stock renderer
+_ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS
+    | orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+    if orjson is not None
+    else 0
+)
+_drf_encoder = JSONEncoder()
+
+
+def _orjson_default(obj):
+    return _drf_encoder.default(obj)
+
+
+def fast_json_dumps(data) -> bytes:
+    """
+    Encodes data to the exact bytes DRF's JSONRenderer would produce, using orjson when it is available.
+
+    orjson handles str, int, dict, list, UUID and friends natively. Everything else
+    (Decimal, dates, lazy translations, querysets...) falls back to DRF's encoder. Data
+    orjson refuses to encode (e.g. integers over 64 bits) is handed over to DRF as is.
+
+    Note: floats with an exponent (below 1e-4 or over 1e16) are written without a "+" sign
+    in the exponent. The API responses don't carry such values, sums are integers and
+    decimals are rendered as strings.
+    """
+    if orjson is not None:
+        try:
+            ret = orjson.dumps(data, default=_orjson_default, option=_ORJSON_OPTIONS)
+        except TypeError:
+            pass
+        else:
+            # JSONRenderer escapes these two for JavaScript compatibility
+            return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+
+    return JSONRenderer().render(data)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in replacement for DRF's JSONRenderer for endpoints returning large payloads.
+
+    Opt in per viewset with:
+
+        renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    Indented output (?indent / Accept: application/json; indent=4) is left to DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        return fast_json_dumps(data)
@@ -4,12 +4,15 @@ from rest_framework import serializers
 class DynamicFieldsModelSerializer(serializers.ModelSerializer):
     """
     A ModelSerializer that takes an additional `fields` argument that
-    controls which fields should be displayed.
+    controls which fields should be displayed, and an `expand` argument that
+    controls which nested related objects are displayed in full. The other
+    nested related objects are displayed as their primary keys.
     """
 
     def __init__(self, *args, **kwargs):
-        # Don't pass the 'fields' arg up to the superclass
+        # Don't pass the 'fields' and 'expand' args up to the superclass
         fields = kwargs.pop("fields", None)
+        expand = kwargs.pop("expand", None)
 
         # Instantiate the superclass normally
         super().__init__(*args, **kwargs)
@@ -20,3 +23,28 @@ class DynamicFieldsModelSerializer(serializers.ModelSerializer):
             existing = set(self.fields)
             for field_name in existing - allowed:
                 self.fields.pop(field_name)
+
+        if expand is not None:
+            # Replace the nested serializers that are not expanded with their primary keys,
+            # which are read from the foreign key columns without loading the related objects
+            expanded = set(expand)
+            for field_name, field in list(self.fields.items()):
+                if field_name in expanded or not isinstance(field, serializers.BaseSerializer):
+                    continue
+                pk_kwargs = {"read_only": True}
+                if field.source not in (None, field_name):
+                    pk_kwargs["source"] = field.source
+                if isinstance(field, serializers.ListSerializer):
+                    pk_kwargs["many"] = True
+                self.fields[field_name] = serializers.PrimaryKeyRelatedField(**pk_kwargs)
+
+    @classmethod
+    def get_expandable_fields(cls) -> list:
+        """
+        Returns the names of the nested related objects that can be expanded.
+        """
+        return [
+            field_name
+            for field_name, field in cls().fields.items()
+            if isinstance(field, serializers.BaseSerializer)
+        ]
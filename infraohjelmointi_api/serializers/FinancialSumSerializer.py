@@ -221,6 +221,28 @@ class FinancialSumSerializer(serializers.ModelSerializer):
 
         return ret_val
 
+    @staticmethod
+    def uses_financial_sum_cache(instance) -> bool:
+        """
+        Whether the financial sums of a group | location | class instance are cached.
+        """
+        _type = instance._meta.model.__name__
+        # Coordinator classes/locations should always be cached (best performance benefit)
+        # Planning classes should not be cached (depend on coordinator finances for overlap)
+        if _type == "ProjectClass":
+            # Coordinator classes: always cache
+            if getattr(instance, "forCoordinatorOnly", False):
+                return True
+            # Planning classes: don't cache (have coordinatorClass attribute)
+            return not getattr(instance, "coordinatorClass", None)
+        if _type == "ProjectLocation":
+            # Coordinator locations: always cache
+            if getattr(instance, "forCoordinatorOnly", False):
+                return True
+            # Planning locations: don't cache (have coordinatorLocation attribute)
+            return not getattr(instance, "coordinatorLocation", None)
+        return _type != "ProjectGroup"
+
     def get_finance_sums(self, instance):
         """
         Calculates financial sums for 10 years given a group | location | class instance.
@@ -240,28 +262,14 @@ class FinancialSumSerializer(serializers.ModelSerializer):
                 year, for_frame_view=forced_to_frame
             )
 
-        # Coordinator classes/locations should always be cached (best performance benefit)
-        # Planning classes should not be cached (depend on coordinator finances for overlap)
-        use_cache = True
-        if _type == "ProjectClass":
-            # Coordinator classes: always cache
-            if getattr(instance, "forCoordinatorOnly", False):
-                use_cache = True
-            # Planning classes: don't cache (have coordinatorClass attribute)
-            elif getattr(instance, "coordinatorClass", None):
-                use_cache = False
-        elif _type == "ProjectLocation":
-            # Coordinator locations: always cache
-            if getattr(instance, "forCoordinatorOnly", False):
-                use_cache = True
-            # Planning locations: don't cache (have coordinatorLocation attribute)
-            elif getattr(instance, "coordinatorLocation", None):
-                use_cache = False
-        elif _type == "ProjectGroup":
-            use_cache = False
+        use_cache = self.uses_financial_sum_cache(instance)
 
         cached_result = None
-        if use_cache:
+        prefetched_sums = self.context.get("financial_sums")
+        if use_cache and prefetched_sums is not None:
+            # read ahead for the whole chunk of a streamed list, a missing instance isn't cached
+            cached_result = prefetched_sums.get(str(instance.id))
+        elif use_cache:
             cached_result = CacheService.get_financial_sum(
                 instance_id=instance.id,
                 instance_type=_type,
@@ -205,6 +205,7 @@ class ProjectCreateSerializer(ProjectWithFinancesSerializer):
 
     class Meta(BaseMeta):
         model = Project
+        exclude = BaseMeta.exclude + Project.FINANCE_YEAR_FIELDS
         list_serializer_class = UpdateListSerializer
         # removed constructionPhaseDetail validator due to inconsistencies in imported data
         validators = [
@@ -118,6 +118,7 @@ class ProjectGetSerializer(DynamicFieldsModelSerializer, ProjectWithFinancesSeri
 
     class Meta(BaseMeta):
         model = Project
+        exclude = BaseMeta.exclude + Project.FINANCE_YEAR_FIELDS
 
     def get_spent_budget(self, project: Project):
         # this data should come from SAP, but since we don't have the connection yet
@@ -149,10 +150,12 @@ class ProjectGetSerializer(DynamicFieldsModelSerializer, ProjectWithFinancesSeri
         return project.projectReadiness()
 
     def get_currentYearsSapValue(self, project: Project):
-        projects_to_sap_values = self.context.get('projects_to_sap_values', {})
-        sap_values = projects_to_sap_values.get(project.id)
-        
-        if not sap_values:
+        projects_to_sap_values = self.context.get('projects_to_sap_values', None)
+
+        # SAP values preloaded into the context are authoritative, a missing project simply has none
+        if projects_to_sap_values is not None:
+            sap_values = projects_to_sap_values.get(project.id)
+        else:
             current_year = datetime.datetime.now().year
             sap_values = SapCurrentYearService.get_by_project_id_year(project.id, int(current_year))
 
@@ -220,37 +223,39 @@ class ProjectGetSerializer(DynamicFieldsModelSerializer, ProjectWithFinancesSeri
         if for_coordinator == True:
             # if class is suurpiiri then goto its parent and check for coordinationClass since suurpiiri classes have no
             # coordination class
-            rep["projectClass"] = (
-                instance.projectClass.coordinatorClass.id
-                if hasattr(instance.projectClass, "coordinatorClass")
-                else instance.projectClass.parent.coordinatorClass.id
-                if (
-                    instance.projectClass != None
-                    and "suurpiiri" in instance.projectClass.name.lower()
-                    and hasattr(instance.projectClass.parent, "coordinatorClass")
+            if "projectClass" in rep:
+                rep["projectClass"] = (
+                    instance.projectClass.coordinatorClass.id
+                    if hasattr(instance.projectClass, "coordinatorClass")
+                    else instance.projectClass.parent.coordinatorClass.id
+                    if (
+                        instance.projectClass != None
+                        and "suurpiiri" in instance.projectClass.name.lower()
+                        and hasattr(instance.projectClass.parent, "coordinatorClass")
+                    )
+                    else None
                 )
-                else None
-            )
             # if project location is division/subdivision then goto its district and get related coordination location else none
-            rep["projectLocation"] = (
-                instance.projectLocation.coordinatorLocation.id
-                if (hasattr(instance.projectLocation, "coordinatorLocation"))
-                else instance.projectLocation.parent.coordinatorLocation.id
-                if (
-                    instance.projectLocation != None
-                    and instance.projectLocation.parent != None
-                    and instance.projectLocation.parent.parent == None
-                    and hasattr(instance.projectLocation.parent, "coordinatorLocation")
-                )
-                else instance.projectLocation.parent.parent.coordinatorLocation.id
-                if (
-                    instance.projectLocation != None
-                    and instance.projectLocation.parent != None
-                    and instance.projectLocation.parent.parent != None
-                    and hasattr(
-                        instance.projectLocation.parent.parent, "coordinatorLocation"
+            if "projectLocation" in rep:
+                rep["projectLocation"] = (
+                    instance.projectLocation.coordinatorLocation.id
+                    if (hasattr(instance.projectLocation, "coordinatorLocation"))
+                    else instance.projectLocation.parent.coordinatorLocation.id
+                    if (
+                        instance.projectLocation != None
+                        and instance.projectLocation.parent != None
+                        and instance.projectLocation.parent.parent == None
+                        and hasattr(instance.projectLocation.parent, "coordinatorLocation")
+                    )
+                    else instance.projectLocation.parent.parent.coordinatorLocation.id
+                    if (
+                        instance.projectLocation != None
+                        and instance.projectLocation.parent != None
+                        and instance.projectLocation.parent.parent != None
+                        and hasattr(
+                            instance.projectLocation.parent.parent, "coordinatorLocation"
+                        )
                     )
+                    else None
                 )
-                else None
-            )
         return rep
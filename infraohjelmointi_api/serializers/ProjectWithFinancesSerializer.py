@@ -58,3 +58,4 @@ class ProjectWithFinancesSerializer(serializers.ModelSerializer):
 
     class Meta(BaseMeta):
         model = Project
+        exclude = BaseMeta.exclude + Project.FINANCE_YEAR_FIELDS
@@ -0,0 +1,76 @@
+"""
+Buffered AuditLog writer.
+
+Entries recorded during a request are kept in memory and written with one bulk_create when
+the request ends. An entry is only buffered once the transaction it was recorded in has
+committed, so the entries of rolled back changes are never written.
+"""
+
+import logging
+from contextvars import ContextVar
+from functools import partial
+from typing import Optional
+
+from django.db import transaction
+
+from ..models import AuditLog
+
+logger = logging.getLogger("infraohjelmointi_api")
+
+ORIGIN = "infrahankkeiden_ohjelmointi"
+
+
+class _RequestBuffer:
+    def __init__(self):
+        self.entries = []
+        self.closed = False
+
+
+_request_buffer: ContextVar[Optional[_RequestBuffer]] = ContextVar("audit_log_buffer", default=None)
+
+
+class AuditLogService:
+    @staticmethod
+    def start_request() -> None:
+        _request_buffer.set(_RequestBuffer())
+
+    @staticmethod
+    def end_request() -> list:
+        """Stops buffering and returns the entries buffered during the request"""
+        buffer = _request_buffer.get()
+        _request_buffer.set(None)
+        if buffer is None:
+            return []
+        buffer.closed = True
+        return buffer.entries
+
+    @classmethod
+    def record(cls, **fields) -> AuditLog:
+        """
+        Records an audit log entry. Outside a request, e.g. in management commands, the entry
+        is written as soon as its transaction commits.
+        """
+        fields.setdefault("log_level", "INFO")
+        fields.setdefault("origin", ORIGIN)
+        fields.setdefault("status", "SUCCESS")
+        audit_log = AuditLog(**fields)
+        transaction.on_commit(partial(cls._add, _request_buffer.get(), audit_log))
+        return audit_log
+
+    @classmethod
+    def _add(cls, buffer: Optional[_RequestBuffer], audit_log: AuditLog) -> None:
+        # a transaction can outlive the request, e.g. in tests
+        if buffer is None or buffer.closed:
+            cls.write([audit_log])
+        else:
+            buffer.entries.append(audit_log)
+
+    @staticmethod
+    def write(entries: list) -> None:
+        if not entries:
+            return
+        try:
+            AuditLog.objects.bulk_create(entries)
+        except Exception as e:
+            # the audited changes are already committed, losing the log must not fail the request
+            logger.error(f"Writing {len(entries)} audit log entries failed: {e}")
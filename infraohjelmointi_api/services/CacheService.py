@@ -14,6 +14,7 @@ from typing import Optional, Any, List
 from django.conf import settings
 from django.core.cache import cache
 
+from .MetricsService import MetricsService
 from .RedisAvailabilityChecker import RedisAvailabilityChecker
 
 logger = logging.getLogger(__name__)
@@ -24,8 +25,13 @@ class CacheService:
 
     CACHE_TIMEOUT = getattr(settings, 'CACHE_TIMEOUT', 43200)
     FINANCIAL_SUM_PREFIX = 'financial_sum'
-    FRAME_BUDGET_PREFIX = 'frame_budget'
+    FRAME_BUDGET_PREFIX = 'frame_budget_year'
     LOOKUP_PREFIX = 'lookup'
+    LOOKUP_BODY_PREFIX = 'lookup_body'
+    DATA_VERSION_PREFIX = 'data_version'
+    PW_PUSH_HASH_PREFIX = 'pw_push_hash'
+    CLASS_ACCESS_PREFIX = 'class_access'
+    PLANNING_SNAPSHOT_PREFIX = 'planning_snapshot'
 
     _cache_failures = 0
     _cache_disabled_until = 0
@@ -72,6 +78,11 @@ class CacheService:
                 cls._cache_disabled_until = 0
         return False
 
+    @classmethod
+    def is_available(cls) -> bool:
+        """Whether the cache is configured and not disabled by the circuit breaker"""
+        return not cls._is_cache_disabled()
+
     @classmethod
     def disable_cache_permanently(cls):
         cls._cache_permanently_disabled = True
@@ -124,6 +135,7 @@ class CacheService:
 
         try:
             result = cache.get(cache_key)
+            MetricsService.record_cache_lookup(hit=result is not None)
             if result is not None:
                 cls._record_cache_success()
             return result
@@ -203,23 +215,91 @@ class CacheService:
         cls._safe_cache_set(cache_key, data, timeout or cls.CACHE_TIMEOUT)
 
     @classmethod
-    def get_frame_budgets(cls, year: int, for_frame_view: bool) -> Optional[dict]:
-        cache_key = cls._generate_cache_key(
+    async def aget_financial_sums(cls, instance_ids: List[str], instance_type: str, year: int,
+                                  for_frame_view: bool, for_coordinator: bool = False) -> dict:
+        """Returns {instance_id: sums} of the given instances found in the cache, with one async multi-get"""
+        if cls._is_cache_disabled() or not instance_ids:
+            return {}
+
+        keys = {
+            cls._generate_cache_key(
+                cls.FINANCIAL_SUM_PREFIX,
+                instance_id=str(instance_id),
+                instance_type=instance_type,
+                year=year,
+                for_frame_view=for_frame_view,
+                for_coordinator=for_coordinator
+            ): str(instance_id)
+            for instance_id in instance_ids
+        }
+        try:
+            cached = await cache.aget_many(list(keys))
+            cls._record_cache_success()
+            for key in keys:
+                MetricsService.record_cache_lookup(hit=key in cached)
+            return {keys[key]: data for key, data in cached.items()}
+        except Exception as e:
+            cls._record_cache_failure()
+            logger.warning(f"Financial sum get failed: {e}")
+            return {}
+
+    # Frame budgets are cached one year at a time and composed into windows on read
+    @classmethod
+    def _frame_budget_key(cls, year: int, for_frame_view: bool) -> str:
+        return cls._generate_cache_key(
             cls.FRAME_BUDGET_PREFIX,
             year=year,
             for_frame_view=for_frame_view
         )
-        return cls._safe_cache_get(cache_key)
+
+    @classmethod
+    def get_frame_budgets(cls, year: int, for_frame_view: bool) -> Optional[dict]:
+        """Returns the frame budgets of a single year"""
+        return cls._safe_cache_get(cls._frame_budget_key(year, for_frame_view))
 
     @classmethod
     def set_frame_budgets(cls, year: int, for_frame_view: bool,
                           data: dict, timeout: Optional[int] = None) -> None:
-        cache_key = cls._generate_cache_key(
-            cls.FRAME_BUDGET_PREFIX,
-            year=year,
-            for_frame_view=for_frame_view
-        )
-        cls._safe_cache_set(cache_key, data, timeout or cls.CACHE_TIMEOUT)
+        """Stores the frame budgets of a single year"""
+        cls._safe_cache_set(cls._frame_budget_key(year, for_frame_view), data, timeout or cls.CACHE_TIMEOUT)
+
+    @classmethod
+    def get_frame_budget_years(cls, years: List[int], for_frame_view: bool) -> dict:
+        """Returns {year: frame budgets} of the given years found in the cache, with one multi-get"""
+        if cls._is_cache_disabled() or not years:
+            return {}
+
+        keys = {cls._frame_budget_key(year, for_frame_view): year for year in years}
+        try:
+            cached = cache.get_many(list(keys))
+            cls._record_cache_success()
+            for key in keys:
+                MetricsService.record_cache_lookup(hit=key in cached)
+            return {keys[key]: data for key, data in cached.items()}
+        except Exception as e:
+            cls._record_cache_failure()
+            logger.warning(f"Frame budget get failed: {e}")
+            return {}
+
+    @classmethod
+    def set_frame_budget_years(cls, frame_budgets_by_year: dict, for_frame_view: bool,
+                               timeout: Optional[int] = None) -> None:
+        """Stores {year: frame budgets} with one multi-set"""
+        if cls._is_cache_disabled() or not frame_budgets_by_year:
+            return
+
+        try:
+            cache.set_many(
+                {
+                    cls._frame_budget_key(year, for_frame_view): data
+                    for year, data in frame_budgets_by_year.items()
+                },
+                timeout or cls.CACHE_TIMEOUT,
+            )
+            cls._record_cache_success()
+        except Exception as e:
+            cls._record_cache_failure()
+            logger.warning(f"Frame budget set failed: {e}")
 
     @classmethod
     def invalidate_financial_sum(cls, instance_id: str, instance_type: str) -> None:
@@ -244,6 +324,43 @@ class CacheService:
         except Exception as e:
             logger.warning(f"Cache invalidation failed: {e}")
 
+    @classmethod
+    def invalidate_projects(cls, projects: list, previous: Optional[list] = None) -> None:
+        """
+        Invalidates what the Project post_save signals would have, once for all given projects:
+        the sums of their groups, classes and locations and of the parents of the classes and
+        locations, the data version and the planning snapshots.
+
+        previous holds the (projectClass_id, projectLocation_id, projectGroup_id) of the projects
+        before the write, the sums a moved project left are invalidated too.
+        For projects written with bulk statements, which do not send the signals.
+        """
+        from ..models import ProjectClass, ProjectLocation
+
+        hierarchy = [
+            (project.projectClass_id, project.projectLocation_id, project.projectGroup_id)
+            for project in projects
+        ] + list(previous or [])
+        for index, instance_type, model in (
+            (0, "ProjectClass", ProjectClass),
+            (1, "ProjectLocation", ProjectLocation),
+        ):
+            ids = {ids[index] for ids in hierarchy if ids[index]}
+            if not ids:
+                continue
+            # loaded once, the parents of every project are walked in memory
+            parents = dict(model.objects.values_list("id", "parent_id"))
+            invalidated = set()
+            for instance_id in ids:
+                while instance_id and instance_id not in invalidated:
+                    invalidated.add(instance_id)
+                    cls.invalidate_financial_sum(instance_id=instance_id, instance_type=instance_type)
+                    instance_id = parents.get(instance_id)
+        for instance_id in {ids[2] for ids in hierarchy if ids[2]}:
+            cls.invalidate_financial_sum(instance_id=instance_id, instance_type="ProjectGroup")
+        cls.bump_data_version()
+        cls.mark_planning_snapshot_dirty(project_ids=[project.id for project in projects])
+
     @classmethod
     def invalidate_frame_budgets(cls, year: Optional[int] = None) -> None:
         if cls._is_cache_disabled():
@@ -290,3 +407,283 @@ class CacheService:
     def invalidate_lookup(cls, table_name: str) -> None:
         cache_key = f"{cls.LOOKUP_PREFIX}:{table_name}"
         cls._safe_cache_delete(cache_key)
+
+    # Compressed lookup list responses, stored with the digest of the uncompressed body so
+    # that a body compressed from a list that was changed meanwhile is never sent
+    @classmethod
+    def get_lookup_body(cls, table_name: str, encoding: str, digest: str) -> Optional[bytes]:
+        cache_key = f"{cls.LOOKUP_BODY_PREFIX}:{table_name}:{encoding}"
+        stored = cls._safe_cache_get(cache_key)
+        if stored is None or stored["digest"] != digest:
+            return None
+        return stored["body"]
+
+    @classmethod
+    def set_lookup_body(cls, table_name: str, encoding: str, digest: str, body: bytes) -> None:
+        cache_key = f"{cls.LOOKUP_BODY_PREFIX}:{table_name}:{encoding}"
+        cls._safe_cache_set(cache_key, {"digest": digest, "body": body}, cls.CACHE_TIMEOUT)
+
+    # Hashes of the payloads last pushed to ProjectWise
+    @classmethod
+    def get_pw_push_hashes(cls, project_ids: List[str]) -> dict:
+        """Returns {project_id: payload hash} for the given projects that have one stored."""
+        if cls._is_cache_disabled() or not project_ids:
+            return {}
+
+        keys = {f"{cls.PW_PUSH_HASH_PREFIX}:{project_id}": project_id for project_id in project_ids}
+        try:
+            hashes = cache.get_many(list(keys))
+            cls._record_cache_success()
+            return {keys[key]: payload_hash for key, payload_hash in hashes.items()}
+        except Exception as e:
+            cls._record_cache_failure()
+            logger.warning(f"PW push hash get failed: {e}")
+            return {}
+
+    @classmethod
+    def set_pw_push_hashes(cls, hashes: dict) -> None:
+        """Stores {project_id: payload hash} without expiry, a lost hash only causes a re-push."""
+        if cls._is_cache_disabled() or not hashes:
+            return
+
+        try:
+            cache.set_many(
+                {f"{cls.PW_PUSH_HASH_PREFIX}:{project_id}": payload_hash for project_id, payload_hash in hashes.items()},
+                None,
+            )
+            cls._record_cache_success()
+        except Exception as e:
+            cls._record_cache_failure()
+            logger.warning(f"PW push hash set failed: {e}")
+
+    # Class paths of restricted programmers
+    @classmethod
+    def _class_access_version_key(cls) -> str:
+        return f"{cls.CLASS_ACCESS_PREFIX}:version"
+
+    @classmethod
+    def get_class_access_paths(cls, user_id: str) -> Optional[List[str]]:
+        """Returns the class paths the user may edit, None when they are not cached."""
+        if cls._is_cache_disabled():
+            return None
+
+        try:
+            version = cache.get(cls._class_access_version_key())
+            if version is None:
+                return None
+            paths = cache.get(f"{cls.CLASS_ACCESS_PREFIX}:{version}:{user_id}")
+            cls._record_cache_success()
+            return paths
+        except Exception as e:
+            cls._record_cache_failure()
+            logger.warning(f"Class access get failed: {e}")
+            return None
+
+    @classmethod
+    def get_class_access_version(cls) -> Optional[int]:
+        """
+        Returns the current version of the cached class paths, seeding it when missing.
+        Returns None when the cache can't be used.
+        """
+        if cls._is_cache_disabled():
+            return None
+
+        version_key = cls._class_access_version_key()
+        try:
+            cache.add(version_key, cls._new_data_version(), None)
+            version = cache.get(version_key)
+            cls._record_cache_success()
+            return version
+        except Exception as e:
+            cls._record_cache_failure()
+            logger.warning(f"Class access version get failed: {e}")
+            return None
+
+    @classmethod
+    def set_class_access_paths(cls, user_id: str, paths: List[str], version: Optional[int]) -> None:
+        """
+        Caches the class paths of the user under the version read before they were queried,
+        paths queried before an invalidation are stored under the old version and never read.
+        """
+        if version is None or cls._is_cache_disabled():
+            return
+
+        try:
+            cache.set(f"{cls.CLASS_ACCESS_PREFIX}:{version}:{user_id}", paths, cls.CACHE_TIMEOUT)
+            cls._record_cache_success()
+        except Exception as e:
+            cls._record_cache_failure()
+            logger.warning(f"Class access set failed: {e}")
+
+    @classmethod
+    def invalidate_class_access(cls) -> None:
+        """
+        Drops the cached class paths of every user by moving to a new version, the old entries expire.
+
+        Bypasses the circuit breaker: a lost invalidation would keep edit rights that were removed.
+        """
+        if 'dummy' in settings.CACHES['default']['BACKEND'].lower():
+            return
+
+        version_key = cls._class_access_version_key()
+        try:
+            cache.incr(version_key)
+        except ValueError:
+            cache.set(version_key, cls._new_data_version(), None)
+        except Exception as e:
+            logger.warning(f"Class access invalidation failed: {e}")
+
+    # Planning view snapshots and the log of the changes made since they were built
+    @classmethod
+    def _planning_snapshot_key(cls, part: str, year: int, for_frame_view: bool,
+                               project_area_planner: bool) -> str:
+        return f"{cls.PLANNING_SNAPSHOT_PREFIX}:{part}:{year}:{int(for_frame_view)}:{int(project_area_planner)}"
+
+    @classmethod
+    def _planning_snapshot_change_key(cls, seq: int) -> str:
+        return f"{cls.PLANNING_SNAPSHOT_PREFIX}:change:{seq}"
+
+    @classmethod
+    def get_planning_snapshot(cls, part: str, year: int, for_frame_view: bool,
+                              project_area_planner: bool) -> Optional[dict]:
+        """Returns the "state" (serialized entries) or the "body" (compressed document) of a snapshot"""
+        return cls._safe_cache_get(
+            cls._planning_snapshot_key(part, year, for_frame_view, project_area_planner)
+        )
+
+    @classmethod
+    def set_planning_snapshot(cls, part: str, year: int, for_frame_view: bool,
+                              project_area_planner: bool, data: dict) -> None:
+        cls._safe_cache_set(
+            cls._planning_snapshot_key(part, year, for_frame_view, project_area_planner),
+            data,
+            cls.CACHE_TIMEOUT,
+        )
+
+    @classmethod
+    def get_planning_snapshot_seq(cls) -> Optional[int]:
+        """
+        Returns the sequence number of the last logged change, seeding it when missing.
+        Returns None when the cache can't be used.
+        """
+        if cls._is_cache_disabled():
+            return None
+
+        seq_key = f"{cls.PLANNING_SNAPSHOT_PREFIX}:seq"
+        try:
+            seq = cache.get(seq_key)
+            if seq is None:
+                cache.add(seq_key, cls._new_data_version(), None)
+                seq = cache.get(seq_key)
+            cls._record_cache_success()
+            return seq
+        except Exception as e:
+            cls._record_cache_failure()
+            logger.warning(f"Planning snapshot seq get failed: {e}")
+            return None
+
+    @classmethod
+    def get_planning_snapshot_changes(cls, since: int, until: int) -> Optional[list]:
+        """
+        Returns the changes logged after since up to and including until, in order.
+        Returns None when any of them is missing, e.g. expired, and the snapshot must be built in full.
+        """
+        if cls._is_cache_disabled():
+            return None
+
+        keys = [cls._planning_snapshot_change_key(seq) for seq in range(since + 1, until + 1)]
+        try:
+            changes = cache.get_many(keys)
+            cls._record_cache_success()
+        except Exception as e:
+            cls._record_cache_failure()
+            logger.warning(f"Planning snapshot changes get failed: {e}")
+            return None
+        if len(changes) != len(keys):
+            return None
+        return [changes[key] for key in keys]
+
+    @classmethod
+    def mark_planning_snapshot_dirty(cls, project_ids: Optional[list] = None) -> None:
+        """
+        Logs a change for the planning snapshots to apply on their next read. Only the given
+        projects and their hierarchy are rebuilt, without project_ids the snapshots are rebuilt in full.
+
+        Bypasses the circuit breaker: a lost change would leave the snapshots stale.
+        """
+        if 'dummy' in settings.CACHES['default']['BACKEND'].lower():
+            return
+
+        seq_key = f"{cls.PLANNING_SNAPSHOT_PREFIX}:seq"
+        try:
+            seq = cache.incr(seq_key)
+        except ValueError:
+            # Not seeded yet or flushed, no stored snapshot can reach the new seed through the log
+            cache.set(seq_key, cls._new_data_version(), None)
+            return
+        except Exception as e:
+            logger.warning(f"Planning snapshot change log failed: {e}")
+            return
+
+        change = {"projects": None if project_ids is None else [str(project_id) for project_id in project_ids]}
+        try:
+            cache.set(cls._planning_snapshot_change_key(seq), change, cls.CACHE_TIMEOUT)
+        except Exception as e:
+            # The missing change makes readers build the snapshots in full
+            logger.warning(f"Planning snapshot change log failed: {e}")
+
+    # Data versions for conditional GET
+    @classmethod
+    def _data_version_key(cls, year: Optional[int] = None) -> str:
+        return f"{cls.DATA_VERSION_PREFIX}:{'all' if year is None else year}"
+
+    @staticmethod
+    def _new_data_version() -> int:
+        # Seeded from the clock so a version lost in a cache flush is never handed out again
+        return time.time_ns()
+
+    @classmethod
+    def get_data_versions(cls, years: List[int]) -> Optional[dict]:
+        """
+        Returns the current data versions for the hierarchy (structure) and the given finance years.
+
+        Versions missing from the cache are seeded. Returns None when the cache can't be used,
+        callers must then skip anything relying on the versions.
+        """
+        if cls._is_cache_disabled():
+            return None
+
+        keys = [cls._data_version_key()] + [cls._data_version_key(year) for year in years]
+        try:
+            versions = cache.get_many(keys)
+            for key in keys:
+                if key not in versions:
+                    cache.add(key, cls._new_data_version(), None)
+                    versions[key] = cache.get(key)
+            if any(versions.get(key) is None for key in keys):
+                return None
+            cls._record_cache_success()
+            return {key: versions[key] for key in keys}
+        except Exception as e:
+            cls._record_cache_failure()
+            logger.warning(f"Data version get failed: {e}")
+            return None
+
+    @classmethod
+    def bump_data_version(cls, year: Optional[int] = None) -> None:
+        """
+        Bumps the data version of a finance year, or the hierarchy version when year is None.
+
+        Bypasses the circuit breaker: a lost bump would leave clients with stale data.
+        """
+        if 'dummy' in settings.CACHES['default']['BACKEND'].lower():
+            return
+
+        cache_key = cls._data_version_key(year)
+        try:
+            cache.incr(cache_key)
+        except ValueError:
+            # Not seeded yet or flushed, a new seed is newer than any version handed out
+            cache.set(cache_key, cls._new_data_version(), None)
+        except Exception as e:
+            logger.warning(f"Data version bump failed: {e}")
@@ -0,0 +1,247 @@
+"""
+Cache warm-up after the cache has been emptied: after a deploy, a SAP synchronization or a
+bulk forced-to-frame update. The entries the planning and coordinator views read first are
+rebuilt in priority order, so that the first users don't pay for the cold aggregates.
+"""
+
+import logging
+import threading
+import time
+from datetime import date
+from typing import Optional
+
+from django.conf import settings
+from django.db import connections
+
+from .CacheService import CacheService
+from .MetricsService import MetricsService
+from .PlanningSnapshotService import PlanningSnapshotService
+from .ProjectClassService import ProjectClassService
+from .ProjectLocationService import ProjectLocationService
+from .utils.RateLimiter import RateLimiter
+
+logger = logging.getLogger("infraohjelmointi_api")
+
+
+class CacheWarmupService:
+    """
+    Rebuilds the cached frame budgets, class and location sums, planning snapshot and lookup
+    lists of a year. Entries already cached are left as they are and counted as warm.
+
+    Every rebuilt entry runs its queries on one connection, spaced to at most `rate` entries
+    per second (CACHE_WARMUP_RATE) so that the warm-up doesn't take the database from live
+    requests.
+    """
+
+    _lock = threading.Lock()
+    _running = False
+    _rerun = False
+    _runs = 0
+    _last_report = []
+
+    def __init__(self, year: Optional[int] = None, rate: Optional[float] = None) -> None:
+        self.year = year or date.today().year
+        if rate is None:
+            rate = getattr(settings, "CACHE_WARMUP_RATE", 20)
+        self.limiter = RateLimiter(rate)
+
+    def warm(self) -> list:
+        """
+        Warms the cache step by step, most read entries first. Returns the report of the steps
+        as [{"step", "keys", "warm", "seconds"}], where "warm" is the entries already cached.
+        """
+        if not CacheService.is_available():
+            logger.info("Cache not in use, skipping the cache warm-up")
+            return []
+
+        steps = [
+            ("frame_budgets", self.__warm_frame_budgets),
+            ("coordinator_sums", self.__warm_coordinator_sums),
+            ("planning_sums", self.__warm_planning_sums),
+            ("planning_snapshot", self.__warm_planning_snapshot),
+            ("lookups", self.__warm_lookups),
+        ]
+        report = []
+        for step, warm_step in steps:
+            start = time.perf_counter()
+            keys, warm = warm_step()
+            report.append(
+                {"step": step, "keys": keys, "warm": warm, "seconds": time.perf_counter() - start}
+            )
+
+        with self._lock:
+            type(self)._runs += 1
+            type(self)._last_report = report
+        logger.info(
+            "Cache warm-up for {}: {} keys, warm ratio {:.0%}".format(
+                self.year, sum(entry["keys"] for entry in report), self.warm_ratio(report)
+            )
+        )
+        return report
+
+    @staticmethod
+    def warm_ratio(report: list) -> float:
+        """The share of the entries that were already cached when the warm-up started"""
+        keys = sum(entry["keys"] for entry in report)
+        return sum(entry["warm"] for entry in report) / keys if keys else 1.0
+
+    @classmethod
+    def start_in_background(cls) -> Optional[threading.Thread]:
+        """
+        Warms the cache of the current year in a thread of this process. A warm-up requested
+        while one is running is run again once it has finished, the data may have changed
+        after the running one read it. Returns the started thread, if any.
+        """
+        if not getattr(settings, "CACHE_WARMUP_ENABLED", True):
+            return None
+
+        with cls._lock:
+            if cls._running:
+                cls._rerun = True
+                return None
+            cls._running = True
+
+        thread = threading.Thread(target=cls.__run_in_background, name="cache-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    @classmethod
+    def __run_in_background(cls) -> None:
+        try:
+            while True:
+                try:
+                    cls().warm()
+                except Exception as e:
+                    logger.warning(f"Cache warm-up failed: {e}")
+                with cls._lock:
+                    if not cls._rerun:
+                        cls._running = False
+                        return
+                    cls._rerun = False
+        finally:
+            connections.close_all()
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            report = cls._last_report
+            return {
+                "runs": cls._runs,
+                "keys": sum(entry["keys"] for entry in report),
+                "warm": sum(entry["warm"] for entry in report),
+                "seconds": sum(entry["seconds"] for entry in report),
+            }
+
+    def __warm_frame_budgets(self) -> tuple:
+        from ..views.BaseClassLocationViewSet import BaseClassLocationViewSet
+
+        years = list(range(self.year, self.year + 11))
+        keys = warm = 0
+        for for_frame_view in [False, True]:
+            keys += len(years)
+            warm += len(CacheService.get_frame_budget_years(years, for_frame_view=for_frame_view))
+            # the missing years of a window are queried together
+            self.limiter.acquire()
+            BaseClassLocationViewSet.build_frame_budgets_context(self.year, for_frame_view=for_frame_view)
+        return keys, warm
+
+    def __warm_coordinator_sums(self) -> tuple:
+        from ..serializers import ProjectClassSerializer, ProjectLocationSerializer
+        from ..views.BaseClassLocationViewSet import BaseClassLocationViewSet
+
+        # the contexts of the coordinator lists of ProjectClassViewSet and ProjectLocationViewSet
+        frame_budgets = BaseClassLocationViewSet.build_frame_budgets_context(self.year, for_frame_view=False)
+        keys = warm = 0
+        for forced_to_frame in [False, True]:
+            context = {
+                "finance_year": self.year,
+                "for_coordinator": True,
+                "forcedToFrame": forced_to_frame,
+                "frame_budgets": frame_budgets,
+            }
+            for serializer_class, queryset in [
+                (ProjectClassSerializer, ProjectClassService.list_all_for_coordinator()),
+                (ProjectLocationSerializer, ProjectLocationService.list_all_for_coordinator()),
+            ]:
+                step_keys, step_warm = self.__warm_sums(serializer_class, queryset, context)
+                keys += step_keys
+                warm += step_warm
+        return keys, warm
+
+    def __warm_planning_sums(self) -> tuple:
+        from ..serializers import ProjectClassSerializer, ProjectLocationSerializer
+        from ..views.BaseClassLocationViewSet import BaseClassLocationViewSet
+
+        # the context of the planning lists, only the classes and locations without a
+        # coordinator counterpart are cached
+        context = {
+            "finance_year": self.year,
+            "frame_budgets": BaseClassLocationViewSet.build_frame_budgets_context(
+                self.year, for_frame_view=False
+            ),
+        }
+        class_keys, class_warm = self.__warm_sums(
+            ProjectClassSerializer,
+            ProjectClassService.list_all().select_related("coordinatorClass"),
+            context,
+        )
+        location_keys, location_warm = self.__warm_sums(
+            ProjectLocationSerializer,
+            ProjectLocationService.list_all().select_related("coordinatorLocation"),
+            context,
+        )
+        return class_keys + location_keys, class_warm + location_warm
+
+    def __warm_sums(self, serializer_class, queryset, context: dict) -> tuple:
+        serializer = serializer_class(context=context)
+        instance_type = serializer_class.Meta.model.__name__
+        keys = warm = 0
+        for instance in queryset.iterator():
+            if not serializer.uses_financial_sum_cache(instance):
+                continue
+            keys += 1
+            cached = CacheService.get_financial_sum(
+                instance_id=instance.id,
+                instance_type=instance_type,
+                year=self.year,
+                for_frame_view=context.get("forcedToFrame", False),
+                for_coordinator=context.get("for_coordinator", False),
+            )
+            if cached is not None:
+                warm += 1
+                continue
+            self.limiter.acquire()
+            serializer.get_finance_sums(instance)
+        return keys, warm
+
+    def __warm_planning_snapshot(self) -> tuple:
+        # holds the group sums, which aren't cached one by one
+        seq = CacheService.get_planning_snapshot_seq()
+        snapshot = CacheService.get_planning_snapshot("body", self.year, False, False)
+        if snapshot is not None and snapshot["version"] == seq:
+            return 1, 1
+        self.limiter.acquire()
+        PlanningSnapshotService(self.year).get()
+        return 1, 0
+
+    def __warm_lookups(self) -> tuple:
+        # loads the views package and with it the lookup viewsets
+        from ..views.CachedLookupViewSet import CachedLookupViewSet
+
+        keys = warm = 0
+        for viewset_class in sorted(CachedLookupViewSet.__subclasses__(), key=lambda c: c.__name__):
+            viewset = viewset_class()
+            keys += 1
+            if CacheService.get_lookup(viewset.get_cache_key_name()) is not None:
+                warm += 1
+                continue
+            self.limiter.acquire()
+            # the data of CachedLookupViewSet.list
+            CacheService.set_lookup(
+                viewset.get_cache_key_name(),
+                viewset.get_serializer_class()(viewset.get_queryset(), many=True).data,
+            )
+        return keys, warm
+
+
+MetricsService.register_stats("cache_warmup", CacheWarmupService.stats)
@@ -0,0 +1,159 @@
+import zlib
+from typing import AsyncIterator, Iterator, Optional
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional, responses are gzipped without it
+    brotli = None
+
+
+class CompressionService:
+    """
+    Content-Encoding negotiation and compression of the JSON responses.
+
+    Responses are compressed with brotli when it is installed and accepted by the client,
+    otherwise with gzip. Streamed responses are compressed on the fly: the chunks are collected
+    up to COMPRESSION_STREAM_FLUSH_SIZE bytes and flushed together, so that the many small chunks
+    of a streamed list don't each pay for a flush of the compressor.
+    """
+
+    GZIP = "gzip"
+    BROTLI = "br"
+
+    GZIP_LEVEL = 6
+    # Quality 5 compresses JSON better than gzip -6 at about the same CPU time, 11 is for static files
+    BROTLI_QUALITY = 5
+
+    @classmethod
+    def available_encodings(cls) -> list:
+        """Returns the encodings the server can produce, the preferred first."""
+        return [cls.BROTLI, cls.GZIP] if brotli is not None else [cls.GZIP]
+
+    @classmethod
+    def negotiate(cls, accept_encoding: Optional[str], encodings: Optional[list] = None) -> Optional[str]:
+        """
+        Returns the encoding to use for a request with the given Accept-Encoding header,
+        None when the response should be sent uncompressed.
+
+        Of the encodings the client accepts with the highest q-value, the one preferred by
+        the server is picked. encodings limits the choice, e.g. to the pre-compressed bodies
+        of a cached response.
+        """
+        if not accept_encoding:
+            return None
+
+        accepted = {}
+        for item in accept_encoding.split(","):
+            coding, _, params = item.strip().partition(";")
+            coding = coding.strip().lower()
+            quality = 1.0
+            for param in params.split(";"):
+                name, _, value = param.strip().partition("=")
+                if name.strip().lower() == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            if coding:
+                accepted[coding] = quality
+
+        candidates = [
+            (accepted.get(encoding, accepted.get("*", 0.0)), -index, encoding)
+            for index, encoding in enumerate(cls.available_encodings())
+            if encodings is None or encoding in encodings
+        ]
+        if not candidates:
+            return None
+        quality, _, encoding = max(candidates)
+        return encoding if quality > 0 else None
+
+    @classmethod
+    def compress(cls, body: bytes, encoding: str) -> bytes:
+        if encoding == cls.BROTLI:
+            return brotli.compress(body, mode=brotli.MODE_TEXT, quality=cls.BROTLI_QUALITY)
+        if encoding == cls.GZIP:
+            # wbits 31 writes the gzip header and trailer
+            compressor = zlib.compressobj(cls.GZIP_LEVEL, zlib.DEFLATED, 31)
+            return compressor.compress(body) + compressor.flush()
+        raise ValueError("Unsupported encoding {}".format(encoding))
+
+    @classmethod
+    def decompress(cls, body: bytes, encoding: str) -> bytes:
+        if encoding == cls.BROTLI:
+            return brotli.decompress(body)
+        if encoding == cls.GZIP:
+            return zlib.decompress(body, 31)
+        raise ValueError("Unsupported encoding {}".format(encoding))
+
+    @classmethod
+    def min_size(cls) -> int:
+        """Responses smaller than this are sent uncompressed, the headers would eat the gain."""
+        return getattr(settings, "COMPRESSION_MIN_SIZE", 1024)
+
+    @classmethod
+    def flush_size(cls) -> int:
+        return getattr(settings, "COMPRESSION_STREAM_FLUSH_SIZE", 64 * 1024)
+
+    @classmethod
+    def compress_stream(cls, chunks: Iterator[bytes], encoding: str) -> Iterator[bytes]:
+        """Compresses the chunks of a streamed response, flushing every flush_size bytes."""
+        stream = _StreamCompressor(encoding, cls.flush_size())
+        for chunk in chunks:
+            compressed = stream.write(chunk)
+            if compressed:
+                yield compressed
+        yield stream.finish()
+
+    @classmethod
+    async def acompress_stream(cls, chunks: AsyncIterator[bytes], encoding: str) -> AsyncIterator[bytes]:
+        """Same as compress_stream, for the async iterators of async streamed responses."""
+        stream = _StreamCompressor(encoding, cls.flush_size())
+        async for chunk in chunks:
+            compressed = stream.write(chunk)
+            if compressed:
+                yield compressed
+        yield stream.finish()
+
+
+class _StreamCompressor:
+    """Collects the chunks of a stream and compresses them flush_size bytes at a time."""
+
+    def __init__(self, encoding: str, flush_size: int):
+        self.encoding = encoding
+        self.flush_size = flush_size
+        self.pending = []
+        self.pending_size = 0
+        if encoding == CompressionService.BROTLI:
+            self.compressor = brotli.Compressor(
+                mode=brotli.MODE_TEXT, quality=CompressionService.BROTLI_QUALITY
+            )
+        elif encoding == CompressionService.GZIP:
+            self.compressor = zlib.compressobj(CompressionService.GZIP_LEVEL, zlib.DEFLATED, 31)
+        else:
+            raise ValueError("Unsupported encoding {}".format(encoding))
+
+    def write(self, chunk) -> bytes:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        self.pending.append(chunk)
+        self.pending_size += len(chunk)
+        if self.pending_size < self.flush_size:
+            return b""
+        return self._compress_pending(final=False)
+
+    def finish(self) -> bytes:
+        return self._compress_pending(final=True)
+
+    def _compress_pending(self, final: bool) -> bytes:
+        data = b"".join(self.pending)
+        self.pending = []
+        self.pending_size = 0
+        if self.encoding == CompressionService.BROTLI:
+            return self.compressor.process(data) + (
+                self.compressor.finish() if final else self.compressor.flush()
+            )
+        return self.compressor.compress(data) + self.compressor.flush(
+            zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        )
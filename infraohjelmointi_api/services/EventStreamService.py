@@ -0,0 +1,376 @@
+"""
+Server-sent events distribution.
+
+Every event is appended once to an event log per channel: a Redis stream shared by all
+uvicorn workers, or an in-process log when Redis is not configured (development and tests).
+Each worker reads the new entries of the channels its clients listen to and fans them out
+to its own connections, and a reconnecting client is sent what it missed since its
+Last-Event-ID from the same log.
+
+Every connection has a bounded queue of pending events. When a client reads slower than
+events arrive, a project-update replaces the pending update of the same project, and if the
+queue is still full the pending events are dropped and the connection is caught up from
+the log instead.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from datetime import date
+from collections import defaultdict, deque
+from typing import Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django_eventstream.event import Event
+from django_eventstream.storage import EventDoesNotExist, StorageBase
+from django_eventstream.utils import get_storage, publish_event
+
+from .MetricsService import MetricsService
+
+logger = logging.getLogger("infraohjelmointi_api")
+
+
+def _stream_length() -> int:
+    return getattr(settings, "SSE_STREAM_LENGTH", 1000)
+
+
+def _merge_key(event: Event) -> Optional[tuple]:
+    """Pending events with the same key are superseded by the newest one"""
+    if event.type != "project-update":
+        return None
+    try:
+        return event.type, json.loads(event.data)["project"]["id"]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+class StreamListener:
+    """The pending events of one SSE connection"""
+
+    def __init__(self, max_pending: Optional[int] = None) -> None:
+        self.loop = asyncio.get_event_loop()
+        self.aevent = asyncio.Event()
+        self.user_id = ""
+        self.channels = set()
+        self.max_pending = max_pending or getattr(settings, "SSE_MAX_PENDING_EVENTS", 50)
+        # (event, merge key) in the order the events were published
+        self.pending = []
+        self.overflow = False
+        self.error = None
+
+    def wake_threadsafe(self) -> None:
+        self.loop.call_soon_threadsafe(self.aevent.set)
+
+
+class ListenerManager:
+    """The SSE connections of this worker by channel"""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.listeners = set()
+        self.listeners_by_channel = defaultdict(set)
+        self.rejected = 0
+        self.delivered = 0
+        self.merged = 0
+        self.dropped = 0
+
+    def add_listener(self, listener: StreamListener, max_connections: Optional[int] = None) -> bool:
+        """Adds a connection, returns False if the worker already has the most it may hold"""
+        if max_connections is None:
+            max_connections = getattr(settings, "SSE_MAX_CONNECTIONS_PER_WORKER", 500)
+        with self.lock:
+            if len(self.listeners) >= max_connections:
+                self.rejected += 1
+                return False
+            self.listeners.add(listener)
+            for channel in listener.channels:
+                self.listeners_by_channel[channel].add(listener)
+        storage = get_storage()
+        if storage is not None:
+            storage.start_fanout(self)
+        return True
+
+    def remove_listener(self, listener: StreamListener) -> None:
+        with self.lock:
+            self.listeners.discard(listener)
+            for channel in listener.channels:
+                self.listeners_by_channel[channel].discard(listener)
+                if not self.listeners_by_channel[channel]:
+                    del self.listeners_by_channel[channel]
+
+    def channels(self) -> list:
+        with self.lock:
+            return sorted(self.listeners_by_channel)
+
+    def publish(self, event: Event) -> None:
+        """Queues an event for the connections listening to its channel"""
+        with self.lock:
+            listeners = list(self.listeners_by_channel.get(event.channel, ()))
+            if not listeners:
+                return
+            merge_key = _merge_key(event)
+            for listener in listeners:
+                self._queue(listener, event, merge_key)
+
+    def _queue(self, listener: StreamListener, event: Event, merge_key: Optional[tuple]) -> None:
+        if listener.overflow:
+            # the connection reads the log next, the event is there
+            self.dropped += 1
+            return
+        pending = listener.pending
+        if merge_key is not None:
+            for i, (_, key) in enumerate(pending):
+                if key == merge_key:
+                    del pending[i]
+                    self.merged += 1
+                    break
+        if len(pending) >= listener.max_pending and event.id is not None:
+            self.dropped += len(pending) + 1
+            pending.clear()
+            listener.overflow = True
+        else:
+            pending.append((event, merge_key))
+        listener.wake_threadsafe()
+
+    def take(self, listener: StreamListener) -> tuple:
+        """Returns and clears the pending events, the overflow flag and the error of a connection"""
+        with self.lock:
+            events = [event for event, _ in listener.pending]
+            overflow, error = listener.overflow, listener.error
+            listener.pending = []
+            listener.overflow = False
+            listener.aevent.clear()
+            self.delivered += len(events)
+        return events, overflow, error
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "connections": len(self.listeners),
+                "rejected": self.rejected,
+                "delivered": self.delivered,
+                "merged": self.merged,
+                "dropped": self.dropped,
+            }
+
+
+listener_manager = ListenerManager()
+MetricsService.register_stats("sse", listener_manager.stats)
+
+
+class MemoryEventStorage(StorageBase):
+    """
+    Event log of this process, used without Redis. Only the connections of this worker get
+    the events, which is enough for development and tests.
+    """
+
+    # django_eventstream keeps a storage instance per thread, the log is shared
+    _lock = threading.Lock()
+    _events = defaultdict(deque)
+    _current_ids = defaultdict(int)
+
+    shared = False
+
+    def append_event(self, channel: str, event_type: str, data: str) -> Event:
+        with self._lock:
+            self._current_ids[channel] += 1
+            event = Event(channel, event_type, data, id=self._current_ids[channel])
+            events = self._events[channel]
+            events.append(event)
+            while len(events) > _stream_length():
+                events.popleft()
+        return event
+
+    def get_events(self, channel: str, last_id: int, limit: int = 100) -> list:
+        with self._lock:
+            current_id = self._current_ids[channel]
+            if last_id == current_id:
+                return []
+            events = list(self._events[channel])
+        # the client has missed events if the ones after its last have been trimmed
+        if not events or not events[0].id - 1 <= last_id < current_id:
+            raise EventDoesNotExist("No such event %d" % last_id, current_id)
+        start = last_id - events[0].id + 1
+        return events[start : start + limit]
+
+    def get_current_id(self, channel: str) -> int:
+        with self._lock:
+            return self._current_ids[channel]
+
+    def start_fanout(self, manager: ListenerManager) -> None:
+        # events are published to the local connections as they are appended
+        pass
+
+
+class RedisEventStorage(StorageBase):
+    """
+    Event log in a Redis stream per channel, shared by the workers. Entries get the integer
+    ids django_eventstream expects from a counter per channel, as stream ids <id>-0.
+    """
+
+    STREAM_KEY = "infraohjelmointi:sse:{}"
+    COUNTER_KEY = "infraohjelmointi:sse:{}:id"
+    # the counter and the stream are updated together so that the ids stay in order
+    APPEND_SCRIPT = """
+local id = redis.call('INCR', KEYS[2])
+redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[1], id .. '-0', 'type', ARGV[2], 'data', ARGV[3])
+return id
+"""
+
+    FANOUT_CATCH_UP = 100
+
+    _client = None
+    _client_lock = threading.Lock()
+    _fanout_task = None
+
+    shared = True
+
+    @classmethod
+    def redis(cls):
+        with cls._client_lock:
+            if cls._client is None:
+                import redis
+
+                cls._client = redis.Redis.from_url(
+                    settings.REDIS_URL, decode_responses=True, socket_timeout=2, socket_connect_timeout=2
+                )
+                cls._append = cls._client.register_script(cls.APPEND_SCRIPT)
+            return cls._client
+
+    def append_event(self, channel: str, event_type: str, data: str) -> Event:
+        self.redis()
+        event_id = self._append(
+            keys=[self.STREAM_KEY.format(channel), self.COUNTER_KEY.format(channel)],
+            args=[_stream_length(), event_type, data],
+        )
+        return Event(channel, event_type, data, id=int(event_id))
+
+    def get_events(self, channel: str, last_id: int, limit: int = 100) -> list:
+        current_id = self.get_current_id(channel)
+        if last_id == current_id:
+            return []
+        # read from the referenced event, the client has missed events if the ones after it
+        # have been trimmed
+        entries = self.redis().xrange(
+            self.STREAM_KEY.format(channel), min="{}-0".format(last_id), max="+", count=limit + 1
+        )
+        if entries and self._entry_id(entries[0][0]) == last_id:
+            entries = entries[1:]
+        elif not entries or self._entry_id(entries[0][0]) != last_id + 1:
+            raise EventDoesNotExist("No such event %d" % last_id, current_id)
+        return [self._event(channel, entry_id, fields) for entry_id, fields in entries[:limit]]
+
+    def get_current_id(self, channel: str) -> int:
+        return int(self.redis().get(self.COUNTER_KEY.format(channel)) or 0)
+
+    def start_fanout(self, manager: ListenerManager) -> None:
+        cls = type(self)
+        if cls._fanout_task is None or cls._fanout_task.done():
+            cls._fanout_task = asyncio.get_event_loop().create_task(self._fanout(manager))
+
+    async def _fanout(self, manager: ListenerManager) -> None:
+        """Reads new entries of the channels with connections in this worker, until none are left"""
+        import redis.asyncio
+        from redis.exceptions import RedisError
+
+        client = redis.asyncio.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+        streams = {}
+        try:
+            while True:
+                channels = manager.channels()
+                if not channels:
+                    return
+                try:
+                    for channel in channels:
+                        key = self.STREAM_KEY.format(channel)
+                        if key not in streams:
+                            # from a little back, a connection may have read the storage before
+                            # the latest entries, the ones it already has are skipped by their id
+                            current_id = int(await client.get(self.COUNTER_KEY.format(channel)) or 0)
+                            streams[key] = "{}-0".format(max(0, current_id - self.FANOUT_CATCH_UP))
+                    response = await client.xread(
+                        {key: streams[key] for key in map(self.STREAM_KEY.format, channels)},
+                        count=100,
+                        block=1000,
+                    )
+                except RedisError as e:
+                    logger.warning(f"Reading the event streams failed: {e}")
+                    await asyncio.sleep(1)
+                    continue
+                for key, entries in response or []:
+                    channel = key[len(self.STREAM_KEY.format("")) :]
+                    for entry_id, fields in entries:
+                        streams[key] = entry_id
+                        manager.publish(self._event(channel, entry_id, fields))
+        finally:
+            await client.aclose()
+
+    @staticmethod
+    def _entry_id(entry_id: str) -> int:
+        return int(entry_id.split("-")[0])
+
+    @classmethod
+    def _event(cls, channel: str, entry_id: str, fields: dict) -> Event:
+        return Event(channel, fields["type"], fields["data"], id=cls._entry_id(entry_id))
+
+
+class EventStreamService:
+    @staticmethod
+    def send_event(channel: str, event_type: str, data: dict) -> None:
+        """
+        Appends an event to the log of the channel, from where every worker sends it to its
+        connections. Replaces django_eventstream.send_event, which only reaches the
+        connections of the worker the event was sent in.
+        """
+        data = json.dumps(data, cls=DjangoJSONEncoder)
+        storage = get_storage()
+        try:
+            if storage is None:
+                raise ValueError("EVENTSTREAM_STORAGE_CLASS is not set")
+            event = storage.append_event(channel, event_type, data)
+        except Exception as e:
+            # the change is already committed, the connected clients still get the event
+            logger.warning(f"Appending a {event_type} event to the event log failed: {e}")
+            event = Event(channel, event_type, data)
+            storage = None
+
+        if storage is None or not storage.shared:
+            listener_manager.publish(event)
+
+        # through a GRIP proxy, when one is configured
+        publish_event(
+            channel,
+            event_type,
+            data,
+            str(event.id) if event.id is not None else None,
+            str(event.id - 1) if event.id is not None else None,
+            blocking=False,
+        )
+
+    @classmethod
+    def send_project_update(cls, project) -> None:
+        """
+        Sends the project-update event of an updated project. The forcedToFrame and finance_year
+        attributes set on the project by the partial update of the project view set are used
+        for serializing it.
+        """
+        from ..serializers import ProjectGetSerializer
+
+        forced_to_frame = getattr(project, "forcedToFrame", False)
+        cls.send_event(
+            "project",
+            "project-update",
+            {
+                "project": ProjectGetSerializer(
+                    project,
+                    context={
+                        "get_pw_link": True,
+                        "forcedToFrame": forced_to_frame,
+                        "for_coordinator": forced_to_frame == True,
+                        "finance_year": getattr(project, "finance_year", date.today().year),
+                    },
+                ).data,
+            },
+        )
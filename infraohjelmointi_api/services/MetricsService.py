@@ -0,0 +1,228 @@
+"""
+MetricsService for per-endpoint request metrics.
+Aggregates request timings, SQL and cache usage into in-process histograms
+and renders them in the Prometheus text exposition format.
+"""
+
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SQL_QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+RESPONSE_BYTES_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST_RE = re.compile(r"\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@dataclass
+class RequestStats:
+    """SQL and cache usage of a single request, collected while the request is handled."""
+
+    sql_count: int = 0
+    sql_seconds: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    sql_fingerprints: Counter = field(default_factory=Counter)
+
+
+_current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "current_request_stats", default=None
+)
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsService:
+    """
+    In-process request metrics.
+
+    Each worker process keeps its own metrics, so with several uvicorn workers a scrape
+    of /metrics shows the numbers of the worker that happened to answer it.
+    """
+
+    HISTOGRAMS = {
+        "infraohjelmointi_request_duration_seconds": ("Wall time of handling a request", DURATION_BUCKETS),
+        "infraohjelmointi_request_sql_queries": ("SQL queries run by a request", SQL_QUERY_BUCKETS),
+        "infraohjelmointi_request_sql_duration_seconds": ("Time spent in SQL by a request", DURATION_BUCKETS),
+        "infraohjelmointi_response_size_bytes": ("Size of non-streaming response bodies", RESPONSE_BYTES_BUCKETS),
+    }
+    COUNTERS = {
+        "infraohjelmointi_cache_hits_total": "CacheService cache hits",
+        "infraohjelmointi_cache_misses_total": "CacheService cache misses",
+    }
+    # source: {name: (type, key of the stats, description)}, the stats are read on every render
+    STATS_METRICS = {
+        # see project/extensions/postgresql_pool
+        "db_pool": {
+            "infraohjelmointi_db_pool_idle_connections": ("gauge", "idle", "Open connections waiting in the database pool"),
+            "infraohjelmointi_db_pool_in_use_connections": ("gauge", "in_use", "Database pool connections held by requests"),
+            "infraohjelmointi_db_pool_max_connections": ("gauge", "max_size", "Connections the database pool keeps open at most"),
+            "infraohjelmointi_db_pool_opened_total": ("counter", "opened", "Connections opened by the database pool"),
+            "infraohjelmointi_db_pool_reused_total": ("counter", "reused", "Checkouts served with an already open connection"),
+            "infraohjelmointi_db_pool_discarded_total": ("counter", "discarded", "Connections closed as broken or expired"),
+            "infraohjelmointi_db_pool_timeouts_total": ("counter", "timeouts", "Checkouts that gave up waiting for a free connection"),
+            "infraohjelmointi_db_pool_wait_seconds_total": ("counter", "wait_seconds", "Time spent waiting for a free connection"),
+        },
+        # see EventStreamService
+        "sse": {
+            "infraohjelmointi_sse_connections": ("gauge", "connections", "Open event stream connections"),
+            "infraohjelmointi_sse_rejected_connections_total": ("counter", "rejected", "Event stream connections refused at SSE_MAX_CONNECTIONS_PER_WORKER"),
+            "infraohjelmointi_sse_events_delivered_total": ("counter", "delivered", "Events sent to event stream connections from their queues"),
+            "infraohjelmointi_sse_events_merged_total": ("counter", "merged", "Queued events replaced by a newer update of the same project"),
+            "infraohjelmointi_sse_events_dropped_total": ("counter", "dropped", "Queued events dropped for slow connections, sent again from the event log"),
+        },
+        # see CacheWarmupService, warm-ups run in this process
+        "cache_warmup": {
+            "infraohjelmointi_cache_warmup_runs_total": ("counter", "runs", "Cache warm-ups run"),
+            "infraohjelmointi_cache_warmup_keys": ("gauge", "keys", "Cache entries checked by the last warm-up"),
+            "infraohjelmointi_cache_warmup_warm_keys": ("gauge", "warm", "Cache entries the last warm-up found already cached"),
+            "infraohjelmointi_cache_warmup_seconds": ("gauge", "seconds", "Duration of the last warm-up"),
+        },
+    }
+
+    _lock = threading.Lock()
+    _histograms = defaultdict(dict)
+    _counters = defaultdict(lambda: defaultdict(int))
+    _stats = defaultdict(dict)
+
+    @staticmethod
+    def start_request() -> RequestStats:
+        stats = RequestStats()
+        _current_request_stats.set(stats)
+        return stats
+
+    @staticmethod
+    def end_request() -> None:
+        _current_request_stats.set(None)
+
+    @staticmethod
+    def sql_fingerprint(sql: str) -> str:
+        """Normalizes a SQL statement so that queries differing only by their parameters group together."""
+        fingerprint = _STRING_LITERAL_RE.sub("?", sql)
+        fingerprint = _NUMBER_RE.sub("?", fingerprint)
+        fingerprint = _PLACEHOLDER_LIST_RE.sub("(...)", fingerprint)
+        return _WHITESPACE_RE.sub(" ", fingerprint).strip()
+
+    @classmethod
+    def record_query(cls, sql: str, duration: float) -> None:
+        stats = _current_request_stats.get()
+        if stats is None:
+            return
+        stats.sql_count += 1
+        stats.sql_seconds += duration
+        stats.sql_fingerprints[cls.sql_fingerprint(sql)] += 1
+
+    @staticmethod
+    def record_cache_lookup(hit: bool) -> None:
+        stats = _current_request_stats.get()
+        if stats is None:
+            return
+        if hit:
+            stats.cache_hits += 1
+        else:
+            stats.cache_misses += 1
+
+    @classmethod
+    def observe_request(
+        cls,
+        view: str,
+        method: str,
+        status_code: int,
+        duration: float,
+        stats: RequestStats,
+        response_bytes: Optional[int] = None,
+    ) -> None:
+        labels = (("view", view), ("method", method), ("status", str(status_code)))
+        with cls._lock:
+            cls._observe("infraohjelmointi_request_duration_seconds", labels, duration)
+            cls._observe("infraohjelmointi_request_sql_queries", labels, stats.sql_count)
+            cls._observe("infraohjelmointi_request_sql_duration_seconds", labels, stats.sql_seconds)
+            if response_bytes is not None:
+                cls._observe("infraohjelmointi_response_size_bytes", labels, response_bytes)
+            cls._counters["infraohjelmointi_cache_hits_total"][labels] += stats.cache_hits
+            cls._counters["infraohjelmointi_cache_misses_total"][labels] += stats.cache_misses
+
+    @classmethod
+    def register_stats(cls, source: str, stats: Callable[[], dict], labels: tuple = ()) -> None:
+        """Registers a callable returning the current stats of a source of STATS_METRICS."""
+        with cls._lock:
+            cls._stats[source][labels] = stats
+
+    @classmethod
+    def _observe(cls, name, labels, value):
+        histogram = cls._histograms[name].get(labels)
+        if histogram is None:
+            histogram = cls._histograms[name][labels] = _Histogram(cls.HISTOGRAMS[name][1])
+        histogram.observe(value)
+
+    @staticmethod
+    def _format_labels(labels) -> str:
+        return ",".join(
+            '{}="{}"'.format(key, value.replace("\\", "\\\\").replace('"', '\\"'))
+            for key, value in labels
+        )
+
+    @classmethod
+    def render_prometheus(cls) -> str:
+        """Renders all collected metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with cls._lock:
+            for name, (description, buckets) in cls.HISTOGRAMS.items():
+                lines.append("# HELP {} {}".format(name, description))
+                lines.append("# TYPE {} histogram".format(name))
+                for labels, histogram in sorted(cls._histograms[name].items()):
+                    label_str = cls._format_labels(labels)
+                    cumulative = 0
+                    for bound, count in zip(list(buckets) + ["+Inf"], histogram.counts):
+                        cumulative += count
+                        lines.append(
+                            '{}_bucket{{{},le="{}"}} {}'.format(name, label_str, bound, cumulative)
+                        )
+                    lines.append("{}_sum{{{}}} {}".format(name, label_str, histogram.sum))
+                    lines.append("{}_count{{{}}} {}".format(name, label_str, histogram.count))
+
+            for name, description in cls.COUNTERS.items():
+                lines.append("# HELP {} {}".format(name, description))
+                lines.append("# TYPE {} counter".format(name))
+                for labels, value in sorted(cls._counters[name].items()):
+                    lines.append("{}{{{}}} {}".format(name, cls._format_labels(labels), value))
+
+            for source, metrics in cls.STATS_METRICS.items():
+                stats_by_labels = {labels: stats() for labels, stats in sorted(cls._stats[source].items())}
+                if not stats_by_labels:
+                    continue
+                for name, (metric_type, key, description) in metrics.items():
+                    lines.append("# HELP {} {}".format(name, description))
+                    lines.append("# TYPE {} {}".format(name, metric_type))
+                    for labels, stats in stats_by_labels.items():
+                        if labels:
+                            lines.append("{}{{{}}} {}".format(name, cls._format_labels(labels), stats[key]))
+                        else:
+                            lines.append("{} {}".format(name, stats[key]))
+
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._histograms.clear()
+            cls._counters.clear()
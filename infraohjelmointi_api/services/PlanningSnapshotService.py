@@ -0,0 +1,309 @@
+import gzip
+import hashlib
+from collections import defaultdict
+from datetime import date
+from typing import Optional
+
+from django.db.models import Prefetch
+
+from ..models import (
+    ClassFinancial,
+    LocationFinancial,
+    Project,
+    ProjectClass,
+    ProjectFinancial,
+    ProjectGroup,
+    ProjectLocation,
+)
+from .CacheService import CacheService
+from .CompressionService import CompressionService
+from .ProjectClassService import ProjectClassService
+from .ProjectLocationService import ProjectLocationService
+from .SapCurrentYearService import SapCurrentYearService
+
+
+class PlanningSnapshotService:
+    """
+    Builds the planning view of a year as one document: the classes, locations and groups
+    with their financial sums and the programmed projects with their finances.
+
+    The serialized entries are kept in the cache along with the gzip-compressed document, and
+    the brotli-compressed one when brotli is installed.
+    Signals log the projects changed since (CacheService.mark_planning_snapshot_dirty), and
+    on the next read only those projects and the classes, locations and groups above them
+    are serialized again. Hierarchy and frame budget changes rebuild the snapshot in full.
+    """
+
+    SECTIONS = ["classes", "locations", "groups", "projects"]
+
+    # more logged changes than this are cheaper to rebuild from scratch
+    MAX_INCREMENTAL_CHANGES = 200
+
+    def __init__(
+        self, year: int, for_frame_view: bool = False, project_area_planner: bool = False
+    ) -> None:
+        self.year = year
+        self.for_frame_view = for_frame_view
+        self.project_area_planner = project_area_planner
+        self.years = list(range(year, year + 11))
+
+    def get(self) -> dict:
+        """
+        Returns the current snapshot as {"version", "etag", "body_gz", "body_br"}, applying the
+        changes logged since the stored one was built. body_br is None without brotli.
+        """
+        # read before the data, a change committed while building is applied on the next read
+        seq = CacheService.get_planning_snapshot_seq()
+        if seq is None:
+            return self.__package(self.build(), version=None)
+
+        snapshot = self.__get_cached("body")
+        if snapshot is not None and snapshot["version"] == seq:
+            return snapshot
+
+        state = self.__rebuild(self.__get_cached("state"), seq)
+        snapshot = self.__package(state, version=seq)
+        self.__set_cached("state", state)
+        self.__set_cached("body", snapshot)
+        return snapshot
+
+    def build(self) -> dict:
+        """Serializes every section of the snapshot"""
+        return {
+            "version": None,
+            "classes": self.__serialize_classes(),
+            "locations": self.__serialize_locations(),
+            "groups": self.__serialize_groups(),
+            "projects": self.__serialize_projects(),
+        }
+
+    def __rebuild(self, state: Optional[dict], seq: int) -> dict:
+        if state is not None and 0 <= seq - state["version"] <= self.MAX_INCREMENTAL_CHANGES:
+            changes = CacheService.get_planning_snapshot_changes(since=state["version"], until=seq)
+            if changes is not None and all(change["projects"] is not None for change in changes):
+                project_ids = {project_id for change in changes for project_id in change["projects"]}
+                state = self.__apply_project_changes(state, project_ids)
+                state["version"] = seq
+                return state
+
+        state = self.build()
+        state["version"] = seq
+        return state
+
+    def __apply_project_changes(self, state: dict, project_ids: set) -> dict:
+        """Serializes the changed projects again, and the hierarchy they were and are under"""
+        if not project_ids:
+            return state
+
+        projects = self.__serialize_projects(project_ids)
+        class_ids, location_ids, group_ids = set(), set(), set()
+        for project_id in project_ids:
+            # a project leaving the view drops out, the sums it was in are recalculated
+            old = state["projects"].pop(project_id, None)
+            for project in [old, projects.get(project_id)]:
+                if project is None:
+                    continue
+                class_ids.add(project["projectClass"])
+                location_ids.add(project["projectLocation"])
+                group_ids.add(project["projectGroup"])
+        state["projects"].update(projects)
+
+        group_locations = dict(
+            ProjectGroup.objects.filter(id__in=[i for i in group_ids if i])
+            .values_list("id", "locationRelation_id")
+        )
+        # location sums are filtered by the location of the group too
+        location_ids.update(group_locations.values())
+
+        class_ids = self.__with_ancestors(ProjectClass, class_ids)
+        location_ids = self.__with_ancestors(ProjectLocation, location_ids)
+        group_ids = {str(group_id) for group_id in group_ids if group_id}
+
+        for section, ids, serialize in [
+            ("classes", class_ids, self.__serialize_classes),
+            ("locations", location_ids, self.__serialize_locations),
+            ("groups", group_ids, self.__serialize_groups),
+        ]:
+            # only nodes already in the snapshot are replaced, new nodes come with a hierarchy change
+            ids = [node_id for node_id in ids if node_id in state[section]]
+            if ids:
+                state[section].update(serialize(ids))
+        return state
+
+    def __with_ancestors(self, model, ids: set) -> set:
+        parents = {
+            str(node_id): str(parent_id) if parent_id else None
+            for node_id, parent_id in model.objects.values_list("id", "parent_id")
+        }
+        ancestors = set()
+        for node_id in ids:
+            node_id = str(node_id) if node_id else None
+            while node_id is not None and node_id not in ancestors:
+                ancestors.add(node_id)
+                node_id = parents.get(node_id)
+        return ancestors
+
+    def __package(self, state: dict, version: Optional[int]) -> dict:
+        # imported here, the renderers are not needed by the other services
+        from ..renderers import fast_json_dumps
+
+        body = fast_json_dumps(
+            {
+                "year": self.year,
+                "forcedToFrame": self.for_frame_view,
+                "version": version,
+                **{section: list(state[section].values()) for section in self.SECTIONS},
+            }
+        )
+        return {
+            "version": version,
+            "etag": '"{}"'.format(hashlib.sha256(body).hexdigest()[:32]),
+            "body_gz": gzip.compress(body, compresslevel=6),
+            "body_br": (
+                CompressionService.compress(body, CompressionService.BROTLI)
+                if CompressionService.BROTLI in CompressionService.available_encodings()
+                else None
+            ),
+        }
+
+    def __get_cached(self, part: str) -> Optional[dict]:
+        return CacheService.get_planning_snapshot(
+            part, self.year, self.for_frame_view, self.project_area_planner
+        )
+
+    def __set_cached(self, part: str, data: dict) -> None:
+        CacheService.set_planning_snapshot(
+            part, self.year, self.for_frame_view, self.project_area_planner, data
+        )
+
+    def __hierarchy_context(self) -> dict:
+        from ..views.BaseClassLocationViewSet import BaseClassLocationViewSet
+
+        return {
+            "finance_year": self.year,
+            "forcedToFrame": self.for_frame_view,
+            "frame_budgets": BaseClassLocationViewSet.build_frame_budgets_context(
+                self.year, for_frame_view=False
+            ),
+        }
+
+    def __serialize_classes(self, ids: Optional[list] = None) -> dict:
+        from ..serializers import ProjectClassSerializer
+
+        # the same queryset as the planning list of ProjectClassViewSet
+        queryset = (
+            ProjectClassService.list_all()
+            .select_related("coordinatorClass", "coordinatorClass__parent", "coordinatorClass__parent__parent", "parent", "defaultProgrammer")
+            .prefetch_related(
+                "coordinatorClass__finances",
+                Prefetch(
+                    "finances",
+                    queryset=ClassFinancial.objects.filter(forFrameView=False).order_by("year"),
+                ),
+            )
+        )
+        if self.project_area_planner:
+            queryset = queryset.filter(name__startswith="808") | queryset.filter(name__startswith="8 08")
+        if ids is not None:
+            queryset = queryset.filter(id__in=ids)
+        return self.__by_id(
+            ProjectClassSerializer(queryset, many=True, context=self.__hierarchy_context()).data
+        )
+
+    def __serialize_locations(self, ids: Optional[list] = None) -> dict:
+        from ..serializers import ProjectLocationSerializer
+
+        queryset = (
+            ProjectLocationService.list_all()
+            .select_related("coordinatorLocation", "parent", "parentClass")
+            .prefetch_related(
+                "coordinatorLocation__finances",
+                Prefetch(
+                    "finances",
+                    queryset=LocationFinancial.objects.filter(forFrameView=False).order_by("year"),
+                ),
+            )
+        )
+        if ids is not None:
+            queryset = queryset.filter(id__in=ids)
+        return self.__by_id(
+            ProjectLocationSerializer(queryset, many=True, context=self.__hierarchy_context()).data
+        )
+
+    def __serialize_groups(self, ids: Optional[list] = None) -> dict:
+        from ..serializers import ProjectGroupSerializer
+
+        queryset = ProjectGroup.objects.select_related(
+            "classRelation", "locationRelation", "location"
+        ).order_by("createdDate")
+        if ids is not None:
+            queryset = queryset.filter(id__in=ids)
+        return self.__by_id(
+            ProjectGroupSerializer(
+                queryset,
+                many=True,
+                context={"finance_year": self.year, "forcedToFrame": self.for_frame_view},
+            ).data
+        )
+
+    def __serialize_projects(self, ids: Optional[set] = None) -> dict:
+        from ..serializers import ProjectFinancialSerializer, ProjectGetSerializer
+
+        queryset = (
+            Project.objects.filter(programmed=True)
+            .select_related(
+                "projectClass",
+                "projectLocation",
+                "lock",
+                "phase",
+                "category",
+                "personPlanning",
+                "personConstruction",
+                "personProgramming",
+                "budgetOverrunReason",
+            )
+            .prefetch_related("favPersons", "hashTags")
+            .order_by("createdDate")
+        )
+        finances = ProjectFinancial.objects.filter(
+            forFrameView=self.for_frame_view, year__in=self.years
+        )
+        sap_values = SapCurrentYearService.get_by_year(date.today().year)
+        if ids is not None:
+            queryset = queryset.filter(id__in=ids)
+            finances = finances.filter(project_id__in=ids)
+            sap_values = sap_values.filter(project_id__in=ids)
+
+        projects_to_finances = defaultdict(list)
+        for f in ProjectFinancialSerializer(finances, many=True, context={"discard_FK": False}).data:
+            projects_to_finances[f["project"]].append(f)
+
+        projects_to_sap_values = defaultdict(list)
+        for sap_value in sap_values:
+            projects_to_sap_values[sap_value.project_id].append(sap_value)
+
+        return self.__by_id(
+            ProjectGetSerializer(
+                queryset,
+                many=True,
+                context={
+                    "finance_year": self.year,
+                    "for_coordinator": False,
+                    "forcedToFrame": self.for_frame_view,
+                    "projects_to_finances": projects_to_finances,
+                    "projects_to_sap_values": projects_to_sap_values,
+                },
+            ).data
+        )
+
+    @staticmethod
+    def __by_id(data) -> dict:
+        entries = {}
+        for entry in data:
+            entry = dict(entry)
+            # relations are kept as strings, the keys of the sections
+            for field in ["projectClass", "projectLocation", "projectGroup"]:
+                if entry.get(field) is not None:
+                    entry[field] = str(entry[field])
+            entries[str(entry["id"])] = entry
+        return entries
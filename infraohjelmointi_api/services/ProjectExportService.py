@@ -0,0 +1,241 @@
+import csv
+import json
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from itertools import islice
+from typing import Iterable, Iterator
+
+from openpyxl import Workbook
+
+from ..models import ProjectClass, ProjectFinancial, ProjectLocation
+
+
+class ProjectExportService:
+    """
+    Exports filtered projects with their finances for 11 years, followed by the financial
+    sums of the classes and locations the projects belong to.
+
+    Projects are read chunk_size at a time and each chunk is written out before the next one
+    is read, so the export is never held in memory as a whole.
+    """
+
+    CONTENT_TYPES = {
+        "csv": "text/csv; charset=utf-8",
+        "ndjson": "application/x-ndjson",
+        "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    }
+
+    # size of the chunks an xlsx export is read from its temporary file
+    STREAM_CHUNK_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        year: int,
+        for_coordinator: bool = False,
+        for_frame_view: bool = False,
+        chunk_size: int = 500,
+    ) -> None:
+        self.year = year
+        self.for_coordinator = for_coordinator
+        self.for_frame_view = for_frame_view
+        self.chunk_size = chunk_size
+        self.years = list(range(year, year + 11))
+
+    @property
+    def columns(self) -> list[str]:
+        return (
+            [
+                "type",
+                "id",
+                "name",
+                "path",
+                "hkrId",
+                "sapProject",
+                "phase",
+                "category",
+                "programmed",
+                "planningStartYear",
+                "constructionEndYear",
+                "projectClass",
+                "projectLocation",
+                "projectGroup",
+            ]
+            + [f"plannedBudget{year}" for year in self.years]
+            + [f"frameBudget{year}" for year in self.years]
+            + [f"budgetChange{year}" for year in self.years]
+        )
+
+    def get_filename(self, export_format: str) -> str:
+        view = "coordinator" if self.for_coordinator else "planning"
+        return f"projects_{view}_{self.year}.{export_format}"
+
+    def stream(self, queryset, export_format: str) -> Iterator[bytes]:
+        """Yields the export of the projects of the queryset in the given format"""
+        writers = {
+            "csv": self.__stream_csv,
+            "ndjson": self.__stream_ndjson,
+            "xlsx": self.__stream_xlsx,
+        }
+        return writers[export_format](self.row_chunks(queryset))
+
+    def row_chunks(self, queryset) -> Iterator[list[dict]]:
+        """
+        Yields the project rows a chunk at a time, the class and location rows last.
+        """
+        hierarchy_ids = set()
+        # only the related objects of the rows are needed, not the m2m prefetches of the view
+        queryset = queryset.prefetch_related(None).select_related("projectGroup")
+        pks = queryset.values_list("pk", flat=True).iterator(chunk_size=self.chunk_size)
+        while chunk := list(islice(pks, self.chunk_size)):
+            projects = {project.pk: project for project in queryset.filter(pk__in=chunk)}
+            finances = self.__get_finances(chunk)
+            rows = []
+            for pk in chunk:
+                project = projects.get(pk)
+                # Row was deleted between reading the keys and the chunk
+                if project is None:
+                    continue
+                project_class, project_location = self.__get_hierarchy(project)
+                hierarchy_ids.update(
+                    node.pk for node in (project_class, project_location) if node
+                )
+                rows.append(
+                    self.__project_row(
+                        project, project_class, project_location, finances.get(pk, {})
+                    )
+                )
+            yield rows
+
+        yield self.__hierarchy_rows(hierarchy_ids)
+
+    def __get_finances(self, project_ids: list) -> dict:
+        finances = {}
+        for project_id, year, value in ProjectFinancial.objects.filter(
+            project_id__in=project_ids,
+            year__in=self.years,
+            forFrameView=self.for_frame_view,
+        ).values_list("project_id", "year", "value"):
+            finances.setdefault(project_id, {})[year] = value
+        return finances
+
+    def __get_hierarchy(self, project) -> tuple:
+        """The class and location of the project in the exported view"""
+        if not self.for_coordinator:
+            return project.projectClass, project.projectLocation
+
+        # the same mapping as the coordinator projects of ProjectGetSerializer
+        project_class = project.projectClass
+        coordinator_class = getattr(project_class, "coordinatorClass", None)
+        if (
+            coordinator_class is None
+            and project_class is not None
+            and "suurpiiri" in project_class.name.lower()
+        ):
+            coordinator_class = getattr(project_class.parent, "coordinatorClass", None)
+
+        location = project.projectLocation
+        coordinator_location = None
+        while location is not None and coordinator_location is None:
+            coordinator_location = getattr(location, "coordinatorLocation", None)
+            location = location.parent
+        return coordinator_class, coordinator_location
+
+    def __project_row(self, project, project_class, project_location, finances: dict) -> dict:
+        row = dict.fromkeys(self.columns)
+        row.update({
+            "type": "project",
+            "id": str(project.id),
+            "name": project.name,
+            "path": None,
+            "hkrId": project.hkrId,
+            "sapProject": project.sapProject,
+            "phase": project.phase.value if project.phase else None,
+            "category": project.category.value if project.category else None,
+            "programmed": project.programmed,
+            "planningStartYear": project.planningStartYear,
+            "constructionEndYear": project.constructionEndYear,
+            "projectClass": project_class.path if project_class else None,
+            "projectLocation": project_location.path if project_location else None,
+            "projectGroup": project.projectGroup.name if project.projectGroup else None,
+        })
+        for year in self.years:
+            row[f"plannedBudget{year}"] = finances.get(year, Decimal("0.00"))
+        return row
+
+    def __hierarchy_rows(self, hierarchy_ids: set) -> list[dict]:
+        """Rows of the classes and locations of the projects and their parents"""
+        # imported here, the serializers use services
+        from ..serializers import ProjectClassSerializer, ProjectLocationSerializer
+        from ..views.BaseClassLocationViewSet import BaseClassLocationViewSet
+
+        context = {
+            "finance_year": self.year,
+            "forcedToFrame": self.for_frame_view,
+            "for_coordinator": self.for_coordinator,
+            "frame_budgets": BaseClassLocationViewSet.build_frame_budgets_context(
+                self.year, for_frame_view=self.for_frame_view
+            ),
+        }
+        rows = []
+        for model, serializer_class, _type in [
+            (ProjectClass, ProjectClassSerializer, "class"),
+            (ProjectLocation, ProjectLocationSerializer, "location"),
+        ]:
+            nodes = {
+                node.pk: node
+                for node in model.objects.filter(forCoordinatorOnly=self.for_coordinator)
+            }
+            exported = {}
+            for node_id in hierarchy_ids:
+                node = nodes.get(node_id)
+                while node is not None and node.pk not in exported:
+                    exported[node.pk] = node
+                    node = nodes.get(node.parent_id)
+
+            serializer = serializer_class(context=context)
+            for node in sorted(exported.values(), key=lambda node: node.path or ""):
+                sums = serializer.get_finance_sums(node)
+                row = dict.fromkeys(self.columns)
+                row.update(
+                    {"type": _type, "id": str(node.id), "name": node.name, "path": node.path}
+                )
+                for index, year in enumerate(self.years):
+                    year_sums = sums[f"year{index}"]
+                    row[f"plannedBudget{year}"] = year_sums["plannedBudget"]
+                    row[f"frameBudget{year}"] = year_sums["frameBudget"]
+                    row[f"budgetChange{year}"] = year_sums["budgetChange"]
+                rows.append(row)
+        return rows
+
+    def __stream_csv(self, row_chunks: Iterable[list[dict]]) -> Iterator[bytes]:
+        output = StringIO()
+        writer = csv.DictWriter(output, fieldnames=self.columns)
+        writer.writeheader()
+        for rows in row_chunks:
+            writer.writerows(rows)
+            yield output.getvalue().encode("utf-8")
+            output.seek(0)
+            output.truncate()
+
+    def __stream_ndjson(self, row_chunks: Iterable[list[dict]]) -> Iterator[bytes]:
+        encoder = json.JSONEncoder(default=str)
+        for rows in row_chunks:
+            if rows:
+                yield "".join(encoder.encode(row) + "\n" for row in rows).encode("utf-8")
+
+    def __stream_xlsx(self, row_chunks: Iterable[list[dict]]) -> Iterator[bytes]:
+        # rows of a write only worksheet go to a temporary file as they are appended
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Projects")
+        ws.freeze_panes = "A2"
+        ws.append(self.columns)
+        for rows in row_chunks:
+            for row in rows:
+                ws.append([row.get(column) for column in self.columns])
+
+        with tempfile.TemporaryFile() as output:
+            wb.save(output)
+            output.seek(0)
+            while chunk := output.read(self.STREAM_CHUNK_SIZE):
+                yield chunk
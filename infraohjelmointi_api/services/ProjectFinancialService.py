@@ -1,4 +1,10 @@
-from ..models import ProjectFinancial
+from typing import Optional
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from ..models import Project, ProjectFinancial
+from .CacheService import CacheService
 
 
 class ProjectFinancialService:
@@ -36,12 +42,48 @@ class ProjectFinancialService:
     def update_or_create_bulk(
         project_financials: list[ProjectFinancial],
     ) -> list[ProjectFinancial]:
-        return ProjectFinancial.objects.bulk_create(
+        created_financials = ProjectFinancial.objects.bulk_create(
             project_financials,
             update_conflicts=True,
             update_fields=["value", "updatedDate"],
             unique_fields=["year", "project_id", "forFrameView"],
         )
+
+        # bulk_create skips the post_save signals, bump the data versions of the years here
+        for year in {financial.year for financial in project_financials}:
+            transaction.on_commit(lambda year=year: CacheService.bump_data_version(year=year))
+        project_ids = {financial.project_id for financial in project_financials}
+        transaction.on_commit(lambda: CacheService.mark_planning_snapshot_dirty(project_ids=list(project_ids)))
+        ProjectFinancialService.update_finance_years(project_ids=project_ids)
+
+        return created_financials
+
+    @staticmethod
+    def update_finance_years(project_ids: Optional[list] = None) -> int:
+        """
+        Updates the first and last years with a nonzero value of the planning and frame finances
+        of the given projects, or of all projects. Returns the number of projects updated.
+        """
+
+        def finance_year(for_frame_view: bool, order_by: str) -> Subquery:
+            return Subquery(
+                ProjectFinancial.objects.filter(
+                    project=OuterRef("pk"), forFrameView=for_frame_view, value__gt=0
+                )
+                .order_by(order_by)
+                .values("year")[:1]
+            )
+
+        projects = Project.objects.all()
+        if project_ids is not None:
+            projects = projects.filter(id__in=project_ids)
+        # one statement, skipping Project.save and its signals
+        return projects.update(
+            financesFirstYear=finance_year(False, "year"),
+            financesLastYear=finance_year(False, "-year"),
+            frameFinancesFirstYear=finance_year(True, "year"),
+            frameFinancesLastYear=finance_year(True, "-year"),
+        )
     
     @staticmethod
     def find_by_project_id_and_finance_years(
@@ -1,13 +1,23 @@
 import requests
 from os import path
 import environ
+import copy
+import hashlib
+import json
 import re
 import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from dataclasses import dataclass
+from typing import Optional
 
 from datetime import datetime
 
+from django.db import transaction
+from django.utils import timezone
+
 logger = logging.getLogger("infraohjelmointi_api")
 
 from ..models import (
@@ -15,20 +25,19 @@ from ..models import (
     Person,
 )
 
-from .PersonService import PersonService
+from .CacheService import CacheService
+from .EventStreamService import EventStreamService
 from .ProjectService import ProjectService
 from .ProjectLocationService import ProjectLocationService
-from .ProjectPhaseService import ProjectPhaseService
-from .ProjectAreaService import ProjectAreaService
-from .ProjectTypeService import ProjectTypeService
-from .ResponsibleZoneService import ResponsibleZoneService
-from .ConstructionPhaseDetailService import ConstructionPhaseDetailService
 
 from .utils import (
     ProjectWiseDataMapper,
+    RateLimitedSession,
+    RateLimiter,
     create_comprehensive_project_data,
 )
 from .utils.PWConfig import PWConfig
+from .utils.PWLookups import PWLookups
 from .utils.PWLogger import PWLogger
 
 env = environ.Env()
@@ -83,6 +92,19 @@ class ProjectWiseService:
     ]
     HIERARCHICAL_FIELDS = set(HIERARCHICAL_FIELD_ORDER)  # O(1) lookup
 
+    # Relations read while building mass update data, loaded with the projects
+    MASS_UPDATE_RELATED_FIELDS = (
+        "phase",
+        "type",
+        "area",
+        "responsibleZone",
+        "constructionPhaseDetail",
+        "projectDistrict",
+        "projectClass",
+        "personPlanning",
+        "personConstruction",
+    )
+
     def __init__(self) -> None:
         self.session = requests.Session()
         self.session.auth = (env("PW_USERNAME"), env("PW_PASSWORD"))
@@ -110,57 +132,126 @@ class ProjectWiseService:
             return match.group(1) + match.group(2) + ' ' + match.group(3)
         return value
 
-    def sync_all_projects_from_pw(self) -> None:
+    def sync_all_projects_from_pw(self) -> list[dict]:
         """Method to synchronise all projects in DB with PW project data.\n"""
 
         logger.debug("Synchronizing all projects in DB with PW")
-        self.sync_projects_from_pw(projects=ProjectService.list_with_non_null_hkr_id())
+        return self.sync_projects_from_pw(projects=ProjectService.list_with_non_null_hkr_id())
 
-    def sync_projects_from_pw(self, projects: list[Project]) -> None:
+    def sync_projects_from_pw(self, projects: list[Project]) -> list[dict]:
         """Method to synchronise given projects with PW project data.\n
         Given projects must have hkrId otherwise project missing hkrId will not be syncrhonized.
+
+        PW projects are fetched on PWConfig.INBOUND_SYNC_WORKERS concurrent workers, PW values are
+        resolved from PWLookups loaded once per call and only the changed fields are written, with
+        bulk_update in one transaction. Returns a log entry with timings for each project.
         """
 
+        projects = [project for project in projects if project.hkrId]
         logger.debug(f"Synchronizing given projects '{len(projects)}' in DB with PW")
-        for project in projects:
-            self.__sync_project_from_pw(project=project)
+        if not projects:
+            return []
+
+        lookups = PWLookups()
+        sync_log = [None] * len(projects)
+        changed_projects = {}
+        changed_persons = {}
+        # the class, location and group of the changed projects before the sync
+        previous = []
+
+        def fetch(worker, hkr_id):
+            start_time = time.perf_counter()
+            pw_project = worker.get_project_from_pw(hkr_id)
+            return pw_project, time.perf_counter() - start_time
+
+        with self._pw_workers(
+            PWConfig.INBOUND_SYNC_WORKERS, PWConfig.INBOUND_SYNC_REQUESTS_PER_SECOND
+        ) as submit:
+            pending = {
+                submit(lambda worker, hkr_id=project.hkrId: fetch(worker, hkr_id)): (i, project)
+                for i, project in enumerate(projects)
+            }
+            for future in as_completed(pending):
+                i, project = pending[future]
+                logger.debug(
+                    f"Synchronizing given project '{project.id}' with PW Id '{project.hkrId}' from PW"
+                )
+                sync_log[i] = entry = {'project_id': str(project.id), 'hkr_id': project.hkrId}
+                try:
+                    pw_project, entry['fetch_time'] = future.result()
+
+                    start_time = time.perf_counter()
+                    hierarchy = (project.projectClass_id, project.projectLocation_id, project.projectGroup_id)
+                    changed_fields = self.__proceed_with_pw_project(
+                        pw_project=pw_project,
+                        project=project,
+                        lookups=lookups,
+                        changed_persons=changed_persons,
+                    )
+                    entry['apply_time'] = time.perf_counter() - start_time
+                    entry['changed_fields'] = changed_fields
+                    entry['status'] = 'updated' if changed_fields else 'unchanged'
+                    if changed_fields:
+                        changed_projects.setdefault(frozenset(changed_fields), []).append(project)
+                        previous.append(hierarchy)
+                except (PWProjectNotFoundError, PWProjectResponseError) as e:
+                    logger.error(e)
+                    entry.update(status='error', error=str(e))
+                except Exception as e:
+                    logger.error(
+                        "Error occurred while syncing project '{}' with PW id '{}'. \nError: {}".format(
+                            project.id, project.hkrId, e
+                        )
+                    )
+                    entry.update(status='error', error=str(e))
+
+        start_time = time.perf_counter()
+        updated_projects = [project for group in changed_projects.values() for project in group]
+        with transaction.atomic():
+            if changed_persons:
+                Person.objects.bulk_update(
+                    changed_persons.values(), ["title", "phone", "email", "updatedDate"]
+                )
+            for fields, group in changed_projects.items():
+                Project.objects.bulk_update(group, sorted(fields), batch_size=500)
+            transaction.on_commit(lambda: self.__invalidate_synced_projects(updated_projects, previous))
+        write_time = time.perf_counter() - start_time
 
-    def sync_project_from_pw(self, pw_id: str) -> None:
+        for entry in sync_log:
+            if entry['status'] != 'error':
+                logger.info(
+                    "Project {} successfully synchronized from PW in {}s (fetch {}s, apply {}s)".format(
+                        entry['project_id'],
+                        entry['fetch_time'] + entry['apply_time'],
+                        entry['fetch_time'],
+                        entry['apply_time'],
+                    )
+                )
+        logger.info(
+            f"Synchronized {len(projects)} projects from PW: {len(updated_projects)} updated, "
+            f"{len([entry for entry in sync_log if entry['status'] == 'error'])} errors, "
+            f"changes written in {write_time}s"
+        )
+        return sync_log
+
+    def sync_project_from_pw(self, pw_id: str) -> list[dict]:
         """Method to synchronise project with given PW id with PW project data.\n"""
 
         logger.debug(f"Synchronizing given project with PW Id '{pw_id}' with PW")
-        self.__sync_project_from_pw(ProjectService.get_by_hkr_id(hkr_id=pw_id))
+        return self.sync_projects_from_pw([ProjectService.get_by_hkr_id(hkr_id=pw_id)])
 
-    def __sync_project_from_pw(self, project: Project) -> None:
-        """Method to synchronise given project from PW project data.\n
-        Given project must have hkrId otherwise project will not be synchronized.
+    def __invalidate_synced_projects(self, projects: list[Project], previous: list) -> None:
         """
-
-        logger.debug(
-            f"Synchronizing given project '{project.id}' with PW Id '{project.hkrId}' from PW"
-        )
-        if not project.hkrId:
+        Invalidates what the project post_save signals would have, once for all synced projects,
+        and sends their project-update events
+        """
+        if not projects:
             return
-        try:
-            start_time = time.perf_counter()
-            # fetch project data from PW
-            pw_project = self.get_project_from_pw(project.hkrId)
-
-            # handle the reponse
-            self.__proceed_with_pw_project(pw_project=pw_project, project=project)
 
-            handling_time = time.perf_counter() - start_time
-            logger.info(
-                f"Project {project.id} with successully synchronized from PW in {handling_time}s"
-            )
-        except (PWProjectNotFoundError, PWProjectResponseError) as e:
-            logger.error(e)
-        except Exception as e:
-            logger.error(
-                "Error occurred while syncing project '{}' with PW id '{}'. \nError: {}".format(
-                    project.id, project.hkrId, e
-                )
-            )
+        # programmed or not, the sync may have taken the project out of the programme
+        CacheService.invalidate_projects(projects, previous)
+        for project in projects:
+            EventStreamService.send_project_update(project)
 
     def _update_hierarchical_fields_one_by_one(self, instance_id, hierarchical_fields, project_name, hkr_id):
         """
@@ -244,10 +335,11 @@ class ProjectWiseService:
         else:
             logger.error("sync_project_to_pw called without proper parameters")
 
-    def __sync_project_to_pw(self, data: dict, project: Project) -> None:
+    def __sync_project_to_pw(self, data: dict, project: Project) -> Optional[UpdateResult]:
         """Method to synchronise given project to PW
         Given project must have hkrId otherwise project will not be synchronized.
         Implements overwrite rules: only update if infra tool field is empty, except for protected fields.
+        Returns the UpdateResult when fields were sent to PW, otherwise None.
         """
         if project.hkrId is None or str(project.hkrId).strip() == "":
             return
@@ -380,6 +472,7 @@ class ProjectWiseService:
                     raise PWProjectResponseError(
                         f"All field updates failed for '{project.name}' (HKR {project.hkrId})"
                     )
+                return result
             else:
                 logger.info(f"No PW data generated for project '{project.name}' (HKR ID: {project.hkrId})")
         except (
@@ -547,21 +640,27 @@ class ProjectWiseService:
         return field_mapping
 
 
-    def sync_all_projects_to_pw(self):
+    def sync_all_projects_to_pw(self, force: bool = False):
         """
         PRODUCTION-READY mass update of all programmed projects to ProjectWise.
         Implements overwrite rules and comprehensive logging.
         Only processes programmed projects with HKR IDs.
+        Projects unchanged since their last successful push are skipped unless force is given.
         """
-        return self._mass_update_projects_to_pw()
+        return self._mass_update_projects_to_pw(force=force)
 
-    def _mass_update_projects_to_pw(self):
+    def _mass_update_projects_to_pw(self, force: bool = False):
         """
         Core mass update implementation with overwrite rules and comprehensive logging.
         Processes all programmed projects with HKR IDs.
 
+        Project data is built up front on the calling thread from prefetched lookups, the PW
+        calls are then made on a pool of PWConfig.MASS_UPDATE_WORKERS workers sharing a
+        PWConfig.MASS_UPDATE_REQUESTS_PER_SECOND rate limit. A hash of each successfully
+        pushed payload is stored, projects whose payload hash is unchanged make no PW calls.
+
         Returns:
-            List of update logs with detailed results for each project
+            List of update logs with detailed results for each project, in project order
         """
         if not self.pw_sync_enabled:
             logger.error(
@@ -572,68 +671,131 @@ class ProjectWiseService:
                 "=" * PWConfig.LOG_SEPARATOR_LENGTH
             )
             return []
-        
-        projects = Project.objects.filter(programmed=True, hkrId__isnull=False)
-        total_projects = projects.count()
+
+        projects = list(
+            Project.objects.filter(programmed=True, hkrId__isnull=False).select_related(
+                *self.MASS_UPDATE_RELATED_FIELDS
+            )
+        )
+        total_projects = len(projects)
         PWLogger.log_mass_update_start(total_projects)
 
         if total_projects == 0:
             PWLogger.log_mass_update_no_projects()
             return []
 
-        update_log = []
-        successful_updates = 0
-        skipped_updates = 0
-        errors = 0
+        update_log = [None] * total_projects
+        pushed_hashes = {}
+        last_hashes = {} if force else CacheService.get_pw_push_hashes([str(project.id) for project in projects])
 
-        for i, project in enumerate(projects, 1):
-            PWLogger.log_mass_update_progress(project.name, project.hkrId, i, total_projects)
+        with self.project_wise_data_mapper.prefetched_lookups(), self._pw_workers(
+            PWConfig.MASS_UPDATE_WORKERS, PWConfig.MASS_UPDATE_REQUESTS_PER_SECOND
+        ) as submit:
+            pending = {}
+            for i, project in enumerate(projects):
+                PWLogger.log_mass_update_progress(project.name, project.hkrId, i + 1, total_projects)
 
-            try:
-                # Create comprehensive project data for mass update
-                project_data = self._create_project_data_for_mass_update(project)
-                logger.debug(f"Created project data with {len(project_data)} fields: {list(project_data.keys())}")
-
-                if not project_data:
-                    PWLogger.log_no_data_to_sync(project.name, project.hkrId, "all fields are None")
-                    update_log.append({
-                        'project_id': str(project.id),
-                        'project_name': project.name,
-                        'hkr_id': project.hkrId,
-                        'status': 'skipped',
-                        'reason': 'no_data'
-                    })
-                    skipped_updates += 1
-                    continue
-
-                # Use the existing sync method which has overwrite rules
-                self.__sync_project_to_pw(data=project_data, project=project)
-
-                update_log.append({
-                    'project_id': str(project.id),
-                    'project_name': project.name,
-                    'hkr_id': project.hkrId,
-                    'updated_fields': list(project_data.keys()),
-                    'status': 'success'
-                })
-                successful_updates += 1
+                try:
+                    # Create comprehensive project data for mass update
+                    project_data = self._create_project_data_for_mass_update(project)
+                    logger.debug(f"Created project data with {len(project_data)} fields: {list(project_data.keys())}")
 
-            except Exception as e:
-                PWLogger.log_project_processing_error(project.name, e)
-                update_log.append({
-                    'project_id': str(project.id),
-                    'project_name': project.name,
-                    'hkr_id': project.hkrId,
-                    'status': 'error',
-                    'error': str(e)
-                })
-                errors += 1
+                    if not project_data:
+                        PWLogger.log_no_data_to_sync(project.name, project.hkrId, "all fields are None")
+                        update_log[i] = self._mass_update_entry(project, status='skipped', reason='no_data')
+                        continue
+
+                    payload_hash = self._payload_hash(
+                        self.project_wise_data_mapper.convert_to_pw_data(data=project_data, project=project)
+                    )
+                    if last_hashes.get(str(project.id)) == payload_hash:
+                        PWLogger.log_no_data_to_sync(project.name, project.hkrId, "unchanged since last push")
+                        update_log[i] = self._mass_update_entry(project, status='skipped', reason='unchanged')
+                        continue
+
+                    # Use the existing sync method which has overwrite rules
+                    future = submit(
+                        lambda worker, data=project_data, project=project: worker.__sync_project_to_pw(
+                            data=data, project=project
+                        )
+                    )
+                    pending[future] = (i, project, project_data, payload_hash)
+
+                except Exception as e:
+                    PWLogger.log_project_processing_error(project.name, e)
+                    update_log[i] = self._mass_update_entry(project, status='error', error=str(e))
+
+            for future in as_completed(pending):
+                i, project, project_data, payload_hash = pending[future]
+                try:
+                    result = future.result()
+                    update_log[i] = self._mass_update_entry(
+                        project, updated_fields=list(project_data.keys()), status='success'
+                    )
+                    # Partially failed pushes are retried on the next run
+                    if result is None or result.total_success == result.total_attempted:
+                        pushed_hashes[str(project.id)] = payload_hash
+                except Exception as e:
+                    PWLogger.log_project_processing_error(project.name, e)
+                    update_log[i] = self._mass_update_entry(project, status='error', error=str(e))
+
+        CacheService.set_pw_push_hashes(pushed_hashes)
 
         # Log comprehensive summary
-        PWLogger.log_mass_update_summary(successful_updates, skipped_updates, errors)
+        PWLogger.log_mass_update_summary(
+            len([log for log in update_log if log['status'] == 'success']),
+            len([log for log in update_log if log['status'] == 'skipped']),
+            len([log for log in update_log if log['status'] == 'error']),
+        )
 
         return update_log
 
+    @contextmanager
+    def _pw_workers(self, max_workers: int, requests_per_second: float):
+        """
+        Yields a submit function running call(worker) on a pool of max_workers threads.
+
+        Each worker thread gets its own copy of the service with its own requests session,
+        all sessions share one requests_per_second limit. Submitted calls must not make
+        database queries, the caller loads everything they need up front.
+        """
+        limiter = RateLimiter(requests_per_second)
+        local = threading.local()
+        sessions = []
+        sessions_lock = threading.Lock()
+
+        def run(call):
+            worker = getattr(local, "service", None)
+            if worker is None:
+                worker = local.service = copy.copy(self)
+                worker.session = RateLimitedSession(limiter)
+                worker.session.auth = self.session.auth
+                worker.session.headers.update(self.session.headers)
+                with sessions_lock:
+                    sessions.append(worker.session)
+            return call(worker)
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pw-worker") as executor:
+                yield lambda call: executor.submit(run, call)
+        finally:
+            for session in sessions:
+                session.close()
+
+    @staticmethod
+    def _mass_update_entry(project: Project, **fields) -> dict:
+        return {
+            'project_id': str(project.id),
+            'project_name': project.name,
+            'hkr_id': project.hkrId,
+            **fields,
+        }
+
+    @staticmethod
+    def _payload_hash(pw_data: dict) -> str:
+        """Stable hash of a PW payload, used to detect projects unchanged since their last push."""
+        return hashlib.sha256(json.dumps(pw_data, sort_keys=True, default=str).encode()).hexdigest()
+
     def _create_project_data_for_mass_update(self, project: Project) -> dict:
         """
         Create project data dictionary for mass updates.
@@ -784,8 +946,16 @@ class ProjectWiseService:
                         )
                     )
 
-    def __proceed_with_pw_project(self, pw_project, project: Project) -> None:
-        """Helper method to handle PW project data and copy it to given project"""
+    def __proceed_with_pw_project(
+        self, pw_project, project: Project, lookups: PWLookups, changed_persons: dict
+    ) -> list[str]:
+        """Helper method to handle PW project data and copy it to given project.\n
+        Does not save the project, returns the names of the fields whose values changed.
+        Persons whose details changed are collected to changed_persons.
+        """
+
+        fields = Project._meta.concrete_fields
+        original_values = {field.attname: getattr(project, field.attname) for field in fields}
 
         project_properties = pw_project["relationshipInstances"][0]["relatedInstance"][
             "properties"
@@ -802,17 +972,22 @@ class ProjectWiseService:
             project.address = project_properties["PROJECT_Kadun_tai_puiston_nimi"]
 
         if project_properties["PROJECT_Hankkeen_vaihe"]:
-            try:
-                # Find phase by PW value using reverse mapping
-                phase_value = project_properties["PROJECT_Hankkeen_vaihe"]
-                phase = ProjectPhaseService.find_by_value(phase_value)
-                if not phase:
-                    # Fallback to default phase
-                    phase = ProjectPhaseService.find_by_value("2. Ohjelmointi")
+            # Find phase by PW value using reverse mapping
+            phase_value = project_properties["PROJECT_Hankkeen_vaihe"]
+            phase = lookups.find("phase", phase_value)
+            if not phase:
+                logger.warning(f"Failed to find phase for value '{phase_value}'")
+                # Fallback to default phase
+                phase = lookups.default_phase
+            if phase:
                 project.phase = phase
-            except Exception as e:
-                logger.warning(f"Failed to find phase for value '{phase_value}': {e}")
-                project.phase = ProjectPhaseService.find_by_value("2. Ohjelmointi")
+            # Done by the pre_save signal on_project_phase_change when saving one by one
+            if (
+                project.phase_id != original_values["phase_id"]
+                and project.phase.value == PWLookups.CONSTRUCTION_PHASE
+                and lookups.construction_category
+            ):
+                project.category = lookups.construction_category
 
         if project_properties["PROJECT_Louheen"]:
             project.louhi = project_properties["PROJECT_Louheen"] != "Ei"
@@ -821,11 +996,12 @@ class ProjectWiseService:
             project.gravel = project_properties["PROJECT_Sorakatu"] != "Ei"
 
         if project_properties["PROJECT_Projektialue"]:
-            try:
-                area_value = project_properties["PROJECT_Projektialue"]
-                project.area = ProjectAreaService.find_by_value(area_value)
-            except Exception as e:
-                logger.warning(f"Failed to find area for value '{area_value}': {e}")
+            area_value = project_properties["PROJECT_Projektialue"]
+            area = lookups.find("area", area_value)
+            if area:
+                project.area = area
+            else:
+                logger.warning(f"Failed to find area for value '{area_value}'")
 
         if project_properties["PROJECT_Aluekokonaisuuden_nimi"]:
             project.entityName = project_properties["PROJECT_Aluekokonaisuuden_nimi"]
@@ -834,25 +1010,28 @@ class ProjectWiseService:
             project.programmed = project_properties["PROJECT_Ohjelmoitu"] != "Ei"
 
         if project_properties["PROJECT_Rakentamisvaiheen_tarkenne"]:
-            try:
-                detail_value = project_properties["PROJECT_Rakentamisvaiheen_tarkenne"]
-                project.constructionPhaseDetail = ConstructionPhaseDetailService.find_by_value(detail_value)
-            except Exception as e:
-                logger.warning(f"Failed to find construction phase detail for value '{detail_value}': {e}")
+            detail_value = project_properties["PROJECT_Rakentamisvaiheen_tarkenne"]
+            detail = lookups.find("constructionPhaseDetail", detail_value)
+            if detail:
+                project.constructionPhaseDetail = detail
+            else:
+                logger.warning(f"Failed to find construction phase detail for value '{detail_value}'")
 
         if project_properties["PROJECT_Toimiala"]:
-            try:
-                type_value = project_properties["PROJECT_Toimiala"]
-                project.type = ProjectTypeService.find_by_value(type_value)
-            except Exception as e:
-                logger.warning(f"Failed to find project type for value '{type_value}': {e}")
+            type_value = project_properties["PROJECT_Toimiala"]
+            project_type = lookups.find("type", type_value)
+            if project_type:
+                project.type = project_type
+            else:
+                logger.warning(f"Failed to find project type for value '{type_value}'")
 
         if project_properties["PROJECT_Alue_rakennusviraston_vastuujaon_mukaan"]:
-            try:
-                zone_value = project_properties["PROJECT_Alue_rakennusviraston_vastuujaon_mukaan"]
-                project.responsibleZone = ResponsibleZoneService.find_by_value(zone_value)
-            except Exception as e:
-                logger.warning(f"Failed to find responsible zone for value '{zone_value}': {e}")
+            zone_value = project_properties["PROJECT_Alue_rakennusviraston_vastuujaon_mukaan"]
+            zone = lookups.find("responsibleZone", zone_value)
+            if zone:
+                project.responsibleZone = zone
+            else:
+                logger.warning(f"Failed to find responsible zone for value '{zone_value}'")
 
         if project_properties["PROJECT_Louhi__hankkeen_aloitusvuosi"]:
             project.planningStartYear = project_properties[
@@ -868,51 +1047,51 @@ class ProjectWiseService:
             project.estConstructionStart = datetime.strptime(
                 project_properties["PROJECT_Hankkeen_rakentaminen_alkaa"],
                 "%Y-%m-%dT%H:%M:%S",
-            )
+            ).date()
 
         if "PROJECT_Hankkeen_rakentaminen_pttyy" in project_properties:
             project.estConstructionEnd = datetime.strptime(
                 project_properties["PROJECT_Hankkeen_rakentaminen_pttyy"],
                 "%Y-%m-%dT%H:%M:%S",
-            )
+            ).date()
 
         if "PROJECT_Nhtvillolo_alku" in project_properties:
             project.visibilityStart = datetime.strptime(
                 project_properties["PROJECT_Nhtvillolo_alku"],
                 "%Y-%m-%dT%H:%M:%S",
-            )
+            ).date()
 
         if "PROJECT_Nhtvillolo_loppu" in project_properties:
             project.visibilityEnd = datetime.strptime(
                 project_properties["PROJECT_Nhtvillolo_loppu"],
                 "%Y-%m-%dT%H:%M:%S",
-            )
+            ).date()
 
         if "PROJECT_Esillaolo_alku" in project_properties:
             project.presenceStart = datetime.strptime(
                 project_properties["PROJECT_Esillaolo_alku"],
                 "%Y-%m-%dT%H:%M:%S",
-            )
+            ).date()
 
         if "PROJECT_Esillaolo_loppu" in project_properties:
             project.presenceEnd = datetime.strptime(
                 project_properties["PROJECT_Esillaolo_loppu"],
                 "%Y-%m-%dT%H:%M:%S",
-            )
+            ).date()
 
         if "PROJECT_Hankkeen_suunnittelu_alkaa" in project_properties:
             project.estPlanningStart = datetime.strptime(
                 project_properties["PROJECT_Hankkeen_suunnittelu_alkaa"],
                 "%Y-%m-%dT%H:%M:%S",
-            )
+            ).date()
 
         if "PROJECT_Hankkeen_suunnittelu_pttyy" in project_properties:
             project.estPlanningEnd = datetime.strptime(
                 project_properties["PROJECT_Hankkeen_suunnittelu_pttyy"],
                 "%Y-%m-%dT%H:%M:%S",
-            )
+            ).date()
 
-        if not project.personPlanning:
+        if not project.personPlanning_id:
             planning_person_data = "{}, {}, {}, {}".format(
                 project_properties["PROJECT_Vastuuhenkil"],
                 project_properties["PROJECT_Vastuuhenkiln_titteli"],
@@ -921,7 +1100,7 @@ class ProjectWiseService:
             )
 
             planning_person = self.__get_project_person(
-                person_data=planning_person_data
+                person_data=planning_person_data, lookups=lookups, changed_persons=changed_persons
             )
             if planning_person:
                 logger.debug(
@@ -934,7 +1113,9 @@ class ProjectWiseService:
 
         if project_properties["PROJECT_Vastuuhenkil_rakennuttaminen"]:
             construction_person = self.__get_project_person(
-                person_data=project_properties["PROJECT_Vastuuhenkil_rakennuttaminen"]
+                person_data=project_properties["PROJECT_Vastuuhenkil_rakennuttaminen"],
+                lookups=lookups,
+                changed_persons=changed_persons,
             )
 
             if construction_person:
@@ -947,17 +1128,23 @@ class ProjectWiseService:
                 project.personConstruction = construction_person
 
         if project_properties["PROJECT_Muut_vastuuhenkilt"]:
+            # otherPersons is a many to many field, it cannot be assigned from the PW text value
             logger.debug(
                 "Person others: {} for project {}".format(
                     project_properties["PROJECT_Muut_vastuuhenkilt"],
                     project.hkrId,
                 )
             )
-            project.otherPersons = project_properties["PROJECT_Muut_vastuuhenkilt"]
 
-        project.save()
+        changed_fields = [
+            field.name for field in fields if getattr(project, field.attname) != original_values[field.attname]
+        ]
+        if changed_fields:
+            project.updatedDate = timezone.now()
+            changed_fields.append("updatedDate")
+        return changed_fields
 
-    def __get_project_person(self, person_data: str) -> Person:
+    def __get_project_person(self, person_data: str, lookups: PWLookups, changed_persons: dict) -> Person:
         """Helper method to load person from DB with PW data"""
 
         person_data = person_data.strip().replace(", ", ",")
@@ -968,10 +1155,13 @@ class ProjectWiseService:
         try:
             full_name, title, phone_nr, email = person_data.split(",")
             last_name, first_name = re.split("(?<=.)(?<!\-)(?=[A-Z])", full_name)
-            person, _ = PersonService.get_or_create_by_name(
-                firstName=first_name.strip().title(), lastName=last_name.strip().title()
+            person = lookups.get_or_create_person(
+                first_name=first_name.strip().title(), last_name=last_name.strip().title()
             )
+            if not person:
+                return None
 
+            original_details = (person.title, person.phone, person.email)
             if title:
                 person.title = title.strip().title()
             if phone_nr:
@@ -979,7 +1169,9 @@ class ProjectWiseService:
             if email:
                 person.email = email.strip()
 
-            person.save()
+            if (person.title, person.phone, person.email) != original_details:
+                person.updatedDate = timezone.now()
+                changed_persons[person.id] = person
 
             return person
         except Exception:
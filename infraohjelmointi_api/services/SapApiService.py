@@ -11,6 +11,7 @@ from django.core.exceptions import MultipleObjectsReturned
 
 from ..models import Project
 from .ProjectService import ProjectService
+from .SapClosedYearCostService import SapClosedYearCostService
 from .SapCostService import SapCostService
 from .SapCurrentYearService import SapCurrentYearService
 
@@ -21,6 +22,10 @@ class SapAuthenticationError(Exception):
     """Raised when SAP returns 401 Unauthorized. Sync should abort immediately to avoid lockout."""
 
 
+class SapRequestError(Exception):
+    """Raised when SAP responds to a request with an error status code."""
+
+
 env = environ.Env()
 env.escape_proxy = True
 
@@ -31,6 +36,8 @@ requests.packages.urllib3.util.ssl_.DEFAULT_CIPHERS = "ALL:@SECLEVEL=1"
 
 
 class SapApiService:
+    BATCHABLE_POSID_FILTER = "(Posid eq '{posid}')"
+
     def __init__(self) -> None:
         # connection setup
         self.session = requests.Session()
@@ -39,7 +46,11 @@ class SapApiService:
 
         self.sap_api_costs_endpoint = env("SAP_COSTS_ENDPOINT")
         self.sap_api_commitments_endpoint = env("SAP_COMMITMENTS_ENDPOINT")
-
+        # How many SAP ids are fetched with one request, 1 fetches every id separately
+        self.sap_batch_size = env.int("SAP_BATCH_SIZE", default=20)
+        # Costs of years older than this many years are stored as closed and not fetched again,
+        # previous year stays open until financial statement is ready
+        self.sap_open_years = env.int("SAP_OPEN_YEARS", default=2)
 
         # Set the sap start year to be 2017 to get all data from sap
         self.sap_fetch_all_data_start_year = 2017
@@ -49,16 +60,18 @@ class SapApiService:
         self.sap_freeze_date = datetime(2026, 1, 30, 0, 0, 0, tzinfo=timezone.utc)
         self.sap_freeze_year = 2025
 
-    def sync_all_projects_from_sap(self, for_financial_statement: bool, sap_year=datetime.now().year) -> None:
+    def sync_all_projects_from_sap(self, for_financial_statement: bool, sap_year=datetime.now().year, projects=None) -> None:
         """Method to synchronise projects from SAP.\n
         Given projects must have sapProject otherwise project will not be syncrhonized.
         Will get for_financial_statement as True if called for fetching sap data for certain year only,
         then also this certain year is given as parameter.
+        Projects can be limited with projects, by default all projects with SAP id are synchronised.
         """
 
         logger.debug("Synchronizing all projects in DB with SAP")
-        projects = ProjectService.list_with_non_null_sap_id()
-        project_count = projects.count() if hasattr(projects, "count") else len(projects)
+        if projects is None:
+            projects = ProjectService.list_with_non_null_sap_id()
+        project_count = len(projects)
         logger.info(f"SAP sync: starting with {project_count} projects with SAP IDs")
 
         # group projects by sapProject, all projects belong to same group
@@ -67,7 +80,20 @@ class SapApiService:
         total_sap_ids = sum(len(by_sap) for by_sap in projects_grouped_by_groups.values())
         logger.info(f"SAP sync: {len(projects_grouped_by_groups)} groups, {total_sap_ids} SAP IDs to process")
 
-        # make only one call either for ungroupped project are all groupped projects
+        # fetch costs and commitments of every SAP id up front, many SAP ids per request
+        sap_ids = list(dict.fromkeys(
+            sap_id for by_sap in projects_grouped_by_groups.values() for sap_id in by_sap
+        ))
+        start_time = time.perf_counter()
+        # all sap data is not fetched, if function is called for getting sap data for certain year,
+        # f.g. for financial statement
+        all_sap_data_by_sap_id = (
+            {} if for_financial_statement
+            else self.get_all_project_costs_and_commitments_by_sap_ids(sap_ids)
+        )
+        current_year_by_sap_id = self.get_costs_and_commitments_by_year_by_sap_ids(sap_ids, sap_year)
+        logger.info(f"SAP sync: fetched data for {len(sap_ids)} SAP IDs in {time.perf_counter() - start_time}s")
+
         for group_id in projects_grouped_by_groups.keys():
             projects_grouped_by_sap_id = projects_grouped_by_groups[group_id]
 
@@ -81,27 +107,17 @@ class SapApiService:
 
                     project_id_list = [p.id for p in projects_within_group]
 
-                    self.__start_and_finish_log_print(sync_group, group_id, sap_id, project_id_list, is_start=True)
+                    self.__start_log_print(sync_group, group_id, sap_id, project_id_list)
 
-                    # fetch costs and commitments from SAP
-                    start_time = time.perf_counter()
                     sap_costs_and_commitments = {}
-
-                    # all sap data is not fetched, if function is called for getting sap data for certain year,
-                    # f.g. for financial statement
                     if not for_financial_statement:
-                        sap_costs_and_commitments["all_sap_data"] = (
-                            self.get_all_project_costs_and_commitments_from_sap(sap_id)
+                        sap_costs_and_commitments["all_sap_data"] = self.__fetched_or_raise(
+                            all_sap_data_by_sap_id[sap_id]
                         )
-
-                    sap_costs_and_commitments["current_year"] = (
-                        self.get_costs_and_commitments_by_year(sap_id, sap_year)
+                    sap_costs_and_commitments["current_year"] = self.__fetched_or_raise(
+                        current_year_by_sap_id[sap_id]
                     )
 
-                    handling_time = time.perf_counter() - start_time
-
-                    self.__start_and_finish_log_print(sync_group, group_id, sap_id, project_id_list, is_start=False, handling_time=handling_time)
-
                     logger.info(f"SAP sync: about to validate and store for sap_id {sap_id}")
                     if self.validate_costs_and_commitments(sap_costs_and_commitments):
                         costs_by_sap_id_all[sap_id] = sap_costs_and_commitments["all_sap_data"]
@@ -307,6 +323,274 @@ class SapApiService:
 
         return json_response
 
+    def get_costs_and_commitments_by_year_by_sap_ids(self, ids: list[str], year) -> dict:
+        """Method to fetch costs and commitments from SAP for given year for many SAP ids.\n
+        Fetches self.sap_batch_size ids per request, ids of failing batches are fetched one by one.
+        Returns the results by SAP id, the result is the exception raised if fetching an id failed.
+        """
+        now = datetime.now(timezone.utc)
+        if now >= self.sap_freeze_date and year == self.sap_freeze_year:
+            # IO-790: frozen year comes from DB
+            return self.__fetch_one_by_one(ids, lambda id: self.get_costs_and_commitments_by_year(id, year))
+
+        budat_start = datetime.now().replace(year=year, month=1, day=1, hour=0, minute=0, second=0)
+        budat_end = datetime.now().replace(year=year+1, month=1, day=1, hour=0, minute=0, second=0)
+
+        json_responses, failed_ids = self.__fetch_costs_and_commitments_in_batches(
+            budat_start, budat_end, ids, all_sap_commitments=False
+        )
+        results = {
+            id: self.__group_costs_and_commitments(sap_costs_and_commitments=json_response, sap_id=id)
+            for id, json_response in json_responses.items()
+        }
+        results.update(
+            self.__fetch_one_by_one(failed_ids, lambda id: self.get_costs_and_commitments_by_year(id, year))
+        )
+        return results
+
+    def get_all_project_costs_and_commitments_by_sap_ids(self, ids: list[str]) -> dict:
+        """Method to fetch all costs and commitments from SAP for many SAP ids.\n
+        Fetches self.sap_batch_size ids per request, ids of failing batches are fetched one by one.
+        Costs of closed years come from SapClosedYearCost, only costs of open years are fetched.
+        Returns the results by SAP id, the result is the exception raised if fetching an id failed.
+        """
+        if not self.__batch_size():
+            return self.__fetch_one_by_one(ids, self.get_all_project_costs_and_commitments_from_sap)
+
+        budat_start = datetime.now().replace(year=self.sap_fetch_all_data_start_year, month=1, day=1, hour=0, minute=0, second=0)
+        budat_end = datetime.now().replace(year=datetime.now().year + 1, month=1, day=1, hour=0, minute=0, second=0)
+
+        # IO-790: After freeze date, costs are fetched from 2026 on and frozen 2025 costs added from DB
+        now = datetime.now(timezone.utc)
+        freeze_active = now >= self.sap_freeze_date
+        costs_start_year = self.sap_freeze_year + 1 if freeze_active else self.sap_fetch_all_data_start_year
+
+        closed_costs, open_year_by_id = self.__get_closed_year_costs(ids, costs_start_year)
+
+        # Costs are fetched from the first open year of the SAP id on
+        ids_by_open_year = {}
+        for id in ids:
+            ids_by_open_year.setdefault(open_year_by_id[id], []).append(id)
+        costs, failed_ids = {}, []
+        for open_year, open_year_ids in ids_by_open_year.items():
+            fetched, failed = self.__fetch_values_in_batches(
+                self.sap_api_costs_endpoint,
+                "costs",
+                open_year_ids,
+                budat_start.replace(year=open_year),
+                budat_end,
+            )
+            costs.update(fetched)
+            failed_ids.extend(failed)
+
+        # Commitments are always fetched from 2017 until the end of the current year + 5 years
+        commitments, failed = self.__fetch_values_in_batches(
+            self.sap_api_commitments_endpoint,
+            "commitments",
+            [id for id in ids if id in costs],
+            budat_start,
+            budat_end.replace(year=budat_end.year + 5),
+        )
+        failed_ids.extend(failed)
+
+        results = {}
+        for id, id_commitments in commitments.items():
+            grouped_costs_and_commitments_all = self.__group_costs_and_commitments(
+                sap_costs_and_commitments={"costs": costs[id], "commitments": id_commitments},
+                sap_id=id,
+            )
+            grouped_costs_and_commitments_all["costs"]["project_task"] += closed_costs[id]["project_task"]
+            grouped_costs_and_commitments_all["costs"]["production_task"] += closed_costs[id]["production_task"]
+            if freeze_active:
+                frozen_entry = next(
+                    (item for item in SapCostService.get_by_sap_id(id) if item.year == self.sap_freeze_year), None
+                )
+                if frozen_entry:
+                    grouped_costs_and_commitments_all["costs"]["project_task"] += frozen_entry.project_task_costs
+                    grouped_costs_and_commitments_all["costs"]["production_task"] += frozen_entry.production_task_costs
+                else:
+                    logger.error(f"CRITICAL: No frozen 2025 data found for {id} in DB - totals will be incorrect!")
+            results[id] = grouped_costs_and_commitments_all
+
+        results.update(self.__fetch_one_by_one(failed_ids, self.get_all_project_costs_and_commitments_from_sap))
+        return results
+
+    def refetch_closed_year(self, year: int, ids: list[str]) -> int:
+        """Fetches costs of given SAP ids for given year from SAP and stores them as closed.\n
+        Returns the amount of stored SAP ids, ids whose costs could not be fetched are not stored.
+        """
+        budat_start, budat_end = self.__closed_year_range(year)
+        costs, failed_ids = self.__fetch_values_in_batches(
+            self.sap_api_costs_endpoint, "costs", ids, budat_start, budat_end, batch_size=self.__batch_size() or 1
+        )
+        if failed_ids:
+            logger.error(f"Could not fetch {year} costs from SAP for SAP ids {failed_ids}")
+        SapClosedYearCostService.store_closed(
+            year,
+            {id: self.__calculate_values(sap_id=id, values=values) for id, values in costs.items()},
+        )
+        return len(costs)
+
+    def __get_closed_year_costs(self, ids: list[str], costs_start_year: int) -> tuple[dict, dict]:
+        """Returns the summed closed year costs and the first open year by SAP id.\n
+        Years older than self.sap_open_years are closed, costs of closed years which
+        are not in DB are fetched from SAP and stored. Closed years are used only up to
+        the first missing or re-opened year, costs are fetched from SAP from that year on.
+        """
+        last_closed_year = datetime.now().year - max(self.sap_open_years, 1)
+        closed_years = range(costs_start_year, last_closed_year + 1)
+
+        stored = {
+            (item.sap_id, item.year): item
+            for item in SapClosedYearCostService.get_by_sap_ids_and_years(ids, closed_years)
+        }
+        for year in closed_years:
+            missing_ids = [id for id in ids if (id, year) not in stored]
+            if not missing_ids:
+                continue
+            logger.info(f"SAP sync: fetching closed year {year} costs for {len(missing_ids)} SAP IDs")
+            self.refetch_closed_year(year, missing_ids)
+            stored.update(
+                ((item.sap_id, item.year), item)
+                for item in SapClosedYearCostService.get_by_sap_ids_and_years(missing_ids, [year])
+            )
+
+        closed_costs, open_year_by_id = {}, {}
+        for id in ids:
+            closed_costs[id] = {"project_task": Decimal(0.000), "production_task": Decimal(0.000)}
+            open_year = costs_start_year
+            while (id, open_year) in stored and stored[(id, open_year)].closed:
+                closed_costs[id]["project_task"] += stored[(id, open_year)].project_task_costs
+                closed_costs[id]["production_task"] += stored[(id, open_year)].production_task_costs
+                open_year += 1
+            open_year_by_id[id] = open_year
+        return closed_costs, open_year_by_id
+
+    def __closed_year_range(self, year: int) -> tuple[datetime, datetime]:
+        # Budat le is inclusive, the range ends at the last second of the year not to overlap the next year
+        return (
+            datetime.now().replace(year=year, month=1, day=1, hour=0, minute=0, second=0),
+            datetime.now().replace(year=year, month=12, day=31, hour=23, minute=59, second=59),
+        )
+
+    def __fetch_one_by_one(self, ids: list[str], fetch) -> dict:
+        results = {}
+        for id in ids:
+            try:
+                results[id] = fetch(id)
+            except SapAuthenticationError:
+                raise
+            except Exception as e:
+                results[id] = e
+        return results
+
+    def __batch_size(self) -> int:
+        """Returns 0 if the endpoints do not have the (Posid eq '{posid}') condition to which ids can be added"""
+        batchable = all(
+            self.BATCHABLE_POSID_FILTER in endpoint
+            for endpoint in (self.sap_api_costs_endpoint, self.sap_api_commitments_endpoint)
+        )
+        return max(self.sap_batch_size, 1) if batchable else 0
+
+    def __fetch_costs_and_commitments_in_batches(
+            self,
+            budat_start: datetime,
+            budat_end: datetime,
+            ids: list[str],
+            all_sap_commitments: bool,
+        ) -> tuple[dict, list[str]]:
+        """Fetches raw costs and commitments of self.sap_batch_size SAP ids per request.\n
+        Returns the responses by SAP id and the ids of failed batches. Every id is returned as failed
+        when the endpoints cannot be batched.
+        """
+        if not self.__batch_size():
+            return {}, list(ids)
+
+        # Fetch commitments until the end fo the current year + 5 years for all data
+        end_date_for_commitment_fetch = (
+            budat_end.replace(year=budat_end.year + 5) if all_sap_commitments else budat_end
+        )
+        costs, failed_ids = self.__fetch_values_in_batches(
+            self.sap_api_costs_endpoint, "costs", ids, budat_start, budat_end
+        )
+        commitments, failed = self.__fetch_values_in_batches(
+            self.sap_api_commitments_endpoint,
+            "commitments",
+            [id for id in ids if id in costs],
+            budat_start,
+            end_date_for_commitment_fetch,
+        )
+        failed_ids.extend(failed)
+
+        json_responses = {
+            id: {"costs": costs[id], "commitments": id_commitments}
+            for id, id_commitments in commitments.items()
+        }
+        return json_responses, failed_ids
+
+    def __fetch_values_in_batches(
+            self,
+            endpoint: str,
+            type: str,
+            ids: list[str],
+            budat_start: datetime,
+            budat_end: datetime,
+            batch_size: int = None,
+        ) -> tuple[dict, list[str]]:
+        """Fetches values of batch_size (self.sap_batch_size by default) SAP ids per request.\n
+        Returns the values by SAP id and the ids of failed batches.
+        """
+        batch_size = batch_size or self.__batch_size()
+        values_by_id = {}
+        failed_ids = []
+        for i in range(0, len(ids), batch_size):
+            batch = ids[i:i + batch_size]
+            batch_label = f"{batch[0]}..{batch[-1]}" if len(batch) > 1 else batch[0]
+            try:
+                values = self.__make_sap_request(
+                    self.__build_sap_url(endpoint, batch, budat_start, budat_end),
+                    batch_label,
+                    type,
+                    raise_on_error=True,
+                )
+            except SapAuthenticationError:
+                raise
+            except Exception as e:
+                logger.warning(f"SAP batch request for {type} of {len(batch)} ids failed: {e}")
+                failed_ids.extend(batch)
+                continue
+            values_by_id.update(self.__split_values_by_sap_id(values, batch))
+
+        return values_by_id, failed_ids
+
+    def __build_sap_url(self, endpoint: str, ids: list[str], budat_start: datetime, budat_end: datetime) -> str:
+        date_format = "%Y-%m-%dT%H:%M:%S"
+        return f"{self.sap_api_url}{endpoint}".format(
+            # (Posid eq '{posid}') becomes (Posid eq 'a' or Posid eq 'b')
+            posid="' or Posid eq '".join(ids),
+            budat_start=budat_start.strftime(date_format),
+            budat_end=budat_end.strftime(date_format),
+        )
+
+    @staticmethod
+    def __split_values_by_sap_id(values: list, ids: list[str]) -> dict:
+        """Splits values of a batch response by SAP id, a Posid belongs to the longest SAP id it starts with"""
+        values_by_id = {id: [] for id in ids}
+        longest_first = sorted(ids, key=len, reverse=True)
+        for value in values:
+            id = next((id for id in longest_first if value["Posid"].startswith(id)), None)
+            if id is None:
+                logger.warning(f"SAP returned Posid '{value['Posid']}' not matching any requested SAP id")
+                continue
+            values_by_id[id].append(value)
+        return values_by_id
+
+    @staticmethod
+    def __fetched_or_raise(fetched):
+        if isinstance(fetched, Exception):
+            raise fetched
+        return fetched
+
     def __store_sap_data(
         self,
         service_class,
@@ -484,8 +768,10 @@ class SapApiService:
             body = response.text or "(empty)"
         logger.error(f"SAP response body for id '{id}': {body}")
 
-    def __make_sap_request(self, api_url, id, type):
-        """Helper method to fetch costs from SAP"""
+    def __make_sap_request(self, api_url, id, type, raise_on_error=False):
+        """Helper method to fetch costs from SAP.\n
+        Responses other than 200 give an empty list, or raise SapRequestError with raise_on_error.
+        """
         start_time = time.perf_counter()
         logger.debug(f"Requesting API for {type} from {api_url}")
         response = self.session.get(api_url)
@@ -511,6 +797,10 @@ class SapApiService:
         # Other errors (e.g. 400 = no data for this key)
         if response.status_code != 200:
             self.__log_response_error(response, id)
+            if raise_on_error:
+                raise SapRequestError(
+                    f"SAP returned status code '{response.status_code}' for {type} of id '{id}'"
+                )
             return []  # Empty list so __calculate_values and callers get consistent type
 
         return response.json()["d"]["results"]
@@ -522,22 +812,12 @@ class SapApiService:
         else:
             return False
 
-    def __start_and_finish_log_print(self, sync_group, group_id, sap_id, project_id_list, is_start, handling_time=None):
-        if (is_start):
-            if sync_group:
-                logger.debug(
-                    f"Synchronizing given project group '{group_id}' with SAP Id '{sap_id}' from SAP"
-                )
-            else:
-                logger.debug(
-                    f"Synchronizing given project(s) '{project_id_list}' with SAP Id '{sap_id}' from SAP"
-                )
+    def __start_log_print(self, sync_group, group_id, sap_id, project_id_list):
+        if sync_group:
+            logger.debug(
+                f"Synchronizing given project group '{group_id}' with SAP Id '{sap_id}' from SAP"
+            )
         else:
-            if sync_group:
-                logger.info(
-                    f"Finished fetching data from SAP for project group '{group_id}' in {handling_time}s"
-                )
-            else:
-                logger.info(
-                    f"Finished fetching data from SAP for project {project_id_list} in {handling_time}s"
-                )
+            logger.debug(
+                f"Synchronizing given project(s) '{project_id_list}' with SAP Id '{sap_id}' from SAP"
+            )
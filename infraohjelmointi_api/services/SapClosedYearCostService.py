@@ -0,0 +1,37 @@
+from ..models import SapClosedYearCost
+
+
+class SapClosedYearCostService:
+    @staticmethod
+    def list_all() -> list[SapClosedYearCost]:
+        return SapClosedYearCost.objects.all()
+
+    @staticmethod
+    def get_by_sap_ids_and_years(sap_ids: list[str], years) -> list[SapClosedYearCost]:
+        return SapClosedYearCost.objects.filter(sap_id__in=sap_ids, year__in=years)
+
+    @staticmethod
+    def get_by_year(year: int, sap_ids: list[str] = None) -> list[SapClosedYearCost]:
+        closed_year_costs = SapClosedYearCost.objects.filter(year=year)
+        if sap_ids:
+            closed_year_costs = closed_year_costs.filter(sap_id__in=sap_ids)
+        return closed_year_costs
+
+    @staticmethod
+    def store_closed(year: int, costs_by_sap_id: dict) -> None:
+        """Stores given {sap_id: {"project_task": x, "production_task": y}} costs as closed"""
+        SapClosedYearCost.objects.bulk_create(
+            [
+                SapClosedYearCost(
+                    sap_id=sap_id,
+                    year=year,
+                    project_task_costs=costs["project_task"],
+                    production_task_costs=costs["production_task"],
+                    closed=True,
+                )
+                for sap_id, costs in costs_by_sap_id.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["sap_id", "year"],
+            update_fields=["project_task_costs", "production_task_costs", "closed", "updatedDate"],
+        )
@@ -1,7 +1,10 @@
+import tempfile
+from datetime import date
 from io import BytesIO
-from typing import List
+from typing import IO, Iterable, Iterator, List
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, Border, Side, PatternFill, NamedStyle
 
 
 class TalpaExcelService:
@@ -41,6 +44,12 @@ class TalpaExcelService:
         ),
     }
 
+    HEADER_STYLE_NAME = "talpa_header"
+    CELL_STYLE_NAME = "talpa_cell"
+
+    # size of the chunks a streamed excel is read from its temporary file
+    STREAM_CHUNK_SIZE = 64 * 1024
+
     def _get_value(self, opening, field: str) -> str:
         if field.startswith("_"):
             return self._get_computed(opening, field)
@@ -97,38 +106,75 @@ class TalpaExcelService:
         return self.generate_batch_excel([opening])
 
     def generate_batch_excel(self, openings: List) -> BytesIO:
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Projektin avauslomake"
-
-        for col, header, _, width in self.COLUMNS:
-            cell = ws[f"{col}1"]
-            cell.value = header
-            cell.font = self.HEADER_STYLE["font"]
-            cell.fill = self.HEADER_STYLE["fill"]
-            cell.alignment = self.HEADER_STYLE["alignment"]
-            cell.border = self.CELL_STYLE["border"]
-            ws.column_dimensions[col].width = width
+        output = BytesIO()
+        self.write_batch_excel(openings, output)
+        output.seek(0)
+        return output
 
-        ws.row_dimensions[1].height = 30
+    def stream_batch_excel(self, openings: Iterable) -> Iterator[bytes]:
+        """
+        Yields the excel of the openings in chunks, for a StreamingHttpResponse.
+
+        The excel is written to a temporary file, so memory use does not grow with the
+        amount of openings when they come from a queryset iterator.
+        """
+        with tempfile.TemporaryFile() as output:
+            self.write_batch_excel(openings, output)
+            output.seek(0)
+            while chunk := output.read(self.STREAM_CHUNK_SIZE):
+                yield chunk
+
+    def write_batch_excel(self, openings: Iterable, output: IO[bytes]) -> None:
+        """
+        Writes the excel of the openings to output.
 
-        for row, opening in enumerate(openings, start=2):
-            for col, _, field, _ in self.COLUMNS:
-                cell = ws[f"{col}{row}"]
-                cell.value = self._get_value(opening, field)
-                cell.alignment = self.CELL_STYLE["alignment"]
-                cell.border = self.CELL_STYLE["border"]
+        Rows are written to a write only worksheet as the openings are iterated, and the
+        cells share named styles instead of each having styles of their own.
+        """
+        wb = Workbook(write_only=True)
+        wb.add_named_style(
+            NamedStyle(
+                name=self.HEADER_STYLE_NAME,
+                border=self.CELL_STYLE["border"],
+                **self.HEADER_STYLE,
+            )
+        )
+        wb.add_named_style(NamedStyle(name=self.CELL_STYLE_NAME, **self.CELL_STYLE))
+        ws = wb.create_sheet("Projektin avauslomake")
 
+        # a write only worksheet needs its dimensions before the rows
+        for col, _, _, width in self.COLUMNS:
+            ws.column_dimensions[col].width = width
+        ws.row_dimensions[1].height = 30
         ws.freeze_panes = "A2"
 
-        output = BytesIO()
+        ws.append(
+            [
+                self._styled_cell(ws, header, self.HEADER_STYLE_NAME)
+                for _, header, _, _ in self.COLUMNS
+            ]
+        )
+        for opening in openings:
+            ws.append(
+                [
+                    self._styled_cell(ws, self._get_value(opening, field), self.CELL_STYLE_NAME)
+                    for _, _, field, _ in self.COLUMNS
+                ]
+            )
+
         wb.save(output)
-        output.seek(0)
-        return output
+
+    def _styled_cell(self, ws, value: str, style: str) -> WriteOnlyCell:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
 
     def get_filename(self, opening) -> str:
         if opening.project and opening.project.name:
             name = opening.project.name
             safe_name = "".join(c for c in name if c.isalnum() or c in " -_")[:50]
             return f"Talpa_avauslomake_{safe_name}.xlsx"
-        return f"Talpa_avauslomake_{opening.id}.xlsx"
\ No newline at end of file
+        return f"Talpa_avauslomake_{opening.id}.xlsx"
+
+    def get_batch_filename(self) -> str:
+        return f"Talpa_avauslomakkeet_{date.today().isoformat()}.xlsx"
@@ -20,6 +20,14 @@ from .ClassFinancialService import ClassFinancialService
 from .LocationFinancialService import LocationFinancialService
 from .SapApiService import SapApiService, SapAuthenticationError
 from .SapCostService import SapCostService
+from .SapClosedYearCostService import SapClosedYearCostService
 from .AppStateValueService import AppStateValueService
 from .CacheService import CacheService
 from .TalpaExcelService import TalpaExcelService
+from .ProjectExportService import ProjectExportService
+from .PlanningSnapshotService import PlanningSnapshotService
+from .CacheWarmupService import CacheWarmupService
+from .CompressionService import CompressionService
+from .MetricsService import MetricsService
+from .AuditLogService import AuditLogService
+from .EventStreamService import EventStreamService
@@ -10,6 +10,14 @@ class PWConfig:
     HIERARCHICAL_FIELD_DELAY = 0.5  # PW needs time between hierarchical updates
     API_TIMEOUT = 30  # Max time to wait for API response
 
+    # === MASS UPDATE ===
+    MASS_UPDATE_WORKERS = 4  # Projects pushed to PW concurrently
+    MASS_UPDATE_REQUESTS_PER_SECOND = 8  # Shared cap on PW requests across all workers, 0 disables
+
+    # === SYNC FROM PW ===
+    INBOUND_SYNC_WORKERS = 8  # PW projects fetched concurrently
+    INBOUND_SYNC_REQUESTS_PER_SECOND = 16  # Shared cap on PW requests across all workers, 0 disables
+
     # === LOGGING ===
     LOG_SEPARATOR_LENGTH = 100  # Standard separator length for consistent logging
 
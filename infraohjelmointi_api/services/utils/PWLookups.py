@@ -0,0 +1,86 @@
+"""
+ProjectWise inbound lookups - PW property values resolved from maps loaded once per sync run.
+"""
+
+import logging
+from typing import Dict, Optional, Tuple
+
+from django.db.models import Model
+
+from ...models import (
+    ConstructionPhaseDetail,
+    Person,
+    ProjectArea,
+    ProjectCategory,
+    ProjectPhase,
+    ProjectType,
+    ResponsibleZone,
+)
+from .FieldMappingDictionaries import (
+    CONSTRUCTION_PHASE_DETAILS_MAP,
+    PHASE_MAP_FOR_PW,
+    PROJECT_AREA_MAP,
+    PROJECT_TYPE_MAP,
+    RESPONSIBLE_ZONE_MAP,
+)
+
+logger = logging.getLogger("infraohjelmointi_api")
+
+
+class PWLookups:
+    """
+    In-memory value maps for the lookups set from ProjectWise data.
+
+    PW sends the display values of FieldMappingDictionaries (e.g. '2. Ohjelmointi'),
+    the infra tool values themselves (e.g. 'programming') are accepted as well.
+    Persons are matched by name, missing persons are created on first use.
+    """
+
+    # Project field -> (lookup model, infra tool value -> PW value(s))
+    FIELDS = {
+        "phase": (ProjectPhase, PHASE_MAP_FOR_PW),
+        "type": (ProjectType, PROJECT_TYPE_MAP),
+        "area": (ProjectArea, PROJECT_AREA_MAP),
+        "responsibleZone": (ResponsibleZone, RESPONSIBLE_ZONE_MAP),
+        "constructionPhaseDetail": (ConstructionPhaseDetail, CONSTRUCTION_PHASE_DETAILS_MAP),
+    }
+    DEFAULT_PHASE = "programming"
+    CONSTRUCTION_PHASE = "construction"
+    CONSTRUCTION_CATEGORY = "K1"
+
+    def __init__(self) -> None:
+        self.values: Dict[str, Dict[str, Model]] = {}
+        for field_name, (model, value_map) in self.FIELDS.items():
+            by_value = {instance.value: instance for instance in model.objects.all()}
+            by_pw_value = dict(by_value)
+            for value, pw_values in value_map.items():
+                if value not in by_value:
+                    continue
+                for pw_value in pw_values if isinstance(pw_values, list) else [pw_values]:
+                    by_pw_value[pw_value] = by_value[value]
+            self.values[field_name] = by_pw_value
+
+        self.construction_category = ProjectCategory.objects.filter(
+            value=self.CONSTRUCTION_CATEGORY
+        ).first()
+
+        self.persons: Dict[Tuple[str, str], Optional[Person]] = {}
+        for person in Person.objects.order_by("id"):
+            key = (person.firstName, person.lastName)
+            # Ambiguous names are not matched, as with get_or_create
+            self.persons[key] = None if key in self.persons else person
+
+    def find(self, field_name: str, pw_value: str) -> Optional[Model]:
+        """Returns the lookup instance for given PW value of given project field or None"""
+        return self.values[field_name].get(pw_value)
+
+    @property
+    def default_phase(self) -> Optional[ProjectPhase]:
+        return self.find("phase", self.DEFAULT_PHASE)
+
+    def get_or_create_person(self, first_name: str, last_name: str) -> Optional[Person]:
+        """Returns the person with given name, creating it when missing. None for ambiguous names."""
+        key = (first_name, last_name)
+        if key not in self.persons:
+            self.persons[key] = Person.objects.create(firstName=first_name, lastName=last_name)
+        return self.persons[key]
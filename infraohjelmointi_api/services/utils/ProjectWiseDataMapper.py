@@ -1,9 +1,20 @@
 import logging
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 
 from infraohjelmointi_api.services import ProjectDistrictService
-from ...models import Project
+from ...models import (
+    ConstructionPhaseDetail,
+    Person,
+    Project,
+    ProjectArea,
+    ProjectClass,
+    ProjectDistrict,
+    ProjectPhase,
+    ProjectType,
+    ResponsibleZone,
+)
 from ..ProjectAreaService import ProjectAreaService
 from ..ProjectPhaseService import ProjectPhaseService
 from ..ResponsibleZoneService import ResponsibleZoneService
@@ -23,6 +34,36 @@ class ProjectWiseDataMapper:
 
     def __init__(self):
         self.field_config = FieldMappingConfig()
+        self._lookups = None
+
+    @contextmanager
+    def prefetched_lookups(self):
+        """
+        Load every lookup the mapper resolves into memory for the duration of the block.
+
+        While active, mapping makes no database queries, which also makes it safe to
+        call from worker threads. Ids missing from the loaded lookups map to empty values.
+        """
+        lookups = {
+            "phase": ProjectPhase.objects.values_list("id", "value"),
+            "type": ProjectType.objects.values_list("id", "value"),
+            "area": ProjectArea.objects.values_list("id", "value"),
+            "responsibleZone": ResponsibleZone.objects.values_list("id", "value"),
+            "constructionPhaseDetail": ConstructionPhaseDetail.objects.values_list("id", "value"),
+            "projectClass": ProjectClass.objects.values_list("id", "path"),
+            "projectDistrict": ProjectDistrict.objects.values_list("id", "path"),
+            "person": ((person.id, person) for person in Person.objects.all()),
+        }
+        self._lookups = {
+            name: {str(key): value for key, value in rows} for name, rows in lookups.items()
+        }
+        try:
+            yield self
+        finally:
+            self._lookups = None
+
+    def _get_prefetched(self, lookup_name: str, value: Any) -> Any:
+        return self._lookups[lookup_name].get(str(value)) if value else None
 
     def convert_to_pw_data(self, data: dict, project: Project) -> dict:
         """
@@ -161,6 +202,8 @@ class ProjectWiseDataMapper:
 
     def _get_service_value(self, field_name: str, value: Any) -> Optional[str]:
         """Get the actual value from the appropriate service."""
+        if self._lookups is not None:
+            return self._get_prefetched(field_name, value) if field_name in self._lookups else None
         try:
             if field_name == "phase":
                 return ProjectPhaseService.get_by_id(value).value if value else None
@@ -181,7 +224,11 @@ class ProjectWiseDataMapper:
     def _map_project_class_field(self, value: Any, pw_fields: List[str]) -> Dict[str, str]:
         """Map project class to hierarchical PW fields."""
         try:
-            classes = ProjectClassService.get_by_id(value).path.split("/") if value else ["", "", ""]
+            if self._lookups is not None:
+                path = self._get_prefetched("projectClass", value)
+            else:
+                path = ProjectClassService.get_by_id(value).path if value else None
+            classes = path.split("/") if path else ["", "", ""]
             result = {}
             for i, pw_field in enumerate(pw_fields):
                 result[pw_field] = classes[i] if i < len(classes) else ""
@@ -193,7 +240,11 @@ class ProjectWiseDataMapper:
     def _map_project_district_field(self, value: Any, pw_fields: List[str]) -> Dict[str, str]:
         """Map project district to hierarchical PW fields."""
         try:
-            locations = ProjectDistrictService.get_by_id(value).path.split("/") if value else ["", "", ""]
+            if self._lookups is not None:
+                path = self._get_prefetched("projectDistrict", value)
+            else:
+                path = ProjectDistrictService.get_by_id(value).path if value else None
+            locations = path.split("/") if path else ["", "", ""]
             result = {}
             for i, pw_field in enumerate(pw_fields):
                 result[pw_field] = locations[i] if i < len(locations) else ""
@@ -202,10 +253,15 @@ class ProjectWiseDataMapper:
             logger.warning(f"Failed to map project district: {e}")
             return {field: "" for field in pw_fields}
 
+    def _get_person(self, value: Any) -> Optional[Person]:
+        if self._lookups is not None:
+            return self._get_prefetched("person", value)
+        return PersonService.get_by_id(value) if value else None
+
     def _map_person_planning_field(self, value: Any, pw_fields: List[str]) -> Dict[str, str]:
         """Map planning person to multiple PW fields."""
         try:
-            person = PersonService.get_by_id(value) if value else None
+            person = self._get_person(value)
             if not person:
                 return {field: "" for field in pw_fields}
 
@@ -222,7 +278,7 @@ class ProjectWiseDataMapper:
     def _map_person_construction_field(self, value: Any, pw_fields: List[str]) -> Dict[str, str]:
         """Map construction person to PW field."""
         try:
-            person = PersonService.get_by_id(value) if value else None
+            person = self._get_person(value)
             if not person:
                 return {pw_fields[0]: ""}
 
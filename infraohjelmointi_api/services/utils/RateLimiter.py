@@ -0,0 +1,42 @@
+"""
+Rate limiting utilities for outbound API calls made from worker threads.
+"""
+
+import threading
+import time
+
+import requests
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing calls evenly to at most `rate` calls per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self) -> None:
+        """Block until the caller may make its call. A rate of 0 disables limiting."""
+        if not self.interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class RateLimitedSession(requests.Session):
+    """requests Session sharing a RateLimiter with other sessions, one session per thread."""
+
+    def __init__(self, limiter: RateLimiter):
+        super().__init__()
+        self.limiter = limiter
+
+    def request(self, *args, **kwargs):
+        self.limiter.acquire()
+        return super().request(*args, **kwargs)
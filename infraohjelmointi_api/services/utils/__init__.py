@@ -1 +1,2 @@
 from .ProjectWiseDataMapper import ProjectWiseDataMapper, create_comprehensive_project_data
+from .RateLimiter import RateLimiter, RateLimitedSession
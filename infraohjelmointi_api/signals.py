@@ -2,19 +2,18 @@ from datetime import date
 import logging
 from django.db.models.signals import post_save
 from django.db import transaction
-from infraohjelmointi_api.models import Project, ClassFinancial, LocationFinancial, ProjectClass, ProjectLocation, TalpaProjectOpening, SapCost, SapCurrentYear
+from infraohjelmointi_api.models import Project, ClassFinancial, LocationFinancial, ProjectClass, ProjectGroup, ProjectLocation, TalpaProjectOpening, SapCost, SapCurrentYear
 from infraohjelmointi_api.serializers import (
     ProjectClassSerializer,
-    ProjectGetSerializer,
     ProjectGroupSerializer,
     ProjectLocationSerializer,
 )
-from .services import ClassFinancialService, ProjectService, LocationFinancialService
+from .services import ClassFinancialService, ProjectFinancialService, ProjectService, LocationFinancialService
 from .services.CacheService import CacheService
 from django.dispatch import receiver
 from django.db.models.signals import post_delete, pre_save
-from django_eventstream import send_event
-from .models import ProjectFinancial, ProjectCategory, ProjectPhase
+from .services.EventStreamService import EventStreamService
+from .models import ProjectFinancial, ProjectCategory, ProjectPhase, ClassProgrammerAssignment, ProjectProgrammer
 
 logger = logging.getLogger("infraohjelmointi_api")
 
@@ -223,7 +222,7 @@ def get_notified_financial_sums(sender, instance, created, **kwargs):
         logger.debug("Signal Triggered: {} Object was created".format(_type))
     logger.debug("Signal Triggered: {} Object was updated".format(_type))
     year = getattr(instance, "finance_year", date.today().year)
-    send_event(
+    EventStreamService.send_event(
         "finance",
         "finance-update",
         get_financial_sums(instance=instance, _type=_type, finance_year=year),
@@ -238,28 +237,21 @@ def get_notified_project(sender, instance, created, update_fields, **kwargs):
     if created:
         logger.debug("Signal Triggered: Project was created")
     else:
-        # This comes from partial_update action which is overriden in project view set
-        # It gets added to the project instance before .save() is called
-        forcedToFrame = getattr(instance, "forcedToFrame", False)
-        year = getattr(instance, "finance_year", date.today().year)
-        send_event(
-            "project",
-            "project-update",
-            {
-                "project": ProjectGetSerializer(
-                    instance,
-                    context={
-                        "get_pw_link": True,
-                        "forcedToFrame": forcedToFrame,
-                        "for_coordinator": forcedToFrame == True,
-                        "finance_year": year,
-                    },
-                ).data,
-            },
-        )
+        # forcedToFrame and finance_year come from partial_update action which is overriden in
+        # project view set, they get added to the project instance before .save() is called
+        EventStreamService.send_project_update(instance)
         logger.debug("Signal Triggered: Project was updated")
 
 
+@receiver(post_save, sender=ProjectFinancial)
+@receiver(post_delete, sender=ProjectFinancial)
+def update_project_finance_years(sender, instance, **kwargs):
+    """
+    Updates the first and last finance years of the project, used by the programming year filter
+    """
+    ProjectFinancialService.update_finance_years(project_ids=[instance.project_id])
+
+
 @receiver(post_save, sender=ProjectFinancial)
 @receiver(post_delete, sender=ProjectFinancial)
 def invalidate_project_financial_cache(sender, instance, **kwargs):
@@ -342,10 +334,7 @@ def invalidate_class_financial_cache(sender, instance, **kwargs):
                     instance_type='ProjectClass'
                 )
 
-        for year_offset in range(-10, 1):
-            affected_year = instance.year + year_offset
-            if affected_year >= 2000:
-                CacheService.invalidate_frame_budgets(year=affected_year)
+        CacheService.invalidate_frame_budgets(year=instance.year)
     except Exception as e:
         logger.error(f"Error invalidating cache for ClassFinancial: {e}")
 
@@ -382,14 +371,24 @@ def invalidate_location_financial_cache(sender, instance, **kwargs):
                     instance_type='ProjectLocation'
                 )
 
-        for year_offset in range(-10, 1):
-            affected_year = instance.year + year_offset
-            if affected_year >= 2000:
-                CacheService.invalidate_frame_budgets(year=affected_year)
+        CacheService.invalidate_frame_budgets(year=instance.year)
     except Exception as e:
         logger.error(f"Error invalidating cache for LocationFinancial: {e}")
 
 
+@receiver(pre_save, sender=Project)
+def capture_old_programmed(sender, instance, **kwargs):
+    """
+    Capture the old programmed value before save so a project leaving the programme
+    is detected too.
+    """
+    instance._old_programmed = None
+    if instance.pk:
+        instance._old_programmed = (
+            Project.objects.filter(pk=instance.pk).values_list("programmed", flat=True).first()
+        )
+
+
 @receiver(post_save, sender=Project)
 def invalidate_project_cache(sender, instance, created, **kwargs):
     """
@@ -397,18 +396,24 @@ def invalidate_project_cache(sender, instance, created, **kwargs):
     """
     try:
         # Only invalidate if relevant fields changed
-        if created or instance.programmed:
-            if instance.projectClass:
+        programmed_changed = getattr(instance, "_old_programmed", None) != instance.programmed
+        if created or instance.programmed or programmed_changed:
+            # The sums of the parents include the project too
+            project_class = instance.projectClass
+            while project_class:
                 CacheService.invalidate_financial_sum(
-                    instance_id=instance.projectClass.id,
+                    instance_id=project_class.id,
                     instance_type='ProjectClass'
                 )
+                project_class = project_class.parent
 
-            if instance.projectLocation:
+            project_location = instance.projectLocation
+            while project_location:
                 CacheService.invalidate_financial_sum(
-                    instance_id=instance.projectLocation.id,
+                    instance_id=project_location.id,
                     instance_type='ProjectLocation'
                 )
+                project_location = project_location.parent
 
             if instance.projectGroup:
                 CacheService.invalidate_financial_sum(
@@ -420,6 +425,84 @@ def invalidate_project_cache(sender, instance, created, **kwargs):
         logger.error(f"Error invalidating cache for Project: {e}")
 
 
+@receiver(post_save, sender=ProjectFinancial)
+@receiver(post_delete, sender=ProjectFinancial)
+@receiver(post_save, sender=ClassFinancial)
+@receiver(post_delete, sender=ClassFinancial)
+@receiver(post_save, sender=LocationFinancial)
+@receiver(post_delete, sender=LocationFinancial)
+@on_transaction_commit
+def bump_finance_data_version(sender, instance, **kwargs):
+    """
+    Bump the data version of the financial year so conditional GETs covering it are answered in full again
+    """
+    CacheService.bump_data_version(year=instance.year)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=ProjectClass)
+@receiver(post_delete, sender=ProjectClass)
+@receiver(post_save, sender=ProjectLocation)
+@receiver(post_delete, sender=ProjectLocation)
+@receiver(post_save, sender=ProjectGroup)
+@receiver(post_delete, sender=ProjectGroup)
+@on_transaction_commit
+def bump_hierarchy_data_version(sender, instance, **kwargs):
+    """
+    Bump the hierarchy data version, project and hierarchy changes can move sums across every year
+    """
+    CacheService.bump_data_version()
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=ProjectFinancial)
+@receiver(post_delete, sender=ProjectFinancial)
+@receiver(post_save, sender=SapCurrentYear)
+@receiver(post_delete, sender=SapCurrentYear)
+@on_transaction_commit
+def mark_planning_snapshot_project_dirty(sender, instance, **kwargs):
+    """
+    Log the changed project, the planning snapshots rebuild it and the sums above it
+    """
+    project_id = instance.id if sender is Project else instance.project_id
+    CacheService.mark_planning_snapshot_dirty(project_ids=[project_id])
+
+
+@receiver(post_save, sender=ClassFinancial)
+@receiver(post_delete, sender=ClassFinancial)
+@receiver(post_save, sender=LocationFinancial)
+@receiver(post_delete, sender=LocationFinancial)
+@receiver(post_save, sender=ProjectClass)
+@receiver(post_delete, sender=ProjectClass)
+@receiver(post_save, sender=ProjectLocation)
+@receiver(post_delete, sender=ProjectLocation)
+@receiver(post_save, sender=ProjectGroup)
+@receiver(post_delete, sender=ProjectGroup)
+@on_transaction_commit
+def mark_planning_snapshot_dirty(sender, instance, **kwargs):
+    """
+    Frame budgets and the hierarchy itself change the sums of any node, the planning snapshots are rebuilt in full
+    """
+    CacheService.mark_planning_snapshot_dirty()
+
+
+@receiver(post_save, sender=ClassProgrammerAssignment)
+@receiver(post_delete, sender=ClassProgrammerAssignment)
+@receiver(post_save, sender=ProjectClass)
+@receiver(post_delete, sender=ProjectClass)
+@receiver(post_save, sender=ProjectProgrammer)
+@receiver(post_delete, sender=ProjectProgrammer)
+@on_transaction_commit
+def invalidate_class_access(sender, instance, **kwargs):
+    """
+    Invalidate the cached class paths of restricted programmers, assignments, class paths and
+    default programmers all change them
+    """
+    CacheService.invalidate_class_access()
+
+
 
 
 @receiver(post_save, sender=Project)
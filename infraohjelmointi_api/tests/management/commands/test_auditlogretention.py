@@ -0,0 +1,54 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from infraohjelmointi_api.models import AuditLog
+
+
+class AuditLogRetentionCommandTestCase(TestCase):
+    def setUp(self):
+        for age_days, endpoint in [(0, "/new/"), (800, "/old/1/"), (900, "/old/2/")]:
+            audit_log = AuditLog.objects.create(
+                operation="UPDATE",
+                log_level="INFO",
+                origin="infrahankkeiden_ohjelmointi",
+                status="SUCCESS",
+                endpoint=endpoint,
+            )
+            AuditLog.objects.filter(id=audit_log.id).update(
+                createdDate=timezone.now() - timedelta(days=age_days)
+            )
+
+    def test_dry_run_keeps_entries(self):
+        out = StringIO()
+        call_command("auditlogretention", "--dry-run", stdout=out)
+
+        self.assertIn("2 audit log entries", out.getvalue())
+        self.assertEqual(AuditLog.objects.count(), 3)
+
+    def test_removes_and_archives_expired_entries(self):
+        with tempfile.TemporaryDirectory() as directory:
+            archive_path = os.path.join(directory, "archive.ndjson.gz")
+            out = StringIO()
+            call_command(
+                "auditlogretention", "--archive", archive_path, "--batch-size", "1", stdout=out
+            )
+
+            with gzip.open(archive_path, "rt", encoding="utf-8") as archive:
+                archived = [json.loads(line) for line in archive]
+
+        self.assertIn("Removed 2 audit log entries", out.getvalue())
+        self.assertEqual([entry["endpoint"] for entry in archived], ["/old/2/", "/old/1/"])
+        self.assertEqual(list(AuditLog.objects.values_list("endpoint", flat=True)), ["/new/"])
+
+    def test_invalid_months(self):
+        with self.assertRaises(CommandError):
+            call_command("auditlogretention", "--months", "0")
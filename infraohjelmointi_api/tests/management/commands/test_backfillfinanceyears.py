@@ -0,0 +1,62 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase
+
+from infraohjelmointi_api.models import Project, ProjectFinancial
+from infraohjelmointi_api.services import ProjectFinancialService
+
+
+class BackfillFinanceYearsCommandTestCase(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(
+            name="Finance years project", description="Test description", programmed=True
+        )
+
+    def finance_years(self):
+        self.project.refresh_from_db()
+        return [getattr(self.project, field) for field in Project.FINANCE_YEAR_FIELDS]
+
+    def test_finances_written_around_the_signals_are_backfilled(self):
+        ProjectFinancial.objects.bulk_create(
+            [
+                ProjectFinancial(project=self.project, year=2027, value=0),
+                ProjectFinancial(project=self.project, year=2028, value=10),
+                ProjectFinancial(project=self.project, year=2031, value=20),
+                ProjectFinancial(project=self.project, year=2029, value=5, forFrameView=True),
+            ]
+        )
+        self.assertEqual(self.finance_years(), [None, None, None, None])
+
+        out = StringIO()
+        call_command("backfillfinanceyears", "--batch-size", "1", stdout=out)
+
+        self.assertEqual(self.finance_years(), [2028, 2031, 2029, 2029])
+        self.assertIn("Finance years updated for 1 projects", out.getvalue())
+
+    def test_finance_years_follow_saved_finances(self):
+        finance = ProjectFinancial.objects.create(project=self.project, year=2030, value=10)
+        ProjectFinancialService.update_or_create_bulk(
+            [ProjectFinancial(project=self.project, year=2026, value=5, forFrameView=True)]
+        )
+        self.assertEqual(self.finance_years(), [2030, 2030, 2026, 2026])
+
+        finance.delete()
+        self.assertEqual(self.finance_years()[:2], [None, None])
+
+    def test_saving_a_read_project_keeps_finance_years(self):
+        stale = Project.objects.get(id=self.project.id)
+        ProjectFinancial.objects.create(project=self.project, year=2030, value=10)
+
+        stale.name = "Renamed project"
+        stale.save()
+
+        self.assertEqual(self.finance_years()[:2], [2030, 2030])
+
+    def test_saving_a_deleted_project_is_not_inserted_again(self):
+        stale = Project.objects.get(id=self.project.id)
+        Project.objects.filter(id=self.project.id).delete()
+
+        with self.assertRaises(DatabaseError):
+            stale.save()
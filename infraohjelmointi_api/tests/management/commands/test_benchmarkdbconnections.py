@@ -0,0 +1,17 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase
+
+
+@skipUnless(connection.vendor == "postgresql", "backend pids are read with pg_backend_pid")
+class BenchmarkDbConnectionsCommandTestCase(TransactionTestCase):
+    def test_reports_connections(self):
+        out = StringIO()
+        call_command("benchmarkdbconnections", "--threads", "2", "--requests", "5", stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("10 requests on 2 threads", output)
+        self.assertIn("database connections used", output)
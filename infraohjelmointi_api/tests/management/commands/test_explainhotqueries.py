@@ -0,0 +1,41 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+
+from infraohjelmointi_api.models import Project, ProjectClass, ProjectFinancial
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN plans are read in the PostgreSQL JSON format")
+class ExplainHotQueriesCommandTestCase(TestCase):
+    def test_without_projects(self):
+        with self.assertRaises(CommandError):
+            call_command("explainhotqueries")
+
+    def test_reports_every_hot_query(self):
+        project_class = ProjectClass.objects.create(name="Explain Class", path="Explain Class")
+        project = Project.objects.create(
+            name="Explain Project",
+            description="Test description",
+            programmed=True,
+            projectClass=project_class,
+        )
+        ProjectFinancial.objects.create(project=project, value=100)
+
+        out = StringIO()
+        call_command("explainhotqueries", "--analyze-tables", stdout=out)
+
+        output = out.getvalue()
+        for name in [
+            "project-finances",
+            "finance-window",
+            "programming-years",
+            "class-projects",
+            "location-projects",
+            "group-projects",
+            "sap-current-year",
+        ]:
+            self.assertIn(f"{name}: ", output)
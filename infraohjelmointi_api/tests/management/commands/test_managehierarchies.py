@@ -2,9 +2,15 @@ from django.test import TestCase
 from io import StringIO
 from django.core.management import call_command
 from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from unittest import mock
 import environ
+import os
+import tempfile
 import uuid
+from openpyxl import Workbook
+from openpyxl.styles import PatternFill
 from overrides import override
 from os import path
 
@@ -57,6 +63,30 @@ def _mock_response(
     return mock_resp
 
 
+def _class_location_excel() -> str:
+    """Excel with a class/location hierarchy for both views on its third sheet"""
+    wb = Workbook()
+    wb.create_sheet()
+    sheet = wb.create_sheet()
+    sheet.append([None] * 7)
+    sheet.append([None] * 7)
+    for code, name, color in [
+        ("8 01", "Kadut ja liikenneväylät", "FFFF0000"),
+        (None, "Uudisrakentaminen", "FFFFC000"),
+        (None, "Eteläinen suurpiiri", "FFFFFF00"),
+        (None, "Kaartinkaupunki", "FFC9C9C9"),
+    ]:
+        sheet.append([code, name, None, None, None, code, name])
+        for column in [2, 7]:
+            sheet.cell(row=sheet.max_row, column=column).fill = PatternFill(
+                start_color=color, end_color=color, fill_type="solid"
+            )
+    excel_file = tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False)
+    excel_file.close()
+    wb.save(excel_file.name)
+    return excel_file.name
+
+
 class ManageHierarchiesCommandTestCase(TestCase):
     @classmethod
     @override
@@ -213,6 +243,49 @@ class ManageHierarchiesCommandTestCase(TestCase):
             f"Should not find any sub division location with '{path}'",
         )
 
+    def test_With_PopulateWithExcel_CreatesHierarchiesOnce(self):
+        excel_path = _class_location_excel()
+        self.addCleanup(os.remove, excel_path)
+        call_command("hierarchies", "--file", excel_path, stdout=StringIO())
+
+        subclass = ProjectClass.objects.get(
+            forCoordinatorOnly=False,
+            path="8 01 Kadut ja liikenneväylät/Uudisrakentaminen/Eteläinen suurpiiri",
+        )
+        coordinator_subclass = ProjectClass.objects.get(forCoordinatorOnly=True, relatedTo=subclass)
+        self.assertEqual(coordinator_subclass.parent.parent.relatedTo.name, "8 01 Kadut ja liikenneväylät")
+        self.assertEqual(
+            sorted(ProjectLocation.objects.filter(parentClass=subclass).values_list("path", flat=True)),
+            ["Eteläinen", "Kaartinkaupunki"],
+        )
+        self.assertEqual(
+            ProjectLocation.objects.get(forCoordinatorOnly=True, parentClass=coordinator_subclass).relatedTo.path,
+            "Kaartinkaupunki",
+        )
+        class_count = ProjectClass.objects.count()
+        location_count = ProjectLocation.objects.count()
+
+        # importing the same excel again writes nothing
+        with CaptureQueriesContext(connection) as queries:
+            call_command("hierarchies", "--file", excel_path, stdout=StringIO())
+        self.assertEqual(ProjectClass.objects.count(), class_count)
+        self.assertEqual(ProjectLocation.objects.count(), location_count)
+        self.assertFalse(
+            [query for query in queries.captured_queries if query["sql"].startswith(("INSERT", "UPDATE"))]
+        )
+
+    def test_With_PopulateWithExcel_DryRun(self):
+        excel_path = _class_location_excel()
+        self.addCleanup(os.remove, excel_path)
+        out = StringIO()
+        call_command("hierarchies", "--file", excel_path, "--dry-run", stdout=out)
+
+        self.assertEqual(ProjectClass.objects.count(), 3)
+        self.assertEqual(ProjectLocation.objects.count(), 2)
+        self.assertIn("Create ProjectClass '8 01 Kadut ja liikenneväylät/Uudisrakentaminen'", out.getvalue())
+        self.assertIn("ProjectClass: 6 to create, 0 to update", out.getvalue())
+        self.assertIn("ProjectLocation: 3 to create, 0 to update", out.getvalue())
+
     # The folowing tests must be refactored to use openpyxl
     # @mock.patch("pandas.read_excel")
     # def test_With_PopulateWithExcel_EmptyFile(self, pandas_mock):
@@ -0,0 +1,211 @@
+"""
+Tests for the excel imports of the projectimporter management command.
+"""
+
+import os
+import tempfile
+from contextlib import redirect_stdout
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from openpyxl import Workbook
+from openpyxl.styles import PatternFill
+
+from infraohjelmointi_api.models import (
+    Note,
+    Person,
+    Project,
+    ProjectCategory,
+    ProjectFinancial,
+    SapCost,
+)
+from infraohjelmointi_api.services import CacheService, EventStreamService
+
+MAIN_CLASS = "FFFF0000"
+CLASS = "FFFFC000"
+SUBCLASS = "FFFFFF00"
+DISTRICT = "FFC9C9C9"
+GROUP = "FFF8CBAD"
+GROUP_PROJECT = "FFFBE5D6"
+
+
+class ExcelBuilder:
+    """Builds an excel with hierarchy rows colored like the real budget and planning excels"""
+
+    def __init__(self, width: int, header_rows: list) -> None:
+        self.width = width
+        self.wb = Workbook()
+        for header in header_rows:
+            self.wb.active.append(header)
+
+    def add_row(self, name, color=None, values=None):
+        row = [None] * self.width
+        row[0] = name
+        for index, value in (values or {}).items():
+            row[index] = value
+        self.wb.active.append(row)
+        if color:
+            self.wb.active.cell(row=self.wb.active.max_row, column=1).fill = PatternFill(
+                start_color=color, end_color=color, fill_type="solid"
+            )
+
+    def add_hierarchy(self, project_rows: dict, group_project_rows: dict):
+        self.add_row("8 01 Kadut ja liikenneväylät", MAIN_CLASS)
+        self.add_row("Luokka", CLASS)
+        self.add_row("Alaluokka", SUBCLASS)
+        self.add_row("Piiri", DISTRICT)
+        for name, values in project_rows.items():
+            self.add_row(name, values=values)
+        self.add_row("Ryhmä", GROUP)
+        for name, values in group_project_rows.items():
+            self.add_row(name, GROUP_PROJECT, values)
+
+    def save(self) -> str:
+        excel_file = tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False)
+        excel_file.close()
+        self.wb.save(excel_file.name)
+        return excel_file.name
+
+
+class ProjectImporterCommandTestCase(TestCase):
+    budget_year = 2026
+
+    def setUp(self):
+        ProjectCategory.objects.get_or_create(value="K5")
+        self.files = []
+
+    def tearDown(self):
+        for excel_path in self.files:
+            os.remove(excel_path)
+
+    def import_excel(self, argument: str, excel: ExcelBuilder) -> list:
+        excel_path = excel.save()
+        self.files.append(excel_path)
+        with CaptureQueriesContext(connection) as queries, redirect_stdout(StringIO()):
+            call_command("projectimporter", argument, excel_path, stdout=StringIO())
+        return queries.captured_queries
+
+    def budget_excel(
+        self, project_count: int, budget: int = 10, notes: str = "Note", prefix: str = "Hanke"
+    ) -> ExcelBuilder:
+        header_rows = [[None] * 31 for _ in range(11)]
+        header_rows[8][19] = "TAE"
+        header_rows[9][19] = self.budget_year
+        excel = ExcelBuilder(width=31, header_rows=header_rows)
+
+        def values(index):
+            return {1: "K5", 2: "K", 6: 1000, 19: budget, 20: budget, 29: notes, 30: str(100000 + index)}
+
+        excel.add_hierarchy(
+            project_rows={f"{prefix} {i + 1}": values(i) for i in range(project_count)},
+            group_project_rows={"Ryhmähanke": {19: 5, 29: "?"}},
+        )
+        return excel
+
+    def planning_excel(self, sap_project: str) -> ExcelBuilder:
+        header0 = [None] * 29
+        header1 = [None] * 29
+        header0[9] = self.budget_year
+        header1[6] = "Vaihe"
+        for month in range(12):
+            header1[9 + month] = month + 1
+        excel = ExcelBuilder(width=29, header_rows=[header0, header1])
+        excel.add_hierarchy(
+            project_rows={
+                "Hanke 1": {1: sap_project, 4: "Vastuuhenkilö", 6: "s m", 10: 1, 27: "200001", 28: "Plan note"},
+                "Hanke 2": {1: "x", 4: "Vastuuhenkilö", 6: "", 27: "?"},
+            },
+            group_project_rows={},
+        )
+        return excel
+
+    def test_budget_import_creates_projects_finances_and_notes(self):
+        self.import_excel("--import-from-budget", self.budget_excel(project_count=8))
+
+        self.assertEqual(Project.objects.count(), 9)
+        project = Project.objects.get(name="Hanke 1")
+        self.assertEqual(project.projectClass.path, "8 01 Kadut ja liikenneväylät/Luokka/Alaluokka")
+        self.assertEqual(project.projectLocation.name, "Piiri")
+        self.assertEqual(project.phase.value, "programming")
+        self.assertEqual(project.category.value, "K5")
+        self.assertTrue(project.programmed)
+        self.assertTrue(project.effectHousing)
+        self.assertEqual(project.hkrId, 100000)
+        self.assertEqual(project.planningStartYear, self.budget_year)
+        self.assertEqual(project.constructionEndYear, self.budget_year + 1)
+        self.assertEqual(
+            ProjectFinancial.objects.get(project=project, year=self.budget_year, forFrameView=True).value,
+            Decimal("10.00"),
+        )
+        self.assertEqual(ProjectFinancial.objects.filter(project=project).count(), 20)
+        self.assertEqual(list(Note.objects.filter(project=project).values_list("content", flat=True)), ["Note"])
+
+        group_project = Project.objects.get(name="Ryhmähanke")
+        self.assertEqual(group_project.projectGroup.name, "Ryhmä")
+        self.assertFalse(Note.objects.filter(project=group_project).exists())
+
+        # Projects are written with bulk statements, not with queries per project
+        queries = self.import_excel("--import-from-budget", self.budget_excel(project_count=4, prefix="Uusi"))
+        queries_with_more_projects = self.import_excel(
+            "--import-from-budget", self.budget_excel(project_count=16, prefix="Toinen")
+        )
+        self.assertEqual(len(queries_with_more_projects), len(queries))
+
+    def test_budget_import_updates_existing_projects(self):
+        self.import_excel("--import-from-budget", self.budget_excel(project_count=2))
+        project_id = Project.objects.get(name="Hanke 1").id
+
+        self.import_excel("--import-from-budget", self.budget_excel(project_count=2, budget=0, notes="Second"))
+
+        self.assertEqual(Project.objects.count(), 3)
+        project = Project.objects.get(name="Hanke 1")
+        self.assertEqual(project.id, project_id)
+        self.assertEqual(project.phase.value, "proposal")
+        self.assertFalse(project.programmed)
+        self.assertEqual(
+            ProjectFinancial.objects.get(project=project, year=self.budget_year, forFrameView=False).value,
+            Decimal("0.00"),
+        )
+        self.assertEqual(
+            sorted(Note.objects.filter(project=project).values_list("content", flat=True)), ["Note", "Second"]
+        )
+
+    def test_budget_import_invalidates_unprogrammed_projects(self):
+        self.import_excel("--import-from-budget", self.budget_excel(project_count=2))
+
+        with patch.object(CacheService, "invalidate_projects") as invalidate_projects, patch.object(
+            EventStreamService, "send_event"
+        ) as send_event, self.captureOnCommitCallbacks(execute=True):
+            self.import_excel("--import-from-budget", self.budget_excel(project_count=2, budget=0))
+
+        project = Project.objects.get(name="Hanke 1")
+        self.assertFalse(project.programmed)
+        invalidate_projects.assert_called_once()
+        self.assertIn(project.id, [p.id for p in invalidate_projects.call_args.args[0]])
+        batch_events = [
+            call.args for call in send_event.call_args_list if call.args[1] == "projects-update"
+        ]
+        self.assertEqual(len(batch_events), 1)
+        self.assertIn(str(project.id), batch_events[0][2]["projects"])
+
+    def test_planning_import_cleans_up_sap_costs_of_changed_sap_project(self):
+        self.import_excel("--import-from-plan", self.planning_excel(sap_project="2814I00001"))
+
+        project = Project.objects.get(name="Hanke 1")
+        self.assertEqual(project.sapProject, "2814I00001")
+        self.assertEqual(project.phase.value, "programming")
+        self.assertEqual(project.planningStartYear, self.budget_year)
+        self.assertEqual(project.personPlanning.lastName, "Vastuuhenkilö")
+        self.assertEqual(Project.objects.get(name="Hanke 2").phase.value, "proposal")
+        self.assertEqual(Person.objects.filter(lastName="Vastuuhenkilö").count(), 1)
+        SapCost.objects.create(project=project, year=self.budget_year, sap_id=project.sapProject)
+
+        self.import_excel("--import-from-plan", self.planning_excel(sap_project="2814I00002"))
+
+        self.assertEqual(Project.objects.get(id=project.id).sapProject, "2814I00002")
+        self.assertFalse(SapCost.objects.filter(project=project).exists())
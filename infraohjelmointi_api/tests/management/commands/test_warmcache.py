@@ -0,0 +1,32 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+LOCMEM_CACHE = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class WarmCacheCommandTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_reports_warm_ratio(self):
+        call_command("warmcache", "--rate", "0", stdout=StringIO())
+
+        out = StringIO()
+        call_command("warmcache", "--rate", "0", stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("frame_budgets: 22 keys, 22 warm, 0 rebuilt", output)
+        self.assertIn("Warm ratio before warm-up 100%", output)
+
+    def test_negative_rate_is_rejected(self):
+        with self.assertRaises(CommandError):
+            call_command("warmcache", "--rate", "-1", stdout=StringIO())
@@ -9,9 +9,10 @@ from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 from infraohjelmointi_api.models import Project, ProjectClass, ProjectDistrict, ProjectFinancial, ProjectGroup, ProjectLocation, ProjectHashTag, User
 from infraohjelmointi_api.serializers import ProjectClassSerializer, ProjectDistrictSerializer, ProjectGetSerializer, ProjectGroupSerializer, ProjectLocationSerializer, ProjectHashtagSerializer
-from infraohjelmointi_api.views import BaseViewSet
+from infraohjelmointi_api.views import ApiProjectsViewSet, BaseViewSet
+from infraohjelmointi_api.views.api.utils import _load_chunk, _serialize_chunk
 from project.extensions.CustomTokenAuth import CustomTokenAuth
-from asgiref.sync import sync_to_async
+from asgiref.sync import async_to_sync, sync_to_async
 
 
 def perform_shared_api_setup(cls):
@@ -233,6 +234,36 @@ class ApiTestCase(TestCase):
         self.assertEqual(self.client.get("/api/locations/{}/".format(self.incorrect_uuid)).status_code, 404, msg="Locations status code != 404")
         self.assertEqual(self.client.get("/api/hashtags/{}/".format(self.incorrect_uuid)).status_code, 404, msg="Hashtags status code != 404")
 
+    def test_api_streaming_chunk_queries_do_not_grow_with_projects(self):
+        for x in range(5):
+            Project.objects.create(
+                name="Chunk project {}".format(x),
+                description="description of the chunk project",
+                projectClass=self.project_class,
+            )
+        project_ids = list(ApiProjectsViewSet.queryset.values_list("pk", flat=True))
+
+        # projects, three m2m prefetches, finances and SAP values
+        with self.assertNumQueries(6):
+            instances, context = async_to_sync(_load_chunk)(
+                ApiProjectsViewSet.queryset,
+                project_ids,
+                {},
+                ApiProjectsViewSet.load_chunk_context,
+            )
+            chunk = _serialize_chunk(
+                instances,
+                project_ids,
+                ProjectGetSerializer,
+                context,
+                "/api/projects/",
+            )
+
+        expected = json.loads(
+            json.dumps(ProjectGetSerializer(Project.objects.all(), many=True).data, default=str)
+        )
+        self.assertListEqual(json.loads(b"[" + chunk + b"]"), expected)
+
 
 @patch.object(BaseViewSet, "authentication_classes", new=[])
 class AsyncApiTestCase(TestCase):
@@ -1,4 +1,8 @@
+from datetime import timedelta
+
+from django.db import transaction
 from django.test import TestCase
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIRequestFactory
 from unittest.mock import patch
@@ -6,6 +10,7 @@ from unittest.mock import patch
 from infraohjelmointi_api.models import AuditLog, Project, User
 from infraohjelmointi_api.views.AuditLogViewSet import AuditLogViewSet
 from infraohjelmointi_api.serializers.AuditLogSerializer import AuditLogSerializer
+from infraohjelmointi_api.services import AuditLogService
 
 User = get_user_model()
 
@@ -87,3 +92,62 @@ class AuditLogViewSetTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data['id'], str(self.audit_log.id))
         self.assertEqual(response.data['operation'], 'CREATE')
+
+    def test_list_with_cursor_pagination_is_windowed(self):
+        """Cursor paginated reads only return the recent entries by default"""
+        old_log = AuditLog.objects.create(
+            actor=self.user,
+            operation="UPDATE",
+            log_level="INFO",
+            origin="infrahankkeiden_ohjelmointi",
+            status="SUCCESS",
+            endpoint="/api/projects/",
+        )
+        AuditLog.objects.filter(id=old_log.id).update(createdDate=timezone.now() - timedelta(days=90))
+
+        request = self.factory.get('/audit-logs/', {'pagination': 'cursor'})
+        view = AuditLogViewSet.as_view({'get': 'list'})
+        response = view(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('count', response.data)
+        self.assertIn('next', response.data)
+        self.assertEqual([log['id'] for log in response.data['results']], [str(self.audit_log.id)])
+
+        request = self.factory.get(
+            '/audit-logs/',
+            {'pagination': 'cursor', 'created_date_from': (timezone.now() - timedelta(days=365)).isoformat()},
+        )
+        response = view(request)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_audit_log_service_writes_request_entries_together(self):
+        """Entries recorded during a request are written once the request ends"""
+        AuditLogService.start_request()
+        with self.captureOnCommitCallbacks(execute=True):
+            for operation in ["UPDATE", "DELETE"]:
+                AuditLogService.record(
+                    actor=self.user, operation=operation, project=self.project, endpoint="/projects/"
+                )
+        self.assertEqual(AuditLog.objects.count(), 1)
+
+        AuditLogService.write(AuditLogService.end_request())
+
+        self.assertEqual(
+            sorted(AuditLog.objects.filter(endpoint="/projects/").values_list("operation", flat=True)),
+            ["DELETE", "UPDATE"],
+        )
+        self.assertTrue(
+            AuditLog.objects.filter(endpoint="/projects/", origin="infrahankkeiden_ohjelmointi", status="SUCCESS").exists()
+        )
+
+    def test_audit_log_service_drops_entries_of_rolled_back_changes(self):
+        """Nothing is written for a transaction that is rolled back"""
+        AuditLogService.start_request()
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValueError), transaction.atomic():
+                AuditLogService.record(actor=self.user, operation="UPDATE", endpoint="/projects/")
+                raise ValueError()
+        AuditLogService.write(AuditLogService.end_request())
+
+        self.assertFalse(AuditLog.objects.filter(endpoint="/projects/").exists())
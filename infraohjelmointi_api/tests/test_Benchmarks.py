@@ -0,0 +1,169 @@
+import json
+import os
+import tempfile
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from infraohjelmointi_api.models import (
+    Project,
+    ProjectClass,
+    ProjectFinancial,
+    SapCurrentYear,
+    User,
+)
+from infraohjelmointi_api.services import SapApiService
+from infraohjelmointi_api.utils.standin_servers import SapStandInServer
+
+class FailingBatchSapStandInServer(SapStandInServer):
+    """Fails every query for more than one SAP id"""
+
+    def handle_get(self, path: str):
+        if " or Posid eq " in path:
+            return 500, {"error": "Batch not supported"}
+        return super().handle_get(path)
+
+
+LOCMEM_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class BenchmarkCommandsTestCase(TestCase):
+    def generate(self, *args):
+        call_command(
+            "generatesyntheticdata", "--projects", "40", "--force", *args, stdout=StringIO()
+        )
+
+    def test_generated_dataset_is_deterministic(self):
+        self.generate()
+        project_ids = set(Project.objects.values_list("id", flat=True))
+
+        self.assertEqual(len(project_ids), 40)
+        self.assertEqual(ProjectFinancial.objects.count(), 40 * 11 * 2)
+        self.assertTrue(
+            ProjectClass.objects.filter(forCoordinatorOnly=True, relatedTo__isnull=False).exists()
+        )
+        for path, parent_path in ProjectClass.objects.exclude(parent=None).values_list(
+            "path", "parent__path"
+        )[:20]:
+            self.assertTrue(path.startswith(parent_path + "/"))
+
+        with self.assertRaises(CommandError):
+            self.generate()
+
+        self.generate("--clear")
+        self.assertEqual(set(Project.objects.values_list("id", flat=True)), project_ids)
+
+    def test_benchmark_report_is_written(self):
+        self.generate()
+        sap_costs = dict(SapCurrentYear.objects.values_list("id", "project_task_costs"))
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "report.json")
+            call_command(
+                "runbenchmarks",
+                "--rounds", "1",
+                "--endpoint", "project-groups",
+                "--endpoint", "api-projects",
+                "--sync-projects", "3",
+                "--output", output,
+                "--force",
+                stdout=StringIO(),
+            )
+            with open(output, encoding="utf-8") as report_file:
+                report = json.load(report_file)
+
+        self.assertEqual(report["dataset"]["projects"], 40)
+        self.assertEqual(set(report["endpoints"].keys()), {"project-groups", "api-projects"})
+        for result in report["endpoints"].values():
+            self.assertEqual(result["status"], 200)
+            self.assertGreater(result["cold_queries"], 0)
+        self.assertEqual(report["sync"]["sap_sync"]["projects"], 3)
+        # The SAP ids are fetched in one batch, two cost and two commitment queries
+        self.assertEqual(report["sync"]["sap_sync"]["http_requests"], 4)
+        # Sync benchmarks are rolled back
+        self.assertEqual(
+            dict(SapCurrentYear.objects.values_list("id", "project_task_costs")), sap_costs
+        )
+        # The benchmark user and its token are not left behind
+        self.assertFalse(User.objects.filter(username="benchmark-runner").exists())
+        self.assertFalse(Token.objects.exists())
+
+    def test_benchmarks_require_debug_or_force(self):
+        with self.assertRaises(CommandError):
+            call_command("runbenchmarks", "--skip-sync", stdout=StringIO())
+
+    def test_sap_sync_against_stand_in(self):
+        project = Project.objects.create(
+            name="Test project", description="Test description", sapProject="2814I00123"
+        )
+        year = date.today().year
+        with SapStandInServer() as sap:
+            service = SapApiService()
+            sap.configure(service)
+            service.sync_all_projects_from_sap(for_financial_statement=True, sap_year=year)
+
+            self.assertEqual(sap.request_count, 2)
+
+        sap_cost = SapCurrentYear.objects.get(project=project, year=year)
+        start = "{}".format(year)
+        self.assertEqual(
+            sap_cost.project_task_costs,
+            SapStandInServer.amount("2814I00123.01", "ActualCostsSet", start),
+        )
+        self.assertEqual(
+            sap_cost.production_task_commitments,
+            SapStandInServer.amount("2814I00123.02", "CommitmentLinesSet", start),
+        )
+
+    def sync_sap_ids_against_stand_in(self, stand_in, sap_ids, batch_size):
+        projects = [
+            Project.objects.create(name="Test project", description="Test description", sapProject=sap_id)
+            for sap_id in sap_ids
+        ]
+        year = date.today().year
+        with stand_in as sap:
+            service = SapApiService()
+            service.sap_batch_size = batch_size
+            sap.configure(service)
+            service.sync_all_projects_from_sap(for_financial_statement=True, sap_year=year)
+            request_count = sap.request_count
+
+        start = "{}".format(year)
+        for project in projects:
+            sap_cost = SapCurrentYear.objects.get(project=project, year=year)
+            self.assertEqual(
+                sap_cost.project_task_costs,
+                SapStandInServer.amount(project.sapProject + ".01", "ActualCostsSet", start),
+            )
+            self.assertEqual(
+                sap_cost.production_task_commitments,
+                SapStandInServer.amount(project.sapProject + ".02", "CommitmentLinesSet", start),
+            )
+        return request_count
+
+    def test_sap_sync_batches_sap_ids(self):
+        # 2814I001 is a prefix of 2814I00123, Posids must still go to the longest SAP id
+        sap_ids = ["2814I00123", "2814I001", "2814I00456", "2814I00789", "2814I00999"]
+
+        request_count = self.sync_sap_ids_against_stand_in(SapStandInServer(), sap_ids, batch_size=2)
+
+        # Three batches, a cost and a commitment query per batch
+        self.assertEqual(request_count, 6)
+
+    def test_sap_sync_fetches_ids_one_by_one_when_batch_fails(self):
+        sap_ids = ["2814I00123", "2814I00456", "2814I00789"]
+
+        request_count = self.sync_sap_ids_against_stand_in(
+            FailingBatchSapStandInServer(), sap_ids, batch_size=2
+        )
+
+        # Failed batch of two ids stops at its cost query, then 2 queries per id
+        self.assertEqual(request_count, 1 + 2 * 2 + 2)
@@ -912,6 +912,81 @@ class CacheServiceEdgeCasesTest(TestCase):
         self.assertIsNone(CacheService.get_frame_budgets(2024, True))
         self.assertIsNotNone(CacheService.get_frame_budgets(2025, True))
 
+    def test_frame_budget_years_are_composed_into_windows(self):
+        """Per-year frame budgets are shared by windows and invalidated one year at a time."""
+        from infraohjelmointi_api.views.BaseClassLocationViewSet import BaseClassLocationViewSet
+
+        project_class = ProjectClass.objects.create(name="Frame Class", path="Frame Class", forCoordinatorOnly=True)
+        for year, frame_budget in [(2030, 100), (2035, 200), (2041, 300)]:
+            ClassFinancial.objects.create(
+                classRelation=project_class, year=year, frameBudget=frame_budget, forFrameView=False
+            )
+
+        window = BaseClassLocationViewSet.build_frame_budgets_context(2030)
+        self.assertEqual(window[f"2030-{project_class.id}"], 100)
+        self.assertEqual(window[f"2035-{project_class.id}"], 200)
+        self.assertNotIn(f"2041-{project_class.id}", window)
+        self.assertEqual(
+            len(CacheService.get_frame_budget_years(list(range(2030, 2041)), for_frame_view=False)), 11
+        )
+
+        CacheService.invalidate_frame_budgets(2035)
+        ClassFinancial.objects.filter(year=2035).update(frameBudget=250)
+        self.assertIsNone(CacheService.get_frame_budgets(2035, False))
+        self.assertIsNotNone(CacheService.get_frame_budgets(2034, False))
+
+        # the shifted window only queries the invalidated and the new year
+        with self.assertNumQueries(1):
+            window = BaseClassLocationViewSet.build_frame_budgets_context(2031)
+        self.assertEqual(window[f"2035-{project_class.id}"], 250)
+        self.assertEqual(window[f"2041-{project_class.id}"], 300)
+        self.assertNotIn(f"2030-{project_class.id}", window)
+
+    def test_invalidate_projects_invalidates_the_ancestors(self):
+        """Bulk written projects invalidate the sums of the parents and of the old hierarchy too."""
+        master_class = ProjectClass.objects.create(name="Master", path="Master")
+        project_class = ProjectClass.objects.create(name="Class", path="Master/Class", parent=master_class)
+        old_class = ProjectClass.objects.create(name="Old Class", path="Old Class")
+        district = ProjectLocation.objects.create(name="District", path="District", parentClass=master_class)
+        location = ProjectLocation.objects.create(
+            name="Location", path="District/Location", parent=district, parentClass=master_class
+        )
+        project = Project.objects.create(
+            name="Bulk project",
+            description="Test description",
+            projectClass=project_class,
+            projectLocation=location,
+        )
+
+        with patch.object(CacheService, 'invalidate_financial_sum') as invalidate:
+            CacheService.invalidate_projects([project], previous=[(old_class.id, None, None)])
+
+        invalidated = {
+            (call.kwargs['instance_type'], call.kwargs['instance_id']) for call in invalidate.call_args_list
+        }
+        self.assertEqual(
+            invalidated,
+            {
+                ('ProjectClass', project_class.id),
+                ('ProjectClass', master_class.id),
+                ('ProjectClass', old_class.id),
+                ('ProjectLocation', location.id),
+                ('ProjectLocation', district.id),
+            },
+        )
+
+    def test_class_access_paths_queried_before_an_invalidation_are_not_served(self):
+        """Paths are stored under the version read before they were queried."""
+        version = CacheService.get_class_access_version()
+        CacheService.set_class_access_paths('user', ['Old Class'], version)
+        self.assertEqual(CacheService.get_class_access_paths('user'), ['Old Class'])
+
+        version = CacheService.get_class_access_version()
+        CacheService.invalidate_class_access()
+        CacheService.set_class_access_paths('user', ['Old Class'], version)
+
+        self.assertIsNone(CacheService.get_class_access_paths('user'))
+
     def test_circuit_breaker_disables_cache_after_failures(self):
         """Test that circuit breaker disables cache after multiple failures."""
         with patch.object(cache, 'set', side_effect=Exception("Redis error")):
@@ -0,0 +1,107 @@
+"""Tests for the cache warm-up."""
+
+import uuid
+from datetime import date
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from infraohjelmointi_api.models import ProjectClass, ProjectPhase
+from infraohjelmointi_api.services.CacheService import CacheService
+from infraohjelmointi_api.services.CacheWarmupService import CacheWarmupService
+from infraohjelmointi_api.services.ProjectClassService import ProjectClassService
+from infraohjelmointi_api.services.ProjectLocationService import ProjectLocationService
+
+LOCMEM_CACHE = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CacheWarmupTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.year = date.today().year
+        self.planning_class = ProjectClass.objects.create(
+            id=uuid.uuid4(), name="Planning class", path="Planning class"
+        )
+        self.coordinator_class = ProjectClass.objects.create(
+            id=uuid.uuid4(),
+            name="Coordinator class",
+            path="Coordinator class",
+            forCoordinatorOnly=True,
+            relatedTo=self.planning_class,
+        )
+        ProjectPhase.objects.get_or_create(value="proposal")
+
+    def test_warm_up_rebuilds_the_cached_entries(self):
+        report = CacheWarmupService(year=self.year, rate=0).warm()
+
+        self.assertEqual(
+            [entry["step"] for entry in report],
+            ["frame_budgets", "coordinator_sums", "planning_sums", "planning_snapshot", "lookups"],
+        )
+        self.assertEqual(CacheWarmupService.warm_ratio(report), 0)
+        for forced_to_frame in [False, True]:
+            self.assertIsNotNone(
+                CacheService.get_financial_sum(
+                    instance_id=self.coordinator_class.id,
+                    instance_type="ProjectClass",
+                    year=self.year,
+                    for_frame_view=forced_to_frame,
+                    for_coordinator=True,
+                )
+            )
+        # planning classes and locations with a coordinator counterpart aren't cached
+        self.assertEqual(
+            report[2]["keys"],
+            ProjectClassService.list_all().filter(coordinatorClass__isnull=True).count()
+            + ProjectLocationService.list_all().filter(coordinatorLocation__isnull=True).count(),
+        )
+        self.assertIsNone(
+            CacheService.get_financial_sum(
+                instance_id=self.planning_class.id,
+                instance_type="ProjectClass",
+                year=self.year,
+                for_frame_view=False,
+                for_coordinator=False,
+            )
+        )
+        self.assertIsNotNone(CacheService.get_lookup("ProjectPhase"))
+
+    def test_warm_entries_are_kept(self):
+        CacheWarmupService(year=self.year, rate=0).warm()
+
+        with patch.object(CacheService, "set_financial_sum") as set_financial_sum:
+            report = CacheWarmupService(year=self.year, rate=0).warm()
+
+        self.assertEqual(CacheWarmupService.warm_ratio(report), 1)
+        set_financial_sum.assert_not_called()
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}})
+    def test_nothing_is_warmed_without_cache(self):
+        self.assertEqual(CacheWarmupService(year=self.year).warm(), [])
+
+
+class CacheWarmupBackgroundTestCase(SimpleTestCase):
+    def test_warm_up_requested_while_running_runs_again(self):
+        runs = []
+
+        def warm(service):
+            runs.append(service.year)
+            if len(runs) == 1:
+                self.assertIsNone(CacheWarmupService.start_in_background())
+            return []
+
+        with patch.object(CacheWarmupService, "warm", warm):
+            CacheWarmupService.start_in_background().join()
+
+        self.assertEqual(len(runs), 2)
+        self.assertFalse(CacheWarmupService._running)
+
+    @override_settings(CACHE_WARMUP_ENABLED=False)
+    def test_disabled_warm_up_is_not_started(self):
+        self.assertIsNone(CacheWarmupService.start_in_background())
@@ -0,0 +1,109 @@
+"""Tests for the compression of the JSON responses."""
+
+import gzip
+import json
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from infraohjelmointi_api.models import Project, ProjectPhase
+from infraohjelmointi_api.services.CacheService import CacheService
+from infraohjelmointi_api.services.CompressionService import CompressionService
+from infraohjelmointi_api.views import BaseViewSet
+
+LOCMEM_CACHE = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+
+class CompressionServiceTestCase(SimpleTestCase):
+    @patch.object(CompressionService, "available_encodings", return_value=["br", "gzip"])
+    def test_negotiation_follows_quality_and_server_preference(self, _):
+        self.assertEqual(CompressionService.negotiate("gzip, deflate, br"), "br")
+        self.assertEqual(CompressionService.negotiate("br;q=0.5, gzip"), "gzip")
+        self.assertEqual(CompressionService.negotiate("gzip, deflate, br", encodings=["gzip"]), "gzip")
+        self.assertEqual(CompressionService.negotiate("*"), "br")
+        self.assertIsNone(CompressionService.negotiate("br;q=0, gzip;q=0, *"))
+        self.assertIsNone(CompressionService.negotiate("identity"))
+        self.assertIsNone(CompressionService.negotiate(None))
+
+    @override_settings(COMPRESSION_STREAM_FLUSH_SIZE=100)
+    def test_streams_are_flushed_at_the_flush_size(self):
+        chunks = [b'{"name":"project %d"},' % index for index in range(50)]
+
+        compressed = list(CompressionService.compress_stream(iter(chunks), "gzip"))
+
+        # about 21 bytes per chunk, a flush every 5 chunks and the end of the stream
+        self.assertEqual(len(compressed), 11)
+        self.assertEqual(gzip.decompress(b"".join(compressed)), b"".join(chunks))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+@patch.object(BaseViewSet, "authentication_classes", new=[])
+@patch.object(BaseViewSet, "permission_classes", new=[])
+class CompressionMiddlewareTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(5):
+            Project.objects.create(name="Compressed project {}".format(index), description="Test description")
+        ProjectPhase.objects.get_or_create(value="proposal")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_large_responses_are_compressed(self):
+        plain = self.client.get("/projects/")
+        compressed = self.client.get("/projects/", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", compressed["Vary"])
+        self.assertLess(len(compressed.content), len(plain.content))
+        self.assertEqual(json.loads(gzip.decompress(compressed.content)), plain.json())
+
+    def test_streamed_responses_are_compressed(self):
+        plain = self.client.get("/projects/")
+        streamed = self.client.get("/projects/?stream=true", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(streamed["Content-Encoding"], "gzip")
+        self.assertFalse(streamed.has_header("Content-Length"))
+        self.assertEqual(json.loads(gzip.decompress(b"".join(streamed))), plain.json())
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.client.get("/projects/?limit=1&fields=id", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Content-Encoding", response)
+
+    @override_settings(COMPRESSION_MIN_SIZE=0)
+    def test_cached_lookup_is_compressed_once(self):
+        plain = self.client.get("/project-phases/").json()
+        self.assertIsNotNone(CacheService.get_lookup("ProjectPhase"))
+
+        with patch.object(
+            CompressionService, "compress", wraps=CompressionService.compress
+        ) as compress:
+            responses = [
+                self.client.get("/project-phases/", HTTP_ACCEPT_ENCODING="gzip") for _ in range(2)
+            ]
+
+        self.assertEqual(compress.call_count, 1)
+        for response in responses:
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            self.assertEqual(json.loads(gzip.decompress(response.content)), plain)
+
+        ProjectPhase.objects.create(value="Compressed phase")
+        CacheService.invalidate_lookup("ProjectPhase")
+        self.client.get("/project-phases/")
+        response = self.client.get("/project-phases/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))), ProjectPhase.objects.count())
+
+    @override_settings(COMPRESSION_ENABLED=False)
+    def test_compression_can_be_disabled(self):
+        # the middleware reads the setting when it is created, on the first request of the client
+        response = self.client.get("/projects/", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertNotIn("Content-Encoding", response)
@@ -0,0 +1,137 @@
+"""Tests for conditional GET (ETag / If-None-Match) on hierarchy and finance list endpoints."""
+
+from datetime import date
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from infraohjelmointi_api.models import (
+    ClassFinancial,
+    ProjectClass,
+    ProjectGroup,
+    ProjectLocation,
+)
+from infraohjelmointi_api.services.CacheService import CacheService
+from infraohjelmointi_api.views import BaseViewSet
+
+LOCMEM_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+@patch.object(BaseViewSet, "authentication_classes", new=[])
+@patch.object(BaseViewSet, "permission_classes", new=[])
+class ConditionalGetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.year = date.today().year
+        cls.masterClass = ProjectClass.objects.create(
+            name="Test Master Class", path="Test Master Class"
+        )
+        cls.coordinatorClass = ProjectClass.objects.create(
+            name="Test Coordinator Class",
+            path="Test Coordinator Class",
+            forCoordinatorOnly=True,
+        )
+        cls.district = ProjectLocation.objects.create(
+            name="Test district", path="Test district"
+        )
+        cls.group = ProjectGroup.objects.create(
+            name="Test Group", classRelation=cls.masterClass
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_endpoints_emit_etags(self):
+        for url in [
+            "/project-classes/",
+            "/project-classes/coordinator/",
+            "/project-locations/",
+            "/project-locations/coordinator/",
+            "/project-groups/",
+            "/project-groups/coordinator/",
+        ]:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, msg=url)
+            self.assertTrue(response.has_header("ETag"), msg=url)
+            self.assertEqual(response["Cache-Control"], "private, no-cache", msg=url)
+
+    def test_matching_etag_is_answered_with_304_without_queries(self):
+        url = "/project-classes/coordinator/?year={}".format(self.year)
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+        # Weak validators from clients are compared weakly
+        response = self.client.get(url, HTTP_IF_NONE_MATCH="W/" + etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_depends_on_query_params(self):
+        etag = self.client.get("/project-classes/?year={}".format(self.year))["ETag"]
+        response = self.client.get(
+            "/project-classes/?year={}".format(self.year + 1), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_finance_change_in_covered_year_changes_etag(self):
+        url = "/project-classes/coordinator/?year={}".format(self.year)
+        etag = self.client.get(url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ClassFinancial.objects.create(
+                year=self.year + 11,
+                classRelation=self.coordinatorClass,
+                frameBudget=1000,
+            )
+        # Year outside the 11 year window of the response
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ClassFinancial.objects.create(
+                year=self.year + 3,
+                classRelation=self.coordinatorClass,
+                frameBudget=1000,
+            )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_hierarchy_change_changes_etag(self):
+        url = "/project-groups/?year={}".format(self.year)
+        etag = self.client.get(url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.name = "Renamed Group"
+            self.group.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_flushed_versions_are_not_reused(self):
+        url = "/project-locations/?year={}".format(self.year)
+        etag = self.client.get(url)["ETag"]
+
+        cache.clear()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_no_etag_without_cache(self):
+        with patch.object(CacheService, "get_data_versions", return_value=None):
+            response = self.client.get("/project-classes/", HTTP_IF_NONE_MATCH="*")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("ETag"))
@@ -0,0 +1,112 @@
+"""Tests for the connection pool of the pooled PostgreSQL backend."""
+
+import threading
+from unittest.mock import patch
+
+from django.db.backends.postgresql.base import Database
+from django.test import SimpleTestCase
+
+from infraohjelmointi_api.services.MetricsService import MetricsService
+from project.extensions.postgresql_pool.base import ConnectionPool
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql):
+        if self.connection.broken:
+            raise Database.OperationalError("server closed the connection unexpectedly")
+
+
+class FakeConnection:
+    autocommit = True
+
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+    def test_returned_connection_is_reused(self):
+        pool = ConnectionPool(max_size=2)
+
+        connection = pool.getconn(FakeConnection)
+        pool.putconn(connection)
+
+        self.assertIs(pool.getconn(FakeConnection), connection)
+        stats = pool.stats()
+        self.assertEqual((stats["opened"], stats["reused"], stats["in_use"]), (1, 1, 1))
+
+    def test_connection_not_reusable_is_closed(self):
+        pool = ConnectionPool(max_size=2)
+
+        connection = pool.getconn(FakeConnection)
+        pool.putconn(connection, reusable=False)
+
+        self.assertTrue(connection.closed)
+        self.assertIsNot(pool.getconn(FakeConnection), connection)
+        self.assertEqual(pool.stats()["discarded"], 1)
+
+    def test_expired_connection_is_closed(self):
+        pool = ConnectionPool(max_size=2, max_lifetime=60)
+
+        with patch("project.extensions.postgresql_pool.base.time.monotonic", return_value=1000):
+            connection = pool.getconn(FakeConnection)
+        with patch("project.extensions.postgresql_pool.base.time.monotonic", return_value=1061):
+            pool.putconn(connection)
+
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()["idle"], 0)
+
+    def test_idle_connection_is_checked_before_reuse(self):
+        pool = ConnectionPool(max_size=2, check_idle=30)
+
+        with patch("project.extensions.postgresql_pool.base.time.monotonic", return_value=1000):
+            connection = pool.getconn(FakeConnection)
+            pool.putconn(connection)
+        connection.broken = True
+
+        with patch("project.extensions.postgresql_pool.base.time.monotonic", return_value=1031):
+            self.assertIsNot(pool.getconn(FakeConnection), connection)
+        self.assertTrue(connection.closed)
+
+    def test_full_pool_times_out(self):
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        pool.getconn(FakeConnection)
+
+        with self.assertRaises(Database.OperationalError):
+            pool.getconn(FakeConnection)
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_connection_of_ended_thread_is_reclaimed(self):
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        thread = threading.Thread(target=pool.getconn, args=(FakeConnection,))
+        thread.start()
+        thread.join()
+
+        pool.getconn(FakeConnection)
+        self.assertEqual(pool.stats()["in_use"], 1)
+
+    def test_stats_are_rendered_as_metrics(self):
+        pool = ConnectionPool(max_size=3)
+        pool.putconn(pool.getconn(FakeConnection))
+
+        with patch.dict(MetricsService._stats, {"db_pool": {(("alias", "pool-test"),): pool.stats}}):
+            metrics = MetricsService.render_prometheus()
+
+        self.assertIn('infraohjelmointi_db_pool_idle_connections{alias="pool-test"} 1', metrics)
+        self.assertIn('infraohjelmointi_db_pool_max_connections{alias="pool-test"} 3', metrics)
+        self.assertIn('infraohjelmointi_db_pool_opened_total{alias="pool-test"} 1', metrics)
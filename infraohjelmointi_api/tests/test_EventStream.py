@@ -0,0 +1,106 @@
+"""Tests for the server-sent events log, fan-out and per-connection queues."""
+
+import json
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+from django_eventstream.event import Event
+from django_eventstream.storage import EventDoesNotExist
+
+from infraohjelmointi_api.services.EventStreamService import (
+    EventStreamService,
+    ListenerManager,
+    MemoryEventStorage,
+    StreamListener,
+    listener_manager,
+)
+from infraohjelmointi_api.services.MetricsService import MetricsService
+
+
+def project_update(event_id, project_id):
+    return Event(
+        "project", "project-update", json.dumps({"project": {"id": project_id}}), id=event_id
+    )
+
+
+@patch(
+    "infraohjelmointi_api.services.EventStreamService.get_storage",
+    new=MemoryEventStorage,
+)
+class EventStreamTestCase(SimpleTestCase):
+    async def test_event_is_logged_and_queued_for_local_connections(self):
+        listener = StreamListener()
+        listener.channels = {"test-queue"}
+        self.assertTrue(listener_manager.add_listener(listener))
+        try:
+            EventStreamService.send_event("test-queue", "finance-update", {"sum": 10})
+            events, overflow, _ = listener_manager.take(listener)
+        finally:
+            listener_manager.remove_listener(listener)
+
+        self.assertFalse(overflow)
+        self.assertEqual([json.loads(event.data) for event in events], [{"sum": 10}])
+        self.assertEqual(
+            MemoryEventStorage().get_events("test-queue", events[0].id - 1)[0].data,
+            events[0].data,
+        )
+
+    @override_settings(SSE_STREAM_LENGTH=3)
+    def test_replay_since_last_event_id(self):
+        storage = MemoryEventStorage()
+        for value in range(5):
+            storage.append_event("test-replay", "finance-update", json.dumps(value))
+
+        self.assertEqual(storage.get_current_id("test-replay"), 5)
+        self.assertEqual(
+            [event.data for event in storage.get_events("test-replay", 3)], ["3", "4"]
+        )
+        self.assertEqual(storage.get_events("test-replay", 5), [])
+        # the event the client last got has been trimmed from the log
+        with self.assertRaises(EventDoesNotExist):
+            storage.get_events("test-replay", 1)
+
+    async def test_pending_project_updates_are_merged(self):
+        manager = ListenerManager()
+        listener = StreamListener(max_pending=3)
+        listener.channels = {"project"}
+        manager.add_listener(listener)
+
+        for event in [project_update(1, "a"), project_update(2, "b"), project_update(3, "a")]:
+            manager.publish(event)
+
+        events, overflow, _ = manager.take(listener)
+        self.assertEqual([event.id for event in events], [2, 3])
+        self.assertFalse(overflow)
+        self.assertEqual(manager.stats()["merged"], 1)
+
+    async def test_full_queue_is_caught_up_from_the_log(self):
+        manager = ListenerManager()
+        listener = StreamListener(max_pending=2)
+        listener.channels = {"project"}
+        manager.add_listener(listener)
+
+        for event_id in range(1, 5):
+            manager.publish(project_update(event_id, str(event_id)))
+
+        events, overflow, _ = manager.take(listener)
+        self.assertEqual(events, [])
+        self.assertTrue(overflow)
+        self.assertEqual(manager.stats()["dropped"], 4)
+
+        manager.publish(project_update(5, "5"))
+        self.assertEqual([event.id for event in manager.take(listener)[0]], [5])
+
+    async def test_connections_per_worker_are_limited(self):
+        manager = ListenerManager()
+        first, second = StreamListener(), StreamListener()
+
+        self.assertTrue(manager.add_listener(first, max_connections=1))
+        self.assertFalse(manager.add_listener(second, max_connections=1))
+        manager.remove_listener(first)
+        self.assertTrue(manager.add_listener(second, max_connections=1))
+
+        with patch.dict(MetricsService._stats, {"sse": {(): manager.stats}}):
+            metrics = MetricsService.render_prometheus()
+        self.assertIn("infraohjelmointi_sse_connections 1\n", metrics)
+        self.assertIn("infraohjelmointi_sse_rejected_connections_total 1\n", metrics)
@@ -6,6 +6,7 @@ from infraohjelmointi_api.models import (
     ProjectProgrammer, ProjectClass, Project, ProjectPhase, ClassProgrammerAssignment, Note, ProjectGroup
 )
 from infraohjelmointi_api.permissions import (
+    ClassPathAccess,
     IsClassProgrammer,
     IsPlanner,
     IsProjectManager,
@@ -657,3 +658,29 @@ class RestrictedProgrammerPermissionsTestCase(TestCase):
         )
         self.assertIsNotNone(response)
         self.assertEqual(response.status_code, 403)
+
+    def test_class_path_access_allows_assigned_paths_and_descendants(self):
+        """The compiled access answers like target_path_matches_assigned_paths."""
+        access = ClassPathAccess(["8 03 Kadut/8 03 01", "8 04 Puistot"])
+
+        self.assertTrue(access.allows("8 03 Kadut/8 03 01"))
+        self.assertTrue(access.allows("8 03 Kadut/8 03 01/B Sillat"))
+        self.assertTrue(access.allows("8 04 Puistot/8 04 01 Uudet puistot"))
+        self.assertFalse(access.allows("8 03 Kadut"))
+        self.assertFalse(access.allows("8 03 Kadut/8 03 012"))
+        self.assertFalse(access.allows("8 04 Puistot ja viheralueet"))
+        self.assertFalse(access.allows(None))
+        self.assertFalse(ClassPathAccess([]))
+
+    def test_class_path_access_filters_projects_in_sql(self):
+        """as_q matches the projects of the assigned classes and their subclasses."""
+        access = ClassPathAccess(
+            [self.bridge_class.path, self.parks_804_class.path, "8 04 Puistot ja viheralueet"]
+        )
+
+        self.assertEqual(access.root_paths, [self.bridge_class.path, "8 04 Puistot ja viheralueet"])
+        self.assertEqual(
+            set(Project.objects.filter(access.as_q())),
+            {self.bridge_project, self.parks_804_project},
+        )
+        self.assertFalse(Project.objects.filter(ClassPathAccess([]).as_q()).exists())
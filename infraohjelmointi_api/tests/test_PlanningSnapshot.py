@@ -0,0 +1,155 @@
+"""Tests for the compressed planning view snapshot and its incremental rebuild."""
+
+import gzip
+import json
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from infraohjelmointi_api.models import (
+    ClassFinancial,
+    Project,
+    ProjectClass,
+    ProjectFinancial,
+)
+from infraohjelmointi_api.services import PlanningSnapshotService
+from infraohjelmointi_api.services.CacheService import CacheService
+from infraohjelmointi_api.views import BaseViewSet
+
+LOCMEM_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+@patch.object(BaseViewSet, "authentication_classes", new=[])
+@patch.object(BaseViewSet, "permission_classes", new=[])
+class PlanningSnapshotTestCase(TestCase):
+    url = "/projects/planning-snapshot/?year=2026"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.master_class = ProjectClass.objects.create(
+            name="Snapshot Master", path="Snapshot Master"
+        )
+        cls.project_class = ProjectClass.objects.create(
+            name="Snapshot Class",
+            path="Snapshot Master/Snapshot Class",
+            parent=cls.master_class,
+        )
+        cls.other_class = ProjectClass.objects.create(
+            name="Other Class", path="Other Class"
+        )
+        cls.project = Project.objects.create(
+            name="Snapshot Project",
+            description="Test description",
+            programmed=True,
+            projectClass=cls.project_class,
+        )
+        cls.finance = ProjectFinancial.objects.create(project=cls.project, year=2026, value=100)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_snapshot(self, **headers):
+        response = self.client.get(self.url, **headers)
+        self.assertEqual(response.status_code, 200)
+        return response, json.loads(response.content)
+
+    def test_snapshot_contains_hierarchy_sums_and_projects(self):
+        response, snapshot = self.get_snapshot()
+
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertTrue(response.has_header("ETag"))
+        self.assertEqual(snapshot["year"], 2026)
+        self.assertFalse(snapshot["forcedToFrame"])
+        classes = {c["id"]: c for c in snapshot["classes"]}
+        self.assertEqual(
+            classes[str(self.master_class.id)]["finances"]["year0"]["plannedBudget"], 100
+        )
+        self.assertEqual(
+            [p["name"] for p in snapshot["projects"]], ["Snapshot Project"]
+        )
+        self.assertEqual(
+            snapshot["projects"][0]["finances"]["budgetProposalCurrentYearPlus0"], "100.00"
+        )
+
+    def test_snapshot_is_sent_compressed_and_answers_if_none_match(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(response.content))["year"], 2026)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_finance_change_rebuilds_only_the_changed_subtree(self):
+        _, snapshot = self.get_snapshot()
+        other_class = next(c for c in snapshot["classes"] if c["id"] == str(self.other_class.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.finance.value = 250
+            self.finance.save()
+
+        with patch.object(
+            PlanningSnapshotService, "build", side_effect=AssertionError("full rebuild")
+        ):
+            response, snapshot = self.get_snapshot()
+
+        classes = {c["id"]: c for c in snapshot["classes"]}
+        for class_id in [self.master_class.id, self.project_class.id]:
+            self.assertEqual(classes[str(class_id)]["finances"]["year0"]["plannedBudget"], 250)
+        self.assertEqual(classes[str(self.other_class.id)], other_class)
+        self.assertEqual(
+            snapshot["projects"][0]["finances"]["budgetProposalCurrentYearPlus0"], "250.00"
+        )
+
+    def test_project_leaving_the_programme_is_dropped(self):
+        self.get_snapshot()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.programmed = False
+            self.project.save()
+
+        _, snapshot = self.get_snapshot()
+        self.assertEqual(snapshot["projects"], [])
+        classes = {c["id"]: c for c in snapshot["classes"]}
+        self.assertEqual(
+            classes[str(self.master_class.id)]["finances"]["year0"]["plannedBudget"], 0
+        )
+
+    def test_frame_budget_change_rebuilds_in_full(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        coordinator_class = ProjectClass.objects.create(
+            name="Snapshot Coordinator",
+            path="Snapshot Coordinator",
+            forCoordinatorOnly=True,
+            relatedTo=self.master_class,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            ClassFinancial.objects.create(
+                year=2026, classRelation=coordinator_class, frameBudget=1000
+            )
+
+        with patch.object(PlanningSnapshotService, "build", wraps=PlanningSnapshotService(2026).build) as build:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        build.assert_called_once()
+
+    def test_missing_change_log_entry_rebuilds_in_full(self):
+        service = PlanningSnapshotService(2026)
+        version = service.get()["version"]
+        CacheService.mark_planning_snapshot_dirty(project_ids=[self.project.id])
+        cache.delete(CacheService._planning_snapshot_change_key(version + 1))
+
+        self.assertIsNone(
+            CacheService.get_planning_snapshot_changes(since=version, until=version + 1)
+        )
+        with patch.object(PlanningSnapshotService, "build", wraps=service.build) as build:
+            self.assertEqual(service.get()["version"], version + 1)
+        build.assert_called_once()
@@ -0,0 +1,103 @@
+import csv
+import json
+import uuid
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from django.test import TestCase
+from openpyxl import load_workbook
+from rest_framework import status
+
+from ..models import Project, ProjectClass, ProjectFinancial
+from ..services import ProjectExportService
+from ..views import BaseViewSet
+
+
+@patch.object(BaseViewSet, "authentication_classes", new=[])
+@patch.object(BaseViewSet, "permission_classes", new=[])
+class ProjectExportTestCase(TestCase):
+    def setUp(self):
+        self.master_class = ProjectClass.objects.create(
+            id=uuid.uuid4(), name="Export Master", path="Export Master"
+        )
+        self.project_class = ProjectClass.objects.create(
+            id=uuid.uuid4(),
+            name="Export Class",
+            path="Export Master/Export Class",
+            parent=self.master_class,
+        )
+        self.projects = [
+            Project.objects.create(
+                id=uuid.uuid4(),
+                name=f"Export Project {index}",
+                description="Test description",
+                programmed=True,
+                projectClass=self.project_class,
+            )
+            for index in range(3)
+        ]
+        for index, project in enumerate(self.projects):
+            ProjectFinancial.objects.create(project=project, year=2026, value=100 * (index + 1))
+            ProjectFinancial.objects.create(project=project, year=2030, value=10)
+            # outside of the exported 11 years
+            ProjectFinancial.objects.create(project=project, year=2040, value=999)
+
+    def test_export_csv_contains_projects_and_hierarchy_sums(self):
+        response = self.client.get("/projects/export/", {"year": 2026})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertIn("projects_planning_2026.csv", response["Content-Disposition"])
+        rows = list(csv.DictReader(StringIO(b"".join(response).decode("utf-8"))))
+
+        project_rows = [row for row in rows if row["type"] == "project"]
+        self.assertEqual(
+            sorted(row["name"] for row in project_rows),
+            ["Export Project 0", "Export Project 1", "Export Project 2"],
+        )
+        self.assertNotIn("plannedBudget2040", rows[0])
+        for row in project_rows:
+            self.assertEqual(row["projectClass"], "Export Master/Export Class")
+            self.assertEqual(row["plannedBudget2030"], "10.00")
+
+        class_rows = {row["path"]: row for row in rows if row["type"] == "class"}
+        self.assertEqual(
+            list(class_rows), ["Export Master", "Export Master/Export Class"]
+        )
+        self.assertEqual(class_rows["Export Master/Export Class"]["plannedBudget2026"], "600")
+
+    def test_export_ndjson_is_written_in_chunks(self):
+        service = ProjectExportService(year=2026, chunk_size=2)
+
+        chunks = list(service.stream(Project.objects.all(), "ndjson"))
+
+        # two chunks of projects and one of the class rows
+        self.assertEqual(len(chunks), 3)
+        rows = [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+        self.assertEqual([row["type"] for row in rows].count("project"), 3)
+        self.assertEqual(rows[-1]["path"], "Export Master/Export Class")
+
+    def test_export_xlsx_filters_projects(self):
+        response = self.client.get(
+            "/projects/export/",
+            {"year": 2026, "exportFormat": "xlsx", "hkrId": "", "programmed": "true"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ws = load_workbook(BytesIO(b"".join(response))).active
+        header = [cell.value for cell in ws[1]]
+        self.assertEqual(header, ProjectExportService(year=2026).columns)
+        # header, three projects and two classes
+        self.assertEqual(ws.max_row, 6)
+
+    def test_export_invalid_format_returns_400(self):
+        response = self.client.get("/projects/export/", {"exportFormat": "pdf"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_coordinator_export_invalid_forced_to_frame_returns_400(self):
+        response = self.client.get(
+            "/projects/coordinator/export/", {"forcedToFrame": "maybe"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,105 @@
+"""Tests for the sparse field selection (?fields= and ?expand=) of the project endpoints."""
+
+import json
+from datetime import date
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from infraohjelmointi_api.models import (
+    Project,
+    ProjectClass,
+    ProjectFinancial,
+    ProjectPhase,
+    SapCurrentYear,
+)
+from infraohjelmointi_api.services.SapCurrentYearService import SapCurrentYearService
+from infraohjelmointi_api.views import BaseViewSet
+
+
+@patch.object(BaseViewSet, "authentication_classes", new=[])
+@patch.object(BaseViewSet, "permission_classes", new=[])
+class ProjectFieldSelectionTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.year = date.today().year
+        cls.phase, _ = ProjectPhase.objects.get_or_create(value="proposal")
+        cls.project_class = ProjectClass.objects.create(name="Selection class", path="Selection class")
+        cls.coordinator_class = ProjectClass.objects.create(
+            name="Selection coordinator",
+            path="Selection coordinator",
+            forCoordinatorOnly=True,
+            relatedTo=cls.project_class,
+        )
+        for index in range(3):
+            project = Project.objects.create(
+                name="Selection project {}".format(index),
+                description="Test description",
+                phase=cls.phase,
+                projectClass=cls.project_class,
+            )
+            ProjectFinancial.objects.create(project=project, year=cls.year, value=100)
+        cls.project = project
+        SapCurrentYear.objects.create(
+            project=project, year=cls.year, sap_id="2814I00000", project_task_costs=5, production_task_costs=7
+        )
+
+    def test_without_selection_projects_are_serialized_in_full(self):
+        project = self.client.get("/projects/{}/".format(self.project.id)).json()
+
+        self.assertEqual(project["phase"]["value"], "proposal")
+        self.assertEqual(len(project["currentYearsSapValues"]), 1)
+        self.assertIn("finances", project)
+
+    def test_fields_compact_the_related_objects(self):
+        results = self.client.get("/projects/?fields=id,name,phase").json()["results"]
+
+        self.assertEqual(len(results), 3)
+        for project in results:
+            self.assertEqual(set(project), {"id", "name", "phase"})
+            self.assertEqual(project["phase"], str(self.phase.id))
+
+    def test_expanded_related_objects_are_serialized_in_full(self):
+        project = self.client.get(
+            "/projects/{}/?fields=id,phase,category&expand=phase".format(self.project.id)
+        ).json()
+
+        self.assertEqual(project["phase"]["value"], "proposal")
+        self.assertIsNone(project["category"])
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get("/projects/?fields=id,unknown&expand=name")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("unknown", response.json()["fields"])
+        self.assertIn("name", response.json()["expand"])
+
+    def test_unrequested_finances_and_sap_values_are_not_read(self):
+        with CaptureQueriesContext(connection) as full:
+            self.client.get("/projects/")
+
+        with patch.object(
+            SapCurrentYearService, "get_by_year", side_effect=AssertionError("SAP values read")
+        ), CaptureQueriesContext(connection) as compact:
+            response = self.client.get("/projects/?fields=id,name,phase")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(len(compact), len(full))
+        self.assertFalse(any("projectfinancial" in query["sql"] for query in compact.captured_queries))
+
+    def test_streamed_selection_matches_the_buffered_one(self):
+        url = "/projects/?fields=id,name,phase,finances,currentYearsSapValues&expand=phase"
+        buffered = self.client.get(url).json()
+        streamed = json.loads(b"".join(self.client.get(url + "&stream=true")))
+
+        self.assertEqual(streamed, buffered)
+        self.assertEqual(streamed["results"][0]["phase"]["value"], "proposal")
+
+    def test_coordinator_projects_keep_coordinator_classes(self):
+        results = self.client.get("/projects/coordinator/?fields=id,projectClass").json()["results"]
+
+        self.assertEqual(len(results), 3)
+        for project in results:
+            self.assertEqual(project["projectClass"], str(self.coordinator_class.id))
@@ -1,12 +1,22 @@
+import time
 import uuid
 from unittest.mock import Mock, patch
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from datetime import date
 
-from ..models import Project, ProjectClass, ProjectType, ProjectPhase, ProjectCategory, Person
-from ..services import ProjectWiseService
+from ..models import Project, ProjectArea, ProjectClass, ProjectType, ProjectPhase, ProjectCategory, Person
+from ..services import CacheService, EventStreamService, ProjectWiseService
 from ..views import BaseViewSet
 from ..services.utils.PWConfig import PWConfig
+from ..services.utils.RateLimiter import RateLimiter
+from ..utils.standin_servers import PWStandInServer
+
+LOCMEM_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
 
 
 @patch.object(BaseViewSet, "authentication_classes", new=[])
@@ -1024,3 +1034,229 @@ class ProjectWiseServiceCoreFunctionalityTestCase(TestCase):
 
                 # Should log error
                 mock_logger.error.assert_called_once_with("sync_project_to_pw called without proper parameters")
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+@patch.object(PWConfig, 'HIERARCHICAL_FIELD_DELAY', 0)
+@patch.object(PWConfig, 'MASS_UPDATE_REQUESTS_PER_SECOND', 0)
+class ConcurrentMassUpdateTestCase(TestCase):
+    """
+    Test cases for the worker pool mass update against the PW stand-in server.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.project_class = ProjectClass.objects.create(name="Mass Update Class", path="Mass Update Class")
+        self.project_phase, _ = ProjectPhase.objects.get_or_create(value="programming")
+        self.person = Person.objects.create(firstName="Mass", lastName="Updater", email="mass@test.com")
+        self.projects = [
+            Project.objects.create(
+                id=uuid.uuid4(),
+                name=f"Mass Update Project {i}",
+                description=f"Mass update description {i}",
+                hkrId=40000 + i,
+                programmed=True,
+                projectClass=self.project_class,
+                phase=self.project_phase,
+                personPlanning=self.person,
+            )
+            for i in range(6)
+        ]
+        self.server = PWStandInServer().start()
+        self.addCleanup(self.server.stop)
+        self.service = ProjectWiseService()
+        self.server.configure(self.service)
+
+    def test_mass_update_pushes_projects_concurrently_in_order(self):
+        # Projects and every lookup are fetched in bulk, however many projects there are
+        with self.assertNumQueries(9):
+            update_log = self.service.sync_all_projects_to_pw()
+
+        self.assertEqual(
+            [log['project_name'] for log in update_log],
+            [project.name for project in Project.objects.filter(id__in=[p.id for p in self.projects])],
+        )
+        self.assertTrue(all(log['status'] == 'success' for log in update_log))
+        self.assertIn('personPlanning', update_log[0]['updated_fields'])
+        # One GET per project, normal fields POST and one POST per hierarchical class field
+        self.assertEqual(self.server.request_count, 6 * 5)
+        sent_persons = {
+            update["instance"]["properties"].get("PROJECT_Vastuuhenkil")
+            for update in self.server.updates
+        }
+        self.assertIn("Updater Mass", sent_persons)
+
+    def test_mass_update_skips_projects_unchanged_since_last_push(self):
+        self.service.sync_all_projects_to_pw()
+        pushed_requests = self.server.request_count
+
+        update_log = self.service.sync_all_projects_to_pw()
+        self.assertTrue(all(log['status'] == 'skipped' and log['reason'] == 'unchanged' for log in update_log))
+        self.assertEqual(self.server.request_count, pushed_requests)
+
+        # Changes to the project or to its related rows are both pushed
+        Project.objects.filter(id=self.projects[0].id).update(name="Renamed Mass Update Project")
+        Person.objects.filter(id=self.person.id).update(title="Projektinjohtaja")
+        update_log = self.service.sync_all_projects_to_pw()
+        self.assertEqual(len([log for log in update_log if log['status'] == 'success']), 6)
+
+        Project.objects.filter(id=self.projects[1].id).update(description="Changed description")
+        update_log = self.service.sync_all_projects_to_pw()
+        statuses = {log['project_id']: log['status'] for log in update_log}
+        self.assertEqual(statuses.pop(str(self.projects[1].id)), 'success')
+        self.assertEqual(set(statuses.values()), {'skipped'})
+
+        update_log = self.service.sync_all_projects_to_pw(force=True)
+        self.assertTrue(all(log['status'] == 'success' for log in update_log))
+
+    def test_mass_update_does_not_store_hash_of_failed_push(self):
+        self.server.known_hkr_ids = {str(project.hkrId) for project in self.projects[1:]}
+
+        update_log = self.service.sync_all_projects_to_pw()
+        statuses = {log['project_id']: log['status'] for log in update_log}
+        self.assertEqual(statuses[str(self.projects[0].id)], 'error')
+
+        self.server.known_hkr_ids = None
+        update_log = self.service.sync_all_projects_to_pw()
+        statuses = {log['project_id']: log['status'] for log in update_log}
+        self.assertEqual(statuses.pop(str(self.projects[0].id)), 'success')
+        self.assertEqual(set(statuses.values()), {'skipped'})
+
+    def test_rate_limiter_spaces_calls(self):
+        limiter = RateLimiter(rate=50)
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 5 / 50)
+
+
+class ConstructionPWStandInServer(PWStandInServer):
+    """PW stand-in answering with projects in construction"""
+
+    @classmethod
+    def project_properties(cls, hkr_id: str) -> dict:
+        return {
+            **super().project_properties(hkr_id),
+            "PROJECT_Hankkeen_vaihe": "7. Rakentaminen",
+            "PROJECT_Toimiala": "katu",
+            "PROJECT_Projektialue": "Kalasatama",
+        }
+
+
+class UnprogrammedPWStandInServer(PWStandInServer):
+    """PW stand-in answering with projects taken out of the programme"""
+
+    @classmethod
+    def project_properties(cls, hkr_id: str) -> dict:
+        return {**super().project_properties(hkr_id), "PROJECT_Ohjelmoitu": "Ei"}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+@patch.object(PWConfig, 'INBOUND_SYNC_REQUESTS_PER_SECOND', 0)
+class InboundSyncTestCase(TestCase):
+    """
+    Test cases for synchronising projects from PW against the PW stand-in server.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.programming_phase, _ = ProjectPhase.objects.get_or_create(value="programming")
+        self.construction_phase, _ = ProjectPhase.objects.get_or_create(value="construction")
+        self.street_type, _ = ProjectType.objects.get_or_create(value="street")
+        self.area, _ = ProjectArea.objects.get_or_create(value="kalasatama")
+        self.k1_category, _ = ProjectCategory.objects.get_or_create(value="K1")
+        self.projects = [
+            Project.objects.create(
+                id=uuid.uuid4(),
+                name=f"Inbound Project {i}",
+                description=f"Inbound description {i}",
+                hkrId=50000 + i,
+                programmed=False,
+                phase=self.programming_phase,
+            )
+            for i in range(4)
+        ]
+        self.service = ProjectWiseService()
+
+    def sync(self, server_class=PWStandInServer, **kwargs):
+        with server_class(**kwargs) as server:
+            server.configure(self.service)
+            return self.service.sync_projects_from_pw(projects=list(Project.objects.filter(hkrId__isnull=False)))
+
+    def test_sync_from_pw_resolves_pw_values(self):
+        sync_log = self.sync(ConstructionPWStandInServer)
+
+        self.assertEqual(len(sync_log), 4)
+        for entry in sync_log:
+            self.assertEqual(entry['status'], 'updated')
+            self.assertIn('phase', entry['changed_fields'])
+            self.assertGreaterEqual(entry['fetch_time'], 0)
+            self.assertGreaterEqual(entry['apply_time'], 0)
+
+        for project in Project.objects.filter(hkrId__isnull=False):
+            properties = PWStandInServer.project_properties(project.hkrId)
+            self.assertEqual(project.phase, self.construction_phase)
+            # The pre_save signal is not run by bulk_update, the sync applies its category rule
+            self.assertEqual(project.category, self.k1_category)
+            self.assertEqual(project.type, self.street_type)
+            self.assertEqual(project.area, self.area)
+            self.assertTrue(project.programmed)
+            self.assertEqual(project.description, properties["PROJECT_Hankkeen_kuvaus"])
+            self.assertEqual(project.estConstructionStart.isoformat(), properties["PROJECT_Hankkeen_rakentaminen_alkaa"][:10])
+            self.assertEqual(
+                f"{project.personPlanning.lastName} {project.personPlanning.firstName}",
+                properties["PROJECT_Vastuuhenkil"],
+            )
+            self.assertEqual(project.personPlanning.email, properties["PROJECT_Vastuuhenkiln_shkpostiosoite"])
+
+        # Persons are created once per name
+        self.assertEqual(
+            Person.objects.count(),
+            len({PWStandInServer.project_properties(p.hkrId)["PROJECT_Vastuuhenkil"] for p in self.projects}),
+        )
+
+    def test_sync_from_pw_writes_only_changes(self):
+        self.sync()
+        updated_dates = dict(Project.objects.values_list("id", "updatedDate"))
+
+        sync_log = self.sync()
+        self.assertEqual({entry['status'] for entry in sync_log}, {'unchanged'})
+        self.assertEqual(dict(Project.objects.values_list("id", "updatedDate")), updated_dates)
+
+        Project.objects.filter(id=self.projects[0].id).update(address="Changed address")
+        sync_log = self.sync()
+        changed = [entry for entry in sync_log if entry['status'] == 'updated']
+        self.assertEqual([entry['project_id'] for entry in changed], [str(self.projects[0].id)])
+        self.assertEqual(changed[0]['changed_fields'], ['address', 'updatedDate'])
+
+    def test_sync_from_pw_invalidates_unprogrammed_projects(self):
+        Project.objects.filter(hkrId__isnull=False).update(programmed=True)
+
+        with patch.object(CacheService, "invalidate_projects") as invalidate_projects, patch.object(
+            EventStreamService, "send_project_update"
+        ) as send_project_update, self.captureOnCommitCallbacks(execute=True):
+            self.sync(UnprogrammedPWStandInServer)
+
+        self.assertFalse(Project.objects.filter(programmed=True).exists())
+        project_ids = {project.id for project in self.projects}
+        invalidate_projects.assert_called_once()
+        self.assertEqual({p.id for p in invalidate_projects.call_args.args[0]}, project_ids)
+        self.assertEqual(
+            {call.args[0].id for call in send_project_update.call_args_list}, project_ids
+        )
+
+    def test_sync_from_pw_reports_missing_projects(self):
+        sync_log = self.sync(known_hkr_ids=[project.hkrId for project in self.projects[1:]])
+
+        errors = [entry for entry in sync_log if entry['status'] == 'error']
+        self.assertEqual([entry['project_id'] for entry in errors], [str(self.projects[0].id)])
+        self.assertIn("No project found from PW", errors[0]['error'])
+        self.assertEqual(Project.objects.get(id=self.projects[0].id).description, "Inbound description 0")
+
+    def test_sync_project_from_pw_by_pw_id(self):
+        with PWStandInServer() as server:
+            server.configure(self.service)
+            sync_log = self.service.sync_project_from_pw(str(self.projects[2].hkrId))
+
+        self.assertEqual([entry['status'] for entry in sync_log], ['updated'])
+        self.assertTrue(Project.objects.get(id=self.projects[2].id).programmed)
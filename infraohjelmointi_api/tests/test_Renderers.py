@@ -0,0 +1,63 @@
+"""Tests for FastJSONRenderer."""
+
+import datetime
+import uuid
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from infraohjelmointi_api import renderers
+from infraohjelmointi_api.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTestCase(SimpleTestCase):
+    payload = {
+        "id": uuid.UUID("5d2ee8d3-5f3a-4c7e-9e8a-0e8c6a8c7b11"),
+        "name": "Hämeentie – katusuunnitelma   \"lainaus\" \\ \n\t\x01",
+        "costForecast": Decimal("1234.50"),
+        "estPlanningStart": datetime.date(2024, 1, 31),
+        "updatedDate": datetime.datetime(2024, 3, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        "localTime": datetime.time(8, 15, 30, 250000),
+        "duration": datetime.timedelta(days=1, seconds=5),
+        "label": gettext_lazy("Projects"),
+        "finances": {
+            "year": 2024,
+            "budgetProposalCurrentYearPlus0": "10.00",
+            "preliminaryCurrentYearPlus10": "0.00",
+        },
+        "hashTags": (uuid.UUID(int=1), uuid.UUID(int=2)),
+        "frameBudget": 1_500_000,
+        "ratio": 0.25,
+        "programmed": True,
+        "lock": None,
+        "bigNumber": 2**70,
+    }
+
+    def test_output_is_byte_identical_to_json_renderer(self):
+        self.assertEqual(
+            FastJSONRenderer().render(self.payload),
+            JSONRenderer().render(self.payload),
+        )
+        self.assertEqual(
+            FastJSONRenderer().render([self.payload, self.payload]),
+            JSONRenderer().render([self.payload, self.payload]),
+        )
+
+    def test_empty_data_and_indent_follow_json_renderer(self):
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+        self.assertEqual(
+            FastJSONRenderer().render(
+                self.payload, renderer_context={"indent": 4}
+            ),
+            JSONRenderer().render(self.payload, renderer_context={"indent": 4}),
+        )
+
+    def test_falls_back_to_json_renderer_without_orjson(self):
+        with patch.object(renderers, "orjson", None):
+            self.assertEqual(
+                FastJSONRenderer().render(self.payload),
+                JSONRenderer().render(self.payload),
+            )
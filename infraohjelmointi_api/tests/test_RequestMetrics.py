@@ -0,0 +1,104 @@
+"""Tests for the request metrics middleware and the /metrics endpoint."""
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from infraohjelmointi_api.models import ProjectClass
+from infraohjelmointi_api.services.CacheService import CacheService
+from infraohjelmointi_api.services.MetricsService import MetricsService
+from infraohjelmointi_api.views import BaseViewSet
+
+LOCMEM_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE, METRICS_AUTH_TOKEN="")
+@patch.object(BaseViewSet, "authentication_classes", new=[])
+@patch.object(BaseViewSet, "permission_classes", new=[])
+class RequestMetricsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ProjectClass.objects.create(name="Test Class", path="Test Class")
+        cls.staff_user = get_user_model().objects.create_user(
+            username="metricsstaff", password="testpass", is_staff=True
+        )
+
+    def setUp(self):
+        cache.clear()
+        MetricsService.reset()
+
+    def test_request_is_recorded_per_view(self):
+        self.client.get("/project-classes/")
+        self.client.get("/project-classes/")
+
+        self.client.force_login(self.staff_user)
+        metrics = self.client.get("/metrics").content.decode()
+        labels = 'view="projectClasses-list",method="GET",status="200"'
+        self.assertIn(
+            "infraohjelmointi_request_duration_seconds_count{{{}}} 2".format(labels), metrics
+        )
+        self.assertIn(
+            'infraohjelmointi_request_sql_queries_bucket{{{},le="+Inf"}} 2'.format(labels), metrics
+        )
+        self.assertIn("infraohjelmointi_response_size_bytes_sum{{{}}}".format(labels), metrics)
+        # Scrapes are not recorded
+        self.assertNotIn('view="metrics"', metrics)
+
+    def test_sql_and_cache_usage_is_counted(self):
+        stats = MetricsService.start_request()
+        try:
+            list(ProjectClass.objects.all())
+            CacheService.get_lookup("ProjectType")
+            CacheService.set_lookup("ProjectType", [])
+            CacheService.get_lookup("ProjectType")
+        finally:
+            MetricsService.end_request()
+
+        # Queries are only recorded through the middleware's execute wrapper
+        self.assertEqual(stats.sql_count, 0)
+        self.assertEqual(stats.cache_misses, 1)
+        self.assertEqual(stats.cache_hits, 1)
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_slow_request_is_logged_with_repeated_queries(self):
+        with self.assertLogs("infraohjelmointi_api", level="WARNING") as logs:
+            self.client.get("/project-classes/")
+
+        slow_logs = [line for line in logs.output if "Slow request GET /project-classes/" in line]
+        self.assertEqual(len(slow_logs), 1)
+        self.assertIn("(projectClasses-list)", slow_logs[0])
+        self.assertIn("x SELECT", slow_logs[0])
+
+    @override_settings(METRICS_AUTH_TOKEN="secret")
+    def test_metrics_token_is_required_when_configured(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+
+    def test_metrics_require_staff_without_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.client.force_login(
+            get_user_model().objects.create_user(username="metricsuser", password="testpass")
+        )
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.client.force_login(self.staff_user)
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    def test_sql_fingerprint_groups_queries_by_shape(self):
+        self.assertEqual(
+            MetricsService.sql_fingerprint(
+                "SELECT * FROM  t WHERE id IN (%s, %s, %s) AND year = 2024 AND name = 'x''y'"
+            ),
+            "SELECT * FROM t WHERE id IN (...) AND year = ? AND name = ?",
+        )
+        self.assertEqual(
+            MetricsService.sql_fingerprint('SELECT "t"."id" FROM "t" WHERE "t"."id" = %s LIMIT 21'),
+            MetricsService.sql_fingerprint('SELECT "t"."id" FROM "t" WHERE "t"."id" = %s LIMIT 1'),
+        )
@@ -0,0 +1,89 @@
+from datetime import datetime, timezone
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from infraohjelmointi_api.models import Project, SapClosedYearCost, SapCost
+from infraohjelmointi_api.services import SapApiService
+from infraohjelmointi_api.utils.standin_servers import SapStandInServer
+
+
+class SapClosedYearsTestCase(TestCase):
+    sap_ids = ["2814I00123", "2814I00456"]
+
+    def setUp(self):
+        self.projects = [
+            Project.objects.create(name="Test project", description="Test description", sapProject=sap_id)
+            for sap_id in self.sap_ids
+        ]
+        self.current_year = datetime.now().year
+        self.last_closed_year = self.current_year - 2
+
+    def sync(self, sap):
+        service = SapApiService()
+        sap.configure(service)
+        # Freeze is not active, costs are fetched from 2017 on
+        service.sap_freeze_date = datetime(2100, 1, 30, 0, 0, 0, tzinfo=timezone.utc)
+        service.sap_open_years = 2
+        request_count = sap.request_count
+        service.sync_all_projects_from_sap(for_financial_statement=False, sap_year=self.current_year)
+        return sap.request_count - request_count
+
+    def expected_project_task_costs(self, sap_id, first_open_year):
+        posid = sap_id + ".01"
+        closed = sum(
+            SapStandInServer.amount(posid, "ActualCostsSet", str(year))
+            for year in range(2017, first_open_year)
+        )
+        return closed + SapStandInServer.amount(posid, "ActualCostsSet", str(first_open_year))
+
+    def assert_all_costs(self, first_open_year):
+        for project in self.projects:
+            sap_cost = SapCost.objects.get(project=project, year=self.current_year)
+            self.assertEqual(
+                sap_cost.project_task_costs,
+                self.expected_project_task_costs(project.sapProject, first_open_year),
+            )
+
+    def test_closed_years_are_fetched_once(self):
+        closed_year_count = self.last_closed_year - 2017 + 1
+        with SapStandInServer() as sap:
+            # Every closed year once, open years costs and commitments, current year costs and commitments
+            self.assertEqual(self.sync(sap), closed_year_count + 2 + 2)
+            self.assert_all_costs(self.last_closed_year + 1)
+            self.assertEqual(
+                SapClosedYearCost.objects.filter(closed=True).count(), closed_year_count * len(self.sap_ids)
+            )
+
+            self.assertEqual(self.sync(sap), 4)
+            self.assert_all_costs(self.last_closed_year + 1)
+
+    def test_reopened_year_is_fetched_until_refetched(self):
+        reopened_year = 2020
+        with SapStandInServer() as sap:
+            self.sync(sap)
+
+            call_command("sapclosedyears", "--year", str(reopened_year), "--reopen", stdout=StringIO())
+            self.assertEqual(SapClosedYearCost.objects.filter(closed=False).count(), len(self.sap_ids))
+
+            # Costs are fetched from the re-opened year on, closed years before it come from DB
+            self.assertEqual(self.sync(sap), 4)
+            self.assert_all_costs(reopened_year)
+
+            with patch.object(SapApiService, "__init__", self.configured_init(sap)):
+                call_command("sapclosedyears", "--year", str(reopened_year), "--refetch", stdout=StringIO())
+            self.assertFalse(SapClosedYearCost.objects.filter(closed=False).exists())
+
+            self.assertEqual(self.sync(sap), 4)
+            self.assert_all_costs(self.last_closed_year + 1)
+
+    def configured_init(self, sap):
+        original_init = SapApiService.__init__
+
+        def init(service):
+            original_init(service)
+            sap.configure(service)
+
+        return init
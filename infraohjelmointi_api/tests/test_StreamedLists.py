@@ -0,0 +1,142 @@
+"""Contract tests: lists streamed with ?stream=true have the same JSON as the buffered lists."""
+
+import json
+from datetime import date
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from infraohjelmointi_api.models import (
+    ClassFinancial,
+    Project,
+    ProjectClass,
+    ProjectFinancial,
+    ProjectGroup,
+    ProjectLocation,
+    SapCurrentYear,
+)
+from infraohjelmointi_api.serializers import ProjectGetSerializer
+from infraohjelmointi_api.services.CacheService import CacheService
+from infraohjelmointi_api.views import BaseViewSet
+
+LOCMEM_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+@patch.object(BaseViewSet, "authentication_classes", new=[])
+@patch.object(BaseViewSet, "permission_classes", new=[])
+class StreamedListsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.year = date.today().year
+        cls.master_class = ProjectClass.objects.create(
+            name="Stream Master", path="Stream Master"
+        )
+        cls.project_class = ProjectClass.objects.create(
+            name="Stream Class", path="Stream Master/Stream Class", parent=cls.master_class
+        )
+        cls.coordinator_class = ProjectClass.objects.create(
+            name="Stream Coordinator", path="Stream Coordinator", forCoordinatorOnly=True
+        )
+        cls.master_class.coordinatorClass = cls.coordinator_class
+        cls.master_class.save()
+        cls.district = ProjectLocation.objects.create(
+            name="Stream district", path="Stream district", parentClass=cls.project_class
+        )
+        cls.coordinator_district = ProjectLocation.objects.create(
+            name="Stream coordinator district", path="Stream coordinator district", forCoordinatorOnly=True
+        )
+        cls.group = ProjectGroup.objects.create(
+            name="Stream Group", classRelation=cls.project_class, locationRelation=cls.district
+        )
+        ClassFinancial.objects.create(
+            year=cls.year, classRelation=cls.coordinator_class, frameBudget=1000
+        )
+        for index in range(7):
+            project = Project.objects.create(
+                name="Stream project {}".format(index),
+                description="Test description",
+                programmed=index % 2 == 0,
+                projectClass=cls.project_class,
+                projectLocation=cls.district,
+                projectGroup=cls.group if index < 3 else None,
+            )
+            ProjectFinancial.objects.create(project=project, year=cls.year, value=100 * index)
+            ProjectFinancial.objects.create(
+                project=project, year=cls.year + 1, value=10, forFrameView=True
+            )
+        SapCurrentYear.objects.create(
+            project=project, year=cls.year, sap_id="2814I00000", project_task_costs=5, production_task_costs=7
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def assertStreamedEqual(self, url):
+        buffered = self.client.get(url)
+        separator = "&" if "?" in url else "?"
+        streamed = self.client.get(url + separator + "stream=true")
+
+        self.assertEqual(buffered.status_code, 200, msg=url)
+        self.assertEqual(streamed.status_code, 200, msg=url)
+        self.assertTrue(streamed.streaming, msg=url)
+        self.assertEqual(streamed["Content-Type"], "application/json", msg=url)
+        self.assertEqual(json.loads(b"".join(streamed)), buffered.json(), msg=url)
+
+    def test_project_list(self):
+        for url in [
+            "/projects/",
+            "/projects/?year={}".format(self.year),
+            "/projects/?limit=2&page=2",
+            "/projects/?limit=2&page=last",
+            "/projects/?programmed=true",
+        ]:
+            self.assertStreamedEqual(url)
+
+    def test_project_list_streams_a_page_without_reading_all_projects(self):
+        response = self.client.get("/projects/?limit=3&page=3&stream=true")
+
+        data = json.loads(b"".join(response))
+        self.assertEqual(data["count"], 7)
+        self.assertEqual(len(data["results"]), 1)
+        self.assertIsNone(data["next"])
+
+        self.assertEqual(self.client.get("/projects/?limit=3&page=4&stream=true").status_code, 404)
+
+    def test_stream_is_aborted_on_error(self):
+        with patch.object(
+            ProjectGetSerializer, "to_representation", side_effect=ValueError("serialization failed")
+        ), self.assertLogs("infraohjelmointi_api", level="ERROR"):
+            response = self.client.get("/projects/?stream=true")
+            with self.assertRaises(ValueError):
+                b"".join(response)
+
+    def test_hierarchy_lists(self):
+        for url in [
+            "/project-classes/",
+            "/project-classes/coordinator/?forcedToFrame=true",
+            "/project-locations/",
+            "/project-locations/coordinator/",
+            "/project-groups/",
+        ]:
+            self.assertStreamedEqual(url)
+
+    def test_cached_sums_are_read_with_one_multi_get(self):
+        url = "/project-classes/coordinator/?year={}".format(self.year)
+        # the buffered list fills the cache
+        buffered = self.client.get(url).json()
+
+        with patch.object(
+            CacheService, "get_financial_sum", side_effect=AssertionError("sync cache read")
+        ), patch.object(
+            CacheService, "aget_financial_sums", wraps=CacheService.aget_financial_sums
+        ) as aget_financial_sums:
+            streamed = json.loads(b"".join(self.client.get(url + "&stream=true")))
+
+        self.assertEqual(streamed, buffered)
+        aget_financial_sums.assert_called_once()
@@ -345,3 +345,24 @@ class TalpaExcelServiceTestCase(TestCase):
         self.assertTrue(filename.endswith(".xlsx"))
         self.assertIn("Test Project", filename)
 
+
+    def test_stream_batch_excel_yields_the_batch_excel(self):
+        opening = TalpaProjectOpening.objects.create(
+            project=self.project,
+            subject="Uusi",
+            projectName="Test",
+            projectType=self.talpa_project_type,
+            projectNumberRange=self.talpa_range,
+        )
+        self.service.STREAM_CHUNK_SIZE = 1024
+
+        chunks = list(self.service.stream_batch_excel(TalpaProjectOpening.objects.iterator()))
+
+        self.assertGreater(len(chunks), 1)
+        ws = load_workbook(BytesIO(b"".join(chunks))).active
+        self.assertEqual([cell.value for cell in ws[2]][6], opening.projectName)
+        self.assertEqual(ws["A1"].style, TalpaExcelService.HEADER_STYLE_NAME)
+        self.assertEqual(ws["G2"].style, TalpaExcelService.CELL_STYLE_NAME)
+        self.assertTrue(ws["A1"].font.bold)
+        self.assertEqual(ws.freeze_panes, "A2")
+        self.assertEqual(ws.column_dimensions["H"].width, 30)
@@ -690,3 +690,48 @@ class TalpaProjectOpeningViewSetTestCase(TestCase):
         self.assertEqual(ws["G2"].value, "Test Project")
         self.assertEqual(ws["I2"].value, "15.01.2026 - 31.12.2032")
 
+
+    def test_download_excel_bulk_streams_filtered_openings(self):
+        for index, (opening_status, budget_account) in enumerate(
+            [
+                ("excel_generated", "8 03 01 01 Uudisrakentaminen"),
+                ("sent_to_talpa", "8 03 01 02 Perusparantaminen"),
+                ("sent_to_talpa", "8 04 Puistot"),
+            ]
+        ):
+            project = Project.objects.create(
+                name=f"Bulk Project {index}",
+                description="Test description",
+                projectClass=self.project_class,
+            )
+            TalpaProjectOpening.objects.create(
+                project=project,
+                subject="Uusi",
+                projectName=f"Bulk {index}",
+                projectType=self.talpa_project_type,
+                projectNumberRange=self.talpa_project_number_range,
+                status=opening_status,
+                budgetAccount=budget_account,
+            )
+
+        response = self.client.get(
+            "/talpa-project-opening/bulk-download-excel/",
+            {"status": "sent_to_talpa", "budgetAccount": "8 03", "createdFrom": date.today().isoformat()},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment", response["Content-Disposition"])
+        ws = load_workbook(BytesIO(b"".join(response))).active
+        self.assertEqual(ws.max_row, 2)
+        self.assertEqual(ws["G2"].value, "Bulk 1")
+        self.assertEqual(ws["A2"].value, "8 03 01 02")
+        # the bulk download leaves the statuses as they are
+        self.assertEqual(TalpaProjectOpening.objects.filter(status="sent_to_talpa").count(), 2)
+
+    def test_download_excel_bulk_invalid_date_returns_400(self):
+        response = self.client.get(
+            "/talpa-project-opening/bulk-download-excel/", {"createdTo": "31.12.2026"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
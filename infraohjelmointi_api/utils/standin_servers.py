@@ -0,0 +1,254 @@
+"""
+Local stand-ins for the SAP OData and ProjectWise REST APIs.
+
+The stand-ins answer the same URLs the sync engines call in production with
+deterministic data, so SapApiService and ProjectWiseService can be run end to end
+in benchmarks and tests without access to the real systems.
+
+    with SapStandInServer() as sap:
+        service = SapApiService()
+        sap.configure(service)
+        service.sync_all_projects_from_sap(for_financial_statement=False)
+"""
+
+import json
+import re
+import threading
+import time
+import zlib
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote_plus
+
+_POSID_RE = re.compile(r"Posid eq '([^']+)'")
+_BUDAT_START_RE = re.compile(r"Budat ge datetime'(\d{4})")
+_HKR_ID_RE = re.compile(r"HKRHanketunnus eq '?(\d+)")
+
+
+def _stable_int(*parts) -> int:
+    """Deterministic integer for the given parts, stable between processes unlike hash()"""
+    return zlib.crc32("|".join(str(part) for part in parts).encode("utf-8"))
+
+
+class StandInServer:
+    """
+    Threaded HTTP server bound to a free port on localhost.
+
+    Subclasses implement handle_get and handle_post returning (status_code, json_body).
+    latency is an artificial delay in seconds added to every response.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return "http://{}:{}/".format(host, port)
+
+    def start(self) -> "StandInServer":
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self._respond(stand_in.handle_get(unquote_plus(self.path)))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                self._respond(
+                    stand_in.handle_post(
+                        unquote_plus(self.path), json.loads(body) if body else {}
+                    )
+                )
+
+            def _respond(self, result):
+                with stand_in._lock:
+                    stand_in.request_count += 1
+                if stand_in.latency:
+                    time.sleep(stand_in.latency)
+                status_code, body = result
+                payload = json.dumps(body, default=str).encode("utf-8")
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def handle_get(self, path: str):
+        return 404, {}
+
+    def handle_post(self, path: str, body: dict):
+        return 404, {}
+
+
+class SapStandInServer(StandInServer):
+    """
+    Answers ActualCostsSet and CommitmentLinesSet OData queries.
+
+    Every Posid in the $filter gets a project task (.01) and a production task (.02) line,
+    amounts depend only on the Posid, the entity set and the start year of the query.
+    """
+
+    COSTS_ENDPOINT = (
+        "ActualCostsSet?saml2=disabled&$format=json&$filter=(Posid eq '{posid}') and "
+        "(Budat ge datetime'{budat_start}' and Budat le datetime'{budat_end}')"
+    )
+    COMMITMENTS_ENDPOINT = (
+        "CommitmentLinesSet?saml2=disabled&$format=json&$filter=(Posid eq '{posid}') and "
+        "(Budat ge datetime'{budat_start}' and Budat le datetime'{budat_end}')"
+    )
+
+    def configure(self, service) -> None:
+        """Points the given SapApiService to this stand-in"""
+        service.sap_api_url = self.url
+        service.sap_api_costs_endpoint = self.COSTS_ENDPOINT
+        service.sap_api_commitments_endpoint = self.COMMITMENTS_ENDPOINT
+
+    @staticmethod
+    def amount(posid: str, entity_set: str, start_year) -> Decimal:
+        return Decimal(_stable_int(posid, entity_set, start_year) % 10_000_000) / 100
+
+    def handle_get(self, path: str):
+        entity_set = path.lstrip("/").split("?")[0]
+        if entity_set not in ("ActualCostsSet", "CommitmentLinesSet"):
+            return 404, {"error": "Unknown entity set '{}'".format(entity_set)}
+
+        start_year = _BUDAT_START_RE.search(path)
+        start_year = start_year.group(1) if start_year else None
+        results = []
+        for posid in _POSID_RE.findall(path):
+            for task in ("01", "02"):
+                task_posid = "{}.{}".format(posid, task)
+                results.append(
+                    {
+                        "Posid": task_posid,
+                        "Wkgbtr": str(self.amount(task_posid, entity_set, start_year)),
+                    }
+                )
+        return 200, {"d": {"results": results}}
+
+
+class PWStandInServer(StandInServer):
+    """
+    Answers ProjectWise project metadata queries by HKR id and accepts project updates.
+
+    known_hkr_ids limits which projects exist in the stand-in, by default every id exists.
+    Received update payloads are kept in updates.
+    """
+
+    PROJECT_META_ENDPOINT = (
+        "PW_WSG/Project?$select=*,@projAttr.*&@projAttr=ProjectProjectType!poly-forward-"
+        "PW_WSG_Dynamic.PrType_1121_HKR_Hankerek_Hanke&$filter=@projAttr.PROJECT_HKRHanketunnus+eq+"
+    )
+    PROJECT_UPDATE_ENDPOINT = "PW_WSG_Dynamic/PrType_1121_HKR_Hankerek_Hanke/"
+
+    PERSONS = [
+        ("Meikäläinen Matti", "Projektinjohtaja", "0401234567", "matti.meikalainen@example.com"),
+        ("Virtanen Liisa", "Rakennuttajainsinööri", "0407654321", "liisa.virtanen@example.com"),
+        ("Korhonen Pekka", "Suunnittelija", "0409876543", "pekka.korhonen@example.com"),
+    ]
+
+    def __init__(self, latency: float = 0.0, known_hkr_ids=None) -> None:
+        super().__init__(latency=latency)
+        self.known_hkr_ids = (
+            {str(hkr_id) for hkr_id in known_hkr_ids} if known_hkr_ids is not None else None
+        )
+        self.updates = []
+
+    def configure(self, service) -> None:
+        """Points the given ProjectWiseService to this stand-in and enables syncing to it"""
+        service.pw_api_url = self.url
+        service.pw_api_project_metadata_endpoint = self.PROJECT_META_ENDPOINT
+        service.pw_api_project_update_endpoint = self.PROJECT_UPDATE_ENDPOINT
+        service.pw_sync_enabled = True
+
+    @classmethod
+    def project_properties(cls, hkr_id: str) -> dict:
+        seed = _stable_int("pw", hkr_id)
+        person, title, phone, email = cls.PERSONS[seed % len(cls.PERSONS)]
+        start_year = 2024 + seed % 6
+        return {
+            "PROJECT_HKRHanketunnus": str(hkr_id),
+            "PROJECT_Hankkeen_kuvaus": "Hankkeen {} kuvaus".format(hkr_id),
+            "PROJECT_Kadun_tai_puiston_nimi": "Katu {}".format(seed % 500),
+            "PROJECT_Hankkeen_vaihe": "2. Ohjelmointi",
+            "PROJECT_Louheen": "Ei",
+            "PROJECT_Sorakatu": "Kyllä" if seed % 7 == 0 else "Ei",
+            "PROJECT_Projektialue": "",
+            "PROJECT_Aluekokonaisuuden_nimi": "",
+            "PROJECT_Ohjelmoitu": "Kyllä",
+            "PROJECT_Rakentamisvaiheen_tarkenne": "",
+            "PROJECT_Toimiala": "",
+            "PROJECT_Alue_rakennusviraston_vastuujaon_mukaan": "",
+            "PROJECT_Louhi__hankkeen_aloitusvuosi": start_year,
+            "PROJECT_Louhi__hankkeen_valmistumisvuosi": start_year + 2 + seed % 3,
+            "PROJECT_Hankkeen_rakentaminen_alkaa": "{}-03-01T00:00:00".format(start_year + 1),
+            "PROJECT_Hankkeen_rakentaminen_pttyy": "{}-10-31T00:00:00".format(start_year + 2),
+            "PROJECT_Vastuuhenkil": person,
+            "PROJECT_Vastuuhenkiln_titteli": title,
+            "PROJECT_Vastuuhenkiln_puhelinnumero": phone,
+            "PROJECT_Vastuuhenkiln_shkpostiosoite": email,
+            "PROJECT_Vastuuhenkil_rakennuttaminen": "",
+            # otherPersons is a many to many field which cannot be assigned from PW data
+            "PROJECT_Muut_vastuuhenkilt": "",
+        }
+
+    def handle_get(self, path: str):
+        match = _HKR_ID_RE.search(path)
+        if not match:
+            return 400, {"errorMessage": "Unsupported query"}
+
+        hkr_id = match.group(1)
+        if self.known_hkr_ids is not None and hkr_id not in self.known_hkr_ids:
+            return 200, {"instances": []}
+
+        return 200, {
+            "instances": [
+                {
+                    "instanceId": "project-{}".format(hkr_id),
+                    "relationshipInstances": [
+                        {
+                            "relatedInstance": {
+                                "instanceId": "hanke-{}".format(hkr_id),
+                                "properties": self.project_properties(hkr_id),
+                            }
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def handle_post(self, path: str, body: dict):
+        if self.PROJECT_UPDATE_ENDPOINT not in path:
+            return 404, {"errorMessage": "Unknown endpoint"}
+        with self._lock:
+            self.updates.append(body)
+        return 200, {"changedInstance": body.get("instance", {})}
@@ -1,9 +1,15 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import viewsets, filters
 from django_filters.rest_framework import DjangoFilterBackend
 from django_filters import rest_framework as django_filters
 from infraohjelmointi_api.models import AuditLog
 from infraohjelmointi_api.serializers.AuditLogSerializer import AuditLogSerializer
-from infraohjelmointi_api.paginations import StandardResultsSetPagination
+from infraohjelmointi_api.paginations import (
+    CreatedDateCursorPagination,
+    StandardResultsSetPagination,
+)
 from infraohjelmointi_api.permissions import IsAdmin
 from rest_framework.permissions import IsAuthenticated
 
@@ -34,8 +40,13 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     """
     API endpoint that allows audit log entries to be viewed.
     Read-only access for admin users to view system audit logs.
+
+    With ?pagination=cursor the entries are cursor paginated, newest first, and limited to
+    the last CURSOR_WINDOW_DAYS days unless created_date_from is given.
     """
 
+    CURSOR_WINDOW_DAYS = 31
+
     permission_classes = [
         IsAuthenticated & IsAdmin
     ]
@@ -48,10 +59,29 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['-createdDate']  # Most recent first by default
     search_fields = ['endpoint', 'origin', 'actor__username', 'project__name']
 
+    def use_cursor_pagination(self):
+        request = getattr(self, "request", None)
+        return request is not None and request.query_params.get("pagination") == "cursor"
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            self._paginator = (
+                CreatedDateCursorPagination()
+                if self.use_cursor_pagination()
+                else StandardResultsSetPagination()
+            )
+        return self._paginator
+
     def get_queryset(self):
         """
         Return audit log entries ordered by creation date (newest first)
         """
-        return AuditLog.objects.select_related(
+        queryset = AuditLog.objects.select_related(
             'actor', 'project', 'project_group', 'project_class'
         ).all()
+        if self.use_cursor_pagination() and "created_date_from" not in self.request.query_params:
+            queryset = queryset.filter(
+                createdDate__gte=timezone.now() - timedelta(days=self.CURSOR_WINDOW_DAYS)
+            )
+        return queryset
@@ -6,6 +6,7 @@ from rest_framework.response import Response
 from rest_framework import status
 
 from .BaseViewSet import BaseViewSet
+from .utils import data_version_etag, hierarchy_sums_response, is_stream_requested
 from infraohjelmointi_api.models import ClassFinancial, LocationFinancial
 from infraohjelmointi_api.services.CacheService import CacheService
 
@@ -19,7 +20,8 @@ class BaseClassLocationViewSet(BaseViewSet):
     def build_frame_budgets_context(year: int, for_frame_view: bool = False) -> defaultdict:
         """
         Build frame_budgets context for consistent budget overlap logic.
-        Uses caching for performance optimization.
+        Frame budgets are cached per year, the 11 years of the window are read with one
+        multi-get and only the missing years are queried.
         
         Args:
             year: Starting year for frame budget collection
@@ -28,35 +30,34 @@ class BaseClassLocationViewSet(BaseViewSet):
         Returns:
             defaultdict: Dictionary with keys "{year}-{relation_id}" and frameBudget values
         """
-        cached_frame_budgets = CacheService.get_frame_budgets(year=year, for_frame_view=for_frame_view)
-        if cached_frame_budgets is not None:
-            frame_budgets = defaultdict(lambda: 0)
-            frame_budgets.update(cached_frame_budgets)
-            return frame_budgets
-        
-        class_financials = ClassFinancial.objects.filter(
-            year__in=range(year, year+11),
-            forFrameView=for_frame_view
-        ).annotate(relation=F("classRelation")).values("year", "relation", "frameBudget")
-        
-        location_financials = LocationFinancial.objects.filter(
-            year__in=range(year, year+11),
-            forFrameView=for_frame_view
-        ).annotate(relation=F("locationRelation")).values("year", "relation", "frameBudget")
-        
-        financials = class_financials.union(location_financials)
+        years = list(range(year, year + 11))
+        frame_budgets_by_year = CacheService.get_frame_budget_years(years, for_frame_view=for_frame_view)
+        missing_years = [y for y in years if y not in frame_budgets_by_year]
+
+        if missing_years:
+            class_financials = ClassFinancial.objects.filter(
+                year__in=missing_years,
+                forFrameView=for_frame_view
+            ).annotate(relation=F("classRelation")).values("year", "relation", "frameBudget")
+
+            location_financials = LocationFinancial.objects.filter(
+                year__in=missing_years,
+                forFrameView=for_frame_view
+            ).annotate(relation=F("locationRelation")).values("year", "relation", "frameBudget")
+
+            # years without any frame budgets are cached too, as empty
+            queried = {y: {} for y in missing_years}
+            for f in class_financials.union(location_financials):
+                relation_id = str(f['relation']) if f['relation'] else None
+                if relation_id:
+                    queried[f['year']][f"{f['year']}-{relation_id}"] = f["frameBudget"]
+
+            CacheService.set_frame_budget_years(queried, for_frame_view=for_frame_view)
+            frame_budgets_by_year.update(queried)
+
         frame_budgets = defaultdict(lambda: 0)
-        for f in financials:
-            relation_id = str(f['relation']) if f['relation'] else None
-            if relation_id:
-                frame_budgets[f"{f['year']}-{relation_id}"] = f["frameBudget"]
-        
-        CacheService.set_frame_budgets(
-            year=year,
-            for_frame_view=for_frame_view,
-            data=dict(frame_budgets)
-        )
-        
+        for y in years:
+            frame_budgets.update(frame_budgets_by_year[y])
         return frame_budgets
 
     @staticmethod
@@ -161,6 +162,10 @@ class BaseClassLocationViewSet(BaseViewSet):
             Query param to fetch coordinator {entity_plural} with frameView project sums.
             Defaults to False.
 
+            stream (optional) : bool
+
+            Stream the same JSON while the {entity_plural} are serialized. Defaults to False.
+
             Usage
             ----------
 
@@ -282,10 +287,7 @@ class BaseClassLocationViewSet(BaseViewSet):
                 instance_id=entity_id,
                 instance_type='ProjectClass' if relation_field == 'classRelation' else 'ProjectLocation'
             )
-            for year_offset in range(-10, 1):
-                affected_year = year + year_offset
-                if affected_year >= 2000:
-                    CacheService.invalidate_frame_budgets(year=affected_year)
+            CacheService.invalidate_frame_budgets(year=year)
             self._update_frame_view_if_needed(
                 forced_to_frame_status, forced_to_frame, obj, entity_id, relation_field, financial_service
             )
@@ -305,10 +307,7 @@ class BaseClassLocationViewSet(BaseViewSet):
                 instance_id=entity_id,
                 instance_type='ProjectClass' if relation_field == 'classRelation' else 'ProjectLocation'
             )
-            for year_offset in range(-10, 1):
-                affected_year = year + year_offset
-                if affected_year >= 2000:
-                    CacheService.invalidate_frame_budgets(year=affected_year)
+            CacheService.invalidate_frame_budgets(year=year)
             self._update_frame_view_if_needed(
                 forced_to_frame_status, forced_to_frame, obj, entity_id, relation_field, financial_service
             )
@@ -319,6 +318,7 @@ class BaseClassLocationViewSet(BaseViewSet):
             "obj": obj
         }
 
+    @data_version_etag
     @override
     def list(self, request, *args, **kwargs):
         """
@@ -332,6 +332,10 @@ class BaseClassLocationViewSet(BaseViewSet):
             Year number to fetch Project Class/Location with finances starting from this year.
             Defaults to current year.
 
+            stream (optional) : Bool
+
+            Stream the same JSON while the instances are serialized. Defaults to False.
+
             Usage
             ----------
 
@@ -350,17 +354,16 @@ class BaseClassLocationViewSet(BaseViewSet):
         year = int(request.query_params.get("year", date.today().year))
         qs = self.get_queryset()
         frame_budgets = self.build_frame_budgets_context(year, for_frame_view=False)
-        
-        serializer = self.get_serializer(
-            qs, 
-            many=True, 
-            context={
-                "finance_year": year,
-                "frame_budgets": frame_budgets
-            }
-        )
+        context = {
+            "finance_year": year,
+            "frame_budgets": frame_budgets
+        }
 
-        return Response(serializer.data)
+        if not is_stream_requested(request):
+            serializer = self.get_serializer(qs, many=True, context=context)
+            return Response(serializer.data)
+
+        return hierarchy_sums_response(request, qs, self.get_serializer_class(), context=context)
 
     @override
     def retrieve(self, request, *args, **kwargs):
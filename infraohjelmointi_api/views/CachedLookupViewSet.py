@@ -1,10 +1,15 @@
+import hashlib
+
+from django.http import HttpResponse
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework import status
 from django.db import transaction
 from django.core.exceptions import FieldDoesNotExist
 
+from infraohjelmointi_api.renderers import fast_json_dumps
 from infraohjelmointi_api.services.CacheService import CacheService
+from infraohjelmointi_api.services.CompressionService import CompressionService
 from .BaseViewSet import BaseViewSet
 
 
@@ -19,6 +24,9 @@ class CachedLookupViewSet(BaseViewSet):
         
         cached_data = CacheService.get_lookup(cache_key)
         if cached_data is not None:
+            compressed_response = self.get_compressed_response(request, cached_data)
+            if compressed_response is not None:
+                return compressed_response
             return Response(cached_data)
         
         response = super().list(request, *args, **kwargs)
@@ -28,6 +36,34 @@ class CachedLookupViewSet(BaseViewSet):
         
         return response
     
+    def get_compressed_response(self, request, data):
+        """
+        Returns the cached list compressed for the client, without compressing it again
+        on every request. None when the client doesn't accept compression, the list is not
+        rendered as plain JSON or it is too small to be compressed.
+        """
+        if request.accepted_renderer.format != "json" or "indent" in (request.accepted_media_type or ""):
+            return None
+        encoding = CompressionService.negotiate(request.headers.get("Accept-Encoding"))
+        if encoding is None:
+            return None
+
+        rendered = fast_json_dumps(data)
+        if len(rendered) < CompressionService.min_size():
+            return None
+
+        cache_key = self.get_cache_key_name()
+        digest = hashlib.sha256(rendered).hexdigest()
+        body = CacheService.get_lookup_body(cache_key, encoding, digest)
+        if body is None:
+            body = CompressionService.compress(rendered, encoding)
+            CacheService.set_lookup_body(cache_key, encoding, digest, body)
+
+        response = HttpResponse(body, content_type="application/json")
+        response["Content-Encoding"] = encoding
+        response["Vary"] = "Accept-Encoding"
+        return response
+
     def create(self, request, *args, **kwargs):
         response = super().create(request, *args, **kwargs)
         if response.status_code == 201:
@@ -0,0 +1,40 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from infraohjelmointi_api.services.MetricsService import MetricsService
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint for the request metrics of this worker process.
+
+        When METRICS_AUTH_TOKEN is set, the scraper must send it as a bearer token.
+        Without a token only staff users logged in to the admin can read the metrics.
+
+        Usage
+        ----------
+
+        metrics/
+
+        Returns
+        -------
+
+        text/plain
+            Metrics in the Prometheus text exposition format
+    """
+    token = getattr(settings, "METRICS_AUTH_TOKEN", None)
+    if token:
+        authorization = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(authorization, "Bearer {}".format(token)):
+            return HttpResponseForbidden()
+    elif not request.user.is_staff:
+        return HttpResponseForbidden()
+
+    return HttpResponse(
+        MetricsService.render_prometheus(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -1,11 +1,14 @@
 from datetime import date
 from django.db.models import Prefetch
 from .BaseClassLocationViewSet import BaseClassLocationViewSet
+from .utils import data_version_etag, hierarchy_sums_response
+from ..renderers import FastJSONRenderer
 from infraohjelmointi_api.serializers import ProjectClassSerializer
 from infraohjelmointi_api.models import Project
 from infraohjelmointi_api.models.ClassFinancial import ClassFinancial
 from infraohjelmointi_api.services import ProjectClassService, ClassFinancialService
 from overrides import override
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework.decorators import action
 
@@ -16,6 +19,7 @@ class ProjectClassViewSet(BaseClassLocationViewSet):
     '''
 
     serializer_class = ProjectClassSerializer
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
 
     @override
     def get_queryset(self):
@@ -64,6 +68,7 @@ class ProjectClassViewSet(BaseClassLocationViewSet):
         url_path='coordinator',
         name='get_coordinator_classes',
     )
+    @data_version_etag
     def get_coordinator_classes(self, request):
         '''Get coordinator classes with filtering'''
         return self.list_for_coordinator(request)
@@ -112,7 +117,8 @@ class ProjectClassViewSet(BaseClassLocationViewSet):
 
         frame_budgets = self.build_frame_budgets_context(year, for_frame_view=False)
 
-        serializer = ProjectClassSerializer(
+        return hierarchy_sums_response(
+            request,
             ProjectClassService.list_all_for_coordinator()
             .select_related(
                 'parent',
@@ -123,7 +129,7 @@ class ProjectClassViewSet(BaseClassLocationViewSet):
                 'coordinatorClass__parent',
                 'coordinatorClass__parent__parent'
             ),
-            many=True,
+            ProjectClassSerializer,
             context={
                 'finance_year': year,
                 'for_coordinator': True,
@@ -132,8 +138,6 @@ class ProjectClassViewSet(BaseClassLocationViewSet):
             },
         )
 
-        return Response(serializer.data)
-
     @action(
         methods=['patch'],
         detail=False,
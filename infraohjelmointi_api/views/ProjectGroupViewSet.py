@@ -1,4 +1,5 @@
 from .BaseViewSet import BaseViewSet
+from .utils import data_version_etag, hierarchy_sums_response
 from infraohjelmointi_api.serializers.ProjectGroupSerializer import (
     ProjectGroupSerializer,
 )
@@ -15,6 +16,7 @@ class ProjectGroupViewSet(BaseViewSet):
 
     serializer_class = ProjectGroupSerializer
 
+    @data_version_etag
     @override
     def list(self, request, *args, **kwargs):
         """
@@ -28,6 +30,10 @@ class ProjectGroupViewSet(BaseViewSet):
             Year number to fetch Project Groups with finances starting from this year.
             Defaults to current year.
 
+            stream (optional) : Bool
+
+            Stream the same JSON while the groups are serialized. Defaults to False.
+
             Usage
             ----------
 
@@ -53,9 +59,9 @@ class ProjectGroupViewSet(BaseViewSet):
                 queryset=Project.objects.filter(programmed=True).prefetch_related('finances'),
             ),
         )
-        serializer = self.get_serializer(qs, many=True, context={"finance_year": year})
-
-        return Response(serializer.data)
+        return hierarchy_sums_response(
+            request, qs, self.get_serializer_class(), context={"finance_year": year}
+        )
 
     @override
     def destroy(self, request, *args, **kwargs):
@@ -73,6 +79,7 @@ class ProjectGroupViewSet(BaseViewSet):
         url_path=r"coordinator",
         name="get_groups_for_coordinator",
     )
+    @data_version_etag
     def get_groups_for_coordinator(self, request):
         """
         Custom action to get ProjectGroup instances with coordinator location/classes
@@ -10,9 +10,11 @@ from infraohjelmointi_api.services import (
 from infraohjelmointi_api.models.LocationFinancial import LocationFinancial
 from infraohjelmointi_api.models import Project
 from overrides import override
-from rest_framework.response import Response
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.decorators import action
 from .BaseClassLocationViewSet import BaseClassLocationViewSet
+from .utils import data_version_etag, hierarchy_sums_response
+from ..renderers import FastJSONRenderer
 
 
 class ProjectLocationViewSet(BaseClassLocationViewSet):
@@ -21,6 +23,7 @@ class ProjectLocationViewSet(BaseClassLocationViewSet):
     """
 
     serializer_class = ProjectLocationSerializer
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
 
     @override
     def get_queryset(self):
@@ -49,6 +52,7 @@ class ProjectLocationViewSet(BaseClassLocationViewSet):
         url_path=r"coordinator",
         name="get_coordinator_locations",
     )
+    @data_version_etag
     def list_for_coordinator(self, request):
         # Dynamic docstring - see BaseClassLocationViewSet._get_coordinator_list_docstring("location", "project-locations/coordinator")
         """Dynamic docstring generated by BaseClassLocationViewSet._get_coordinator_list_docstring"""
@@ -59,9 +63,10 @@ class ProjectLocationViewSet(BaseClassLocationViewSet):
 
         frame_budgets = self.build_frame_budgets_context(year, for_frame_view=False)
 
-        serializer = ProjectLocationSerializer(
+        return hierarchy_sums_response(
+            request,
             ProjectLocationService.list_all_for_coordinator(),
-            many=True,
+            ProjectLocationSerializer,
             context={
                 "finance_year": year,
                 "for_coordinator": True,
@@ -69,7 +74,6 @@ class ProjectLocationViewSet(BaseClassLocationViewSet):
                 "frame_budgets": frame_budgets
             },
         )
-        return Response(serializer.data)
 
     @action(
         methods=["patch"],
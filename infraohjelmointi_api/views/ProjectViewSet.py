@@ -1,6 +1,8 @@
 from datetime import date, timedelta, datetime
 import datetime as dt_module
+import gzip
 import logging
+from functools import partial
 from django_filters.rest_framework import DjangoFilterBackend
 import django_filters
 from infraohjelmointi_api.serializers import (
@@ -16,7 +18,6 @@ from infraohjelmointi_api.serializers import (
     ProjectNoteGetSerializer,
 )
 from infraohjelmointi_api.models import (
-    AuditLog,
     ClassFinancial,
     LocationFinancial,
     Project,
@@ -28,35 +29,52 @@ from infraohjelmointi_api.models import (
 )
 from infraohjelmointi_api.services import (
     AppStateValueService,
+    AuditLogService,
     CacheService,
+    CacheWarmupService,
+    CompressionService,
     ProjectPhaseService,
     ProjectWiseService,
     ProjectFinancialService,
     ProjectClassService,
+    ProjectExportService,
+    PlanningSnapshotService,
 )
 from infraohjelmointi_api.services.ProjectWiseService import PWProjectResponseError
 from infraohjelmointi_api.services.utils import create_comprehensive_project_data
 from infraohjelmointi_api.permissions import (
     user_in_restricted_programmer_group,
-    get_restricted_user_assigned_class_paths,
-    target_path_matches_assigned_paths,
+    get_restricted_user_class_access,
 )
 import json
 
 from infraohjelmointi_api.services.SapCurrentYearService import SapCurrentYearService
 from .BaseViewSet import BaseViewSet
+from .utils import (
+    _if_none_match_passes,
+    get_field_selection,
+    is_stream_requested,
+    iterate_in_thread,
+    load_project_chunk_context,
+)
+from .api.utils import generate_streaming_response
 from distutils.util import strtobool
 from ..paginations import StandardResultsSetPagination
+from ..renderers import FastJSONRenderer, fast_json_dumps
 from overrides import override
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from django.db import transaction
+from django.core.paginator import InvalidPage
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework.decorators import action
-from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.exceptions import NotFound, ParseError, ValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.utils.urls import remove_query_param
 import uuid
 from rest_framework import status
 from itertools import chain
-from django.db.models import Count, Case, When, Q, F
+from django.db.models import Count, Case, When, Q, F, Exists, OuterRef
 from django.db.models.signals import post_save
 from collections import defaultdict
 from dateutil.relativedelta import relativedelta
@@ -103,10 +121,48 @@ class ProjectViewSet(BaseViewSet):
         self.projectWiseService = ProjectWiseService()
 
     pagination_class = StandardResultsSetPagination
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     filter_backends = [DjangoFilterBackend]
     filterset_class = ProjectFilter
     serializer_class = ProjectGetSerializer
 
+    # Actions serializing projects with ProjectGetSerializer, these take ?fields= and ?expand=
+    FIELD_SELECTION_ACTIONS = ["list", "retrieve", "get_projects_for_coordinator"]
+
+    # Related objects loaded with the projects, by the serialized field reading them
+    PROJECT_SELECT_RELATED = {
+        "projectClass": ["projectClass"],
+        "projectLocation": ["projectLocation"],
+        "locked": ["lock"],
+        "phase": ["phase"],
+        "category": ["category"],
+        "personPlanning": ["personPlanning"],
+        "personConstruction": ["personConstruction"],
+        "personProgramming": ["personProgramming"],
+        "budgetOverrunReason": ["budgetOverrunReason"],
+    }
+    COORDINATOR_SELECT_RELATED = {
+        "projectClass": [
+            "projectClass",
+            "projectClass__coordinatorClass",
+            "projectClass__parent__coordinatorClass",
+        ],
+        "projectLocation": [
+            "projectLocation",
+            "projectLocation__coordinatorLocation",
+            "projectLocation__parent__coordinatorLocation",
+            "projectLocation__parent__parent__coordinatorLocation",
+        ],
+    }
+    PROJECT_PREFETCH_RELATED = {
+        "favPersons": ["favPersons"],
+        "hashTags": ["hashTags"],
+        # Prefetch finances to prevent N+1 queries if accessed
+        "finances": ["finances"],
+    }
+    # Fields reading their related objects also when the nested objects are compacted to ids
+    RELATED_FIELDS_READ_COMPACT = ["locked", "favPersons", "hashTags", "finances"]
+
     @override
     def destroy(self, request, *args, **kwargs):
         """
@@ -337,18 +393,14 @@ class ProjectViewSet(BaseViewSet):
         return date
 
     def audit_log_project_card_changes(self, old_values, new_values, project, user, url, operation):
-        audit_log = AuditLog(
+        AuditLogService.record(
             actor=user if isinstance(user, User) else None,
             operation=operation,
-            log_level="INFO",
-            origin='infrahankkeiden_ohjelmointi',
-            status='SUCCESS',
             project=project,
             old_values=old_values,
             new_values=new_values,
             endpoint=url,
         )
-        audit_log.save()
 
     def create_updated_finance_instances(self, finances, project, forced_to_frame, year):
         finance_instances = []
@@ -774,6 +826,64 @@ class ProjectViewSet(BaseViewSet):
             return ProjectCreateSerializer
         return super().get_serializer_class()
 
+    @override
+    def get_serializer(self, *args, **kwargs):
+        """
+        Overriden GenericAPIView class method to serialize only the fields selected with ?fields= and ?expand=
+        """
+        kwargs.update(self._get_field_selection())
+        return super().get_serializer(*args, **kwargs)
+
+    def _get_field_selection(self) -> dict:
+        """
+        Utility function to get the sparse field selection of the request as serializer arguments.\n
+        Only the actions serializing projects take a selection, for the others an empty dict is returned.
+
+            URL Query Parameters
+            ----------
+
+            fields (optional) : Comma separated field names
+
+            Only the given fields are serialized. Related objects are serialized as their ids.
+
+            expand (optional) : Comma separated field names
+
+            Related objects serialized in full with a field selection.
+
+            Usage
+            ----------
+
+            projects/?fields=id,name,phase&expand=phase
+        """
+        if self.action not in self.FIELD_SELECTION_ACTIONS:
+            return {}
+        if not hasattr(self, "_field_selection"):
+            self._field_selection = get_field_selection(self.request, ProjectGetSerializer)
+        return self._field_selection
+
+    def _is_field_requested(self, field_name: str) -> bool:
+        fields = self._get_field_selection().get("fields")
+        return fields is None or field_name in fields
+
+    def _get_related_fields(self, for_coordinator=False):
+        """
+        Utility function to get the names of the requested fields that read related objects of the projects.\n
+        Returns None when the whole projects are serialized.
+        """
+        selection = self._get_field_selection()
+        if not selection:
+            return None
+
+        expand = set(selection["expand"])
+        fields = selection["fields"] if selection["fields"] is not None else ProjectGetSerializer().fields
+        return {
+            field_name
+            for field_name in fields
+            if field_name in expand
+            or field_name in self.RELATED_FIELDS_READ_COMPACT
+            or (for_coordinator and field_name in self.COORDINATOR_SELECT_RELATED)
+        }
+
     def get_projects(
         self, request, for_coordinator=False, forFrameView=False
     ) -> ProjectGetSerializer:
@@ -816,34 +926,39 @@ class ProjectViewSet(BaseViewSet):
         paginator.page_size = limit
         page = paginator.paginate_queryset(queryset, request)
 
-        year = date.today().year if financeYear == None else int(financeYear)
-        finances = ProjectFinancialSerializer(
-            ProjectFinancial.objects.filter(
-                forFrameView=forFrameView,
-                year__in=range(year, year + 11)
-            ),
-            many=True,
-            context={"discard_FK": False}
-        ).data
-
-        projects_to_finances = defaultdict(list)
-        for f in finances:
-            projects_to_finances[f["project"]].append(f)
-
-        current_year = dt_module.datetime.now().year
-        sap_values = SapCurrentYearService.get_by_year(current_year)
-        projects_to_sap_values = defaultdict(list)
-        for sap_value in sap_values:
-            # Append the SAP value to the list of SAP values for the corresponding project_id
-            projects_to_sap_values[sap_value.project_id].append(sap_value)
-
         serializerContext = {
             "finance_year": financeYear,
             "for_coordinator": for_coordinator,
             "forcedToFrame": forFrameView,
-            "projects_to_finances": projects_to_finances,
-            "sap_values_by_project": projects_to_sap_values
         }
+        # finances and SAP values are only read for the projects of the page and when serialized
+        project_ids = [project.id for project in page] if page is not None else None
+
+        if self._is_field_requested("finances"):
+            year = date.today().year if financeYear == None else int(financeYear)
+            finances = ProjectFinancial.objects.filter(
+                forFrameView=forFrameView,
+                year__in=range(year, year + 11)
+            )
+            if project_ids is not None:
+                finances = finances.filter(project_id__in=project_ids)
+
+            projects_to_finances = defaultdict(list)
+            for f in ProjectFinancialSerializer(finances, many=True, context={"discard_FK": False}).data:
+                projects_to_finances[f["project"]].append(f)
+            serializerContext["projects_to_finances"] = projects_to_finances
+
+        if self._is_field_requested("currentYearsSapValues"):
+            current_year = dt_module.datetime.now().year
+            sap_values = SapCurrentYearService.get_by_year(current_year)
+            if project_ids is not None:
+                sap_values = sap_values.filter(project_id__in=project_ids)
+
+            projects_to_sap_values = defaultdict(list)
+            for sap_value in sap_values:
+                # Append the SAP value to the list of SAP values for the corresponding project_id
+                projects_to_sap_values[sap_value.project_id].append(sap_value)
+            serializerContext["projects_to_sap_values"] = projects_to_sap_values
 
         if page is not None:
             serializer = self.get_serializer(
@@ -866,12 +981,111 @@ class ProjectViewSet(BaseViewSet):
     def list(self, request, *args, **kwargs):
         """
         Overriden list action for projects to make use of the utility function and get projects for planning by default.\n
-        All search result url query paramters can be used to filter projects here.
+        All search result url query paramters can be used to filter projects here.\n
+        With stream=true the same JSON is streamed while the projects are read, see stream_projects.
         """
+        if is_stream_requested(request):
+            return self.stream_projects(request, for_coordinator=False, forFrameView=False)
 
         projects = self.get_projects(request, for_coordinator=False, forFrameView=False)
         return Response(projects.data)
 
+    def stream_projects(self, request, for_coordinator=False, forFrameView=False):
+        """
+        Utility function to stream a page of the filtered projects with the same JSON as get_projects.
+
+        Only counting the projects and the page links happens in the view, the projects are read
+        and serialized in chunks while the response is sent, with the async ORM between the chunks.
+
+            Parameters
+            ----------
+
+            request : HttpRequest
+            request object
+
+            for_coordinator : Bool
+            Paramter stating if the projects are needed for coordinator
+
+            forFrameView : Bool
+            Paramter to identify if projects being returned should have frame view finances.
+
+            Returns
+            -------
+
+            StreamingHttpResponse
+        """
+        queryset = self.filter_queryset(
+            self.get_queryset(for_coordinator=for_coordinator)
+        )
+
+        financeYear = request.query_params.get("year", None)
+        limit = request.query_params.get("limit", None)
+        if limit is None:
+            querySetCount = queryset.count()
+            limit = querySetCount if querySetCount > 0 else 1
+
+        if financeYear is not None and not financeYear.isnumeric():
+            logger.error(f"{request.user.id}: Invalid financeYear provided: {financeYear}")
+            raise ParseError(detail={f"{request.user.id}: limit": "Invalid value"}, code="invalid")
+
+        # the page of PageNumberPagination, without reading its projects
+        paginator = PageNumberPagination()
+        paginator.page_size = limit
+        paginator.request = request
+        django_paginator = paginator.django_paginator_class(queryset, limit)
+        page_number = request.query_params.get(paginator.page_query_param, 1)
+        if page_number in paginator.last_page_strings:
+            page_number = django_paginator.num_pages
+        try:
+            paginator.page = django_paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(
+                paginator.invalid_page_message.format(page_number=page_number, message=str(exc))
+            )
+
+        year = date.today().year if financeYear == None else int(financeYear)
+        # the links are the same as in the buffered list, without ?stream=true
+        next_link = paginator.get_next_link()
+        previous_link = paginator.get_previous_link()
+        header = fast_json_dumps(
+            {
+                "count": django_paginator.count,
+                "next": remove_query_param(next_link, "stream") if next_link else None,
+                "previous": remove_query_param(previous_link, "stream") if previous_link else None,
+            }
+        )
+
+        async def stream():
+            yield header[:-1] + b',"results":'
+            async for chunk in generate_streaming_response(
+                queryset,
+                ProjectGetSerializer,
+                request.user.id,
+                request.path,
+                chunk_size=500,
+                serializer_context={
+                    "finance_year": financeYear,
+                    "for_coordinator": for_coordinator,
+                    "forcedToFrame": forFrameView,
+                },
+                chunk_context_loader=partial(
+                    load_project_chunk_context,
+                    year=year,
+                    for_frame_view=forFrameView,
+                    finances=self._is_field_requested("finances"),
+                    sap_values=self._is_field_requested("currentYearsSapValues"),
+                ),
+                pk_queryset=paginator.page.object_list.prefetch_related(None).values_list(
+                    "pk", flat=True
+                ),
+                item_encoder=fast_json_dumps,
+                serializer_kwargs=self._get_field_selection(),
+            ):
+                yield chunk
+            yield b"}"
+
+        return StreamingHttpResponse(stream(), content_type="application/json")
+
     @action(
         methods=["get"],
         detail=False,
@@ -920,66 +1134,266 @@ class ProjectViewSet(BaseViewSet):
         )
         return Response(projects.data)
 
+    def stream_export(self, request, for_coordinator=False, forFrameView=False):
+        """
+        Utility function to stream the filtered projects and their class and location sums as a file
+
+            Parameters
+            ----------
+
+            request : HttpRequest
+            request object
+
+            for_coordinator : Bool
+            Paramter stating if the projects are exported for coordinator
+
+            forFrameView : Bool
+            Paramter to identify if the exported finances should be frame view finances.
+
+            Returns
+            -------
+
+            StreamingHttpResponse
+        """
+        exportFormat = request.query_params.get("exportFormat", "csv")
+        if exportFormat not in ProjectExportService.CONTENT_TYPES:
+            raise ParseError(
+                detail={"exportFormat": "Value must be one of csv, ndjson, xlsx"},
+                code="invalid",
+            )
+        financeYear = request.query_params.get("year", None)
+        if financeYear is not None and not financeYear.isnumeric():
+            raise ParseError(detail={"year": "Invalid value"}, code="invalid")
+        year = date.today().year if financeYear is None else int(financeYear)
+
+        queryset = self.filter_queryset(
+            self.get_queryset(for_coordinator=for_coordinator)
+        )
+        service = ProjectExportService(
+            year=year, for_coordinator=for_coordinator, for_frame_view=forFrameView
+        )
+        # projects are read and written in chunks while the response is sent
+        response = StreamingHttpResponse(
+            iterate_in_thread(service.stream(queryset, exportFormat)),
+            content_type=ProjectExportService.CONTENT_TYPES[exportFormat],
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{service.get_filename(exportFormat)}"'
+        )
+        response["Access-Control-Expose-Headers"] = "Content-Disposition"
+        return response
+
+    @action(
+        methods=["get"],
+        detail=False,
+        url_path=r"export",
+        name="export_projects",
+    )
+    def export_projects(self, request):
+        """
+        Custom action to export the planning view projects with their finances for 11 years,
+        followed by the financial sums of their classes and locations.\n
+        All search result url query paramters can be used to filter projects here.
+
+            URL Query Parameters
+            ----------
+
+            exportFormat (optional) : String
+
+            Format of the export, one of csv, ndjson or xlsx. Defaults to csv.
+
+            year (optional) : Int
+
+            First year of the exported finances. Defaults to the current year.
+
+            Usage
+            ----------
+
+            projects/export/?exportFormat=<format>&year=<year>
+
+            Returns
+            -------
+
+            File
+                Project rows followed by class and location rows.
+        """
+        return self.stream_export(request, for_coordinator=False, forFrameView=False)
+
+    @action(
+        methods=["get"],
+        detail=False,
+        url_path=r"coordinator/export",
+        name="export_projects_for_coordinator",
+    )
+    def export_projects_for_coordinator(self, request):
+        """
+        Custom action to export the coordinator view projects with their finances for 11 years,
+        followed by the financial sums of their coordinator classes and locations.\n
+        All search result url query paramters can be used to filter projects here.
+
+            URL Query Parameters
+            ----------
+
+            exportFormat (optional) : String
+
+            Format of the export, one of csv, ndjson or xlsx. Defaults to csv.
+
+            year (optional) : Int
+
+            First year of the exported finances. Defaults to the current year.
+
+            forcedToFrame (optional) : Bool
+
+            Query parameter to state if the exported finances should be frame view finances.
+            Defaults to False.
+
+            Usage
+            ----------
+
+            projects/coordinator/export/?exportFormat=<format>&year=<year>&forcedToFrame=<bool>
+
+            Returns
+            -------
+
+            File
+                Project rows followed by coordinator class and location rows.
+        """
+        forcedToFrame = request.query_params.get("forcedToFrame", False)
+        if forcedToFrame in ["False", "false"]:
+            forcedToFrame = False
+
+        if forcedToFrame in ["true", "True"]:
+            forcedToFrame = True
+
+        if forcedToFrame not in [True, False]:
+            raise ParseError(
+                detail={"forcedToFrame": "Value must be a boolean"}, code="invalid"
+            )
+
+        return self.stream_export(
+            request, for_coordinator=True, forFrameView=forcedToFrame
+        )
+
+    @action(
+        methods=["get"],
+        detail=False,
+        url_path=r"planning-snapshot",
+        name="get_planning_snapshot",
+    )
+    def get_planning_snapshot(self, request):
+        """
+        Custom action to get the whole planning view of a year in one document: the classes,
+        locations and groups with their financial sums, and the programmed projects with their finances.\n
+        The document is kept up to date in the cache and sent brotli or gzip-compressed when the client accepts it.
+
+            URL Query Parameters
+            ----------
+
+            year (optional) : Int
+
+            First year of the finances. Defaults to the current year.
+
+            forcedToFrame (optional) : Bool
+
+            Query parameter to state if the finances should be frame view finances.
+            Defaults to False.
+
+            Usage
+            ----------
+
+            projects/planning-snapshot/?year=<year>&forcedToFrame=<bool>
+
+            Returns
+            -------
+
+            JSON
+                {"year", "forcedToFrame", "version", "classes", "locations", "groups", "projects"}
+        """
+        financeYear = request.query_params.get("year", None)
+        if financeYear is not None and not financeYear.isnumeric():
+            raise ParseError(detail={"year": "Invalid value"}, code="invalid")
+        year = date.today().year if financeYear is None else int(financeYear)
+
+        forcedToFrame = request.query_params.get("forcedToFrame", False)
+        if forcedToFrame in ["False", "false"]:
+            forcedToFrame = False
+        if forcedToFrame in ["true", "True"]:
+            forcedToFrame = True
+        if forcedToFrame not in [True, False]:
+            raise ParseError(
+                detail={"forcedToFrame": "Value must be a boolean"}, code="invalid"
+            )
+
+        # project area planners only see their own classes, the same as in ProjectClassViewSet
+        project_area_planner = request.user.groups.filter(
+            name="project_area_planners"
+        ).exists()
+
+        snapshot = PlanningSnapshotService(
+            year=year,
+            for_frame_view=forcedToFrame,
+            project_area_planner=project_area_planner,
+        ).get()
+
+        # the stored compressed bodies are sent as they are, a snapshot stored without brotli has only gzip
+        bodies = {
+            CompressionService.BROTLI: snapshot.get("body_br"),
+            CompressionService.GZIP: snapshot["body_gz"],
+        }
+        encoding = CompressionService.negotiate(
+            request.headers.get("Accept-Encoding"),
+            encodings=[encoding for encoding, body in bodies.items() if body is not None],
+        )
+
+        if request.headers.get("If-None-Match") and not _if_none_match_passes(
+            request, snapshot["etag"]
+        ):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        elif encoding is not None:
+            response = HttpResponse(bodies[encoding], content_type="application/json")
+            response["Content-Encoding"] = encoding
+        else:
+            response = HttpResponse(
+                gzip.decompress(snapshot["body_gz"]), content_type="application/json"
+            )
+        response["ETag"] = snapshot["etag"]
+        response["Vary"] = "Accept-Encoding"
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
     @override
     def get_queryset(self, for_coordinator=False):
         """
         Overriden the default get_queryset method to apply filtering by URL query params.\n
         Provided url query params filter out the queryset before returning it.
         """
-        qs = None
         year = int(self.request.query_params.get("year", date.today().year))
+        # only the related objects of the requested fields are loaded with the projects
+        related_fields = self._get_related_fields(for_coordinator=for_coordinator)
+
+        def related_paths(relations: dict) -> list:
+            return [
+                path
+                for field_name, paths in relations.items()
+                if related_fields is None or field_name in related_fields
+                for path in paths
+            ]
+
+        select_related = related_paths(self.PROJECT_SELECT_RELATED)
         if for_coordinator == True:
             # add select_related to the queryset to get in the same db query projectClass and projectLocation
-            qs = (
-                super()
-                .get_queryset()
-                .select_related(
-                    "projectClass",
-                    "projectLocation",
-                    "lock",
-                    "phase",
-                    "category",
-                    "personPlanning",
-                    "personConstruction",
-                    "personProgramming",
-                    "personConstruction",
-                    "budgetOverrunReason",
-                    "projectClass__coordinatorClass",
-                    "projectLocation__coordinatorLocation",
-                    "projectClass__parent__coordinatorClass",
-                    "projectLocation__parent__coordinatorLocation",
-                    "projectLocation__parent__parent__coordinatorLocation",
-                )
-                .prefetch_related(
-                    "favPersons",
-                    "hashTags",
-                    "finances",  # Prefetch finances to prevent N+1 queries if accessed
-                )
-                .filter(
-                    Q(projectClass__isnull=False) | Q(projectLocation__isnull=False)
-                )
-            )
-        else:
-            qs = (
-                super()
-                .get_queryset()
-                .select_related(
-                    "projectClass",
-                    "projectLocation",
-                    "lock",
-                    "phase",
-                    "category",
-                    "personPlanning",
-                    "personConstruction",
-                    "personProgramming",
-                    "personConstruction",
-                    "budgetOverrunReason",
-                )
-                .prefetch_related(
-                    "favPersons",
-                    "hashTags",
-                    "finances",  # Prefetch finances to prevent N+1 queries if accessed
-                )
+            select_related += related_paths(self.COORDINATOR_SELECT_RELATED)
+        prefetch_related = related_paths(self.PROJECT_PREFETCH_RELATED)
+
+        qs = super().get_queryset()
+        # select_related() without fields would follow every foreign key
+        if select_related:
+            qs = qs.select_related(*select_related)
+        if prefetch_related:
+            qs = qs.prefetch_related(*prefetch_related)
+        if for_coordinator == True:
+            qs = qs.filter(
+                Q(projectClass__isnull=False) | Q(projectLocation__isnull=False)
             )
         masterClass = self.request.query_params.getlist("masterClass", [])
         _class = self.request.query_params.getlist("class", [])
@@ -1254,6 +1668,9 @@ class ProjectViewSet(BaseViewSet):
             for batch in batch_process(update_project_finances, bulk_size):
                 ProjectFinancial.objects.bulk_update(batch, ['value'])
 
+        # the bulk writes above skip the signals keeping the finance years of the projects
+        ProjectFinancialService.update_finance_years()
+
         new_class_finances, update_class_finances = self.update_forced_to_frame_classes()
 
         # Bulk create new ClassFinancial entries
@@ -1274,11 +1691,20 @@ class ProjectViewSet(BaseViewSet):
             for batch in batch_process(update_location_finances, bulk_size):
                 LocationFinancial.objects.bulk_update(batch, ['frameBudget', 'budgetChange'])
 
-        current_year = date.today().year
-        for year_offset in range(-2, 13):
-            year = current_year + year_offset
-            CacheService.invalidate_frame_budgets(year=year)
-        CacheService.clear_all()
+        def invalidate_caches():
+            current_year = date.today().year
+            for year_offset in range(-2, 13):
+                year = current_year + year_offset
+                CacheService.invalidate_frame_budgets(year=year)
+            CacheService.clear_all()
+            # The bulk writes above skip signals, clear_all may be skipped when the cache is degraded
+            CacheService.bump_data_version()
+            CacheService.mark_planning_snapshot_dirty()
+
+        # on commit, a read between the clear and the commit would cache the old data again
+        transaction.on_commit(invalidate_caches)
+        # the cache was emptied, rebuild the most read entries before the users read them
+        transaction.on_commit(CacheWarmupService.start_in_background)
 
         forced_to_frame_data_updated, _ = AppStateValueService.update_or_create(name="forcedToFrameDataUpdated", value=True)
 
@@ -1575,8 +2001,8 @@ class ProjectViewSet(BaseViewSet):
         if not user_in_restricted_programmer_group(request):
             return None
 
-        assigned_paths = get_restricted_user_assigned_class_paths(request.user)
-        if not assigned_paths:
+        class_access = get_restricted_user_class_access(request.user)
+        if not class_access:
             return Response(
                 data={
                     "message": (
@@ -1587,25 +2013,15 @@ class ProjectViewSet(BaseViewSet):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        unauthorized_ids = []
-        projects = (
-            Project.objects.filter(id__in=project_ids)
-            .select_related("projectClass")
-            .only("id", "projectClass__path")
-        )
-        found_ids = set()
-        for project in projects:
-            found_ids.add(str(project.id))
-            class_path = (
-                project.projectClass.path if project.projectClass else None
-            )
-            if not target_path_matches_assigned_paths(class_path, assigned_paths):
-                unauthorized_ids.append(str(project.id))
-
-        # Treat unknown ids the same as out-of-class — deny by default.
-        missing_ids = [pid for pid in project_ids if pid not in found_ids]
-        if missing_ids:
-            unauthorized_ids.extend(missing_ids)
+        # Only the projects in the assigned classes are read, the rest are denied
+        allowed_ids = {
+            str(project_id)
+            for project_id in Project.objects.filter(
+                class_access.as_q("projectClass__path"), id__in=project_ids
+            ).values_list("id", flat=True)
+        }
+        # Unknown ids are treated the same as out-of-class — deny by default.
+        unauthorized_ids = [pid for pid in project_ids if pid not in allowed_ids]
 
         if unauthorized_ids:
             return Response(
@@ -1741,7 +2157,7 @@ class ProjectViewSet(BaseViewSet):
                 return qs.filter(projectClass__coordinatorClass__in=ids)
             return qs.filter(projectClass__in=ids)
 
-    def _filter_projects_by_programming_year(self, qs, prYearMin, prYearMax):
+    def _filter_projects_by_programming_year(self, qs, prYearMin, prYearMax, for_frame_view=False):
         """
         Utility function to filter Project Queryset by financial years.\n
 
@@ -1758,12 +2174,22 @@ class ProjectViewSet(BaseViewSet):
 
             Used to filter for projects with financials before prYearMax and financials value > 0.
 
+            for_frame_view : bool
+
+            Filter by the frame view finances instead of the planning finances. Defaults to False.
+
             Returns
             -------
 
             Queryset
                 Filtered Project Queryset
         """
+        # first and last years with a nonzero value, see ProjectFinancialService.update_finance_years
+        first_year, last_year = (
+            ("frameFinancesFirstYear", "frameFinancesLastYear")
+            if for_frame_view
+            else ("financesFirstYear", "financesLastYear")
+        )
 
         if prYearMin is not None and prYearMax is not None:
             if not prYearMax.isnumeric():
@@ -1779,42 +2205,37 @@ class ProjectViewSet(BaseViewSet):
                     code="prYearMin_gt_prYearMax",
                 )
 
-            financialProjectIds = (
-                ProjectFinancialService.find_by_min_value_and_year_range(
-                    min_value=0, year_range=range(prYearMin, prYearMax + 1)
-                )
-                .values_list("project", flat=True)
-                .distinct()
+            year_range = (prYearMin, prYearMax)
+            # finances spanning over the whole range may have no value within it, only those
+            # projects are checked from the finances
+            spans_range_with_value = Q(
+                Exists(
+                    ProjectFinancialService.find_by_min_value_and_year_range(
+                        min_value=0,
+                        year_range=range(prYearMin, prYearMax + 1),
+                        for_frame_view=for_frame_view,
+                    ).filter(project=OuterRef("pk"))
+                ),
+                **{f"{first_year}__lt": prYearMin, f"{last_year}__gt": prYearMax},
+            )
+            qs = qs.filter(
+                Q(**{f"{first_year}__range": year_range})
+                | Q(**{f"{last_year}__range": year_range})
+                | spans_range_with_value,
+                programmed=True,
             )
-            qs = qs.filter(Q(id__in=financialProjectIds) & Q(programmed=True))
 
         elif prYearMin is not None:
             if not prYearMin.isnumeric():
                 raise ParseError(detail={"prYearMin": "Invalid value"}, code="invalid")
 
-            prYearMin = int(prYearMin)
-            financialProjectIds = (
-                ProjectFinancialService.find_by_min_value_and_min_year(
-                    min_value=0, min_year=prYearMin
-                )
-                .values_list("project", flat=True)
-                .distinct()
-            )
-            qs = qs.filter(Q(id__in=financialProjectIds) & Q(programmed=True))
+            qs = qs.filter(**{f"{last_year}__gte": int(prYearMin)}, programmed=True)
 
         elif prYearMax is not None:
             if not prYearMax.isnumeric():
                 raise ParseError(detail={"prYearMax": "Invalid value"}, code="invalid")
-            prYearMax = int(prYearMax)
 
-            financialProjectIds = (
-                ProjectFinancialService.find_by_min_value_and_max_year(
-                    min_value=0, max_year=prYearMax
-                )
-                .values_list("project", flat=True)
-                .distinct()
-            )
-            qs = qs.filter(Q(id__in=financialProjectIds) & Q(programmed=True))
+            qs = qs.filter(**{f"{first_year}__lte": int(prYearMax)}, programmed=True)
 
         return qs
 
@@ -1,7 +1,8 @@
 import uuid
 import logging
+from datetime import date
 
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
@@ -14,10 +15,19 @@ from .BaseViewSet import BaseViewSet
 from infraohjelmointi_api.models import TalpaProjectOpening
 from infraohjelmointi_api.serializers import TalpaProjectOpeningSerializer
 from infraohjelmointi_api.services import TalpaExcelService
+from .utils import iterate_in_thread
 
 logger = logging.getLogger("infraohjelmointi_api")
 
-TALPA_GET_ACTIONS = ["get_by_project", "get_priorities", "get_subjects", "download_excel"]
+TALPA_GET_ACTIONS = [
+    "get_by_project",
+    "get_priorities",
+    "get_subjects",
+    "download_excel",
+    "download_excel_bulk",
+]
+
+EXCEL_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
 
 class TalpaProjectOpeningViewSet(BaseViewSet):
@@ -149,8 +159,49 @@ class TalpaProjectOpeningViewSet(BaseViewSet):
 
         response = HttpResponse(
             service.generate_excel(instance).getvalue(),
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            content_type=EXCEL_CONTENT_TYPE,
         )
         response["Content-Disposition"] = f'attachment; filename="{service.get_filename(instance)}"'
         response["Access-Control-Expose-Headers"] = "Content-Disposition"
         return response
+
+    @swagger_auto_schema(
+        operation_description="Download one Excel of Talpa openings for Talpa submission. "
+        + "Statuses of the openings are not changed.",
+        manual_parameters=[
+            openapi.Parameter("status", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Status, can be repeated"),
+            openapi.Parameter("budgetAccount", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Budget account number prefix, e.g. 8 03"),
+            openapi.Parameter("createdFrom", openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+            openapi.Parameter("createdTo", openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+        ],
+        responses={200: openapi.Response(description="Excel file"), 400: "Invalid date"},
+    )
+    @action(methods=["get"], detail=False, url_path=r"bulk-download-excel")
+    def download_excel_bulk(self, request):
+        queryset = self.get_queryset().order_by("createdDate")
+        statuses = request.query_params.getlist("status", [])
+        budget_account = request.query_params.get("budgetAccount", None)
+        if statuses:
+            queryset = queryset.filter(status__in=statuses)
+        if budget_account:
+            queryset = queryset.filter(budgetAccount__startswith=budget_account)
+        for param, lookup in [("createdFrom", "createdDate__date__gte"), ("createdTo", "createdDate__date__lte")]:
+            if param not in request.query_params:
+                continue
+            try:
+                queryset = queryset.filter(**{lookup: date.fromisoformat(request.query_params[param])})
+            except ValueError:
+                return Response(
+                    {"detail": f"Invalid date format in '{param}', expected YYYY-MM-DD."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        service = TalpaExcelService()
+        # openings are read in chunks while the excel is written, not all at once
+        response = StreamingHttpResponse(
+            iterate_in_thread(service.stream_batch_excel(queryset.iterator(chunk_size=500))),
+            content_type=EXCEL_CONTENT_TYPE,
+        )
+        response["Content-Disposition"] = f'attachment; filename="{service.get_batch_filename()}"'
+        response["Access-Control-Expose-Headers"] = "Content-Disposition"
+        return response
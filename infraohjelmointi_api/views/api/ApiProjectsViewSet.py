@@ -1,18 +1,16 @@
 import json
-from collections import defaultdict
 from datetime import date
 from ..BaseViewSet import BaseViewSet
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
-from infraohjelmointi_api.models import (
-    Project, ProjectFinancial
-)
-from infraohjelmointi_api.serializers import (
-    ProjectGetSerializer, ProjectFinancialSerializer
-)
+from rest_framework.renderers import BrowsableAPIRenderer
+from infraohjelmointi_api.renderers import FastJSONRenderer
+from infraohjelmointi_api.models import Project
+from infraohjelmointi_api.serializers import ProjectGetSerializer
 import uuid
 from django.http import StreamingHttpResponse
 from .utils import generate_response, generate_streaming_response, send_logger_api_generate_data_start
+from ..utils import load_project_chunk_context
 
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
@@ -34,21 +32,34 @@ class ApiProjectsViewSet(BaseViewSet):
 
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
 
     queryset = (
         Project.objects.all()
         .select_related(
-            "projectClass",
-            "projectLocation",
-            "lock",
+            "projectSet",
+            "siteId",
+            "area",
+            "type",
+            "typeQualifier",
+            "priority",
             "phase",
-            "category",
             "personPlanning",
-            "personConstruction",
             "personProgramming",
             "personConstruction",
+            "category",
+            "constructionPhaseDetail",
+            "constructionProcurementMethod",
+            "staraProcurementReason",
+            "riskAssessment",
+            "constructionPhase",
+            "planningPhase",
+            "projectQualityLevel",
+            "responsibleZone",
+            "budgetOverrunReason",
+            "lock",
         )
-        .prefetch_related("favPersons", "hashTags", "finances")
+        .prefetch_related("favPersons", "hashTags", "otherPersons")
     )
 
     serializer_class = ProjectGetSerializer
@@ -98,36 +109,23 @@ class ApiProjectsViewSet(BaseViewSet):
                 queryset = queryset.filter(projectClass__id=uuid.UUID(project_class_id))
             except Exception:
                 return StreamingHttpResponse(json.dumps({"error":"Invalid UUID"}),status=400, content_type = "application/json")
-        else:
-            queryset = Project.objects.all()
-        self.queryset = queryset
-
-        year = date.today().year
-        finances = ProjectFinancialSerializer(
-            ProjectFinancial.objects.filter(
-                year__in=range(year, year + 11),
-                forFrameView=False,
-            ),
-            many=True,
-            context={"discard_FK": False}
-        ).data
-
-        projects_to_finances = defaultdict(list)
-        for f in finances:
-            projects_to_finances[f["project"]].append(f)
-
-        serializer_context = {
-            "projects_to_finances": projects_to_finances
-        }
 
         return StreamingHttpResponse(
             generate_streaming_response(
-                self.queryset,
+                queryset,
                 self.serializer_class,
                 request.user.id,
                 path,
                 chunk_size=500,
-                serializer_context=serializer_context
+                chunk_context_loader=self.load_chunk_context,
             ),
             content_type="application/json",
         )
+
+    @staticmethod
+    async def load_chunk_context(project_ids) -> dict:
+        """
+        Loads the finances and current year SAP values for only the given projects,
+        used as serializer context for one streamed chunk.
+        """
+        return await load_project_chunk_context(project_ids, year=date.today().year)
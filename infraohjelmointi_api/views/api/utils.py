@@ -1,3 +1,4 @@
+import inspect
 import json
 import logging
 import time
@@ -10,61 +11,95 @@ from asgiref.sync import sync_to_async
 
 logger = logging.getLogger("infraohjelmointi_api")
 
+# Shared encoder for the streamed items, json.dumps(default=...) would build a new one per call
+_stream_item_encoder = json.JSONEncoder(default=str)
+
 
 async def generate_streaming_response(
-    queryset, serializer_class, user_id, endpoint, chunk_size=1000, serializer_context={}
-) -> AsyncGenerator[str, None]:
+    queryset,
+    serializer_class,
+    user_id,
+    endpoint,
+    chunk_size=1000,
+    serializer_context={},
+    chunk_context_loader=None,
+    pk_queryset=None,
+    item_encoder=_stream_item_encoder.encode,
+    serializer_kwargs=None,
+) -> AsyncGenerator[bytes, None]:
     """
     Generates a streaming response for a given queryset using the provided serializer with chunking.
 
+    Primary keys are read from the queryset chunk_size at a time. Each chunk is then hydrated
+    with the queryset's own select_related/prefetch_related plan and its context is loaded with
+    the async ORM, and only the serialization runs in a thread, so the worker thread is free
+    between the queries of concurrent requests. The number of queries per chunk stays constant
+    and memory use is bounded by the chunk size.
+
     Args:
         queryset: The Django queryset to serialize.
         serializer_class: The Django REST Framework serializer class to use.
         user_id: The id for the request user.
         endpoint: The name for the endpoint that will be used on logging.
-        chunk_size: The number of serialized items to include in each chunk.
+        chunk_size: The number of items fetched, serialized and yielded at a time.
         serializer_context: Context that will be passed to the serializer.
+        chunk_context_loader: Optional callable, sync or async, receiving the list of primary keys
+            in a chunk and returning extra serializer context (e.g. finances) for only those instances.
+        pk_queryset: Optional primary keys to stream instead of all of the queryset, e.g. a page.
+        item_encoder: Callable encoding one serialized item to str or bytes.
+        serializer_kwargs: Extra keyword arguments of the serializer, e.g. a sparse field selection.
 
     Yields:
-        str: A chunk of the JSON response.
+        bytes: A chunk of the JSON response.
+
+    Raises:
+        Exception: An error while reading or serializing is logged and raised again, the response
+            is aborted instead of ending with an incomplete document.
     """
-    serializer = serializer_class(many=False, context=serializer_context)
-    async_to_representation = sync_to_async(serializer.to_representation, thread_sensitive=True)
+    serialize_chunk = sync_to_async(
+        _serialize_chunk, thread_sensitive=True
+    )
 
     start = time.time()
-    yield "["
+    yield b"["
     first = True
-    item_buffer = []
-    item_index = 0
+    pk_buffer = []
 
     try:
-        async for item in queryset:
-            item_index += 1
-
-            try:
-                serialized_data = await async_to_representation(item)
-
-                json_string = json.dumps(serialized_data, default=str)
-                item_buffer.append(json_string)
-
-                if len(item_buffer) >= chunk_size:
-                    yield ("," if not first else "") + ",".join(item_buffer)
-                    item_buffer = []
+        if pk_queryset is None:
+            pk_queryset = queryset.prefetch_related(None).values_list("pk", flat=True)
+        async for pk in pk_queryset.aiterator(chunk_size=chunk_size):
+            pk_buffer.append(pk)
+
+            if len(pk_buffer) >= chunk_size:
+                instances, context = await _load_chunk(
+                    queryset, pk_buffer, serializer_context, chunk_context_loader
+                )
+                chunk = await serialize_chunk(
+                    instances, pk_buffer, serializer_class, context, endpoint, item_encoder, serializer_kwargs,
+                )
+                pk_buffer = []
+                if chunk:
+                    yield (b"," if not first else b"") + chunk
                     first = False
 
-            except Exception as item_error:
-                item_id = getattr(item, 'id', 'N/A')
-                logger.error(f"Error serializing item {item_index} (ID: {item_id}) in endpoint {endpoint}: {item_error}", exc_info=True)
-
-                raise item_error
-
-        if item_buffer:
-            yield ("," if not first else "") + ",".join(item_buffer)
+        if pk_buffer:
+            instances, context = await _load_chunk(
+                queryset, pk_buffer, serializer_context, chunk_context_loader
+            )
+            chunk = await serialize_chunk(
+                instances, pk_buffer, serializer_class, context, endpoint, item_encoder, serializer_kwargs,
+            )
+            if chunk:
+                yield (b"," if not first else b"") + chunk
 
-        yield "]"
+        yield b"]"
 
     except Exception as outer_error:
         logger.error(f"Error during queryset iteration for endpoint {endpoint}: {outer_error}", exc_info=True)
+        # the status has already been sent, aborting the response is the only way to tell the
+        # client that the document is incomplete
+        raise
 
     finally:
         end = time.time()
@@ -75,6 +110,56 @@ async def generate_streaming_response(
         )
 
 
+async def _load_chunk(queryset, pks, serializer_context, chunk_context_loader) -> tuple:
+    """
+    Loads the instances for the given primary keys using the queryset's related object plan,
+    and the serializer context of the chunk, with the async ORM.
+    """
+    # the rows and their prefetches are read in one go
+    instances = {instance.pk: instance async for instance in queryset.filter(pk__in=pks)}
+
+    context = dict(serializer_context)
+    if chunk_context_loader is not None:
+        if inspect.iscoroutinefunction(chunk_context_loader):
+            context.update(await chunk_context_loader(pks))
+        else:
+            context.update(
+                await sync_to_async(chunk_context_loader, thread_sensitive=True)(pks)
+            )
+    return instances, context
+
+
+def _serialize_chunk(
+    instances,
+    pks,
+    serializer_class,
+    serializer_context,
+    endpoint,
+    item_encoder=_stream_item_encoder.encode,
+    serializer_kwargs=None,
+) -> bytes:
+    """
+    Serializes the loaded instances in the order the keys were read.
+    """
+    serializer = serializer_class(many=False, context=serializer_context, **(serializer_kwargs or {}))
+
+    item_buffer = []
+    for item_index, pk in enumerate(pks, start=1):
+        item = instances.get(pk)
+        # Row was deleted between reading the keys and hydrating the chunk
+        if item is None:
+            continue
+        try:
+            encoded = item_encoder(serializer.to_representation(item))
+            item_buffer.append(encoded if isinstance(encoded, bytes) else encoded.encode("utf-8"))
+        except Exception as item_error:
+            logger.error(f"Error serializing item {item_index} (ID: {pk}) in endpoint {endpoint}: {item_error}", exc_info=True)
+
+            raise item_error
+
+    return b",".join(item_buffer)
+
+
 def generate_response(self, user_id, pk, endpoint):
     """
     Generates a serialized response.
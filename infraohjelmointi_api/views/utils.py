@@ -0,0 +1,238 @@
+import datetime
+import hashlib
+from collections import defaultdict
+from datetime import date
+from functools import wraps
+from typing import AsyncGenerator, Iterator
+
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.response import Response
+
+from infraohjelmointi_api.models import ProjectFinancial, SapCurrentYear
+from infraohjelmointi_api.renderers import fast_json_dumps
+from infraohjelmointi_api.serializers import ProjectFinancialSerializer
+from infraohjelmointi_api.services.CacheService import CacheService
+
+from .api.utils import generate_streaming_response
+
+
+def build_data_version_etag(request):
+    """
+    Builds a strong ETag for a hierarchy/finance list request from the data versions.
+
+    The response covers the finances of the requested year and the 10 following years,
+    so the ETag combines the versions of those years with the hierarchy version, the
+    full request path and the user (responses are filtered by role).
+
+    Returns None when no ETag can be given, e.g. when the cache is unavailable.
+    """
+    try:
+        year = int(request.query_params.get("year", date.today().year))
+    except (TypeError, ValueError):
+        return None
+
+    versions = CacheService.get_data_versions(years=list(range(year, year + 11)))
+    if versions is None:
+        return None
+
+    etag_source = "|".join(
+        [request.get_full_path(), str(request.user.pk)]
+        + ["{}={}".format(key, value) for key, value in versions.items()]
+    )
+    return '"{}"'.format(hashlib.sha256(etag_source.encode()).hexdigest()[:32])
+
+
+def _if_none_match_passes(request, etag):
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return True
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    client_etags = [tag.removeprefix("W/") for tag in parse_etags(if_none_match)]
+    return "*" not in client_etags and etag not in client_etags
+
+
+def data_version_etag(view_func):
+    """
+    Decorator for hierarchy and finance list actions to support conditional GET.
+
+    Responses get an ETag built from the data versions, and a request with a matching
+    If-None-Match header is answered with 304 Not Modified before the queryset or
+    serializer is touched.
+
+    Usage
+    ----------
+
+    @data_version_etag
+    def list(self, request, *args, **kwargs):
+    """
+
+    @wraps(view_func)
+    def inner(self, request, *args, **kwargs):
+        etag = build_data_version_etag(request)
+        if etag is not None and not _if_none_match_passes(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = view_func(self, request, *args, **kwargs)
+
+        if etag is not None and response.status_code in (
+            status.HTTP_200_OK,
+            status.HTTP_304_NOT_MODIFIED,
+        ):
+            response["ETag"] = etag
+            # Revalidate on every use, the response depends on the user
+            response["Cache-Control"] = "private, no-cache"
+        return response
+
+    return inner
+
+
+async def iterate_in_thread(iterator: Iterator[bytes]) -> AsyncGenerator[bytes, None]:
+    """
+    Yields the chunks of a synchronous iterator for a StreamingHttpResponse.
+
+    Under ASGI a StreamingHttpResponse reads a synchronous iterator into a list before
+    sending it. Here each chunk is produced in the thread of the database connection only
+    after the previous chunk has been sent, so the response is streamed with backpressure.
+    """
+    get_next = sync_to_async(next, thread_sensitive=True)
+    done = object()
+    try:
+        while (chunk := await get_next(iterator, done)) is not done:
+            yield chunk
+    finally:
+        # e.g. the client disconnected, the iterator releases its cursor and files
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await sync_to_async(close, thread_sensitive=True)()
+
+
+def is_stream_requested(request) -> bool:
+    """
+    True when the client asked for a streamed list with ?stream=true.
+
+    Streamed lists have the same JSON as the buffered ones, but the rows are read and serialized
+    in chunks while the response is sent, and the worker thread is only held for each chunk.
+    """
+    return request.query_params.get("stream", "false").lower() == "true"
+
+
+def _get_list_param(request, name: str):
+    """
+    Reads a comma separated query parameter that may also be repeated, None when not given.
+    """
+    values = request.query_params.getlist(name)
+    if not values:
+        return None
+    return [value.strip() for param in values for value in param.split(",") if value.strip()]
+
+
+def get_field_selection(request, serializer_class) -> dict:
+    """
+    Reads the sparse field selection of a request as DynamicFieldsModelSerializer arguments.
+
+    ?fields=id,name,phase limits the response to the given fields, and with any selection the
+    nested related objects are compacted to their ids unless they are listed in ?expand=phase.
+    Without either parameter an empty dict is returned and the whole representation is used.
+
+    Unknown field names are answered with 400 Bad Request.
+    """
+    fields = _get_list_param(request, "fields")
+    expand = _get_list_param(request, "expand")
+    if fields is None and expand is None:
+        return {}
+
+    available = set(serializer_class().fields)
+    expandable = set(serializer_class.get_expandable_fields())
+    errors = {}
+    unknown_fields = [field for field in fields or [] if field not in available]
+    if unknown_fields:
+        errors["fields"] = "Unknown fields: {}".format(", ".join(unknown_fields))
+    unknown_expand = [field for field in expand or [] if field not in expandable]
+    if unknown_expand:
+        errors["expand"] = "Fields that can't be expanded: {}".format(", ".join(unknown_expand))
+    if errors:
+        raise ParseError(detail=errors, code="invalid")
+
+    return {"fields": fields, "expand": expand or []}
+
+
+async def load_project_chunk_context(
+    project_ids, year: int, for_frame_view: bool = False, finances: bool = True, sap_values: bool = True
+) -> dict:
+    """
+    Loads the finances of 11 years from the given year and the current year SAP values of only
+    the given projects with the async ORM, as ProjectGetSerializer context for one streamed chunk.
+    Finances or SAP values that are not serialized can be left out with finances=False and
+    sap_values=False.
+    """
+    context = {}
+    if finances:
+        project_finances = [
+            finance
+            async for finance in ProjectFinancial.objects.filter(
+                project_id__in=project_ids,
+                year__in=range(year, year + 11),
+                forFrameView=for_frame_view,
+            )
+        ]
+        projects_to_finances = defaultdict(list)
+        for f in ProjectFinancialSerializer(project_finances, many=True, context={"discard_FK": False}).data:
+            projects_to_finances[f["project"]].append(f)
+        context["projects_to_finances"] = projects_to_finances
+
+    if sap_values:
+        projects_to_sap_values = defaultdict(list)
+        async for sap_value in SapCurrentYear.objects.filter(
+            project_id__in=project_ids, year=datetime.datetime.now().year
+        ):
+            projects_to_sap_values[sap_value.project_id].append(sap_value)
+        context["projects_to_sap_values"] = projects_to_sap_values
+
+    return context
+
+
+# Hierarchy nodes are few but each one aggregates its projects, small chunks keep the thread hops short
+HIERARCHY_STREAM_CHUNK_SIZE = 50
+
+
+def hierarchy_sums_response(request, queryset, serializer_class, context: dict):
+    """
+    Responds with the serialized classes, locations or groups and their financial sums.
+
+    With ?stream=true the same JSON is streamed a chunk at a time. The cached sums of a chunk
+    are read with one async multi-get and the nodes are loaded with the async ORM, only the
+    serialization of the chunk holds the worker thread.
+    """
+    if not is_stream_requested(request):
+        return Response(serializer_class(queryset, many=True, context=context).data)
+
+    instance_type = serializer_class.Meta.model.__name__
+
+    async def load_cached_sums(instance_ids) -> dict:
+        return {
+            "financial_sums": await CacheService.aget_financial_sums(
+                instance_ids,
+                instance_type,
+                year=int(context.get("finance_year", date.today().year)),
+                for_frame_view=context.get("forcedToFrame", False),
+                for_coordinator=context.get("for_coordinator", False),
+            )
+        }
+
+    return StreamingHttpResponse(
+        generate_streaming_response(
+            queryset,
+            serializer_class,
+            request.user.id,
+            request.path,
+            chunk_size=HIERARCHY_STREAM_CHUNK_SIZE,
+            serializer_context=context,
+            chunk_context_loader=load_cached_sums,
+            item_encoder=fast_json_dumps,
+        ),
+        content_type="application/json",
+    )
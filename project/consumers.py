@@ -1,14 +1,23 @@
-from django_eventstream.consumers import EventsConsumer, Listener
+from django_eventstream.consumers import EventsConsumer
 from django_grip import GripMiddleware
 from django_eventstream.eventrequest import EventRequest
 from django_eventstream.eventstream import EventPermissionError
-from django_eventstream.utils import sse_error_response, add_default_headers
+from django_eventstream.utils import (
+    sse_error_response,
+    add_default_headers,
+    make_id,
+    sse_encode_error,
+    sse_encode_event,
+)
 from overrides import override
-from django.http import HttpResponseBadRequest
+from django.http import HttpResponse, HttpResponseBadRequest
 import asyncio
+import copy
 import six
 from channels.http import AsgiRequest
 
+from infraohjelmointi_api.services.EventStreamService import StreamListener, listener_manager
+
 import environ
 
 env = environ.Env()
@@ -81,6 +90,21 @@ class CostomEventConsumer(EventsConsumer):
         except Exception as e:
             logger.error("Error occured while setting allowed CORS", e)
 
+        # every connection holds a task and a queue, a worker only takes so many
+        if not response:
+            self.listener = StreamListener()
+            self.listener.user_id = (
+                event_request.user.pk if event_request.user else "anonymous"
+            )
+            self.listener.channels = event_request.channels
+            if not listener_manager.add_listener(self.listener):
+                self.listener = None
+                response = HttpResponse(
+                    "Too many event stream connections, try again later.\n",
+                    status=503,
+                )
+                response["Retry-After"] = "10"
+
         # if this was a grip request or we encountered an error, respond now
         if response:
             response = gm.process_response(request, response)
@@ -118,7 +142,101 @@ class CostomEventConsumer(EventsConsumer):
 
         await self.send_headers(headers=headers)
 
-        self.listener = Listener()
         self.is_streaming = True
 
         asyncio.get_event_loop().create_task(self.stream(event_request))
+
+    @override
+    async def stream(self, event_request):
+        """
+        Original method only gets the events sent in this worker, and re-reads the storage
+        whenever events arrive while it is read. Here the events come from the queue filled by
+        EventStreamService, and the ones already read from the storage are skipped.
+        """
+        try:
+            first_result = True
+            while self.is_streaming:
+                try:
+                    event_response = await self.get_events(event_request)
+                except EventPermissionError as e:
+                    body = sse_encode_error(
+                        "forbidden", str(e), extra={"channels": e.channels}
+                    )
+                    await self.send_body(body.encode("utf-8"))
+                    break
+
+                last_ids = copy.deepcopy(event_response.channel_last_ids)
+                event_id = make_id(last_ids)
+
+                body = ""
+                if first_result:
+                    first_result = False
+                    # include padding on the first result
+                    body += ":" + (" " * 2048) + "\n\n"
+                    body += "event: stream-open\ndata:\n\n"
+
+                if len(event_response.channel_reset) > 0:
+                    body += sse_encode_event(
+                        "stream-reset",
+                        {"channels": list(event_response.channel_reset)},
+                        event_id=event_id,
+                        json_encode=True,
+                    )
+
+                for channel, items in event_response.channel_items.items():
+                    for item in items:
+                        last_ids[channel] = item.id
+                        body += sse_encode_event(
+                            item.type, item.data, event_id=make_id(last_ids)
+                        )
+
+                await self.send_body(body.encode("utf-8"), more_body=True)
+
+                if len(event_response.channel_more) > 0:
+                    # read again immediately
+                    continue
+
+                # the client is caught up, wait for the queue
+                overflow = False
+                while self.is_streaming and not overflow:
+                    waiting = asyncio.ensure_future(self.listener.aevent.wait())
+                    while True:
+                        done, _ = await asyncio.wait([waiting], timeout=20)
+                        if waiting in done:
+                            break
+                        await self.send_body(
+                            b"event: keep-alive\ndata:\n\n", more_body=True
+                        )
+
+                    if not self.is_streaming:
+                        break
+
+                    events, overflow, error = listener_manager.take(self.listener)
+
+                    body = ""
+                    for event in events:
+                        if event.id is not None:
+                            last_id = last_ids.get(event.channel)
+                            if last_id is not None and int(event.id) <= int(last_id):
+                                # already sent from the storage
+                                continue
+                            last_ids[event.channel] = event.id
+                        body += sse_encode_event(
+                            event.type, event.data, event_id=make_id(last_ids) or None
+                        )
+
+                    if error:
+                        body += sse_encode_error(
+                            error["condition"], error["text"], extra=error.get("extra")
+                        )
+                        await self.send_body(body.encode("utf-8"), more_body=False)
+                        self.is_streaming = False
+                        break
+
+                    if body:
+                        await self.send_body(body.encode("utf-8"), more_body=True)
+
+                # after an overflow the dropped events are read from the storage
+                event_request.channel_last_ids = last_ids
+        finally:
+            listener_manager.remove_listener(self.listener)
@@ -0,0 +1,18 @@
+from infraohjelmointi_api.services.AuditLogService import AuditLogService
+
+
+class AuditLogMiddleware:
+    """
+    Buffers the audit log entries recorded during a request and writes them with one
+    bulk_create when the view has returned and its transactions have committed.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        AuditLogService.start_request()
+        try:
+            return self.get_response(request)
+        finally:
+            AuditLogService.write(AuditLogService.end_request())
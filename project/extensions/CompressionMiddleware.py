@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from infraohjelmointi_api.services.CompressionService import CompressionService
+
+
+class CompressionMiddleware:
+    """
+    Compresses JSON responses with brotli or gzip, negotiated from the Accept-Encoding header
+    of each request.
+
+    Responses under COMPRESSION_MIN_SIZE bytes and responses that already have a Content-Encoding
+    (e.g. the pre-compressed planning snapshot) are sent as they are. Streamed responses are
+    compressed while they are sent, see CompressionService.compress_stream. Server-sent events
+    are not JSON and are never compressed, every event has to reach the client right away.
+
+    A strong ETag is made weak as the compressed body is not byte-identical with the original,
+    the conditional GETs of the API use the weak comparison.
+    """
+
+    COMPRESSIBLE_CONTENT_TYPES = ("application/json",)
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "COMPRESSION_ENABLED", True)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.enabled or not self._is_compressible(response):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = CompressionService.negotiate(request.headers.get("Accept-Encoding"))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = CompressionService.acompress_stream(
+                    response.streaming_content, encoding
+                )
+            else:
+                response.streaming_content = CompressionService.compress_stream(
+                    response.streaming_content, encoding
+                )
+            # the length of a streamed response isn't known beforehand
+            del response["Content-Length"]
+        else:
+            if len(response.content) < CompressionService.min_size():
+                return response
+            compressed = CompressionService.compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        etag = response.headers.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    def _is_compressible(self, response) -> bool:
+        if response.has_header("Content-Encoding"):
+            return False
+        content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+        return content_type in self.COMPRESSIBLE_CONTENT_TYPES
@@ -0,0 +1,96 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from infraohjelmointi_api.services.MetricsService import MetricsService
+
+logger = logging.getLogger("infraohjelmointi_api")
+
+
+class RequestMetricsMiddleware:
+    """
+    Records wall time, SQL query count and time, CacheService hits/misses and the response size
+    for every request resolved to a view, labelled by the view name (e.g. projectClasses-list).
+
+    Requests slower than SLOW_REQUEST_THRESHOLD_MS are logged with their most repeated SQL
+    fingerprints, which is usually enough to spot an N+1 query.
+
+    Streaming responses are measured until the response object is returned, their body is
+    produced afterwards and is not included.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "REQUEST_METRICS_ENABLED", True)
+        self.slow_request_threshold = getattr(settings, "SLOW_REQUEST_THRESHOLD_MS", 1000) / 1000
+        self.slow_request_top_queries = getattr(settings, "SLOW_REQUEST_TOP_QUERIES", 5)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        stats = MetricsService.start_request()
+        start = time.perf_counter()
+        try:
+            with _record_queries():
+                response = self.get_response(request)
+        finally:
+            MetricsService.end_request()
+        duration = time.perf_counter() - start
+
+        resolver_match = getattr(request, "resolver_match", None)
+        # Static files and unknown urls don't resolve to a view, /metrics itself is left out
+        if resolver_match is None or resolver_match.view_name == "metrics":
+            return response
+
+        view = resolver_match.view_name or resolver_match._func_path
+        response_bytes = None if response.streaming else len(response.content)
+        MetricsService.observe_request(
+            view=view,
+            method=request.method,
+            status_code=response.status_code,
+            duration=duration,
+            stats=stats,
+            response_bytes=response_bytes,
+        )
+
+        if duration >= self.slow_request_threshold:
+            top_queries = "".join(
+                "\n  {}x {}".format(count, fingerprint)
+                for fingerprint, count in stats.sql_fingerprints.most_common(self.slow_request_top_queries)
+            )
+            logger.warning(
+                "Slow request {} {} ({}) took {} ms: {} SQL queries in {} ms, cache hits {} misses {}, "
+                "top queries:{}".format(
+                    request.method,
+                    request.get_full_path(),
+                    view,
+                    round(duration * 1000),
+                    stats.sql_count,
+                    round(stats.sql_seconds * 1000),
+                    stats.cache_hits,
+                    stats.cache_misses,
+                    top_queries or " none",
+                )
+            )
+
+        return response
+
+
+def _record_queries():
+    """Installs the query recording execute wrapper on every database connection."""
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(_record_query))
+    return stack
+
+
+def _record_query(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        MetricsService.record_query(sql, time.perf_counter() - start)
@@ -0,0 +1,243 @@
+"""
+PostgreSQL backend with a connection pool per worker process.
+
+Under ASGI the synchronous code of every request runs in a thread of its own, so Django's
+persistent connections (CONN_MAX_AGE) would stay with threads that are not used again.
+With this backend a connection closed at the end of a request goes back to the pool of the
+worker, and the next request, in whichever thread, takes it from there instead of opening
+a new one.
+
+Configured with the POOL dict of the database settings, see DATABASES in project/settings.py:
+    MAX_SIZE      connections the worker keeps open at most, further requests wait
+    TIMEOUT       seconds a request waits for a free connection before failing
+    MAX_LIFETIME  seconds after which a connection is closed instead of returned
+    CHECK_IDLE    seconds a connection may sit idle before it is checked with SELECT 1
+                  when taken, None to never check
+"""
+
+import threading
+import time
+from collections import deque
+from functools import partial
+from typing import Callable, Optional
+
+from django.db.backends.postgresql.base import Database
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgreSQLDatabaseWrapper
+from django.db.backends.postgresql.creation import DatabaseCreation as PostgreSQLDatabaseCreation
+
+# psycopg2 and psycopg 3 both report a session outside a transaction as 0
+TRANSACTION_STATUS_IDLE = 0
+
+
+class ConnectionPool:
+    """
+    Open connections shared by the threads of one worker process. A connection is taken
+    with getconn and given back with putconn, at most max_size are out at a time.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        timeout: float = 10.0,
+        max_lifetime: float = 1800.0,
+        check_idle: Optional[float] = 30.0,
+    ) -> None:
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_idle = check_idle
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        # (connection, opened at, returned at), the most recently returned last
+        self._idle = deque()
+        # id(connection): (connection, opened at, thread holding it)
+        self._in_use = {}
+        self.opened = 0
+        self.reused = 0
+        self.discarded = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+
+    def getconn(self, connect: Callable):
+        """Returns an idle connection, or one opened with connect if none is left"""
+        self._reclaim_orphans()
+        start = time.monotonic()
+        acquired = self._slots.acquire(timeout=self.timeout)
+        with self._lock:
+            self.wait_seconds += time.monotonic() - start
+            if not acquired:
+                self.timeouts += 1
+        if not acquired:
+            raise Database.OperationalError(
+                "No free database connection in {} s, all {} connections of the pool are in use".format(
+                    self.timeout, self.max_size
+                )
+            )
+
+        try:
+            connection, opened_at = self._take_idle()
+            if connection is None:
+                connection, opened_at = connect(), time.monotonic()
+                with self._lock:
+                    self.opened += 1
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_use[id(connection)] = (connection, opened_at, threading.current_thread())
+        return connection
+
+    def putconn(self, connection, reusable: bool = True) -> None:
+        """Gives a connection back, it is closed instead if it is not reusable or has expired"""
+        with self._lock:
+            entry = self._in_use.pop(id(connection), None)
+        if entry is None:
+            # not from this pool, or already reclaimed
+            self._discard(connection)
+            return
+        try:
+            if reusable and not self._expired(connection, entry[1], time.monotonic()):
+                with self._lock:
+                    self._idle.append((connection, entry[1], time.monotonic()))
+            else:
+                self._discard(connection)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """Closes the idle connections, the ones in use are closed when given back"""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection, _, _ in idle:
+            self._discard(connection)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "max_size": self.max_size,
+                "opened": self.opened,
+                "reused": self.reused,
+                "discarded": self.discarded,
+                "timeouts": self.timeouts,
+                "wait_seconds": self.wait_seconds,
+            }
+
+    def _take_idle(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None, None
+                connection, opened_at, returned_at = self._idle.pop()
+            now = time.monotonic()
+            stale = self.check_idle is not None and now - returned_at > self.check_idle
+            if self._expired(connection, opened_at, now) or (stale and not self._is_usable(connection)):
+                self._discard(connection)
+                continue
+            with self._lock:
+                self.reused += 1
+            return connection, opened_at
+
+    def _reclaim_orphans(self) -> None:
+        # a thread that ended without closing its connection would hold its slot for good
+        with self._lock:
+            orphans = [
+                connection
+                for connection, _, thread in self._in_use.values()
+                if not thread.is_alive()
+            ]
+        for connection in orphans:
+            self.putconn(connection, reusable=False)
+
+    def _expired(self, connection, opened_at: float, now: float) -> bool:
+        return bool(connection.closed) or now - opened_at > self.max_lifetime
+
+    @staticmethod
+    def _is_usable(connection) -> bool:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if not connection.autocommit:
+                connection.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, connection) -> None:
+        with self._lock:
+            self.discarded += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+# pools by (alias, database name), tests switch the database of an alias to the test database
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str, settings_dict: dict) -> ConnectionPool:
+    key = (alias, settings_dict["NAME"])
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            options = settings_dict.get("POOL", {})
+            pool = _pools[key] = ConnectionPool(
+                max_size=options.get("MAX_SIZE", 10),
+                timeout=options.get("TIMEOUT", 10.0),
+                max_lifetime=options.get("MAX_LIFETIME", 1800.0),
+                check_idle=options.get("CHECK_IDLE", 30.0),
+            )
+            # imported here, the backend can be loaded before the apps are ready
+            from infraohjelmointi_api.services.MetricsService import MetricsService
+
+            MetricsService.register_stats("db_pool", pool.stats, labels=(("alias", alias),))
+    return pool
+
+
+def close_pools(alias: str) -> None:
+    """Closes the idle connections of the pools of an alias"""
+    with _pools_lock:
+        pools = [pool for (pool_alias, _), pool in _pools.items() if pool_alias == alias]
+    for pool in pools:
+        pool.close()
+
+
+class DatabaseCreation(PostgreSQLDatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # idle pooled connections to the test database would keep it from being dropped
+        close_pools(self.connection.alias)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(PostgreSQLDatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    @property
+    def pool(self) -> ConnectionPool:
+        return get_pool(self.alias, self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        return self.pool.getconn(partial(super().get_new_connection, conn_params))
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # a connection closed inside atomic() stays referenced by this wrapper, it must not be shared
+        reusable = not self.in_atomic_block and self._reset(self.connection)
+        with self.wrap_database_errors:
+            self.pool.putconn(self.connection, reusable=reusable)
+
+    @staticmethod
+    def _reset(connection) -> bool:
+        """Rolls back a transaction left open, returns False if the connection is broken"""
+        try:
+            if connection.closed:
+                return False
+            if connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            return True
+        except Database.Error:
+            return False
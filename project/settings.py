@@ -53,6 +53,25 @@ env = environ.Env(
     TWISTED_MAX_LINE_LENGTH=(int, 32768),
     RESTRICTED_PROGRAMMER_AD_GROUP=(str, "sg_kymp_sso_io_rajoitetut_ohjelmoijat"),
     CACHE_TIMEOUT=(int, 43200),
+    CACHE_WARMUP_ENABLED=(bool, True),
+    CACHE_WARMUP_RATE=(float, 20.0),
+    REQUEST_METRICS_ENABLED=(bool, True),
+    COMPRESSION_ENABLED=(bool, True),
+    COMPRESSION_MIN_SIZE=(int, 1024),
+    COMPRESSION_STREAM_FLUSH_SIZE=(int, 65536),
+    SLOW_REQUEST_THRESHOLD_MS=(int, 1000),
+    METRICS_AUTH_TOKEN=(str, None),
+    CONN_MAX_AGE=(int, 0),
+    CONN_HEALTH_CHECKS=(bool, True),
+    DB_POOL_ENABLED=(bool, True),
+    DB_POOL_MAX_CONNECTIONS=(int, 20),
+    DB_POOL_TIMEOUT=(float, 10.0),
+    DB_POOL_MAX_LIFETIME=(int, 1800),
+    DB_POOL_CHECK_IDLE=(int, 30),
+    WORKERS_AMOUNT_FOR_UVICORN=(int, 1),
+    SSE_MAX_CONNECTIONS_PER_WORKER=(int, 500),
+    SSE_MAX_PENDING_EVENTS=(int, 50),
+    SSE_STREAM_LENGTH=(int, 1000),
 )
 
 # Read .env file, but environment variables take precedence
@@ -143,6 +162,10 @@ LOGOUT_REDIRECT_URL = "/"
 
 
 MIDDLEWARE = [
+    # First so that the recorded request time covers all the other middleware
+    "project.extensions.RequestMetricsMiddleware.RequestMetricsMiddleware",
+    # Next so that the response size in the metrics is the size sent
+    "project.extensions.CompressionMiddleware.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     # WhiteNoiseMiddleware should be above all and just below SecurityMiddleware
@@ -152,6 +175,8 @@ MIDDLEWARE = [
     "django.middleware.csrf.CsrfViewMiddleware",
     "simple_history.middleware.HistoryRequestMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # Audit log entries of a request are written together after its transactions
+    "project.extensions.AuditLogMiddleware.AuditLogMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django_grip.GripMiddleware",
@@ -159,6 +184,17 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "project.urls"
 
+# Per-endpoint request metrics, exposed at /metrics
+REQUEST_METRICS_ENABLED = env("REQUEST_METRICS_ENABLED")
+SLOW_REQUEST_THRESHOLD_MS = env("SLOW_REQUEST_THRESHOLD_MS")
+METRICS_AUTH_TOKEN = env("METRICS_AUTH_TOKEN")
+
+# brotli/gzip compression of the JSON responses of at least COMPRESSION_MIN_SIZE bytes,
+# streamed responses are flushed every COMPRESSION_STREAM_FLUSH_SIZE bytes
+COMPRESSION_ENABLED = env("COMPRESSION_ENABLED")
+COMPRESSION_MIN_SIZE = env("COMPRESSION_MIN_SIZE")
+COMPRESSION_STREAM_FLUSH_SIZE = env("COMPRESSION_STREAM_FLUSH_SIZE")
+
 CORS_ALLOWED_ORIGINS = env("ALLOWED_CORS_ORIGINS")
 
 TEMPLATES = [
@@ -186,6 +222,21 @@ WSGI_APPLICATION = "project.wsgi.application"
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
 DATABASES = {"default": dj_database_url.parse(env("DATABASE_URL"))}
+DATABASES["default"]["CONN_MAX_AGE"] = env("CONN_MAX_AGE")
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = env("CONN_HEALTH_CHECKS")
+
+# PostgreSQL connections are pooled per worker process, see project/extensions/postgresql_pool.
+# DB_POOL_MAX_CONNECTIONS is shared by all uvicorn workers so that together they stay within it.
+if env("DB_POOL_ENABLED") and DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    DATABASES["default"]["ENGINE"] = "project.extensions.postgresql_pool"
+    # connections go back to the pool at the end of each request instead of staying with its thread
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["POOL"] = {
+        "MAX_SIZE": max(1, env("DB_POOL_MAX_CONNECTIONS") // max(1, env("WORKERS_AMOUNT_FOR_UVICORN"))),
+        "TIMEOUT": env("DB_POOL_TIMEOUT"),
+        "MAX_LIFETIME": env("DB_POOL_MAX_LIFETIME"),
+        "CHECK_IDLE": env("DB_POOL_CHECK_IDLE") if env("CONN_HEALTH_CHECKS") else None,
+    }
 
 HELUSERS_BACK_CHANNEL_LOGOUT_ENABLED = env("HELUSERS_BACK_CHANNEL_LOGOUT_ENABLED")
 
@@ -306,6 +357,10 @@ REDIS_URL = env('REDIS_URL', default=None)
 REDIS_AVAILABLE = False
 
 CACHE_TIMEOUT = env('CACHE_TIMEOUT')
+# Warm-up of the cache after bulk forced-to-frame updates and SAP synchronizations,
+# at most CACHE_WARMUP_RATE entries rebuilt per second (0 for no limit)
+CACHE_WARMUP_ENABLED = env('CACHE_WARMUP_ENABLED')
+CACHE_WARMUP_RATE = env('CACHE_WARMUP_RATE')
 
 
 def _is_test_environment() -> bool:
@@ -362,18 +417,6 @@ def check_redis_availability(redis_url: str, max_retries: int = 5, initial_delay
     return False
 
 
-def parse_redis_url(redis_url: str) -> dict:
-    parsed = urlparse(redis_url)
-    config = {
-        'host': parsed.hostname or 'localhost',
-        'port': parsed.port or 6379,
-        'db': int(parsed.path.lstrip('/') or 0) if parsed.path else 0,
-    }
-    if parsed.password:
-        config['password'] = parsed.password
-    return config
-
-
 # Configure Redis if URL is provided
 # Skip Redis check for management commands that don't need it (e.g., makemigrations, migrate)
 _skip_redis_check_commands = ['makemigrations', 'migrate', 'showmigrations', 'sqlmigrate', 'sqlflush', 'inspectdb', 'collectstatic', 'check']
@@ -409,6 +452,13 @@ else:
     if not _skip_redis_check:
         logger.info("REDIS_URL not configured")
 
+# Server-sent events, see infraohjelmointi_api/services/EventStreamService.py
+# Without Redis the events are kept in the worker, Redis streams are set up below
+EVENTSTREAM_STORAGE_CLASS = "infraohjelmointi_api.services.EventStreamService.MemoryEventStorage"
+SSE_MAX_CONNECTIONS_PER_WORKER = env("SSE_MAX_CONNECTIONS_PER_WORKER")
+SSE_MAX_PENDING_EVENTS = env("SSE_MAX_PENDING_EVENTS")
+SSE_STREAM_LENGTH = env("SSE_STREAM_LENGTH")
+
 # Configure Redis cache backend if REDIS_URL is provided
 # Always configure Redis backend if URL is set, even if not immediately available
 # django-redis with IGNORE_EXCEPTIONS will handle connection failures gracefully
@@ -435,28 +485,13 @@ if REDIS_URL:
         }
     }
 
-    # Configure django-eventstream to use Redis for SSE event storage (fixes IO-725)
-    # EVENTSTREAM_REDIS is the correct way to configure Redis for django-eventstream
-    # This enables multi-pod event sharing via Redis
-    # Only configure EVENTSTREAM_REDIS if Redis is actually available at startup
-    # If not available, django-eventstream will fall back to in-memory storage
-    # Note: If Redis goes down after startup, EVENTSTREAM_REDIS will still be set,
-    # but django-eventstream should handle connection failures gracefully by falling back
-    # to in-memory storage (events won't be shared across pods, but app will work)
+    # Server-sent events are stored in Redis streams that every worker and pod reads (fixes IO-725)
+    # Only when Redis is available at startup, otherwise the events stay within the worker
     if REDIS_AVAILABLE:
-        redis_config = parse_redis_url(REDIS_URL)
-        EVENTSTREAM_REDIS = {
-            'host': redis_config['host'],
-            'port': redis_config['port'],
-            'db': redis_config['db'],
-        }
-        if 'password' in redis_config:
-            EVENTSTREAM_REDIS['password'] = redis_config['password']
-        logger.info("django-eventstream configured to use Redis for multi-pod event sharing")
+        EVENTSTREAM_STORAGE_CLASS = "infraohjelmointi_api.services.EventStreamService.RedisEventStorage"
+        logger.info("Server-sent events distributed through Redis streams")
     else:
-        # Don't set EVENTSTREAM_REDIS - django-eventstream will use in-memory storage
-        # This allows the app to work without Redis (events won't be shared across pods, but that's OK)
-        logger.info("Redis not available - django-eventstream will use in-memory storage (single-pod only)")
+        logger.info("Redis not available - server-sent events stay within the worker")
     
     safe_url = REDIS_URL.split('@')[-1] if '@' in REDIS_URL else REDIS_URL
     logger.info("Redis cache configured: %s", safe_url)